@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Throughput of Qualtrics vs AsyncQualtrics for many getResponse calls.
+Uses local MockQualtricsServer with artificial latency to emulate network round trip.
+
+Usage: python benchmarks/async_vs_sync.py [number of calls] [latency in seconds]
+"""
+import asyncio
+import sys
+import time
+
+from pyqualtrics import Qualtrics
+from pyqualtrics.aio import AsyncQualtrics
+from pyqualtrics.mock import MockQualtricsServer
+
+
+def run_sync(server, calls):
+    with server.configure(Qualtrics("user", "token")) as qualtrics:
+        for i in range(calls):
+            qualtrics.getResponse("SV_1", "R_%s" % (i % 100))
+
+
+async def run_async(server, calls, concurrency):
+    async with server.configure(AsyncQualtrics("user", "token", pool_maxsize=concurrency)) as qualtrics:
+        await asyncio.gather(*[qualtrics.getResponse("SV_1", "R_%s" % (i % 100)) for i in range(calls)])
+
+
+def main(argv):
+    calls = int(argv[1]) if len(argv) > 1 else 200
+    latency = float(argv[2]) if len(argv) > 2 else 0.02
+    with MockQualtricsServer(latency=latency) as server:
+        for i in range(100):
+            server.add_response("SV_1", "R_%s" % i, Q1=str(i))
+
+        start = time.time()
+        run_sync(server, calls)
+        elapsed = time.time() - start
+        print("Qualtrics (sequential):         %6.2fs  %8.1f calls/s" % (elapsed, calls / elapsed))
+
+        for concurrency in (10, 50):
+            start = time.time()
+            asyncio.run(run_async(server, calls, concurrency))
+            elapsed = time.time() - start
+            print("AsyncQualtrics (%3d connections): %6.2fs  %8.1f calls/s" % (concurrency, elapsed, calls / elapsed))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Time, size of the result and peak memory of reading a synthetic CSV response export with csv.DictReader (list of dicts) and
+pyqualtrics.columns.read_response_columns (NumPy arrays, requires numpy).
+
+Usage: python benchmarks/columns.py [number of responses] [number of questions]
+"""
+import csv
+import gc
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from timeit import default_timer
+
+from pyqualtrics.columns import read_response_columns
+
+
+def write_export(filename, responses, questions):
+    """ csv format export: 3 header rows, metadata columns, numeric answers (10% missing) and a text question """
+    random.seed(1)
+    names = ["ResponseID", "StartDate", "EndDate", "Finished"] + ["Q%s" % q for q in range(questions)] + ["Comment"]
+    with io.open(filename, "w", encoding="utf-8", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(names)
+        writer.writerow(names)
+        writer.writerow([json.dumps({"ImportId": name}) for name in names])
+        for i in range(responses):
+            row = ["R_%010d" % i, "2016-01-01 %02d:%02d:00" % (i // 60 % 24, i % 60),
+                   "2016-01-02 %02d:%02d:00" % (i // 60 % 24, i % 60), str(i % 2)]
+            row.extend("" if random.random() < 0.1 else str(random.randint(1, 7)) for q in range(questions))
+            row.append(random.choice(["", "Good", "Could be better", "No comment"]))
+            writer.writerow(row)
+
+
+def read_dicts(fp):
+    reader = csv.reader(fp)
+    names = next(reader)
+    next(reader)
+    next(reader)
+    return list(csv.DictReader(fp, fieldnames=names))
+
+
+def measure(filename, function):
+    """ Time is measured without tracemalloc, which slows down allocations a lot """
+    gc.collect()
+    start = default_timer()
+    with io.open(filename, encoding="utf-8", newline="") as fp:
+        result = function(fp)
+    elapsed = default_timer() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    with io.open(filename, encoding="utf-8", newline="") as fp:
+        result = function(fp)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, current, peak
+
+
+def main(argv):
+    responses = int(argv[1]) if len(argv) > 1 else 1000000
+    questions = int(argv[2]) if len(argv) > 2 else 20
+    filename = tempfile.mktemp(suffix=".csv")
+    try:
+        write_export(filename, responses, questions)
+        mb = 1024.0 * 1024.0
+        print("%d responses, %d questions, %.1f MB file" % (responses, questions, os.path.getsize(filename) / mb))
+        for name, function in (("csv.DictReader", read_dicts), ("read_response_columns", read_response_columns)):
+            elapsed, current, peak = measure(filename, function)
+            print("%-22s %7.2f s  result %8.1f MB  peak %8.1f MB" % (name, elapsed, current / mb, peak / mb))
+    finally:
+        os.remove(filename)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Time to first row, total time and peak memory of reading CSV response export with GetResponseExportFile
+(archive is downloaded completely, then decompressed) and iter_response_export_rows (archive is decompressed and
+parsed while it is downloaded). MockQualtricsServer runs in a separate process, so only memory allocated by
+the client is measured.
+
+Usage: python benchmarks/export_stream.py [number of responses] [number of questions]
+"""
+import csv
+import gc
+import multiprocessing
+import sys
+import tracemalloc
+from timeit import default_timer
+
+from pyqualtrics import Qualtrics
+from pyqualtrics.mock import MockQualtricsServer
+
+
+def serve(responses, questions, queue, stop):
+    with MockQualtricsServer() as server:
+        for i in range(responses):
+            server.add_response("SV_1", "R_%08d" % i, **dict(("Q%s" % q, "answer %s" % (i * q)) for q in range(questions)))
+        qualtrics = server.configure(Qualtrics("user", "token"))
+        export_id = qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+        # Generate the archive before measurements start
+        qualtrics.GetResponseExportFile(export_id).close()
+        queue.put((server.url, server.api3_url, export_id))
+        stop.wait()
+
+
+def read_file(qualtrics, export_id):
+    fp = qualtrics.GetResponseExportFile(export_id)
+    return csv.reader(fp)
+
+
+def measure(url, api3_url, export_id, function):
+    qualtrics = Qualtrics("user", "token")
+    qualtrics.url = url
+    qualtrics.api3_url = api3_url
+    gc.collect()
+    tracemalloc.start()
+    start = default_timer()
+    first_row = None
+    count = 0
+    for row in function(qualtrics, export_id):
+        if first_row is None:
+            first_row = default_timer() - start
+        count += 1
+    total = default_timer() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    qualtrics.close()
+    return count, first_row, total, peak
+
+
+def main(argv):
+    responses = int(argv[1]) if len(argv) > 1 else 100000
+    questions = int(argv[2]) if len(argv) > 2 else 20
+    queue = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve, args=(responses, questions, queue, stop))
+    process.start()
+    try:
+        url, api3_url, export_id = queue.get()
+        mb = 1024.0 * 1024.0
+        for name, function in (("GetResponseExportFile", read_file),
+                               ("iter_response_export_rows", Qualtrics.iter_response_export_rows)):
+            count, first_row, total, peak = measure(url, api3_url, export_id, function)
+            print("%-26s %d rows  first row after %6.3f s  total %6.2f s  peak %7.1f MB" % (
+                name, count, first_row, total, peak / mb))
+    finally:
+        stop.set()
+        process.join()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Time to look up many responses by ID: one getResponse call per ID versus getResponses.
+MockQualtricsServer delays each response by latency seconds to emulate network round trip.
+
+Usage: python benchmarks/get_responses.py [number of responses] [number of IDs] [latency]
+"""
+import random
+import sys
+from timeit import default_timer
+
+from pyqualtrics import Qualtrics
+from pyqualtrics.mock import MockQualtricsServer
+
+
+def one_by_one(qualtrics, response_ids):
+    return dict((response_id, qualtrics.getResponse("SV_1", response_id)) for response_id in response_ids)
+
+
+def batched(qualtrics, response_ids):
+    return qualtrics.getResponses("SV_1", response_ids)
+
+
+def main(argv):
+    responses = int(argv[1]) if len(argv) > 1 else 10000
+    ids = int(argv[2]) if len(argv) > 2 else 200
+    latency = float(argv[3]) if len(argv) > 3 else 0.05
+    with MockQualtricsServer(latency=latency) as server:
+        for i in range(responses):
+            server.add_response("SV_1", "R_%08d" % i, Q1=str(i % 7), Q2="Comment %s" % i)
+        response_ids = random.Random(1).sample(list(server.surveys["SV_1"]), ids)
+        print("%d responses, %d IDs, latency %.3f s" % (responses, ids, latency))
+        for function in (one_by_one, batched):
+            with server.configure(Qualtrics("user", "token")) as qualtrics:
+                del server.calls[:]
+                start = default_timer()
+                found = function(qualtrics, response_ids)
+                elapsed = default_timer() - start
+            print("%-12s %8.2f s  %5d API calls  %d found" % (
+                function.__name__, elapsed, len(server.calls), sum(1 for value in found.values() if value)))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Time spent decoding server responses of different API calls with each installed JSON library
+(see pyqualtrics.jsoncodec). Documents are generated locally, so only decoding is measured.
+
+Usage: python benchmarks/json_codec.py [number of responses in getLegacyResponseData page] [number of questions]
+"""
+import json
+import sys
+from collections import OrderedDict
+from timeit import default_timer
+
+from pyqualtrics.jsoncodec import CODECS
+
+
+def documents(responses, questions):
+    """ (name, JSON text, decode as OrderedDict) of typical server responses """
+    legacy = OrderedDict()
+    for i in range(responses):
+        response = OrderedDict([("ResponseSet", "Default Response Set"), ("Name", "Doe, John"),
+                                ("EmailAddress", "john.doe%s@example.com" % i), ("IPAddress", "127.0.0.1"),
+                                ("StartDate", "2017-12-01 10:00:00"), ("EndDate", "2017-12-01 10:05:00"),
+                                ("Finished", "1")])
+        for q in range(questions):
+            response["Q%s" % q] = str(q % 7) if q % 3 else "Free text answer %s" % i
+        legacy["R_%08d" % i] = response
+    panel = [OrderedDict([("RecipientID", "MLRP_%08d" % i), ("FirstName", "John"), ("LastName", "Doe"),
+                          ("Email", "john.doe%s@example.com" % i), ("ExternalDataReference", ""),
+                          ("Language", "EN"), ("EmbeddedData", {"SubjectID": str(i)})])
+             for i in range(responses)]
+    meta = {"httpStatus": "200 - OK", "requestId": "00000000-0000-0000-0000-000000000000"}
+    return [
+        ("getLegacyResponseData", json.dumps(legacy), True),
+        ("getPanel", json.dumps(panel), False),
+        ("CreateResponseExport", json.dumps({"result": {"id": "ES_0123456789abcde"}, "meta": meta}), False),
+        ("GetResponseExportProgress", json.dumps({"result": {"percentComplete": 45.5, "status": "in progress"},
+                                                  "meta": meta}), False),
+    ]
+
+
+def measure(codec, text, ordered, min_time=0.5):
+    """ :return: seconds per decoded document """
+    data = text.encode("utf-8")
+    count = 0
+    start = default_timer()
+    while True:
+        codec.loads(data, ordered=ordered)
+        count += 1
+        elapsed = default_timer() - start
+        if elapsed >= min_time:
+            return elapsed / count
+
+
+def main(argv):
+    responses = int(argv[1]) if len(argv) > 1 else 1000
+    questions = int(argv[2]) if len(argv) > 2 else 20
+    codecs = []
+    for codec_class in CODECS.values():
+        try:
+            codecs.append(codec_class())
+        except ImportError:
+            pass
+    print("%-26s %10s  " % ("", "size") + "".join("%14s" % codec.name for codec in codecs))
+    for name, text, ordered in documents(responses, questions):
+        times = [measure(codec, text, ordered) for codec in codecs]
+        print("%-26s %10d  " % (name, len(text)) + "".join(
+            "%11.1f us" % (elapsed * 1e6) if elapsed < 1e-3 else "%11.2f ms" % (elapsed * 1e3) for elapsed in times))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Time and peak memory of processing all responses to a survey returned by getLegacyResponseData
+(whole response body parsed into OrderedDict) and iter_legacy_response_data (responses parsed one at a time
+while the body is downloaded). MockQualtricsServer runs in a separate process, so only memory allocated by
+the client is measured. Time is measured separately, without tracemalloc.
+
+Usage: python benchmarks/legacy_json.py [number of responses] [number of questions]
+"""
+import gc
+import multiprocessing
+import sys
+import tracemalloc
+from timeit import default_timer
+
+from pyqualtrics import Qualtrics
+from pyqualtrics.mock import MockQualtricsServer
+
+
+def serve(responses, questions, queue, stop):
+    with MockQualtricsServer() as server:
+        for i in range(responses):
+            server.add_response("SV_1", "R_%08d" % i, **dict(("Q%s" % q, str(q % 7)) for q in range(questions)))
+        queue.put((server.url, server.api3_url))
+        stop.wait()
+
+
+def get_legacy_response_data(qualtrics):
+    count = 0
+    for response_id, response in qualtrics.getLegacyResponseData("SV_1", low_memory=True).items():
+        count += 1
+    return count
+
+
+def iter_legacy_response_data(qualtrics):
+    count = 0
+    for response_id, response in qualtrics.iter_legacy_response_data("SV_1"):
+        count += 1
+    return count
+
+
+def measure(url, api3_url, function):
+    qualtrics = Qualtrics("user", "token")
+    qualtrics.url = url
+    qualtrics.api3_url = api3_url
+    gc.collect()
+    start = default_timer()
+    count = function(qualtrics)
+    elapsed = default_timer() - start
+    gc.collect()
+    tracemalloc.start()
+    function(qualtrics)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    qualtrics.close()
+    return count, elapsed, peak
+
+
+def main(argv):
+    responses = int(argv[1]) if len(argv) > 1 else 50000
+    questions = int(argv[2]) if len(argv) > 2 else 20
+    queue = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve, args=(responses, questions, queue, stop))
+    process.start()
+    try:
+        url, api3_url = queue.get()
+        mb = 1024.0 * 1024.0
+        for function in (get_legacy_response_data, iter_legacy_response_data):
+            count, elapsed, peak = measure(url, api3_url, function)
+            print("%-26s %d responses  %6.2f s  %8.0f responses/s  peak %7.1f MB" % (
+                function.__name__, count, elapsed, count / elapsed, peak / mb))
+    finally:
+        stop.set()
+        process.join()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
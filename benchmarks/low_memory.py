@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Peak and retained memory of getLegacyResponseData with and without low_memory option.
+MockQualtricsServer runs in a separate process, so only memory allocated by the client is measured.
+
+Usage: python benchmarks/low_memory.py [number of responses] [number of questions]
+"""
+import gc
+import multiprocessing
+import sys
+import tracemalloc
+
+from pyqualtrics import Qualtrics
+from pyqualtrics.mock import MockQualtricsServer
+
+
+def serve(responses, questions, queue, stop):
+    with MockQualtricsServer() as server:
+        for i in range(responses):
+            server.add_response("SV_1", "R_%08d" % i, **dict(("Q%s" % q, str(q % 7)) for q in range(questions)))
+        queue.put((server.url, server.api3_url))
+        stop.wait()
+
+
+def measure(url, api3_url, low_memory):
+    qualtrics = Qualtrics("user", "token", low_memory=low_memory)
+    qualtrics.url = url
+    qualtrics.api3_url = api3_url
+    gc.collect()
+    tracemalloc.start()
+    responses = qualtrics.getLegacyResponseData("SV_1")
+    count = len(responses)
+    current, peak = tracemalloc.get_traced_memory()
+    del responses
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    qualtrics.close()
+    return count, peak, current, retained
+
+
+def main(argv):
+    responses = int(argv[1]) if len(argv) > 1 else 20000
+    questions = int(argv[2]) if len(argv) > 2 else 20
+    queue = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve, args=(responses, questions, queue, stop))
+    process.start()
+    try:
+        url, api3_url = queue.get()
+        mb = 1024.0 * 1024.0
+        for low_memory in (False, True):
+            count, peak, current, retained = measure(url, api3_url, low_memory)
+            print("low_memory=%-5s  %d responses  peak %7.1f MB  after call %7.1f MB  "
+                  "after result is released %7.1f MB" % (low_memory, count, peak / mb, current / mb, retained / mb))
+    finally:
+        stop.set()
+        process.join()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Memory used by responses kept as OrderedDict (as returned by getLegacyResponseData) and as ResponseRecord
+(compact=True, pyqualtrics.records). Responses are decoded from JSON one at a time, like iter_legacy_response_data
+does, so every value is a separate string object as it would be in real server responses.
+
+Usage: python benchmarks/records.py [number of responses] [number of questions]
+"""
+import gc
+import json
+import sys
+import tracemalloc
+from collections import OrderedDict
+from timeit import default_timer
+
+from pyqualtrics.records import iter_compact_responses
+
+
+def parsed_responses(responses, questions):
+    """ Generator of (ResponseID, OrderedDict) tuples """
+    for i in range(responses):
+        response = OrderedDict([
+            ("ResponseSet", "Default Response Set"), ("Name", "Doe, John %s" % i),
+            ("ExternalDataReference", ""), ("EmailAddress", "john.doe%s@example.com" % i),
+            ("IPAddress", "10.0.%s.%s" % (i // 256 % 256, i % 256)), ("Status", "0"),
+            ("StartDate", "2017-12-01 10:%02d:%02d" % (i // 60 % 60, i % 60)),
+            ("EndDate", "2017-12-01 11:%02d:%02d" % (i // 60 % 60, i % 60)), ("Finished", "1")])
+        for q in range(questions):
+            response["Q%s" % (q + 1)] = str((i + q) % 7 + 1) if q % 5 else "Comment %s" % i
+        yield "R_%08d" % i, json.loads(json.dumps(response), object_pairs_hook=OrderedDict)
+
+
+def as_ordered_dict(responses, questions):
+    return OrderedDict(parsed_responses(responses, questions))
+
+
+def as_records(responses, questions):
+    return OrderedDict(iter_compact_responses(parsed_responses(responses, questions)))
+
+
+def measure(function, responses, questions):
+    gc.collect()
+    tracemalloc.start()
+    start = default_timer()
+    result = function(responses, questions)
+    elapsed = default_timer() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(result)
+    del result
+    gc.collect()
+    return count, elapsed, current, peak
+
+
+def main(argv):
+    responses = int(argv[1]) if len(argv) > 1 else 500000
+    questions = int(argv[2]) if len(argv) > 2 else 10
+    mb = 1024.0 * 1024.0
+    print("%d responses, %d questions (time includes generating and decoding the fixture, traced)" % (
+        responses, questions))
+    for function in (as_ordered_dict, as_records):
+        count, elapsed, current, peak = measure(function, responses, questions)
+        print("%-16s %7.2f s  result %8.1f MB  %6.0f bytes/response" % (
+            function.__name__, elapsed, current / mb, current / float(count)))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
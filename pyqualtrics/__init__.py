@@ -18,8 +18,10 @@
 # limitations under the License.
 
 import io
+import codecs
 import csv
 import json
+import tempfile
 import zipfile
 from collections import OrderedDict
 import collections
@@ -28,10 +30,25 @@ from zipfile import BadZipfile
 import requests
 import os
 import sys
+import threading
+import time
 
 import xml.etree.ElementTree as ET
-
-from requests.exceptions import ConnectionError, Timeout, TooManyRedirects, HTTPError
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from itertools import chain, islice
+from timeit import default_timer
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout, TooManyRedirects, HTTPError, ChunkedEncodingError
+
+from pyqualtrics.columns import read_response_columns, _count_header_rows, _export_field_names
+from pyqualtrics.fileutil import _replace_file
+from pyqualtrics.jsoncodec import StdlibJsonCodec
+from pyqualtrics.jsonstream import JsonObjectStream
+from pyqualtrics.labels import SurveyLabels
+from pyqualtrics.records import ResponseRecord, compact_responses
+from pyqualtrics.zipstream import ZipStreamReader
 
 __version__ = "0.6.6"
 
@@ -51,10 +68,388 @@ if os.path.exists('.env'):
         if len(var) == 2:
             os.environ[var[0]] = var[1]
 
+# Errors raised while reading a stream returned by GetResponseExportStream: download failed or archive is truncated
+EXPORT_STREAM_ERRORS = (ConnectionError, ChunkedEncodingError, Timeout, BadZipfile)
+
+class QualtricsResult(object):
+    """ Outcome of a single API call (v2 or v3), returned by Qualtrics.call and Qualtrics.call3 functions.
+    Result of the last API call made by the current thread is available as Qualtrics.last_result
+    """
+    def __init__(self, url=None, data=None):
+        self.url = url                  # URL constructed by the library
+        self.data = data                # Body of POST request (v3 API calls only)
+        self.status_code = None         # HTTP status code, None if request was not sent
+        self.value = None               # Value returned by request/request3 function, None if API call failed
+        self.json_response = None       # JSON document returned by the server
+        self.text = None                # Server response as a text string
+        self.r = None                   # requests.Response object
+        self.error_message = "Not yet set by request function"  # None if no error occurs
+        self.elapsed = None             # Duration of HTTP request, in seconds
+
+    @property
+    def ok(self):
+        return self.error_message is None
+
+    def without_body(self):
+        """ Copy of this result without server response (for low memory mode) """
+        result = QualtricsResult(self.url, self.data)
+        result.status_code = self.status_code
+        result.error_message = self.error_message
+        result.elapsed = self.elapsed
+        return result
+
+    def __repr__(self):
+        return "%s(url=%r, status_code=%r, error_message=%r, elapsed=%r)" % (
+            self.__class__.__name__, self.url, self.status_code, self.error_message, self.elapsed)
+
+
+class ResponseExport(object):
+    """ State and outcome of a response export made by Qualtrics.export_responses function.
+    Times are in seconds, phases are:
+    queue - from the start of export until Qualtrics starts generating the file (percentComplete above zero)
+    generate - until the file is ready
+    download - until the file is downloaded (or stream is opened, if no filename is given)
+
+    If no filename is given, ok only means that the stream has been opened: the rest of the archive is downloaded
+    while the stream is read, so its read functions can raise EXPORT_STREAM_ERRORS (AsyncQualtrics downloads the
+    whole file before it returns the export).
+    """
+    def __init__(self, surveyId, format, filename=None):
+        self.survey_id = surveyId
+        self.format = format
+        self.filename = filename        # Where export file is downloaded to, None if stream is returned
+        self.id = None                  # responseExportId
+        self.status = None              # "queued", "in progress", "complete", "downloaded", "failed", "cancelled" or "timeout"
+        self.percent_complete = 0.0     # As reported by GetResponseExportProgress
+        self.polls = 0                  # Number of GetResponseExportProgress calls
+        self.file_url = None            # URL of the export file
+        self.stream = None              # Text stream of the file in export archive, if no filename is given
+        self.error_message = "Not yet set by export_responses function"  # None if no error occurs
+        self.queue_time = None
+        self.generate_time = None
+        self.download_time = None
+        self.started = default_timer()
+        self.parameters = dict()        # CreateResponseExport parameters specific to this export (date window etc)
+        self.shards = None              # Exports this one has been merged from (see export_responses_by_date)
+
+    @property
+    def ok(self):
+        return self.error_message is None
+
+    @property
+    def value(self):
+        """ Downloaded file name or text stream, None if export failed """
+        if not self.ok:
+            return None
+        return self.filename if self.filename is not None else self.stream
+
+    @property
+    def total_time(self):
+        return sum(t for t in (self.queue_time, self.generate_time, self.download_time) if t is not None)
+
+    def __repr__(self):
+        return "%s(survey_id=%r, id=%r, status=%r, error_message=%r, total_time=%r)" % (
+            self.__class__.__name__, self.survey_id, self.id, self.status, self.error_message, self.total_time)
+
+
+class ImportChunk(object):
+    """ Part of records (responses, panel members) uploaded by a single API call (see Qualtrics.import_responses
+    and Qualtrics.import_panel)
+    """
+    def __init__(self, index, offset, count):
+        self.index = index              # Number of the chunk, from 0
+        self.offset = offset            # Index of the first record of the chunk in imported records
+        self.count = count              # Number of records
+        self.size = None                # Size of CSV file (in characters)
+        self.status = "pending"         # "pending", "imported", "failed" or "skipped" (imported before)
+        self.error_message = None
+        self.elapsed = None             # Duration of API call, in seconds
+        self.job_id = None              # ID of asynchronous import job (importContacts)
+        self.counts = None              # {"created": n, "updated": n, "failed": n} reported by the job
+
+    @property
+    def ok(self):
+        return self.status in ("imported", "skipped")
+
+    def __repr__(self):
+        return "%s(index=%r, offset=%r, count=%r, status=%r, error_message=%r)" % (
+            self.__class__.__name__, self.index, self.offset, self.count, self.status, self.error_message)
+
+
+class ChunkedImport(object):
+    """ Outcome of an import uploaded in chunks: ImportChunk objects, in order of imported records """
+    def __init__(self):
+        self.chunks = []
+
+    @property
+    def ok(self):
+        return all(chunk.ok for chunk in self.chunks)
+
+    @property
+    def completed(self):
+        """ Indexes of imported chunks, for completed parameter of import_responses (to resume the import) """
+        return [chunk.index for chunk in self.chunks if chunk.ok]
+
+    @property
+    def failed(self):
+        return [chunk for chunk in self.chunks if not chunk.ok]
+
+    @property
+    def imported(self):
+        """ Number of records imported by this import (skipped chunks are not counted) """
+        return sum(chunk.count for chunk in self.chunks if chunk.status == "imported")
+
+    @property
+    def error_message(self):
+        """ None if all chunks have been imported """
+        failed = self.failed
+        if not failed:
+            return None
+        return "%d of %d chunks have not been imported. Chunk %d: %s" % (
+            len(failed), len(self.chunks), failed[0].index, failed[0].error_message)
+
+
+class ResponseImport(ChunkedImport):
+    """ Outcome of Qualtrics.import_responses: ImportChunk objects, in order of responses """
+    def __init__(self, surveyId):
+        super(ResponseImport, self).__init__()
+        self.survey_id = surveyId
+
+    @property
+    def responses(self):
+        """ Number of responses imported by this import (skipped chunks are not counted) """
+        return self.imported
+
+    def __repr__(self):
+        return "%s(survey_id=%r, chunks=%r, responses=%r, error_message=%r)" % (
+            self.__class__.__name__, self.survey_id, len(self.chunks), self.responses, self.error_message)
+
+
+class PanelImport(ChunkedImport):
+    """ Outcome of Qualtrics.import_panel: ID of the panel and ImportChunk objects, in order of panel members """
+    def __init__(self, LibraryID, PanelID=None):
+        super(PanelImport, self).__init__()
+        self.library_id = LibraryID
+        self.panel_id = PanelID         # Set when the panel has been created by the first chunk
+
+    @property
+    def members(self):
+        """ Number of panel members imported by this import (skipped chunks are not counted) """
+        return self.imported
+
+    def __repr__(self):
+        return "%s(panel_id=%r, chunks=%r, members=%r, error_message=%r)" % (
+            self.__class__.__name__, self.panel_id, len(self.chunks), self.members, self.error_message)
+
+
+class ContactsImport(ChunkedImport):
+    """ Outcome of Qualtrics.import_contacts: ID of the contact list, ImportChunk objects (with job IDs and
+    counts reported by each job) and aggregate counts of contacts
+    """
+    def __init__(self, LibraryID, ListID=None):
+        super(ContactsImport, self).__init__()
+        self.library_id = LibraryID
+        self.list_id = ListID           # Set when the list has been created by the first chunk
+
+    def _count(self, name):
+        return sum(chunk.counts.get(name, 0) for chunk in self.chunks if chunk.counts)
+
+    @property
+    def created(self):
+        return self._count("created")
+
+    @property
+    def updated(self):
+        return self._count("updated")
+
+    @property
+    def failed_contacts(self):
+        """ Number of contacts (rows) rejected by import jobs that have completed """
+        return self._count("failed")
+
+    def __repr__(self):
+        return "%s(list_id=%r, chunks=%r, created=%r, updated=%r, failed=%r, error_message=%r)" % (
+            self.__class__.__name__, self.list_id, len(self.chunks), self.created, self.updated,
+            self.failed_contacts, self.error_message)
+
+
+class ContactRemoval(object):
+    """ Outcome of removal of a single contact from a list by Qualtrics.remove_contacts """
+    def __init__(self, RecipientID):
+        self.recipient_id = RecipientID
+        self.status = None              # "removed" or "failed"
+        self.error_message = None
+        self.status_code = None         # HTTP status code of the last removeContact call
+        self.attempts = 0               # Number of removeContact calls (more than one if transient failures occur)
+        self.elapsed = None             # Seconds, including retries
+
+    @property
+    def ok(self):
+        return self.status == "removed"
+
+    def __repr__(self):
+        return "%s(recipient_id=%r, status=%r, attempts=%r, error_message=%r)" % (
+            self.__class__.__name__, self.recipient_id, self.status, self.attempts, self.error_message)
+
+
+class ContactsRemoval(object):
+    """ Outcome of Qualtrics.remove_contacts: ContactRemoval object of each contact, in order of RecipientIDs """
+    def __init__(self, LibraryID, ListID):
+        self.library_id = LibraryID
+        self.list_id = ListID
+        self.contacts = []
+        # True if contacts have not been removed because the list is larger than recreate_threshold
+        self.recreate = False
+
+    @property
+    def ok(self):
+        return not self.recreate and all(contact.ok for contact in self.contacts)
+
+    @property
+    def removed(self):
+        return sum(1 for contact in self.contacts if contact.ok)
+
+    @property
+    def failed(self):
+        return [contact for contact in self.contacts if not contact.ok]
+
+    @property
+    def error_message(self):
+        """ None if all contacts have been removed """
+        if self.recreate:
+            return "List %s has %d contacts, deleting and recreating it is cheaper than removing them" % (
+                self.list_id, len(self.contacts))
+        failed = self.failed
+        if not failed:
+            return None
+        return "%d of %d contacts have not been removed. %s: %s" % (
+            len(failed), len(self.contacts), failed[0].recipient_id, failed[0].error_message)
+
+    def __repr__(self):
+        return "%s(list_id=%r, contacts=%r, removed=%r, error_message=%r)" % (
+            self.__class__.__name__, self.list_id, len(self.contacts), self.removed, self.error_message)
+
+
+class _RateLimiter(object):
+    """ Spaces out API calls made by many threads (or tasks) so that at most rate calls per second are started """
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = None
+        self._lock = threading.Lock()
+
+    def delay(self, now):
+        """ Reserve the next free slot, return seconds to wait before making the call """
+        with self._lock:
+            start = now if self._next is None else max(now, self._next)
+            self._next = start + self.interval
+        return start - now
+
+
+class _PollSchedule(object):
+    """ Intervals between status calls of a background job (GetResponseExportProgress of response exports,
+    checkImportContactsStatus of contact imports). When percent complete grows, the next poll is planned halfway
+    to the estimated completion time. Otherwise the interval grows exponentially.
+    """
+    def __init__(self, min_interval, max_interval, backoff=2.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._interval = None
+        self._last_percent = None
+        self._last_time = None
+
+    def next_interval(self, now, percent):
+        if self._last_time is not None and percent > self._last_percent and now > self._last_time:
+            rate = (percent - self._last_percent) / (now - self._last_time)
+            interval = (100.0 - percent) / rate / 2
+        elif self._interval is None:
+            interval = self.min_interval
+        else:
+            interval = self._interval * self.backoff
+        if self._last_percent is None or percent != self._last_percent:
+            self._last_percent, self._last_time = percent, now
+        self._interval = max(self.min_interval, min(self.max_interval, interval))
+        return self._interval
+
+
+# Date formats accepted by export_responses_by_date (in addition to datetime objects)
+EXPORT_DATE_FORMATS = ("%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+
+def _parse_export_date(value):
+    """ Convert date string or datetime to naive UTC datetime. Raises ValueError if format is not recognized """
+    if isinstance(value, datetime):
+        if value.utcoffset() is not None:
+            value = (value - value.utcoffset()).replace(tzinfo=None)
+        return value
+    for date_format in EXPORT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            pass
+    raise ValueError("Unrecognized date format: %r" % value)
+
+
+def _format_export_date(value):
+    """ startDate/endDate parameter of CreateResponseExport (ISO 8601, UTC). Strings are sent as is """
+    if isinstance(value, datetime):
+        return _parse_export_date(value).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return value
+
+
+# getLegacyResponseData parameters that have CreateResponseExport equivalents (see legacy_export_threshold)
+LEGACY_EXPORT_PARAMETERS = {
+    "LastResponseID": "lastResponseId",
+    "Limit": "limit",
+    "StartDate": "startDate",
+    "EndDate": "endDate",
+}
+
+
+def _csv_export_responses(fp):
+    """ (ResponseID, OrderedDict) tuples from CSV (csv or csv2013 format) response export file, in the shape of
+    getLegacyResponseData. Raises ValueError if it has no ResponseID column
+    """
+    reader = csv.reader(fp)
+    first_rows = list(islice(reader, 3))
+    if not first_rows:
+        return
+    names = _export_field_names(first_rows)
+    id_columns = [i for i, name in enumerate(names) if name in ("ResponseID", "ResponseId")]
+    if not id_columns:
+        raise ValueError("Export file has no ResponseID column")
+    for row in chain(first_rows[_count_header_rows(first_rows):], reader):
+        response = OrderedDict(zip(names, row))
+        response_id = response.pop(names[id_columns[0]])
+        yield response_id, response
+
+
+def _last_result_property(name, doc):
+    """ Attribute of the Qualtrics object that is a view of the last QualtricsResult (backward compatibility) """
+    def fget(self):
+        result = self.last_result
+        if result is None:
+            return None
+        return getattr(result, name)
+
+    def fset(self, value):
+        result = self.last_result
+        if result is None:
+            result = self._store_result(QualtricsResult())
+        setattr(result, name, value)
+    return property(fget, fset, doc=doc)
+
+
 class Qualtrics(object):
     """
     This is representation of Qualtrics REST API
+
+    A single object can be shared by many threads. last_error_message, json_response and other last_* attributes
+    describe the last API call made by the current thread.
     """
+    # How often (in seconds) cancellation of long running operations is checked
+    CANCEL_CHECK_INTERVAL = 0.1
+
     # Export formats (API v3)
     CSV_FORMAT = "csv"
     JSON_FORMAT = "json"
@@ -62,17 +457,47 @@ class Qualtrics(object):
     XML_FORMAT = "xml"
     SPSS_FORMAT = "spss"
 
-    # Additional options passed to requests.get or request.post
+    # Additional options passed to Session.get or Session.post
     # For example, to disable SSL certificate validations, set requests_kwargs to {"verify": False"}
     # Can also be used to specify custom certificate and so on
     # http://docs.python-requests.org/en/master/user/advanced/#ssl-cert-verification
     requests_kwargs = dict()
 
-    def __init__(self, user=None, token=None, api_version="2.5"):
+    # Base URL of v3 API calls
+    api3_url = "https://survey.qualtrics.com/API/v3"
+
+    # Encoder and decoder of JSON documents sent to and received from the server
+    # Use pyqualtrics.jsoncodec.get_codec() to pick a faster library (orjson, simplejson) if it is installed
+    json_codec = StdlibJsonCodec()
+
+    # getLegacyResponseData retrieves responses by v3 response export (much faster for large surveys) if the survey
+    # has at least that many responses. None - always use getLegacyResponseData API call
+    legacy_export_threshold = None
+
+    # Views of the last API call result (see QualtricsResult)
+    last_error_message = _last_result_property("error_message", "Human-readable error message (None if no error)")
+    last_status_code = _last_result_property("status_code", "HTTP status code")
+    last_url = _last_result_property("url", "URL constructed by the library")
+    last_data = _last_result_property("data", "Body of the last POST request (v3 API calls only)")
+    json_response = _last_result_property("json_response", "JSON document returned by the server")
+    r = _last_result_property("r", "requests.Response object, for debugging purpose")
+    response = _last_result_property("text", "Server response as a text string, for debugging purpose")
+
+    def __init__(self, user=None, token=None, api_version="2.5", pool_connections=10, pool_maxsize=10,
+                 keep_alive=True, pool_idle_timeout=None, low_memory=False):
         """
         :param user: The user name. If omitted, value of environment variable QUALTRICS_USER will be used.
         :param token: API token for the user. If omitted, value of environment variable QUALTRICS_TOKEN will be used.
         :param api_version: API version to use (this library has been tested with version 2.5).
+        :param pool_connections: Number of per-host connection pools kept by the HTTP session.
+        :param pool_maxsize: Maximum number of connections kept open to a single host. Should be at least the number
+                             of threads sharing this object.
+        :param keep_alive: Reuse connections between API calls. If False, "Connection: close" is sent with each request.
+        :param pool_idle_timeout: Seconds after which idle pooled connections are dropped and re-established on the
+                                  next call (server closes idle connections anyway). None means never.
+        :param low_memory: Do not keep copies of server responses (response, r and json_response attributes will
+                           be None). Can also be passed to individual API calls, i.e.
+                           getLegacyResponseData(SurveyID, low_memory=True)
         """
         if user is None:
             user = os.environ.get("QUALTRICS_USER", None)
@@ -88,14 +513,17 @@ class Qualtrics(object):
         self.default_api_version = api_version
         # Version must be a string, not an integer or float
         assert self.default_api_version, STR
-        self.last_error_message = None
-        self.last_status_code = None
-        self.last_url = None
-        self.last_data = None
-        self.json_response = None
-        self.r = None  # requests.Response object, for debugging purpose
-        self.response = None  # For debugging purpose
+        self._local = threading.local()
         self.url = None # For debugging purpose
+        self.low_memory = low_memory
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.pool_idle_timeout = pool_idle_timeout
+        self._session = None
+        self._session_last_used = None
+        self._session_lock = threading.Lock()
+        self._survey_labels = dict()    # SurveyID -> SurveyLabels, see get_survey_labels
 
     def __str__(self):
         return self.user
@@ -106,25 +534,110 @@ class Qualtrics(object):
         # Note this will print Qualtrics token - may be dangerous for logging
         return "%s(%r)" % (self.__class__, self.__dict__)
 
-    def request3(self, url, method="post", stream=False, data=None):
-        self.last_url = url
-        self.last_data = None
-        self.r = None
-        self.response = None
-        self.last_error_message = "Not yet set by request3 function"
-        if data is None:
-            data = dict()
-        data_json = json.dumps(data)
-        headers = {
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def last_result(self):
+        """ QualtricsResult of the last API call made by the current thread (None if there were no calls) """
+        return getattr(self._local, "result", None)
+
+    def _store_result(self, result):
+        self._local.result = result
+        return result
+
+    def close(self):
+        """ Close all pooled connections. The object can still be used after that, new connections will be opened
+        on the next API call.
+        """
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+                self._session_last_used = None
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    @property
+    def session(self):
+        """ requests.Session object used for all API calls made by this object (both v2 and v3 APIs).
+        Created on first use, idle connections are evicted after pool_idle_timeout seconds.
+        """
+        with self._session_lock:
+            now = time.time()
+            if self._session is not None and self.pool_idle_timeout is not None and \
+                    now - self._session_last_used > self.pool_idle_timeout:
+                # Server has most likely dropped these connections already. The old session is not closed: other
+                # threads may still be in the middle of a request made with it. Its connections are closed when
+                # it is garbage collected
+                self._session = None
+            if self._session is None:
+                self._session = self._create_session()
+            self._session_last_used = now
+            return self._session
+
+    def _request3_headers(self):
+        return {
             "X-API-TOKEN": self.token,
             "Content-Type": "application/json"
         }
+
+    @staticmethod
+    def _request3_error(status_code, json_response):
+        """ Error message for v3 API call or None if call was successful
+
+        :param status_code: HTTP status code
+        :param json_response: parsed server response (None if it is not a JSON document)
+        """
+        if status_code in (200, 206):
+            # 206 Partial Content is returned for requests with Range header
+            return None
+        # HTTP server error: 404, 500 etc
+        # Apparently http code 401 Unauthorized is returned when incorrect token is provided
+        try:
+            if "error" in json_response["meta"]:
+                return json_response["meta"]["error"]["errorMessage"]
+        except:
+            # Mailformed response from the server
+            pass
+        return "HTTP Code %s" % status_code
+
+    def call3(self, url, method="post", stream=False, data=None, low_memory=None, headers=None):
+        """ Send request to Qualtrics API v3
+
+        :param stream: Do not read body of successful response, it is up to the caller to read it
+                       (using iter_content function) and close the response
+        :param low_memory: Do not keep server response in last_result (self.low_memory is used if None)
+        :param headers: Additional HTTP headers
+        :return: QualtricsResult object. Its value is requests.Response object or None if request failed
+        """
+        if low_memory is None:
+            low_memory = self.low_memory
+        result = QualtricsResult(url)
+        self._store_result(result.without_body() if low_memory else result)
+        if data is None:
+            data = dict()
+        data_json = self.json_codec.dumps(data)
+        request_headers = self._request3_headers()
+        if headers:
+            request_headers.update(headers)
+        start = default_timer()
         try:
             if method == "post":
-                self.last_data = data
-                r = requests.post(url, data=data_json, headers=headers)
+                result.data = data
+                r = self.session.post(url, data=data_json, headers=request_headers, **self.requests_kwargs)
             elif method == "get":
-                r = requests.get(url, headers=headers)
+                r = self.session.get(url, headers=request_headers, stream=stream, **self.requests_kwargs)
             else:
                 raise NotImplementedError("method %s is not supported" % method)
         except (ConnectionError, Timeout, TooManyRedirects, HTTPError) as e:
@@ -133,28 +646,67 @@ class Qualtrics(object):
             # HTTPError: Response.raise_for_status() will raise an HTTPError if the HTTP request returned an unsuccessful status code.
             # Timeout: If a request times out, a Timeout exception is raised.
             # TooManyRedirects: If a request exceeds the configured number of maximum redirections, a TooManyRedirects exception is raised.
-            self.last_error_message = str(e)
-            return None
-        self.r = r
-        self.response = r.text   # Keep this for backward compatibility with previous versions
+            result.error_message = str(e)
+            return self._finish_result(result, low_memory)
+        finally:
+            result.elapsed = default_timer() - start
+        result.status_code = r.status_code
+        if stream and self._request3_error(r.status_code, None) is None:
+            # Body will be read by the caller
+            result.error_message = None
+            result.value = r
+            if not low_memory:
+                result.r = r
+            return self._finish_result(result, low_memory)
         try:
-            self.json_response = r.json()
-        except:
-            self.json_response = None
-        if r.status_code != 200:
-            # HTTP server error: 404, 500 etc
-            # Apparently http code 401 Unauthorized is returned when incorrect token is provided
-            self.last_error_message = "HTTP Code %s" % r.status_code
-            try:
-                if "error" in self.json_response["meta"]:
-                    self.last_error_message = self.json_response["meta"]["error"]["errorMessage"]
-                    return None
-            except:
-                # Mailformed response from the server
-                pass
-            return None
+            # Body is decoded once, callers use result.json_response instead of r.json()
+            json_response = self.json_codec.loads(r.content)
+        except Exception:
+            json_response = None
+        result.error_message = self._request3_error(r.status_code, json_response)
+        if result.error_message is None:
+            result.value = r
+        # Returned result always references the parsed document, in low memory mode it is not kept by this object
+        result.json_response = json_response
+        if not low_memory:
+            result.r = r
+            result.text = r.text   # Keep this for backward compatibility with previous versions
+        return self._finish_result(result, low_memory)
+
+    def request3(self, url, method="post", stream=False, data=None, low_memory=None, headers=None):
+        """ Send request to Qualtrics API v3
+
+        :return: requests.Response object or None if request failed
+        """
+        return self.call3(url, method=method, stream=stream, data=data, low_memory=low_memory,
+                          headers=headers).value
 
-        return r
+    def _response_export_data(self, format, surveyId, lastResponseId=None, startDate=None, endDate=None, limit=None,
+                              includedQuestionIds=None, useLabels=None):
+        """ Body of CreateResponseExport request """
+        data = {
+            "format": format,
+            "surveyId": surveyId
+        }
+        if lastResponseId is not None:
+            data["lastResponseId"] = lastResponseId
+        if startDate is not None:
+            data["startDate"] = _format_export_date(startDate)
+        if endDate is not None:
+            data["endDate"] = _format_export_date(endDate)
+        if limit is not None:
+            data["limit"] = limit
+        if isinstance(includedQuestionIds, STR):
+            includedQuestionIds = self.json_codec.loads(includedQuestionIds)
+        if includedQuestionIds:
+            data["includedQuestionIds"] = includedQuestionIds
+        if useLabels is True:
+            data["useLabels"] = True
+        #     "decimalSeparator": decimalSeparator,
+        #     "seenUnansweredRecode": seenUnansweredRecode,
+        #     "useLocalTime": useLocalTime,
+        # }
+        return data
 
     def CreateResponseExport(self, format, surveyId, lastResponseId=None, startDate=None, endDate=None, limit=None,
                              includedQuestionIds=None, useLabels=None, decimalSeparator=None, seenUnansweredRecode=None,
@@ -170,6 +722,7 @@ class Qualtrics(object):
         :param lastResponseId: Export all responses received after the specified response
         :type lastResponseId: str
         :param startDate: Recorded date range filter (Only exports responses recorded after the specified date.)
+                          ISO 8601 string (2017-12-01T00:00:00Z) or datetime (naive datetime is UTC)
         :type startDate: str datetime
         :param endDate: Recorded date range filter (Only exports responses recorded before the specified date.)
         :type endDate: str datetime
@@ -188,39 +741,35 @@ class Qualtrics(object):
         :type useLocalTime: bool
         :return: ID of the response export for GetResponseExportProgress/GetResponseExportFile or None if error occurs
         """
-        url = "https://survey.qualtrics.com/API/v3/responseexports"
-        data = {
-            "format": format,
-            "surveyId": surveyId
-        }
-        if lastResponseId is not None:
-            data["lastResponseId"] = lastResponseId
-        #     "startDate": startDate,
-        #     "endDate": endDate,
-        if limit is not None:
-            data["limit"] = limit
-        if isinstance(includedQuestionIds, STR):
-            includedQuestionIds = json.loads(includedQuestionIds)
-        if includedQuestionIds:
-            data["includedQuestionIds"] = includedQuestionIds
-        if useLabels is True:
-            data["useLabels"] = True
-        #     "decimalSeparator": decimalSeparator,
-        #     "seenUnansweredRecode": seenUnansweredRecode,
-        #     "useLocalTime": useLocalTime,
-        # }
-        response = self.request3(url, method="post", data=data)
-        if response is None:
-            return response
+        url = "%s/responseexports" % self.api3_url
+        data = self._response_export_data(format, surveyId, lastResponseId=lastResponseId, startDate=startDate,
+                                          endDate=endDate, limit=limit, includedQuestionIds=includedQuestionIds,
+                                          useLabels=useLabels)
+        result = self.call3(url, method="post", data=data)
+        if result.value is None:
+            return None
         try:
-            responseExportId = response.json()["result"]["id"]
+            responseExportId = result.json_response["result"]["id"]
         except Exception as e:
             self.last_error_message = "Mailformed response from server: %s" % e
             return None
-        self.response = response
         self.last_error_message = None
         return responseExportId
 
+    @staticmethod
+    def _parse_export_progress(json_response):
+        """ Extract (status, URL or percentage) from GetResponseExportProgress response.
+        Raises KeyError or TypeError if response is mailformed
+        """
+        status = json_response["result"]["status"]
+        if status == "complete":
+            # Return URL to download the data
+            data = json_response["result"]["file"]
+        else:
+            # Return Percentage
+            data = json_response["result"]["percentComplete"]
+        return status, data
+
     def GetResponseExportProgress(self, responseExportId):
         """ Retrieve the status of a response export CreateResponseExport
         https://api.qualtrics.com/docs/get-response-export-progress
@@ -229,20 +778,13 @@ class Qualtrics(object):
         :type responseExportId: str
         :return:
         """
-        url = "https://survey.qualtrics.com/API/v3/responseexports/%s" % responseExportId
-        response = self.request3(url, method="get")
-        if response is None:
+        url = "%s/responseexports/%s" % (self.api3_url, responseExportId)
+        result = self.call3(url, method="get")
+        if result.value is None:
             # Server or network error
             return "servfail", self.last_error_message
         try:
-            status = response.json()["result"]["status"]
-
-            if status == "complete":
-                # Return URL to download the data
-                data = response.json()["result"]["file"]
-            else:
-                # Return Percentage
-                data = response.json()["result"]["percentComplete"]
+            status, data = self._parse_export_progress(result.json_response)
             self.last_error_message = None
         except (ValueError, KeyError, TypeError) as e:
             self.last_error_message = "Mailformed server response: %s" % e
@@ -250,76 +792,716 @@ class Qualtrics(object):
 
         return status, data
 
-    def GetResponseExportFile(self, responseExportId):
+    def _response_export_file_url(self, responseExportId):
+        if responseExportId.startswith(("https://", "http://")):
+            return responseExportId
+        return "%s/responseexports/%s/file" % (self.api3_url, responseExportId)
+
+    @staticmethod
+    def _open_export_archive(iofile):
+        """ Open the file in zip archive returned by Qualtrics as a text stream.
+        Raises BadZipfile if iofile is not a zip archive
+
+        :param iofile: seekable binary file with zip archive
+        """
+        archive = zipfile.ZipFile(iofile)
+        # https://docs.python.org/2/library/zipfile.html#zipfile.ZipFile.namelist
+        # Assuming there is only one file in zip archive returned by Qualtrics
+        fh = archive.open(archive.namelist()[0], mode="r")
+
+        # Converting binary file stream to text stream, so it can be fed to csv module etc
+        return io.TextIOWrapper(fh)
+
+    def GetResponseExportFile(self, responseExportId, chunk_size=65536, spool_size=10 * 1024 * 1024):
         """ Retrieve the response export file after the export is complete
         https://api.qualtrics.com/docs/get-response-export-file
+
+        The archive is streamed to a temporary file (kept in memory if it is smaller than spool_size)
+
         :param responseExportId: The ID given to you after running your Response Export call or URL return by GetResponseExportProgress
         :type responseExportId: str
+        :param chunk_size: Size of chunks (in bytes) the archive is downloaded in
+        :param spool_size: Archives larger than spool_size bytes are stored on disk instead of memory
         :return: open file, can be read using .read() function or passed to csv library etc
         """
-        if "https://" in responseExportId:
-            url = responseExportId
-        else:
-            url = "https://survey.qualtrics.com/API/v3/responseexports/%s/file" % responseExportId
-        response = self.request3(url, method="get")
+        url = self._response_export_file_url(responseExportId)
+        response = self.request3(url, method="get", stream=True)
         if response is None:
             return None
 
+        spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
         try:
-            # Python 3.5
-            iofile = BytesIO(response.content)
-        except:
-            # Python 2.7
-            iofile = StringIO(response.content)
+            for chunk in response.iter_content(chunk_size):
+                spool.write(chunk)
+        except (ConnectionError, ChunkedEncodingError, Timeout) as e:
+            spool.close()
+            self.last_error_message = str(e)
+            return None
+        finally:
+            response.close()
+        spool.seek(0)
         try:
-            archive = zipfile.ZipFile(iofile)
-            # https://docs.python.org/2/library/zipfile.html#zipfile.ZipFile.namelist
-            # Assuming there is only one file in zip archive returned by Qualtrics
-            fh = archive.open(archive.namelist()[0], mode="r")
-
-            # Converting binary file stream to text stream, so it can be fed to csv module etc
-            # Note this may not work for large csv files that do not fit in memory
-            # Not sure how typical is that with Qualtrics surveys, though
-            fp = io.TextIOWrapper(fh)
+            fp = self._open_export_archive(spool)
         except BadZipfile as e:
+            spool.close()
             self.last_error_message = str(e)
             return None
         self.last_error_message = None
         return fp
 
-    def DownloadResponseExportFile(self, responseExportId, filename):
+    # Delimiters of export file formats that can be iterated row by row
+    EXPORT_ROW_DELIMITERS = {".csv": ",", ".tsv": "\t"}
+
+    def GetResponseExportStream(self, responseExportId, chunk_size=65536):
+        """ Retrieve the response export file after the export is complete, decompressing it while it is downloaded.
+        https://api.qualtrics.com/docs/get-response-export-file
+
+        Unlike GetResponseExportFile, data can be read as soon as first chunk of the archive arrives, and memory usage
+        does not depend on the size of export. Connection errors and BadZipfile (if archive turns out to be truncated
+        or corrupted) are raised by read functions of returned stream. Close the stream to release the connection.
+
+        :param responseExportId: The ID given to you after running your Response Export call or URL return by GetResponseExportProgress
+        :type responseExportId: str
+        :param chunk_size: Size of chunks (in bytes) the archive is downloaded in
+        :return: open text stream (utf-8), name attribute is the name of file in archive
+        """
+        url = self._response_export_file_url(responseExportId)
+        response = self.request3(url, method="get", stream=True)
+        if response is None:
+            return None
+        reader = ZipStreamReader(response.iter_content(chunk_size), on_close=response.close)
+        try:
+            reader.read_header()
+        except (ConnectionError, ChunkedEncodingError, Timeout, BadZipfile) as e:
+            reader.close()
+            self.last_error_message = str(e)
+            return None
+        self.last_error_message = None
+        # utf-8-sig skips byte order mark Qualtrics puts at the beginning of CSV files
+        return io.TextIOWrapper(io.BufferedReader(reader, chunk_size), encoding="utf-8-sig", newline="")
+
+    def iter_response_export_rows(self, responseExportId, chunk_size=65536):
+        """ Iterate over rows of CSV or TSV response export file while it is being downloaded, see GetResponseExportStream.
+        Header rows are returned as well.
+
+        If download fails, iteration stops and last_error_message is set.
+        last_error_message is None if all rows have been retrieved.
+
+        :param responseExportId: The ID given to you after running your Response Export call or URL return by GetResponseExportProgress
+        :type responseExportId: str
+        :param chunk_size: Size of chunks (in bytes) the archive is downloaded in
+        :return: generator of rows (lists of strings)
+        """
+        fp = self.GetResponseExportStream(responseExportId, chunk_size=chunk_size)
+        if fp is None:
+            return
+        with fp:
+            extension = os.path.splitext(fp.name)[1].lower()
+            if extension not in self.EXPORT_ROW_DELIMITERS:
+                self.last_error_message = "Export file %s is not CSV or TSV file" % fp.name
+                return
+            try:
+                for row in csv.reader(fp, delimiter=self.EXPORT_ROW_DELIMITERS[extension]):
+                    yield row
+            except (ConnectionError, ChunkedEncodingError, Timeout, BadZipfile) as e:
+                self.last_error_message = str(e)
+
+    def response_export_columns(self, responseExportId, types=None, header_rows=None, chunk_size=65536):
+        """ Download CSV or TSV response export file and decode it into typed NumPy arrays, one per column
+        (see pyqualtrics.columns.read_response_columns). Requires numpy library.
+
+        :param responseExportId: The ID given to you after running your Response Export call or URL return by GetResponseExportProgress
+        :param types: {column name: numpy dtype}, types of other columns are inferred
+        :param header_rows: Number of header rows (detected automatically if None)
+        :param chunk_size: Size of chunks (in bytes) the archive is downloaded in
+        :return: pyqualtrics.columns.ResponseColumns or None if error occurs
+        """
+        fp = self.GetResponseExportStream(responseExportId, chunk_size=chunk_size)
+        if fp is None:
+            return None
+        return self._read_export_columns(fp, types, header_rows)
+
+    def _read_export_columns(self, fp, types, header_rows):
+        """ read_response_columns with errors reported in last_error_message. Closes fp """
+        with fp:
+            extension = os.path.splitext(fp.name)[1].lower()
+            if extension not in self.EXPORT_ROW_DELIMITERS:
+                self.last_error_message = "Export file %s is not CSV or TSV file" % fp.name
+                return None
+            try:
+                columns = read_response_columns(fp, header_rows=header_rows, types=types,
+                                                delimiter=self.EXPORT_ROW_DELIMITERS[extension])
+            except (ConnectionError, ChunkedEncodingError, Timeout, BadZipfile) as e:
+                self.last_error_message = str(e)
+                return None
+            except ValueError as e:
+                self.last_error_message = "Can't convert column to the given type: %s" % e
+                return None
+        self.last_error_message = None
+        return columns
+
+    def DownloadResponseExportFile(self, responseExportId, filename, chunk_size=65536, resume=False):
         """ Download the response export file after the export is complete to the local file system
         https://api.qualtrics.com/docs/get-response-export-file
+
+        Data is written to filename + ".part" file, which is renamed to filename when download is complete.
+        If resume is True and that file exists, download continues from where it stopped (using HTTP Range header).
+
         :param responseExportId: The ID given to you after running your Response Export call or URL return by GetResponseExportProgress
         :type responseExportId: str
         :param filename: where to save zip file returned by Qualtrics
         :type filename: str
+        :param chunk_size: Size of chunks (in bytes) the archive is downloaded in
+        :param resume: Continue interrupted download
         :return: True is success, None if error
         """
-        if "https://" in responseExportId:
-            url = responseExportId
-        else:
-            url = "https://survey.qualtrics.com/API/v3/responseexports/%s/file" % responseExportId
-        response = self.request3(url, method="get", stream=True)
+        url = self._response_export_file_url(responseExportId)
+        part_filename = filename + ".part"
+        offset = 0
+        if resume and os.path.exists(part_filename):
+            offset = os.path.getsize(part_filename)
+        headers = {"Range": "bytes=%s-" % offset} if offset else None
+        result = self.call3(url, method="get", stream=True, headers=headers)
+        response = result.value
         if response is None:
+            if offset and result.status_code == 416:
+                # Range Not Satisfiable - the file has been downloaded completely already
+                self._replace_file(part_filename, filename)
+                self.last_error_message = None
+                return True
+            return None
+        # Server may ignore Range header and send the whole file (200 OK instead of 206 Partial Content)
+        mode = "ab" if response.status_code == 206 else "wb"
+        try:
+            with open(part_filename, mode) as fp:
+                for chunk in response.iter_content(chunk_size):
+                    fp.write(chunk)
+        except (ConnectionError, ChunkedEncodingError, Timeout) as e:
+            self.last_error_message = str(e)
             return None
+        finally:
+            response.close()
+        self._replace_file(part_filename, filename)
         self.last_error_message = None
-        with open(filename, "wb") as fp:
-            for chunk in response.iter_content(8192):
-                fp.write(chunk)
         return True
 
-    def request(self, Request, Product='RS', post_data=None, post_files=None, **kwargs):
-        """ Send GET or POST request to Qualtrics API using v2.x format
-        https://survey.qualtrics.com/WRAPI/ControlPanel/docs.php#overview_2.5
+    def export_responses(self, surveyId, format=CSV_FORMAT, filename=None, timeout=None, cancel=None,
+                         min_poll_interval=0.5, max_poll_interval=30, chunk_size=65536, **kwargs):
+        """ Export responses using v3 API: start the export, wait for it to complete and download the file.
+        GetResponseExportProgress is called more often when export is about to complete (estimated from
+        percentComplete) and less often when it does not progress.
 
-        This function also sets self.last_error_message and self.json_response
+        export = qualtrics.export_responses(surveyId, Qualtrics.CSV_FORMAT, timeout=600)
+        if export.ok:
+            try:
+                with export.stream:
+                    rows = list(csv.reader(export.stream))
+            except EXPORT_STREAM_ERRORS as e:
+                print("Download failed: %s" % e)
+
+        :param surveyId: ID of the survey for which to export responses
+        :param format: Export format (csv, csv2013, xml, json, spss)
+        :param filename: Download the export archive to this file. If None, export file is opened
+        as a text stream (see GetResponseExportStream), which is downloaded while it is read: export.ok is True
+        once the stream is opened, and reading it raises EXPORT_STREAM_ERRORS if download fails
+        :param timeout: Seconds to wait for export to complete (download is not interrupted)
+        :param cancel: threading.Event, stop waiting for export when it is set
+        :param min_poll_interval: Minimum seconds between GetResponseExportProgress calls
+        :param max_poll_interval: Maximum seconds between GetResponseExportProgress calls
+        :param chunk_size: Size of chunks (in bytes) the archive is downloaded in
+        :param kwargs: Additional parameters for CreateResponseExport (lastResponseId, limit, useLabels etc)
+        :return: ResponseExport object. If it failed, error_message and last_error_message are set
+        """
+        export = ResponseExport(surveyId, format, filename)
+        schedule = _PollSchedule(min_poll_interval, max_poll_interval)
+        deadline = default_timer() + timeout if timeout is not None else None
+        export.id = self.CreateResponseExport(format, surveyId, **kwargs)
+        if export.id is None:
+            return self._export_failed(export, "failed", self.last_error_message)
+        export.status = "queued"
+        while True:
+            status, data = self.GetResponseExportProgress(export.id)
+            interval = self._export_progress(export, schedule, status, data, deadline, timeout)
+            if interval is None:
+                break
+            if cancel is None:
+                time.sleep(interval)
+            elif cancel.wait(interval):
+                return self._export_failed(export, "cancelled",
+                                           "Response export %s has been cancelled" % export.id)
+        if export.status != "complete":
+            return export
+        return self._download_export(export, chunk_size)
+
+    def export_many_responses(self, surveyIds, format=CSV_FORMAT, directory=None, max_workers=4, timeout=None,
+                              cancel=None, progress=None, min_poll_interval=0.5, max_poll_interval=30,
+                              chunk_size=65536, **kwargs):
+        """ Export responses to many surveys at once. All exports are started first (so Qualtrics generates them
+        in parallel), then their progress is checked in a single loop, and completed files are downloaded by
+        a pool of max_workers threads while the other exports are still being generated.
+
+        exports = qualtrics.export_many_responses(surveyIds, directory="exports", timeout=3600)
+        for surveyId, export in exports.items():
+            if not export.ok:
+                print(surveyId, export.status, export.error_message)
+
+        :param surveyIds: IDs of the surveys for which to export responses
+        :param format: Export format (csv, csv2013, xml, json, spss)
+        :param directory: Download export archives to directory/<surveyId>.zip files. If None, archives are
+        kept in temporary files opened as text streams (see GetResponseExportFile)
+        :param max_workers: Number of threads starting exports and downloading files
+        :param timeout: Seconds to wait for all exports to complete (downloads are not interrupted)
+        :param cancel: threading.Event, stop waiting for exports that are not complete yet when it is set
+        :param progress: function called with ResponseExport object every time its state changes (in the calling thread)
+        :param min_poll_interval: Minimum seconds between GetResponseExportProgress calls for one export
+        :param max_poll_interval: Maximum seconds between GetResponseExportProgress calls for one export
+        :param chunk_size: Size of chunks (in bytes) archives are downloaded in
+        :param kwargs: Additional parameters for CreateResponseExport (lastResponseId, limit, useLabels etc)
+        :return: OrderedDict {surveyId: ResponseExport}. last_error_message is set if any of exports failed
+        """
+        exports = OrderedDict()
+        for surveyId in surveyIds:
+            filename = os.path.join(directory, "%s.zip" % surveyId) if directory is not None else None
+            exports[surveyId] = ResponseExport(surveyId, format, filename)
+        self._run_exports(list(exports.values()), format, max_workers, timeout, cancel, progress, min_poll_interval,
+                          max_poll_interval, chunk_size, kwargs)
+        failed = [export for export in exports.values() if not export.ok]
+        self.last_error_message = "%s of %s response exports failed" % (len(failed), len(exports)) if failed else None
+        return exports
+
+    def _run_exports(self, exports, format, max_workers, timeout, cancel, progress, min_poll_interval,
+                     max_poll_interval, chunk_size, kwargs):
+        """ Start ResponseExport objects (with their own parameters added to kwargs), wait for them and download
+        them concurrently, see export_many_responses
+        """
+        deadline = default_timer() + timeout if timeout is not None else None
+
+        def report(export):
+            if progress is not None:
+                progress(export)
+
+        def create(export):
+            export.started = default_timer()
+            export.id = self.CreateResponseExport(format, export.survey_id, **dict(kwargs, **export.parameters))
+            if export.id is None:
+                return self._export_failed(export, "failed", self.last_error_message)
+            export.status = "queued"
+            return export
+
+        def download(export):
+            return self._download_export(export, chunk_size, stream=False)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # export: [_PollSchedule, time of the next GetResponseExportProgress call]
+            pending = OrderedDict()
+            for export in executor.map(create, exports):
+                report(export)
+                if export.status == "queued":
+                    pending[export] = [_PollSchedule(min_poll_interval, max_poll_interval), default_timer()]
+            downloads = set()
+            while pending or downloads:
+                if cancel is not None and cancel.is_set():
+                    for export in pending:
+                        report(self._export_failed(export, "cancelled",
+                                                   "Response export %s has been cancelled" % export.id))
+                    pending.clear()
+                now = default_timer()
+                for export in [export for export, (schedule, due) in pending.items() if due <= now]:
+                    status, data = self.GetResponseExportProgress(export.id)
+                    interval = self._export_progress(export, pending[export][0], status, data, deadline, timeout)
+                    report(export)
+                    if interval is None:
+                        del pending[export]
+                        if export.status == "complete":
+                            downloads.add(executor.submit(download, export))
+                    else:
+                        pending[export][1] = default_timer() + interval
+
+                wait_time = None
+                if pending:
+                    wait_time = max(0, min(due for schedule, due in pending.values()) - default_timer())
+                    if cancel is not None and downloads:
+                        wait_time = min(wait_time, self.CANCEL_CHECK_INTERVAL)
+                if downloads:
+                    done, downloads = wait(downloads, timeout=wait_time, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        report(future.result())
+                elif pending and cancel is not None:
+                    cancel.wait(wait_time)
+                elif pending:
+                    time.sleep(wait_time)
+
+    def export_responses_by_date(self, surveyId, startDate, endDate=None, shards=4, format=CSV_FORMAT,
+                                 filename=None, max_workers=4, timeout=None, cancel=None, progress=None,
+                                 min_poll_interval=0.5, max_poll_interval=30, chunk_size=65536, **kwargs):
+        """ Export responses recorded between startDate and endDate as several exports of consecutive date windows,
+        which Qualtrics generates in parallel (see export_many_responses), and merge them into one CSV file.
+
+        Windows overlap by EXPORT_WINDOW_OVERLAP seconds, so responses recorded at window boundaries are exported
+        whether Qualtrics includes boundary dates or not. Rows already merged from the previous window are skipped,
+        so every response is written once, in the order of windows. To find them, ResponseIDs of all rows of the
+        previous window are kept in memory (roughly 100 bytes per response), use more shards for huge surveys.
+
+        export = qualtrics.export_responses_by_date(surveyId, "2017-01-01", "2018-01-01", shards=8, timeout=3600)
+        if export.ok:
+            rows = csv.reader(export.stream)
+
+        :param surveyId: ID of the survey for which to export responses
+        :param startDate: Export responses recorded after this date (datetime or string, see EXPORT_DATE_FORMATS, UTC)
+        :param endDate: Export responses recorded before this date (now if None)
+        :param shards: Number of date windows. Windows are at least 2 * EXPORT_WINDOW_OVERLAP + 1 seconds long,
+        so short ranges are split into fewer windows
+        :param format: Export format (csv or csv2013)
+        :param filename: Write merged CSV file (not a zip archive) to this file. If None, merged file is
+        a temporary file opened as a text stream
+        :param max_workers: Number of threads starting exports and downloading files
+        :param timeout: Seconds to wait for all exports to complete (downloads are not interrupted)
+        :param cancel: threading.Event, stop waiting for exports that are not complete yet when it is set
+        :param progress: function called with ResponseExport object of a window every time its state changes
+        :param min_poll_interval: Minimum seconds between GetResponseExportProgress calls for one export
+        :param max_poll_interval: Maximum seconds between GetResponseExportProgress calls for one export
+        :param chunk_size: Size of chunks (in bytes) archives are downloaded in
+        :param kwargs: Additional parameters for CreateResponseExport (useLabels, includedQuestionIds etc)
+        :return: ResponseExport object of the merged export, its shards attribute is the list of window exports.
+        Times are those of the slowest window (download_time includes merging).
+        If it failed, error_message and last_error_message are set
+        """
+        export = self._date_sharded_export(surveyId, startDate, endDate, shards, format, filename)
+        self._run_exports(export.shards, format, max_workers, timeout, cancel, progress, min_poll_interval,
+                          max_poll_interval, chunk_size, kwargs)
+        self._merge_export(export)
+        self.last_error_message = export.error_message
+        return export
+
+    def export_responses_by_questions(self, surveyId, questionIds, shards=4, format=CSV_FORMAT, filename=None,
+                                      max_workers=4, timeout=None, cancel=None, progress=None, min_poll_interval=0.5,
+                                      max_poll_interval=30, chunk_size=65536, **kwargs):
+        """ Export responses to a survey with many questions as several exports of consecutive groups of questions
+        (includedQuestionIds parameter), which Qualtrics generates in parallel (see export_many_responses),
+        and join their rows on ResponseID into one CSV file.
+
+        Columns present in all exports (ResponseID and other response metadata) are written once. Unless endDate is
+        given, all exports are limited to responses recorded before the call, so they contain the same responses.
+        A response missing from some exports (deleted while they were generated) is written after the others,
+        with empty values in the columns of those exports.
+
+        export = qualtrics.export_responses_by_questions(surveyId, ["QID%s" % i for i in range(1, 3001)], shards=8)
+        if export.ok:
+            rows = csv.reader(export.stream)
+
+        :param surveyId: ID of the survey for which to export responses
+        :param questionIds: IDs of questions to export (e.g. ["QID1", "QID3", ... , "QID5"]), in order
+        :param shards: Number of groups of questions
+        :param format: Export format (csv or csv2013)
+        :param filename: Write joined CSV file (not a zip archive) to this file. If None, joined file is
+        a temporary file opened as a text stream
+        :param max_workers: Number of threads starting exports and downloading files
+        :param timeout: Seconds to wait for all exports to complete (downloads are not interrupted)
+        :param cancel: threading.Event, stop waiting for exports that are not complete yet when it is set
+        :param progress: function called with ResponseExport object of a group every time its state changes
+        :param min_poll_interval: Minimum seconds between GetResponseExportProgress calls for one export
+        :param max_poll_interval: Maximum seconds between GetResponseExportProgress calls for one export
+        :param chunk_size: Size of chunks (in bytes) archives are downloaded in
+        :param kwargs: Additional parameters for CreateResponseExport (useLabels, startDate, endDate etc)
+        :return: ResponseExport object of the joined export, its shards attribute is the list of group exports.
+        Times are those of the slowest group (download_time includes joining).
+        If it failed, error_message and last_error_message are set
+        """
+        export = self._question_sharded_export(surveyId, questionIds, shards, format, filename)
+        if kwargs.get("endDate") is None:
+            kwargs["endDate"] = self._utcnow()
+        self._run_exports(export.shards, format, max_workers, timeout, cancel, progress, min_poll_interval,
+                          max_poll_interval, chunk_size, kwargs)
+        self._merge_export(export, self._join_export_rows)
+        self.last_error_message = export.error_message
+        return export
+
+    # Formats of exports that can be split into shards and merged
+    SHARDED_EXPORT_FORMATS = (CSV_FORMAT, CSV2013_FORMAT)
+    # Seconds by which date windows of export_responses_by_date overlap
+    EXPORT_WINDOW_OVERLAP = 1
+
+    @staticmethod
+    def _utcnow():
+        # datetime.utcnow() is deprecated in recent Python versions
+        return datetime(1970, 1, 1) + timedelta(seconds=time.time())
+
+    def _check_sharded_export_format(self, format):
+        if format not in self.SHARDED_EXPORT_FORMATS:
+            raise ValueError("Sharded export supports %s formats only" % ", ".join(self.SHARDED_EXPORT_FORMATS))
+
+    def _question_sharded_export(self, surveyId, questionIds, shards, format, filename):
+        """ ResponseExport with shards for consecutive groups of questionIds. Raises ValueError if arguments
+        are invalid
+        """
+        self._check_sharded_export_format(format)
+        if isinstance(questionIds, STR) or not questionIds:
+            raise ValueError("questionIds should be a non-empty list of question IDs")
+        questionIds = list(questionIds)
+        shards = max(1, min(shards, len(questionIds)))
+        bounds = [len(questionIds) * i // shards for i in range(shards + 1)]
+        export = ResponseExport(surveyId, format, filename)
+        export.shards = []
+        for i in range(shards):
+            shard = ResponseExport(surveyId, format)
+            shard.parameters = {"includedQuestionIds": questionIds[bounds[i]:bounds[i + 1]]}
+            export.shards.append(shard)
+        return export
+
+    def _date_sharded_export(self, surveyId, startDate, endDate, shards, format, filename):
+        """ ResponseExport with shards for consecutive date windows between startDate and endDate.
+        Raises ValueError if arguments are invalid
+        """
+        self._check_sharded_export_format(format)
+        start = _parse_export_date(startDate)
+        end = _parse_export_date(endDate) if endDate is not None else self._utcnow()
+        if end <= start:
+            raise ValueError("endDate should be later than startDate")
+        overlap = self.EXPORT_WINDOW_OVERLAP
+        seconds = (end - start).total_seconds()
+        # A response recorded in the overlap of two windows must not be exported by the third one
+        shards = max(1, min(shards, int(seconds // (2 * overlap + 1))))
+        bounds = [start + timedelta(seconds=round(seconds * i / shards)) for i in range(shards)] + [end]
+        export = ResponseExport(surveyId, format, filename)
+        export.shards = []
+        for i in range(shards):
+            shard = ResponseExport(surveyId, format)
+            shard.parameters = {
+                "startDate": bounds[i] - timedelta(seconds=overlap) if i > 0 else bounds[i],
+                "endDate": bounds[i + 1] + timedelta(seconds=overlap) if i < shards - 1 else bounds[i + 1],
+            }
+            export.shards.append(shard)
+        return export
+
+    def _merge_export(self, export, merge_rows=None):
+        """ Merge downloaded shards of export (their streams are closed) into export.filename or export.stream
+
+        :param merge_rows: function writing rows of shard streams to a file (_merge_export_rows if None)
+        """
+        if merge_rows is None:
+            merge_rows = self._merge_export_rows
+        failed = [shard for shard in export.shards if not shard.ok]
+        if failed:
+            for shard in export.shards:
+                if shard.stream is not None:
+                    shard.stream.close()
+            return self._export_failed(export, failed[0].status, "%s of %s response exports failed: %s" % (
+                len(failed), len(export.shards), failed[0].error_message))
+        if export.filename is not None:
+            fp = io.open(export.filename + ".part", "w", encoding="utf-8", newline="")
+        else:
+            fp = io.TextIOWrapper(tempfile.TemporaryFile(), encoding="utf-8", newline="")
+        try:
+            # Streams of export files have been opened without newline="" (see GetResponseExportFile)
+            streams = []
+            for shard in export.shards:
+                streams.append(io.TextIOWrapper(shard.stream.detach(), encoding="utf-8-sig", newline=""))
+                shard.stream = None
+            try:
+                merge_rows(streams, fp)
+            finally:
+                for stream in streams:
+                    stream.close()
+        except (ValueError, BadZipfile) as e:
+            fp.close()
+            if export.filename is not None:
+                os.remove(export.filename + ".part")
+            return self._export_failed(export, "failed", "Can't merge response exports: %s" % e)
+        if export.filename is not None:
+            fp.close()
+            self._replace_file(export.filename + ".part", export.filename)
+        else:
+            fp.seek(0)
+            export.stream = fp
+        export.queue_time = max(shard.queue_time for shard in export.shards)
+        export.generate_time = max(shard.generate_time for shard in export.shards)
+        return self._export_downloaded(
+            export, True, default_timer() - export.started - export.queue_time - export.generate_time)
+
+    @classmethod
+    def _merge_export_rows(cls, streams, fp):
+        """ Write rows of CSV export files to fp in order. Header rows are written once, rows with ResponseID
+        written by the previous file are skipped. Raises ValueError if header rows of files are different
+
+        Duplicates could be told apart by date (only responses recorded in the overlap of two windows are exported
+        twice), but dates in export files are in the time zone of export (timeZone parameter), while windows are
+        in UTC. So ResponseIDs of all rows of the previous file are kept: memory grows with the size of a window,
+        not of the whole export.
+
+        :return: number of rows (responses) written
+        """
+        header = None
+        writer = csv.writer(fp, lineterminator="\r\n")
+        previous_ids = set()
+        count = 0
+        for stream in streams:
+            reader = csv.reader(stream)
+            first_rows = list(islice(reader, 3))
+            if not first_rows:
+                continue
+            header_rows = _count_header_rows(first_rows)
+            if header is None:
+                header = first_rows[:header_rows]
+                writer.writerows(header)
+                id_column = cls._response_id_column(header)
+            elif first_rows[:header_rows] != header:
+                raise ValueError("Header rows of exports are different")
+            ids = set()
+            for row in chain(first_rows[header_rows:], reader):
+                # Whole row identifies the response if there is no ResponseID column
+                key = row[id_column] if id_column is not None and id_column < len(row) else tuple(row)
+                ids.add(key)
+                if key not in previous_ids:
+                    writer.writerow(row)
+                    count += 1
+            previous_ids = ids
+        return count
+
+    @classmethod
+    def _join_export_rows(cls, streams, fp):
+        """ Write rows of CSV export files with different columns of the same responses to fp, joined on ResponseID.
+        Columns present in all files are written once. Rows are expected to be in the same order in all files
+        (only rows that have not been joined yet are kept in memory), rows missing from some files are written last.
+        Raises ValueError if files have no ResponseID column
+
+        :return: number of rows (responses) written
+        """
+        headers, iterators = [], []
+        for stream in streams:
+            reader = csv.reader(stream)
+            first_rows = list(islice(reader, 3))
+            header_rows = _count_header_rows(first_rows)
+            headers.append(first_rows[:header_rows])
+            iterators.append(chain(first_rows[header_rows:], reader))
+        if len(set(len(header) for header in headers)) > 1:
+            raise ValueError("Exports have different number of header rows")
+        id_columns = [cls._response_id_column(header) for header in headers]
+        if None in id_columns:
+            raise ValueError("Export has no ResponseID column")
+        # Column is identified by its values in all header rows
+        keys = [list(zip(*header)) for header in headers]
+        shared = set(keys[0]).intersection(*keys[1:])
+        # Indexes of columns written from each file: all columns of the first one, not shared columns of others
+        selected = [list(range(len(keys[0])))] + [[j for j, key in enumerate(file_keys) if key not in shared]
+                                                  for file_keys in keys[1:]]
+        shared_index = [dict((key, j) for j, key in enumerate(file_keys) if key in shared) for file_keys in keys]
+
+        writer = csv.writer(fp, lineterminator="\r\n")
+        for i in range(len(headers[0])):
+            writer.writerow([headers[n][i][j] for n in range(len(headers)) for j in selected[n]])
+
+        pending = [OrderedDict() for stream in streams]  # ResponseID -> row, for rows that have not been joined
+        count = [0]
+
+        def write(response_id):
+            rows = [file_pending.pop(response_id, None) for file_pending in pending]
+            if rows[0] is None:
+                # Take shared columns (ResponseID etc) from another file
+                n, row = next((n, row) for n, row in enumerate(rows) if row is not None)
+                rows[0] = [row[shared_index[n][key]] if key in shared else "" for key in keys[0]]
+            joined = []
+            for n, row in enumerate(rows):
+                if row is None:
+                    joined.extend([""] * len(selected[n]))
+                else:
+                    joined.extend([row[j] if j < len(row) else "" for j in selected[n]])
+            writer.writerow(joined)
+            count[0] += 1
+
+        active = True
+        while active:
+            active = False
+            for n, iterator in enumerate(iterators):
+                row = next(iterator, None)
+                if row is None:
+                    continue
+                active = True
+                response_id = row[id_columns[n]] if id_columns[n] < len(row) else ""
+                pending[n][response_id] = row
+                if all(response_id in file_pending for file_pending in pending):
+                    write(response_id)
+        # Responses missing from some of the files
+        for file_pending in pending:
+            while file_pending:
+                write(next(iter(file_pending)))
+        return count[0]
+
+    @staticmethod
+    def _response_id_column(header):
+        """ Index of ResponseID column. csv format has ResponseID in the first header row. csv2013 format has
+        V1..V10 labels in the first row, so ResponseID (labeled V1) is found in the second one
+        """
+        for row in header[:2]:
+            for i, name in enumerate(row):
+                if name in ("ResponseID", "ResponseId"):
+                    return i
+        return None
 
-        :param Request: The name of the API call to be made ("createPanel", "deletePanel" etc).
-        :param post_data: Content of POST request. If None, GET request will be sent
-        :param post_files: Files to post (for importSurvey API call)
-        :param kwargs: Additional parameters for this API Call (LibraryID="abd", PanelID="123")
-        :return: None if request failed
+    def _download_export(self, export, chunk_size, stream=True):
+        """ Download complete export to export.filename or open it as export.stream
+        (using GetResponseExportStream if stream is True, GetResponseExportFile otherwise)
+        """
+        start = default_timer()
+        if export.filename is not None:
+            downloaded = self.DownloadResponseExportFile(export.file_url, export.filename, chunk_size=chunk_size)
+        else:
+            if stream:
+                export.stream = self.GetResponseExportStream(export.file_url, chunk_size=chunk_size)
+            else:
+                export.stream = self.GetResponseExportFile(export.file_url, chunk_size=chunk_size)
+            downloaded = export.stream is not None
+        return self._export_downloaded(export, downloaded, default_timer() - start)
+
+    def _export_failed(self, export, status, error_message):
+        export.status = status
+        export.error_message = self.last_error_message = error_message
+        return export
+
+    def _export_progress(self, export, schedule, status, data, deadline, timeout):
+        """ Update export with the result of GetResponseExportProgress call
+
+        :return: seconds to wait before the next call, None if export is complete or failed
+        """
+        export.polls += 1
+        now = default_timer()
+        if status == "servfail":
+            self._export_failed(export, "failed", data)
+            return None
+        if status not in ("in progress", "complete"):
+            self._export_failed(export, "failed", "Response export %s is %s" % (export.id, status))
+            return None
+        export.percent_complete = 100.0 if status == "complete" else float(data or 0)
+        if export.queue_time is None and export.percent_complete > 0:
+            export.queue_time = now - export.started
+            export.status = "in progress"
+        if status == "complete":
+            export.generate_time = now - export.started - export.queue_time
+            export.status, export.file_url = "complete", data
+            return None
+        if deadline is not None and now >= deadline:
+            self._export_failed(export, "timeout",
+                                "Response export %s did not complete in %s seconds" % (export.id, timeout))
+            return None
+        interval = schedule.next_interval(now, export.percent_complete)
+        if deadline is not None:
+            interval = min(interval, deadline - now)
+        return interval
+
+    def _export_downloaded(self, export, downloaded, download_time):
+        export.download_time = download_time
+        if not downloaded:
+            return self._export_failed(export, "failed", self.last_error_message)
+        export.status = "downloaded"
+        export.error_message = None
+        return export
+
+    _replace_file = staticmethod(_replace_file)
+
+    def _request_url_and_params(self, Request, Product, kwargs):
+        """ Construct URL and query parameters for v2.x API call
+
+        :param kwargs: parameters for API call. Version and ED are removed from this dictionary
+        :return: tuple (url, params)
         """
         Version = kwargs.pop("Version", self.default_api_version)
         # Version must be a string, not an integer or float
@@ -355,48 +1537,22 @@ class Qualtrics(object):
         if ed is not None:
             for key in ed:
                 params["ED[%s]" % key] = ed[key]
+        return url, params
 
-        self.json_response = None
-        self.last_error_message = "Not yet set by request function"
-        self.last_status_code = None
-        try:
-            if post_data:
-                r = requests.post(url,
-                                  data=post_data,
-                                  params=params,
-                                  **self.requests_kwargs)
-            elif post_files:
-                r = requests.post(url,
-                                  files=post_files,
-                                  params=params,
-                                  **self.requests_kwargs)
-            else:
-                r = requests.get(
-                    url,
-                    params=params,
-                    **self.requests_kwargs
-                )
-        except (ConnectionError, Timeout, TooManyRedirects, HTTPError) as e:
-            # http://docs.python-requests.org/en/master/user/quickstart/#errors-and-exceptions
-            # ConnectionError: In the event of a network problem (e.g. DNS failure, refused connection, etc) Requests will raise a ConnectionError exception.
-            # HTTPError: Response.raise_for_status() will raise an HTTPError if the HTTP request returned an unsuccessful status code.
-            # Timeout: If a request times out, a Timeout exception is raised.
-            # TooManyRedirects: If a request exceeds the configured number of maximum redirections, a TooManyRedirects exception is raised.
-            self.last_url = ""
-            self.response = None
-            self.last_error_message = str(e)
-            return None
+    def _parse_response(self, Request, status_code, text, kwargs):
+        """ Interpret server response to v2.x API call
 
-        self.last_url = r.url
-        self.response = r.text
-        self.last_status_code = r.status_code
-        if r.status_code == 403:
-            self.last_error_message = "API Error: HTTP Code %s (Forbidden)" % r.status_code
-            return None
-        if r.status_code == 401 and Request == "getSurvey":
+        :param Request: The name of the API call
+        :param status_code: HTTP status code
+        :param text: body of the response
+        :param kwargs: parameters of API call
+        :return: tuple (result, json_response, error_message). result is None if request failed
+        """
+        if status_code == 403:
+            return None, None, "API Error: HTTP Code %s (Forbidden)" % status_code
+        if status_code == 401 and Request == "getSurvey":
             # I'm don't know if 401 is returned for requests other than getSurvey
-            self.last_error_message = "API Error: HTTP Code %s (Unauthorized)" % r.status_code
-            return None
+            return None, None, "API Error: HTTP Code %s (Unauthorized)" % status_code
         # Apparently, getSurvey now returns error 500 and error message in XML format:
         # <XML>
         # 	<Meta>
@@ -409,59 +1565,129 @@ class Qualtrics(object):
         # 	</Meta>
         # 	<Result></Result>
         # </XML>
-        if r.status_code == 500 and Request == "getSurvey":
-            root = ET.fromstring(r.text)
+        if status_code == 500 and Request == "getSurvey":
+            root = ET.fromstring(text)
             try:
-                self.last_error_message = root.find("Meta").find("ErrorMessage").text
+                return None, None, root.find("Meta").find("ErrorMessage").text
             except AttributeError:
                 # 'NoneType' object has no attribute 'text'
-                self.last_error_message = "Internal server error"
-            return None
+                return None, None, "Internal server error"
 
         try:
             if Request == "getLegacyResponseData":
                 # Preserve order of responses and fields in each response using OrderedDict
-                json_response = json.loads(r.text, object_pairs_hook=collections.OrderedDict)
+                json_response = self.json_codec.loads(text, ordered=True)
             else:
                 # Don't not use OrderedDict for simplicity.
-                json_response = json.loads(r.text)
+                json_response = self.json_codec.loads(text)
         except ValueError:
             # If the data being deserialized is not a valid JSON document, a ValueError will be raised.
-            self.json_response = None
             if "Format" not in kwargs:
-                self.last_error_message = "Unexpected response from Qualtrics: not a JSON document"
-                return None
+                return None, None, "Unexpected response from Qualtrics: not a JSON document"
             else:
                 # Special case - getSurvey. That request has a custom response format (xml).
                 # It does not follow the default response format
-                self.last_error_message = None
-                return r.text
+                return text, None, None
 
-        self.json_response = json_response
         # Sanity check.
         if (Request == "getLegacyResponseData" or Request == "getPanel" or Request == 
             "getListContacts") and "Meta" not in json_response:
             # Special cases - getLegacyResponseData, getPanel and getListContacts
             # Success
-            self.last_error_message = None
-            return json_response
+            return json_response, json_response, None
         if "Meta" not in json_response:
             # Should never happen
-            self.last_error_message = "Unexpected response from Qualtrics: no Meta key in JSON response"
-            return None
+            return None, json_response, "Unexpected response from Qualtrics: no Meta key in JSON response"
         if "Status" not in json_response["Meta"]:
             # Should never happen
-            self.last_error_message = "Unexpected response from Qualtrics: no Status key in JSON response"
-            return None
+            return None, json_response, "Unexpected response from Qualtrics: no Status key in JSON response"
+
+        if json_response["Meta"]["Status"] == "Success":
+            return json_response, json_response, None
+
+        # If error happens, it returns JSON object too
+        # Error message is in json_response["Meta"]["ErrorMessage"]
+        return None, json_response, json_response["Meta"]["ErrorMessage"]
+
+    def call(self, Request, Product='RS', post_data=None, post_files=None, **kwargs):
+        """ Send GET or POST request to Qualtrics API using v2.x format
+        https://survey.qualtrics.com/WRAPI/ControlPanel/docs.php#overview_2.5
+
+        :param Request: The name of the API call to be made ("createPanel", "deletePanel" etc).
+        :param post_data: Content of POST request. If None, GET request will be sent
+        :param post_files: Files to post (for importSurvey API call)
+        :param kwargs: Additional parameters for this API Call (LibraryID="abd", PanelID="123")
+        :return: QualtricsResult object. Its value is None if request failed
+        """
+        low_memory = kwargs.pop("low_memory", self.low_memory)
+        url, params = self._request_url_and_params(Request, Product, kwargs)
+
+        result = QualtricsResult()
+        self._store_result(result.without_body() if low_memory else result)
+        start = default_timer()
+        try:
+            if post_data:
+                r = self.session.post(url,
+                                  data=post_data,
+                                  params=params,
+                                  **self.requests_kwargs)
+            elif post_files:
+                r = self.session.post(url,
+                                  files=post_files,
+                                  params=params,
+                                  **self.requests_kwargs)
+            else:
+                r = self.session.get(
+                    url,
+                    params=params,
+                    **self.requests_kwargs
+                )
+        except (ConnectionError, Timeout, TooManyRedirects, HTTPError) as e:
+            # http://docs.python-requests.org/en/master/user/quickstart/#errors-and-exceptions
+            # ConnectionError: In the event of a network problem (e.g. DNS failure, refused connection, etc) Requests will raise a ConnectionError exception.
+            # HTTPError: Response.raise_for_status() will raise an HTTPError if the HTTP request returned an unsuccessful status code.
+            # Timeout: If a request times out, a Timeout exception is raised.
+            # TooManyRedirects: If a request exceeds the configured number of maximum redirections, a TooManyRedirects exception is raised.
+            result.url = ""
+            result.error_message = str(e)
+            return self._finish_result(result, low_memory)
+        finally:
+            result.elapsed = default_timer() - start
+
+        result.url = r.url
+        result.status_code = r.status_code
+        text = r.text
+        if low_memory:
+            # Release raw response body before parsing, so it is not kept in memory together with parsed document
+            r = None
+        else:
+            result.r = r
+            result.text = text
+        result.value, result.json_response, result.error_message = self._parse_response(
+            Request, result.status_code, text, kwargs)
+        return self._finish_result(result, low_memory)
+
+    def _finish_result(self, result, low_memory):
+        """ In low memory mode, only metadata (status code, error message etc) of the result is kept by this object.
+        Server response is referenced by returned QualtricsResult object only.
+        """
+        if low_memory:
+            self._store_result(result.without_body())
+        return result
 
-        if json_response["Meta"]["Status"] == "Success":
-            self.last_error_message = None
-            return json_response
+    def request(self, Request, Product='RS', post_data=None, post_files=None, **kwargs):
+        """ Send GET or POST request to Qualtrics API using v2.x format
+        https://survey.qualtrics.com/WRAPI/ControlPanel/docs.php#overview_2.5
 
-        # If error happens, it returns JSON object too
-        # Error message is in json_response["Meta"]["ErrorMessage"]
-        self.last_error_message = json_response["Meta"]["ErrorMessage"]
-        return None
+        This function also sets self.last_error_message and self.json_response (for the current thread)
+
+        :param Request: The name of the API call to be made ("createPanel", "deletePanel" etc).
+        :param post_data: Content of POST request. If None, GET request will be sent
+        :param post_files: Files to post (for importSurvey API call)
+        :param kwargs: Additional parameters for this API Call (LibraryID="abd", PanelID="123")
+        :return: None if request failed
+        """
+        return self.call(Request, Product=Product, post_data=post_data, post_files=post_files, **kwargs).value
 
     def createPanel(self, LibraryID, Name, **kwargs):
         """ Creates a new Panel in the Qualtrics System and returns the id of the new panel
@@ -471,9 +1697,10 @@ class Qualtrics(object):
         :param Name: The name of the new panel
         :return: PanelID of new panel, None if error occurs
         """
-        if self.request("createPanel", LibraryID=LibraryID, Name=Name, **kwargs) is None:
+        result = self.request("createPanel", LibraryID=LibraryID, Name=Name, **kwargs)
+        if result is None:
             return None
-        return self.json_response["Result"]["PanelID"]
+        return result["Result"]["PanelID"]
 
     def deletePanel(self, LibraryID, PanelID, **kwargs):
         """ Deletes the panel.
@@ -495,9 +1722,10 @@ class Qualtrics(object):
         :param kwargs: Additional parameters (used by unittest)
         :return: The Number of members
         """
-        if self.request("getPanelMemberCount", LibraryID=LibraryID, PanelID=PanelID, **kwargs) is None:
+        result = self.request("getPanelMemberCount", LibraryID=LibraryID, PanelID=PanelID, **kwargs)
+        if result is None:
             return None
-        return int(self.json_response["Result"]["Count"])
+        return int(result["Result"]["Count"])
 
     def addRecipient(self, LibraryID, PanelID, FirstName, LastName, Email, ExternalDataRef, Language, ED):
         """ Add a new recipient to a panel
@@ -513,17 +1741,18 @@ class Qualtrics(object):
         :param ED:      The embedded data (dictionary)
         :return:    The Recipient ID or None
         """
-        if not self.request("addRecipient",
-                            LibraryID=LibraryID,
-                            PanelID=PanelID,
-                            FirstName=FirstName,
-                            LastName=LastName,
-                            Email=Email,
-                            ExternalDataRef=ExternalDataRef,
-                            Language=Language,
-                            ED=ED):
+        result = self.request("addRecipient",
+                              LibraryID=LibraryID,
+                              PanelID=PanelID,
+                              FirstName=FirstName,
+                              LastName=LastName,
+                              Email=Email,
+                              ExternalDataRef=ExternalDataRef,
+                              Language=Language,
+                              ED=ED)
+        if not result:
             return None
-        return self.json_response["Result"]["RecipientID"]
+        return result["Result"]["RecipientID"]
 
     def getRecipient(self, LibraryID, RecipientID):
         """Get a representation of the recipient and their history
@@ -532,9 +1761,10 @@ class Qualtrics(object):
         :param LibraryID: The library the recipient belongs to
         :param RecipientID: The recipient id of the person's response history you want to retrieve
         """
-        if not self.request("getRecipient", LibraryID=LibraryID, RecipientID=RecipientID):
+        result = self.request("getRecipient", LibraryID=LibraryID, RecipientID=RecipientID)
+        if not result:
             return None
-        return self.json_response["Result"]["Recipient"]
+        return result["Result"]["Recipient"]
 
     def removeRecipient(self, LibraryID, PanelID, RecipientID, **kwargs):
         """ Removes the specified panel member recipient from the specified panel.
@@ -563,9 +1793,10 @@ class Qualtrics(object):
         :param kwargs:
         :return: EmailDistributionID
         """
-        if not self.request("sendSurveyToIndividual", **kwargs):
+        result = self.request("sendSurveyToIndividual", **kwargs)
+        if not result:
             return None
-        return self.json_response["Result"]["EmailDistributionID"]
+        return result["Result"]["EmailDistributionID"]
 
     def sendSurveyToPanel(self, SurveyID, SendDate, SentFromAddress, FromEmail, FromName, Subject, MessageID, MessageLibraryID, PanelID, PanelLibraryID, LinkType, **kwargs):
         """ Sends a survey through the Qualtrics mailer to the panel specified.
@@ -586,21 +1817,22 @@ class Qualtrics(object):
         :
         :return: EmailDistributionID
         """
-        if not self.request("sendSurveyToPanel", 
-                            SurveyID=SurveyID, 
-                            SendDate=SendDate, 
-                            SentFromAddress=SentFromAddress, 
-                            FromEmail=FromEmail, 
-                            FromName=FromName, 
-                            Subject=Subject, 
-                            MessageID=MessageID, 
-                            MessageLibraryID=MessageLibraryID, 
-                            PanelID=PanelID,
-                            PanelLibraryID=PanelLibraryID,
-                            LinkType=LinkType, 
-                             **kwargs):
+        result = self.request("sendSurveyToPanel", 
+                              SurveyID=SurveyID, 
+                              SendDate=SendDate, 
+                              SentFromAddress=SentFromAddress, 
+                              FromEmail=FromEmail, 
+                              FromName=FromName, 
+                              Subject=Subject, 
+                              MessageID=MessageID, 
+                              MessageLibraryID=MessageLibraryID, 
+                              PanelID=PanelID,
+                              PanelLibraryID=PanelLibraryID,
+                              LinkType=LinkType, 
+                               **kwargs)
+        if not result:
             return None
-        return self.json_response["Result"]["EmailDistributionID"]
+        return result["Result"]["EmailDistributionID"]
 
     def sendReminder(self, ParentEmailDistributionID, SendDate, SentFromAddress, FromEmail, FromName, Subject, MessageID, LibraryID, **kwargs):
         """ Sends a survey through the Qualtrics mailer to the panel specified.
@@ -616,18 +1848,19 @@ class Qualtrics(object):
         :param kwargs:
         :return: EmailDistributionID
         """
-        if not self.request("sendReminder", 
-                            ParentEmailDistributionID=ParentEmailDistributionID,
-                            SendDate=SendDate, 
-                            SentFromAddress=SentFromAddress, 
-                            FromEmail=FromEmail, 
-                            FromName=FromName, 
-                            Subject=Subject, 
-                            MessageID=MessageID, 
-                            LibraryID=LibraryID, 
-                             **kwargs):
+        result = self.request("sendReminder", 
+                              ParentEmailDistributionID=ParentEmailDistributionID,
+                              SendDate=SendDate, 
+                              SentFromAddress=SentFromAddress, 
+                              FromEmail=FromEmail, 
+                              FromName=FromName, 
+                              Subject=Subject, 
+                              MessageID=MessageID, 
+                              LibraryID=LibraryID, 
+                               **kwargs)
+        if not result:
             return None
-        return self.json_response["Result"]["EmailDistributionID"]
+        return result["Result"]["EmailDistributionID"]
 
     def createDistribution(self, SurveyID, PanelID, Description, PanelLibraryID, **kwargs):
         """ Creates a distribution for survey and a panel. No emails will be sent. Distribution Links can be generated
@@ -641,14 +1874,15 @@ class Qualtrics(object):
         :param PanelLibraryID:  The library id for the panel
         :return: The distribution id
         """
-        if not self.request("createDistribution",
-                            SurveyID=SurveyID,
-                            PanelID=PanelID,
-                            Description=Description,
-                            PanelLibraryID=PanelLibraryID,
-                            **kwargs):
+        result = self.request("createDistribution",
+                              SurveyID=SurveyID,
+                              PanelID=PanelID,
+                              Description=Description,
+                              PanelLibraryID=PanelLibraryID,
+                              **kwargs)
+        if not result:
             return None
-        return self.json_response["Result"]["EmailDistributionID"]
+        return result["Result"]["EmailDistributionID"]
 
     def getDistributions(self, **kwargs):
         """ Returns the data for the given distribution.
@@ -661,9 +1895,10 @@ class Qualtrics(object):
         :param kwargs:
         :return:
         """
-        if not self.request("getDistributions", **kwargs):
+        result = self.request("getDistributions", **kwargs)
+        if not result:
             return None
-        return self.json_response
+        return result
 
     def getSurveys(self, **kwargs):
         """
@@ -687,6 +1922,72 @@ class Qualtrics(object):
         # Response does not include answers though
         return self.request("getSurvey", SurveyID=SurveyID, Format=None)
 
+    def _parse_survey_labels(self, SurveyID, xml):
+        """ SurveyLabels from getSurvey result, cached. None if xml is None or not a valid XML document """
+        if xml is None:
+            return None
+        try:
+            labels = SurveyLabels.from_xml(xml)
+        except ET.ParseError as e:
+            self.last_error_message = "Unexpected response from Qualtrics: %s" % e
+            return None
+        self._survey_labels[SurveyID] = labels
+        return labels
+
+    def get_survey_labels(self, SurveyID, refresh=False):
+        """ Choice code -> label maps of survey questions (pyqualtrics.labels.SurveyLabels), parsed from survey
+        definition returned by getSurvey. They are cached, so getSurvey is called once per survey.
+
+        :param SurveyID: ID of the survey
+        :param refresh: Call getSurvey even if labels are cached (survey has been modified)
+        :return: SurveyLabels object, None if error occurs
+        """
+        labels = self._survey_labels.get(SurveyID)
+        if labels is not None and not refresh:
+            self.last_error_message = None
+            return labels
+        return self._parse_survey_labels(SurveyID, self.getSurvey(SurveyID))
+
+    def label_responses(self, SurveyID, responses):
+        """ Labeled copy of responses retrieved by getLegacyResponseData (same as returned with Labels="1"),
+        without retrieving them again
+
+        responses = qualtrics.getLegacyResponseData(SurveyID)
+        labeled = qualtrics.label_responses(SurveyID, responses)
+
+        :param SurveyID: ID of the survey
+        :param responses: {ResponseID: response} dictionary
+        :return: {ResponseID: labeled response} dictionary, None if survey definition can't be retrieved
+        """
+        labels = self.get_survey_labels(SurveyID)
+        if labels is None:
+            return None
+        return labels.label_responses(responses)
+
+    @staticmethod
+    def _parse_response_count(json_response):
+        """ Number of responses from Get Survey (v3) response. Raises KeyError or TypeError if it is mailformed """
+        counts = json_response["result"]["responseCounts"]
+        return int(counts["auditable"]) + int(counts.get("generated") or 0)
+
+    def get_response_count(self, SurveyID):
+        """ Number of recorded responses to a survey (including imported and generated ones), without retrieving them
+        https://api.qualtrics.com/docs/get-survey
+
+        :param SurveyID: ID of the survey
+        :return: number of responses, None if error occurs
+        """
+        result = self.call3("%s/surveys/%s" % (self.api3_url, SurveyID), method="get")
+        if result.value is None:
+            return None
+        try:
+            count = self._parse_response_count(result.json_response)
+        except (ValueError, KeyError, TypeError) as e:
+            self.last_error_message = "Mailformed server response: %s" % e
+            return None
+        self.last_error_message = None
+        return count
+
     def importSurvey(self, ImportFormat, Name, Activate=None, URL=None, FileContents=None, OwnerID=None, **kwargs):
         """
         Import Survey
@@ -768,15 +2069,35 @@ class Qualtrics(object):
             PanelID=None,
             ResponsesInProgress=None,
             LocationData=None,
+            compact=False,
+            export_threshold=None,
             **kwargs):
         """ Returns all of the response data for a survey in the original (legacy) data format.
         https://survey.qualtrics.com/WRAPI/ControlPanel/docs.php#getLegacyResponseData_2.5
 
         :param SurveyID:    The survey you will be getting the responses for.
+        :param compact: Return responses as read-only ResponseRecord objects (pyqualtrics.records) instead of
+                        OrderedDict. They share field names and short values, so they take much less memory
+        :param export_threshold: If the survey has at least that many responses (see get_response_count, Limit is
+                        taken into account), they are retrieved by v3 response export (csv2013 format) and converted
+                        to the same {ResponseID: response} dictionary. Used only if no parameters other than
+                        LastResponseID, Limit, StartDate and EndDate are given. Fields are strings and missing
+                        answers are empty strings, like in exports. If None, legacy_export_threshold is used
         :param kwargs: Additional parameters allowed by getLegacyResponseData API call
         :return:
         """
-        return self.request(
+        export_parameters = self._legacy_export_parameters(
+            export_threshold, dict(kwargs, LastResponseID=LastResponseID, Limit=Limit, ResponseID=ResponseID,
+                                   ResponseSetID=ResponseSetID, SubgroupID=SubgroupID, StartDate=StartDate,
+                                   EndDate=EndDate, Questions=Questions, Labels=Labels, ExportTags=ExportTags,
+                                   ExportQuestionIDs=ExportQuestionIDs, LocalTime=LocalTime,
+                                   UnansweredRecode=UnansweredRecode, PanelID=PanelID,
+                                   ResponsesInProgress=ResponsesInProgress, LocationData=LocationData))
+        if export_parameters is not None and self._use_legacy_export(
+                export_threshold, self.get_response_count(SurveyID), Limit):
+            responses = self._legacy_export(SurveyID, export_parameters)
+            return compact_responses(responses) if compact and responses is not None else responses
+        responses = self.request(
             "getLegacyResponseData",
             SurveyID=SurveyID,
             LastResponseID=LastResponseID,
@@ -796,6 +2117,162 @@ class Qualtrics(object):
             ResponsesInProgress=ResponsesInProgress,
             LocationData=LocationData,
             **kwargs)
+        return compact_responses(responses) if compact else responses
+
+    def _legacy_export_parameters(self, export_threshold, parameters):
+        """ CreateResponseExport parameters equivalent to getLegacyResponseData parameters,
+        None if responses can't (or shouldn't) be retrieved by response export
+        """
+        if export_threshold is None and self.legacy_export_threshold is None:
+            return None
+        export_parameters = dict()
+        for name, value in parameters.items():
+            if value is None or name == "low_memory":
+                continue
+            if name not in LEGACY_EXPORT_PARAMETERS:
+                return None
+            export_parameters[LEGACY_EXPORT_PARAMETERS[name]] = value
+        return export_parameters
+
+    def _use_legacy_export(self, export_threshold, count, Limit):
+        """ Whether response export should be used to retrieve count responses (None if count is not known) """
+        if export_threshold is None:
+            export_threshold = self.legacy_export_threshold
+        if count is None:
+            # Let getLegacyResponseData report the error, if it is not specific to v3 API
+            return False
+        if Limit is not None:
+            count = min(count, int(Limit))
+        return count >= export_threshold
+
+    def _legacy_export(self, SurveyID, export_parameters):
+        """ getLegacyResponseData result retrieved by export_responses """
+        export = self.export_responses(SurveyID, self.CSV2013_FORMAT, **export_parameters)
+        if not export.ok:
+            return None
+        try:
+            responses = self._read_export_responses(export.stream)
+        except EXPORT_STREAM_ERRORS + (ValueError, csv.Error) as e:
+            self.last_error_message = str(e)
+            return None
+        return responses
+
+    @staticmethod
+    def _read_export_responses(fp):
+        """ Read and close CSV export stream """
+        with fp:
+            return OrderedDict(_csv_export_responses(fp))
+
+    def iter_legacy_responses(self, SurveyID, page_size=1000, prefetch=False, **kwargs):
+        """ Iterate over responses to a survey, retrieving them page by page using Limit and LastResponseID
+        parameters of getLegacyResponseData, so only one page (two if prefetch is True) is kept in memory.
+
+        If an API call fails, iteration stops and last_error_message is set.
+        last_error_message is None if all responses have been retrieved.
+
+        for response_id, response in qualtrics.iter_legacy_responses(SurveyID, page_size=500, Labels="1"):
+            ...
+
+        :param SurveyID: The survey you will be getting the responses for.
+        :param page_size: Number of responses retrieved by one API call
+        :param prefetch: Retrieve the next page in background thread while the current one is processed
+        :param kwargs: Additional parameters for getLegacyResponseData (StartDate, Questions, Labels, compact etc)
+        :return: generator of (ResponseID, response) tuples
+        """
+        assert page_size > 0
+        compact = kwargs.pop("compact", False)
+        # Pages are discarded after they have been processed, no need to keep copies of them
+        kwargs.setdefault("low_memory", True)
+        last_response_id = kwargs.pop("LastResponseID", None)
+
+        def fetch(last_response_id):
+            return self.call("getLegacyResponseData", SurveyID=SurveyID, Limit=page_size,
+                             LastResponseID=last_response_id, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(fetch, last_response_id) if prefetch else None
+            while True:
+                result = future.result() if prefetch else fetch(last_response_id)
+                # Make result visible to the calling thread (prefetch is done by another thread)
+                self._store_result(result.without_body() if kwargs["low_memory"] else result)
+                page = result.value
+                if page is None:
+                    return
+                last_page = len(page) < page_size
+                if page:
+                    last_response_id = next(reversed(page))
+                if prefetch and not last_page:
+                    future = executor.submit(fetch, last_response_id)
+                while page:
+                    # Release responses as soon as they have been processed
+                    response_id, response = page.popitem(last=False)
+                    yield response_id, ResponseRecord.from_mapping(response) if compact else response
+                if last_page:
+                    return
+
+    def iter_legacy_response_data(self, SurveyID, chunk_size=65536, compact=False, **kwargs):
+        """ Same as getLegacyResponseData, but responses are parsed one at a time while server response is being
+        downloaded, so neither the response body nor the dictionary of all responses is kept in memory.
+
+        If API call fails, iteration stops and last_error_message is set.
+        last_error_message is None if all responses have been retrieved.
+
+        :param SurveyID: The survey you will be getting the responses for.
+        :param chunk_size: Size of chunks (in bytes) the response body is downloaded in
+        :param compact: Yield responses as ResponseRecord objects instead of OrderedDict
+        :param kwargs: Additional parameters for getLegacyResponseData (Limit, LastResponseID, Labels etc)
+        :return: generator of (ResponseID, response) tuples, in the order returned by Qualtrics
+        """
+        kwargs.pop("low_memory", None)
+        url, params = self._request_url_and_params("getLegacyResponseData", "RS", dict(kwargs, SurveyID=SurveyID))
+        # Body of the response is never kept, so there is no need for low_memory mode
+        result = self._store_result(QualtricsResult())
+        start = default_timer()
+        try:
+            r = self.session.get(url, params=params, stream=True, **self.requests_kwargs)
+        except (ConnectionError, Timeout, TooManyRedirects, HTTPError) as e:
+            result.url = ""
+            result.error_message = str(e)
+            result.elapsed = default_timer() - start
+            return
+        result.url = r.url
+        result.status_code = r.status_code
+        try:
+            if r.status_code != 200:
+                result.value, result.json_response, result.error_message = self._parse_response(
+                    "getLegacyResponseData", r.status_code, r.text, kwargs)
+                return
+            decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")()
+            stream = JsonObjectStream()
+            for chunk in r.iter_content(chunk_size):
+                for key, value in stream.feed(decoder.decode(chunk)):
+                    if key == "Meta":
+                        result.error_message = self._legacy_stream_error(value)
+                        return
+                    yield key, ResponseRecord.from_mapping(value) if compact else value
+            for key, value in stream.feed(decoder.decode(b"", final=True)) + stream.finish():
+                if key == "Meta":
+                    result.error_message = self._legacy_stream_error(value)
+                    return
+                yield key, ResponseRecord.from_mapping(value) if compact else value
+            result.error_message = None
+        except ValueError as e:
+            result.error_message = "Unexpected response from Qualtrics: %s" % e
+        except (ConnectionError, ChunkedEncodingError, Timeout) as e:
+            result.error_message = str(e)
+        finally:
+            r.close()
+            result.elapsed = default_timer() - start
+
+    @staticmethod
+    def _legacy_stream_error(meta):
+        """ Error message for Meta part of getLegacyResponseData response
+        (it is returned instead of responses if request fails)
+        """
+        try:
+            return meta["ErrorMessage"]
+        except (KeyError, TypeError):
+            return "Unexpected response from Qualtrics: no ErrorMessage key in JSON response"
 
     def getResponse(self, SurveyID, ResponseID, **kwargs):
         """ Get data for a single response ResponseID in SurveyID. SurveyID is required by API
@@ -821,6 +2298,74 @@ class Qualtrics(object):
             return None
         return response[ResponseID]
 
+    def getResponses(self, SurveyID, ResponseIDs, compact=False, export_threshold=None, chunk_size=65536, **kwargs):
+        """ Get many responses to a survey with as few API calls as possible. Instead of one getLegacyResponseData
+        call per response, responses of the survey are retrieved by a single call (iter_legacy_response_data),
+        or by response export if the survey is large (see export_threshold), and only requested ones are kept.
+        Retrieval stops as soon as all of them have been found.
+
+        responses = qualtrics.getResponses(SurveyID, response_ids, StartDate="2017-01-01 00:00:00")
+        missing = [response_id for response_id, response in responses.items() if response is None]
+
+        :param SurveyID: The survey you will be getting the responses for.
+        :param ResponseIDs: IDs of responses to retrieve
+        :param compact: Return responses as ResponseRecord objects instead of OrderedDict
+        :param export_threshold: Use response export if the survey has at least that many responses
+        (see getLegacyResponseData). If None, legacy_export_threshold is used
+        :param chunk_size: Size of chunks (in bytes) server response is downloaded in
+        :param kwargs: Additional parameters for getLegacyResponseData. StartDate and EndDate covering requested
+        responses reduce the number of responses retrieved
+        :return: OrderedDict {ResponseID: response} in the order of ResponseIDs. Response is None if the survey has
+        no response with this ID (wrong or deleted one). None if error occurs
+        """
+        responses = OrderedDict((response_id, None) for response_id in ResponseIDs)
+        if len(responses) <= 1:
+            for response_id in responses:
+                found = self.getLegacyResponseData(SurveyID, ResponseID=response_id, compact=compact, **kwargs)
+                if found is None:
+                    return None
+                responses[response_id] = found.get(response_id)
+            self.last_error_message = None
+            return responses
+        export_parameters = self._legacy_export_parameters(export_threshold, kwargs)
+        if export_parameters is not None and self._use_legacy_export(
+                export_threshold, self.get_response_count(SurveyID), kwargs.get("Limit")):
+            export = self.export_responses(SurveyID, self.CSV2013_FORMAT, chunk_size=chunk_size, **export_parameters)
+            if not export.ok:
+                return None
+            try:
+                with export.stream:
+                    complete = self._select_responses(_csv_export_responses(export.stream), responses, compact)
+            except EXPORT_STREAM_ERRORS + (ValueError, csv.Error) as e:
+                self.last_error_message = str(e)
+                return None
+        else:
+            complete = self._select_responses(
+                self.iter_legacy_response_data(SurveyID, chunk_size=chunk_size, **kwargs), responses, compact)
+        if complete:
+            # Retrieval has been stopped early
+            self.last_error_message = None
+        if self.last_error_message is not None:
+            return None
+        return responses
+
+    @staticmethod
+    def _select_responses(items, responses, compact):
+        """ Set values of responses dictionary from (ResponseID, response) items, until all of them are found.
+        Returns True if retrieval of items has been stopped before they ended
+        """
+        remaining = set(responses)
+        for response_id, response in items:
+            if response_id not in remaining:
+                continue
+            responses[response_id] = ResponseRecord.from_mapping(response) if compact else response
+            remaining.discard(response_id)
+            if not remaining:
+                if hasattr(items, "close"):
+                    items.close()
+                return True
+        return False
+
     def importResponses(self, SurveyID,
                         ResponseSetID=None,
                         FileURL=None,
@@ -857,6 +2402,160 @@ class Qualtrics(object):
             return False
         return True
 
+    # Default maximum number of responses and size (in characters, approximately) of CSV file uploaded by a single
+    # importResponses call of import_responses
+    IMPORT_CHUNK_SIZE = 5000
+    IMPORT_CHUNK_BYTES = 4 * 1024 * 1024
+
+    @staticmethod
+    def _response_fields(responses):
+        """ Union of fields of responses, in order of appearance """
+        fields = OrderedDict()
+        for response in responses:
+            for key in response:
+                fields[key] = None
+        return list(fields)
+
+    @classmethod
+    def _responses_to_csv(cls, responses, headers=None):
+        """ CSV file for importResponses. Columns are headers (union of fields of responses if None), responses
+        with other fields raise ValueError. importResponses reads files in the layout of legacy CSV (csv2013)
+        response export: fields are named by the second header row and responses start in the third row, so
+        field names are written in both header rows
+        """
+        if headers is None:
+            headers = cls._response_fields(responses)
+        known = set(headers)
+        fp = StringIO()
+        dictwriter = csv.DictWriter(fp, fieldnames=list(headers), restval="")
+        dictwriter.writeheader()
+        dictwriter.writeheader()
+        for response in responses:
+            unknown = [key for key in response if key not in known]
+            if unknown:
+                raise ValueError("Response fields are not in import headers: %s" % ", ".join(unknown))
+            dictwriter.writerow(response)
+        return fp.getvalue()
+
+    @classmethod
+    def _with_import_headers(cls, chunks, headers):
+        """ Pair (ImportChunk, responses) items with headers, or fields of responses of the first chunk if None,
+        so CSV files of all chunks have the same columns
+        """
+        for chunk, batch in chunks:
+            if headers is None:
+                headers = cls._response_fields(batch)
+            yield chunk, (batch, headers)
+
+    @staticmethod
+    def _import_chunks(result, responses, chunk_size, max_chunk_bytes):
+        """ Split responses (any iterable) into lists of at most chunk_size responses and about max_chunk_bytes
+        characters of CSV data. Yields (ImportChunk, list of responses), ImportChunk is added to result
+        """
+        batch, size, offset = [], 0, 0
+        for response in chain(responses, [None]):
+            if response is not None:
+                # Values and delimiters, quotes are not counted
+                response_size = sum(len(value) if isinstance(value, STR) else len(str(value))
+                                    for value in response.values()) + len(response)
+            if batch and (response is None or len(batch) >= chunk_size or size + response_size > max_chunk_bytes):
+                chunk = ImportChunk(len(result.chunks), offset, len(batch))
+                result.chunks.append(chunk)
+                yield chunk, batch
+                offset += len(batch)
+                batch, size = [], 0
+            if response is not None:
+                batch.append(response)
+                size += response_size
+
+    def import_responses(self, SurveyID, responses, chunk_size=IMPORT_CHUNK_SIZE, max_chunk_bytes=IMPORT_CHUNK_BYTES,
+                         max_workers=4, completed=None, progress=None, headers=None, **kwargs):
+        """ Import many responses (dictionaries, like in importResponsesAsDict) in chunks, uploaded by
+        concurrent importResponses calls. Responses are read from the iterable and converted to CSV one chunk
+        at a time, so at most max_workers + 1 chunks are kept in memory.
+
+        result = qualtrics.import_responses(SurveyID, responses)
+        if not result.ok:
+            # Upload chunks that have failed
+            result = qualtrics.import_responses(SurveyID, responses, completed=result.completed)
+
+        :param SurveyID: The ID of the Survey the responses will be connected to
+        :param responses: iterable of responses (dictionaries). Unless headers are given, columns are fields of
+        responses of the first chunk; chunks with responses with other fields fail
+        :param chunk_size: Maximum number of responses in a chunk
+        :param max_chunk_bytes: Maximum size of a chunk (CSV data, approximately). A response larger than that is
+        uploaded in a chunk of its own
+        :param max_workers: Maximum number of simultaneous importResponses calls
+        :param completed: Indexes of chunks imported before (ResponseImport.completed of interrupted import),
+        they are skipped. Responses and chunk_size/max_chunk_bytes should be the same as in that import
+        :param progress: Function called with ImportChunk when it has been uploaded (or skipped)
+        :param headers: Column names (all responses have the same fields, or only these fields should be imported)
+        :param kwargs: Additional parameters for importResponses (ResponseSetID, IgnoreValidation etc)
+        :return: ResponseImport object. If any chunk has failed, last_error_message is set
+        """
+        result = ResponseImport(SurveyID)
+        self._upload_chunks(
+            self._with_import_headers(self._import_chunks(result, responses, chunk_size, max_chunk_bytes), headers),
+            lambda data: self._responses_to_csv(*data),
+            lambda chunk, contents: self.importResponses(SurveyID, FileContents=contents, **kwargs),
+            max_workers, completed, progress)
+        self.last_error_message = result.error_message
+        return result
+
+    def _upload_chunk(self, upload, chunk, contents):
+        """ Call upload(chunk, contents) and record its outcome in chunk """
+        start = default_timer()
+        if upload(chunk, contents):
+            chunk.status = "imported"
+        else:
+            chunk.status, chunk.error_message = "failed", self.last_error_message
+        chunk.elapsed = default_timer() - start
+        return chunk
+
+    def _upload_chunks(self, chunks, to_contents, upload, max_workers, completed, progress, first=None):
+        """ Upload (ImportChunk, data) items by at most max_workers concurrent upload(chunk, contents) calls.
+        Data is converted by to_contents just before it is uploaded, so at most max_workers + 1 chunks are kept
+        in memory. Chunks with indexes in completed are skipped, chunks to_contents raises ValueError for fail.
+        If first is given, the first chunk is uploaded by it before other chunks are started (they are not uploaded
+        if it fails)
+        """
+        completed = set(completed or ())
+
+        def report(chunk):
+            if progress is not None:
+                progress(chunk)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            uploads = set()
+            for chunk, data in chunks:
+                if chunk.index in completed:
+                    chunk.status = "skipped"
+                    report(chunk)
+                    continue
+                try:
+                    contents = to_contents(data)
+                except ValueError as e:
+                    chunk.status, chunk.error_message = "failed", str(e)
+                    report(chunk)
+                    if first is not None:
+                        break
+                    continue
+                chunk.size = len(contents)
+                del data
+                if first is not None:
+                    report(self._upload_chunk(first, chunk, contents))
+                    if not chunk.ok:
+                        break
+                    first = None
+                    continue
+                while len(uploads) >= max_workers:
+                    done, uploads = wait(uploads, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        report(future.result())
+                uploads.add(executor.submit(self._upload_chunk, upload, chunk, contents))
+            for future in uploads:
+                report(future.result())
+
     def importResponsesAsDict(self, SurveyID, responses,
                         ResponseSetID=None,
                         Delimiter=None,
@@ -868,40 +2567,30 @@ class Qualtrics(object):
         Refer to https://survey.qualtrics.com/WRAPI/ControlPanel/docs.php#importResponses_2.5 for additional info
 
         :param SurveyID:
-        :param responses: list of responses. Each response is represented as a dictionary
+        :param responses: list (or any iterable) of responses. Each response is represented as a dictionary
             [
             {"ResponseID": "R_1234", ...},
             {"ResponseID": "R_1235", "Finished": "1", ...},
             ]
+            Large number of responses is imported in chunks, see import_responses
         :param ResponseSetID: The ID of the response set the responses will be placed in.
         :param Delimiter: Separate values by this character. Default is , (comma)
         :param Enclosure: Allows a value to contain the delimiter. Default is " (quote)
         :param IgnoreValidation: If set to true (1), we will not validate the responses as we import.
         :param DecimalFormat: Decimals delimiter. Possible values are ,(comma) and .(period)
-        :param kwargs: Additional parameters
-        :return:
+        :param kwargs: Additional parameters (chunk_size, max_chunk_bytes, max_workers etc of import_responses)
+        :return: True if all responses have been imported
         """
-        assert(isinstance(responses, list))
-        if len(responses) < 1:
-            return True
-        headers = responses[0].keys()
-        fp = StringIO()
-        dictwriter = csv.DictWriter(fp, fieldnames=headers)
-        dictwriter.writeheader()
-        dictwriter.writeheader()
-        for response in responses:
-            dictwriter.writerow(response)
-
-        contents = fp.getvalue()
-        return self.importResponses(
-            SurveyID=SurveyID,
+        result = self.import_responses(
+            SurveyID,
+            responses,
             ResponseSetID=ResponseSetID,
             Delimiter=Delimiter,
             Enclosure=Enclosure,
             IgnoreValidation=IgnoreValidation,
             DecimalFormat=DecimalFormat,
-            FileContents=contents,
             **kwargs)
+        return result.ok
 
     def updateResponseEmbeddedData(self, SurveyID, ResponseID, ED, **kwargs):
         """
@@ -963,20 +2652,11 @@ class Qualtrics(object):
             **kwargs
         )
 
-    def importPanel(self, LibraryID, Name, CSV, **kwargs):
-        """ Imports a csv file as a new panel (optionally it can append to a previously made panel) into the database
-        and returns the panel id.  The csv file can be posted (there is an approximate 8 megabytes limit)  or a url can
-        be given to retrieve the file from a remote server.
-        The csv file must be comma separated using " for encapsulation.
-
-        https://survey.qualtrics.com/WRAPI/ControlPanel/docs.php#importPanel_2.5
-
-        :param LibraryID:
-        :param Name:
-        :param CSV: contents of CSV file to be imported
-        :return:
+    @staticmethod
+    def _column_header_kwargs(CSV, kwargs):
+        """ Compute Email, FirstName, LastName and ExternalRef column numbers from the header of CSV file
+        (if ColumnHeaders is set and those parameters were not passed explicitly). Updates kwargs in place
         """
-
         if kwargs.get("ColumnHeaders", None) == "1" or kwargs.get("ColumnHeaders", None) == 1:
             fp = StringIO(CSV)
             headers = next(csv.reader(fp))
@@ -990,11 +2670,154 @@ class Qualtrics(object):
                 kwargs["ExternalRef"] = headers.index("ExternalRef") + 1
             fp.close()
 
+    def importPanel(self, LibraryID, Name, CSV, **kwargs):
+        """ Imports a csv file as a new panel (optionally it can append to a previously made panel) into the database
+        and returns the panel id.  The csv file can be posted (there is an approximate 8 megabytes limit)  or a url can
+        be given to retrieve the file from a remote server.
+        The csv file must be comma separated using " for encapsulation.
+        Files larger than PANEL_CHUNK_BYTES (or iterables of lines) are imported in chunks, see import_panel_csv.
+
+        https://survey.qualtrics.com/WRAPI/ControlPanel/docs.php#importPanel_2.5
+
+        :param LibraryID:
+        :param Name:
+        :param CSV: contents of CSV file to be imported (string or iterable of lines, i.e. file object)
+        :return:
+        """
+        if not isinstance(CSV, STR) or len(CSV) > self.PANEL_CHUNK_BYTES:
+            result = self.import_panel_csv(LibraryID, Name, CSV, **kwargs)
+            return result.panel_id if result.ok else None
+
+        self._column_header_kwargs(CSV, kwargs)
+        return self._import_panel(LibraryID, Name, CSV, kwargs)
+
+    def _import_panel(self, LibraryID, Name, CSV, kwargs):
+        """ Single importPanel API call, returns PanelID """
         result = self.request("importPanel", post_data=CSV, LibraryID=LibraryID, Name=Name, **kwargs)
         if result is not None:
             return result["Result"]["PanelID"]
         return None
 
+    # importPanel accepts files up to about 8 megabytes. Default maximum number of panel members and size
+    # (in characters, approximately) of CSV file uploaded by a single importPanel call of import_panel
+    PANEL_CHUNK_SIZE = 50000
+    PANEL_CHUNK_BYTES = 7 * 1024 * 1024
+
+    @staticmethod
+    def _csv_chunks(result, CSV, header, chunk_size, max_chunk_bytes):
+        """ Split CSV file (string or iterable of lines) into files of at most chunk_size rows and about
+        max_chunk_bytes characters, each starting with the header row if header is True.
+        Yields (ImportChunk, CSV string), ImportChunk is added to result
+        """
+        line_fp = StringIO()
+        writer = csv.writer(line_fp)
+
+        def to_line(row):
+            line_fp.seek(0)
+            line_fp.truncate()
+            writer.writerow(row)
+            return line_fp.getvalue()
+
+        rows = csv.reader(StringIO(CSV) if isinstance(CSV, STR) else CSV)
+        header_line = ""
+        if header:
+            header_row = next(rows, None)
+            if header_row is None:
+                return
+            header_line = to_line(header_row)
+        lines, size, offset = [], len(header_line), 0
+        for row in chain(rows, [None]):
+            line = to_line(row) if row is not None else None
+            if lines and (line is None or len(lines) >= chunk_size or size + len(line) > max_chunk_bytes):
+                chunk = ImportChunk(len(result.chunks), offset, len(lines))
+                result.chunks.append(chunk)
+                yield chunk, header_line + "".join(lines)
+                offset += len(lines)
+                lines, size = [], len(header_line)
+            if line is not None:
+                lines.append(line)
+                size += len(line)
+
+    def import_panel_csv(self, LibraryID, Name, CSV, chunk_size=PANEL_CHUNK_SIZE, max_chunk_bytes=PANEL_CHUNK_BYTES,
+                         max_workers=4, PanelID=None, completed=None, progress=None, **kwargs):
+        """ Import a large CSV file as a panel. The file is split into chunks (each with the header row, if
+        ColumnHeaders is "1") uploaded by importPanel: the first chunk creates the panel, remaining ones are appended
+        to it by concurrent calls. The file can be an iterable of lines (i.e. file object), it is read one chunk
+        at a time.
+
+        :param LibraryID:
+        :param Name:
+        :param CSV: contents of CSV file (string or iterable of lines)
+        :param chunk_size: Maximum number of panel members in a chunk
+        :param max_chunk_bytes: Maximum size of a chunk (CSV data, in characters)
+        :param max_workers: Maximum number of simultaneous importPanel calls
+        :param PanelID: Append to this panel instead of creating a new one
+        :param completed: Indexes of chunks imported before (PanelImport.completed of interrupted import, PanelID
+        should be PanelImport.panel_id), they are skipped
+        :param progress: Function called with ImportChunk when it has been uploaded (or skipped)
+        :param kwargs: Additional parameters for importPanel (ColumnHeaders, Email, FirstName etc)
+        :return: PanelImport object (panel_id and outcome of each chunk). If any chunk has failed,
+        last_error_message is set
+        """
+        header = kwargs.get("ColumnHeaders", None) in ("1", 1)
+        # Column numbers (Email etc) are computed from the first chunk, they are the same in all chunks
+        first_chunk = [True]
+
+        def to_contents(text):
+            if first_chunk[0]:
+                self._column_header_kwargs(text, kwargs)
+                first_chunk[0] = False
+            return text
+        result = PanelImport(LibraryID, PanelID)
+        return self._import_panel_chunks(result, Name, self._csv_chunks(result, CSV, header, chunk_size,
+                                                                        max_chunk_bytes),
+                                         to_contents, max_workers, completed, progress, kwargs)
+
+    def import_panel(self, LibraryID, Name, panel, headers=None, chunk_size=PANEL_CHUNK_SIZE,
+                     max_chunk_bytes=PANEL_CHUNK_BYTES, max_workers=4, PanelID=None, completed=None, progress=None,
+                     **kwargs):
+        """ Import panel members (dictionaries, like in importJsonPanel) from any iterable. They are converted to
+        CSV and uploaded in chunks, see import_panel_csv
+
+        result = qualtrics.import_panel(LibraryID, "Roster", members)
+        if not result.ok:
+            result = qualtrics.import_panel(LibraryID, "Roster", members, PanelID=result.panel_id,
+                                            completed=result.completed)
+
+        :param headers: Columns of CSV file (default: Email, FirstName, LastName, ExternalRef)
+        :return: PanelImport object. If any chunk has failed, last_error_message is set
+        """
+        kwargs["ColumnHeaders"] = "1"
+        self._column_header_kwargs(self._panel_to_csv([], headers), kwargs)
+        result = PanelImport(LibraryID, PanelID)
+        return self._import_panel_chunks(result, Name, self._import_chunks(result, panel, chunk_size, max_chunk_bytes),
+                                         lambda batch: self._panel_to_csv(batch, headers), max_workers, completed,
+                                         progress, kwargs, empty=[])
+
+    def _import_panel_chunks(self, result, Name, chunks, to_contents, max_workers, completed, progress, kwargs,
+                             empty=None):
+        """ Upload chunks of panel import, see import_panel_csv. If there are no chunks and empty is given,
+        the panel is created from it
+        """
+        assert result.panel_id is not None or not completed, "PanelID is required to resume panel import"
+
+        def create(chunk, contents):
+            result.panel_id = self._import_panel(result.library_id, Name, contents, kwargs)
+            return result.panel_id is not None
+
+        def append(chunk, contents):
+            return self._import_panel(result.library_id, Name, contents, dict(kwargs, PanelID=result.panel_id))
+
+        self._upload_chunks(chunks, to_contents, append, max_workers, completed, progress,
+                            first=create if result.panel_id is None else None)
+        if empty is not None and not result.chunks and result.panel_id is None:
+            # Empty panel
+            chunk = ImportChunk(0, 0, 0)
+            result.chunks.append(chunk)
+            self._upload_chunks([(chunk, empty)], to_contents, append, 1, None, progress, first=create)
+        self.last_error_message = result.error_message
+        return result
+
     def importContacts(self, LibraryID, Name, CSV, **kwargs):
         """ Asynchronously imports a csv file into your directory
         (optionally it can create a new list or append to an existing list).
@@ -1011,38 +2834,230 @@ class Qualtrics(object):
         :return:
         """
 
-        if kwargs.get("ColumnHeaders", None) == "1" or kwargs.get("ColumnHeaders", None) == 1:
-            fp = StringIO(CSV)
-            headers = csv.reader(fp).next()
-            if "Email" in headers and "Email" not in kwargs:
-                kwargs["Email"] = headers.index("Email") + 1
-            if "FirstName" in headers and "FirstName" not in kwargs:
-                kwargs["FirstName"] = headers.index("FirstName") + 1
-            if "LastName" in headers and "LastName" not in kwargs:
-                kwargs["LastName"] = headers.index("LastName") + 1
-            if "ExternalRef" in headers and "ExternalRef" not in kwargs:
-                kwargs["ExternalRef"] = headers.index("ExternalRef") + 1
-            fp.close()
+        if not isinstance(CSV, STR) or len(CSV) > self.CONTACTS_CHUNK_BYTES:
+            result = self.import_contacts(LibraryID, Name, CSV, **kwargs)
+            return result.list_id if result.ok else None
+
+        self._column_header_kwargs(CSV, kwargs)
 
         result = self.request("importContacts", Product="TA", post_data=CSV, LibraryID=LibraryID, Name=Name, **kwargs)
         if result is not None:
             return result["Result"]["ListID"]
         return None
 
-    def importJsonPanel(self, LibraryID, Name, panel, headers=None, **kwargs):
-        """ Import JSON document as a new panel. Example document:
-        [
-        {"Email": "pyqualtrics@gmail.com", "FirstName": "PyQualtrics", "LastName": "Library"},
-        {"Email": "pyqualtrics+2@gmail.com", "FirstName": "PyQualtrics2", "LastName": "Library2"}
-        ]
+    def checkImportContactsStatus(self, LibraryID, JobID, **kwargs):
+        """ Check the status of contacts import job started by importContacts
+
+        https://survey.qualtrics.com/WRAPI/Contacts/docs.php#checkImportContactsStatus_2.3
 
         :param LibraryID:
-        :param Name:
-        :param panel:
-        :param kwargs:
-        :param headers:
-        :return:
+        :param JobID: ID of the import job
+        :return: dictionary with Status, PercentComplete and numbers of CreatedContacts, UpdatedContacts and
+        FailedContacts. None if error occurs
+        """
+        result = self.request("checkImportContactsStatus", Product="TA", LibraryID=LibraryID, JobID=JobID, **kwargs)
+        if result is not None:
+            return result["Result"]
+        return None
+
+    # importContacts accepts files up to about 50 megabytes. Default maximum number of contacts and size
+    # (in characters, approximately) of CSV file uploaded by a single importContacts call of import_contacts
+    CONTACTS_CHUNK_SIZE = 250000
+    CONTACTS_CHUNK_BYTES = 45 * 1024 * 1024
+
+    @staticmethod
+    def _parse_contacts_import_status(status):
+        """ (finished, percent, counts or error message) from checkImportContactsStatus result.
+        Raises KeyError, TypeError or ValueError if it is malformed
+        """
+        state = status["Status"]
+        if state.lower() in ("complete", "completed"):
+            return True, 100.0, dict((name, int(status.get(key) or 0)) for name, key in (
+                ("created", "CreatedContacts"), ("updated", "UpdatedContacts"), ("failed", "FailedContacts")))
+        if state.lower() in ("failed", "error"):
+            return True, float(status.get("PercentComplete") or 0), "Contacts import job has failed: %s" % (
+                status.get("ErrorMessage") or state)
+        return False, float(status.get("PercentComplete") or 0), None
+
+    def _import_contacts_chunk(self, LibraryID, Name, contents, kwargs):
+        """ importContacts call, returns (ListID, JobID) or (None, None) """
+        result = self.request("importContacts", Product="TA", post_data=contents, LibraryID=LibraryID, Name=Name,
+                              **kwargs)
+        if result is None:
+            return None, None
+        return result["Result"]["ListID"], result["Result"].get("JobID")
+
+    def _contacts_import_progress(self, chunk, LibraryID, schedule, deadline):
+        """ Check status of the import job of the chunk (checkImportContactsStatus). When the job has finished,
+        chunk status is set ("imported" with counts, or "failed" with error_message)
+
+        :return: seconds to wait before the next check, None if the job has finished
+        """
+        status = self.checkImportContactsStatus(LibraryID, chunk.job_id)
+        return self._contacts_import_status(chunk, schedule, deadline, status, self.last_error_message)
+
+    @classmethod
+    def _contacts_import_status(cls, chunk, schedule, deadline, status, error_message):
+        """ Update chunk with checkImportContactsStatus result (None if the call has failed with error_message),
+        see _contacts_import_progress
+        """
+        if status is None:
+            chunk.status, chunk.error_message = "failed", error_message
+            return None
+        try:
+            finished, percent, outcome = cls._parse_contacts_import_status(status)
+        except (KeyError, TypeError, ValueError) as e:
+            chunk.status, chunk.error_message = "failed", "Mailformed server response: %s" % e
+            return None
+        if finished and isinstance(outcome, dict):
+            chunk.status, chunk.counts = "imported", outcome
+            return None
+        if finished:
+            chunk.status, chunk.error_message = "failed", outcome
+            return None
+        interval = schedule.next_interval(default_timer(), percent)
+        if deadline is not None and default_timer() + interval > deadline:
+            chunk.status = "failed"
+            chunk.error_message = "Contacts import job %s has not completed in time" % chunk.job_id
+            return None
+        return interval
+
+    @staticmethod
+    def _contacts_import_started(chunk, pending, min_poll_interval, max_poll_interval):
+        """ Chunk has been uploaded (or failed): its job is added to pending {ImportChunk: [_PollSchedule, time of
+        the next checkImportContactsStatus call]}. Returns True if the chunk is done already
+        """
+        if chunk.status == "failed":
+            return True
+        if chunk.job_id is None:
+            # Import has been done synchronously
+            chunk.status = "imported"
+            return True
+        pending[chunk] = [_PollSchedule(min_poll_interval, max_poll_interval), default_timer()]
+        return False
+
+    @staticmethod
+    def _next_poll(pending):
+        """ Seconds until the next status check of pending jobs is due, None if there are none """
+        if not pending:
+            return None
+        return max(0, min(due for schedule, due in pending.values()) - default_timer())
+
+    def import_contacts(self, LibraryID, Name, CSV=None, filename=None, ListID=None, chunk_size=CONTACTS_CHUNK_SIZE,
+                        max_chunk_bytes=CONTACTS_CHUNK_BYTES, max_workers=4, timeout=None, min_poll_interval=0.5,
+                        max_poll_interval=30, completed=None, progress=None, **kwargs):
+        """ Import contacts from a large CSV file (or iterable of lines) and wait until they have been imported.
+        The file is split into chunks (each with the header row) imported by importContacts: the first one creates
+        the list (unless ListID is given), remaining ones are appended to it by concurrent calls as soon as the list
+        exists. Import jobs of all chunks are polled (checkImportContactsStatus) from one loop, each more often when
+        it is about to complete and less often when it does not progress. The file is read one chunk at a time.
+
+        result = qualtrics.import_contacts(LibraryID, "Contacts", filename="contacts.csv", timeout=3600)
+        print(result.created, result.updated, result.failed_contacts, result.error_message)
+
+        :param LibraryID:
+        :param Name: Name of the new list
+        :param CSV: contents of CSV file (string or iterable of lines, i.e. file object)
+        :param filename: Name of CSV file (instead of CSV)
+        :param ListID: Append to this list instead of creating a new one
+        :param chunk_size: Maximum number of contacts in a chunk
+        :param max_chunk_bytes: Maximum size of a chunk (CSV data, in characters)
+        :param max_workers: Maximum number of simultaneous importContacts calls (uploads). Jobs of uploaded chunks
+        are not counted, they run on the server
+        :param timeout: Seconds to wait for all jobs to complete
+        :param min_poll_interval: Minimum seconds between checkImportContactsStatus calls for a job
+        :param max_poll_interval: Maximum seconds between checkImportContactsStatus calls for a job
+        :param completed: Indexes of chunks imported before (ContactsImport.completed of interrupted import, ListID
+        should be ContactsImport.list_id), they are skipped
+        :param progress: Function called with ImportChunk when its job has finished (or it is skipped)
+        :param kwargs: Additional parameters for importContacts
+        :return: ContactsImport object (list_id, created/updated/failed_contacts counts and outcome of each chunk).
+        If any chunk has failed, last_error_message is set
         """
+        assert (CSV is None) != (filename is None), "Either CSV or filename should be given"
+        assert ListID is not None or not completed, "ListID is required to resume contacts import"
+        if filename is not None:
+            with io.open(filename, encoding="utf-8", newline="") as fp:
+                return self.import_contacts(LibraryID, Name, fp, ListID=ListID, chunk_size=chunk_size,
+                                            max_chunk_bytes=max_chunk_bytes, max_workers=max_workers,
+                                            timeout=timeout, min_poll_interval=min_poll_interval,
+                                            max_poll_interval=max_poll_interval, completed=completed,
+                                            progress=progress, **kwargs)
+        deadline = default_timer() + timeout if timeout is not None else None
+        result = ContactsImport(LibraryID, ListID)
+        completed = set(completed or ())
+        # chunk: [_PollSchedule, time of the next checkImportContactsStatus call]
+        pending = OrderedDict()
+
+        def report(chunk):
+            if progress is not None:
+                progress(chunk)
+
+        def upload(chunk, contents):
+            """ Start import job of the chunk. The first one creates the list """
+            start = default_timer()
+            parameters = kwargs if result.list_id is None else dict(kwargs, ListID=result.list_id)
+            list_id, chunk.job_id = self._import_contacts_chunk(LibraryID, Name, contents, parameters)
+            chunk.elapsed = default_timer() - start
+            if list_id is None:
+                chunk.status, chunk.error_message = "failed", self.last_error_message
+            else:
+                result.list_id = list_id
+            return chunk
+
+        def started(chunk):
+            if self._contacts_import_started(chunk, pending, min_poll_interval, max_poll_interval):
+                report(chunk)
+
+        def poll(uploads):
+            """ Check jobs that are due, then wait for an upload to complete or for the next check """
+            now = default_timer()
+            for chunk in [chunk for chunk, (schedule, due) in pending.items() if due <= now]:
+                interval = self._contacts_import_progress(chunk, LibraryID, pending[chunk][0], deadline)
+                if interval is None:
+                    del pending[chunk]
+                    report(chunk)
+                else:
+                    pending[chunk][1] = default_timer() + interval
+            wait_time = self._next_poll(pending)
+            if uploads:
+                done, uploads = wait(uploads, timeout=wait_time, return_when=FIRST_COMPLETED)
+                for future in done:
+                    started(future.result())
+            elif wait_time is not None:
+                time.sleep(wait_time)
+            return uploads
+
+        column_headers = False
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            uploads = set()
+            for chunk, contents in self._csv_chunks(result, CSV, True, chunk_size, max_chunk_bytes):
+                if chunk.index in completed:
+                    chunk.status = "skipped"
+                    report(chunk)
+                    continue
+                if not column_headers:
+                    # Column numbers (Email etc) are computed from the first chunk, they are the same in all chunks
+                    self._column_header_kwargs(contents, kwargs)
+                    column_headers = True
+                chunk.size = len(contents)
+                if result.list_id is None:
+                    # The first chunk creates the list, other chunks are not uploaded if it fails
+                    started(upload(chunk, contents))
+                    if result.list_id is None:
+                        break
+                    continue
+                while len(uploads) >= max_workers:
+                    uploads = poll(uploads)
+                uploads.add(executor.submit(upload, chunk, contents))
+                del contents
+            while uploads or pending:
+                uploads = poll(uploads)
+        self.last_error_message = result.error_message
+        return result
+
+    @staticmethod
+    def _panel_to_csv(panel, headers=None):
         if headers is None:
             headers = ["Email", "FirstName", "LastName", "ExternalRef"]
         fp = StringIO()
@@ -1050,14 +3065,24 @@ class Qualtrics(object):
         dictwriter.writeheader()
         for subject in panel:
             dictwriter.writerow(subject)
+        return fp.getvalue()
+
+    def importJsonPanel(self, LibraryID, Name, panel, headers=None, **kwargs):
+        """ Import JSON document as a new panel. Example document:
+        [
+        {"Email": "pyqualtrics@gmail.com", "FirstName": "PyQualtrics", "LastName": "Library"},
+        {"Email": "pyqualtrics+2@gmail.com", "FirstName": "PyQualtrics2", "LastName": "Library2"}
+        ]
 
-        contents = fp.getvalue()
-        return self.importPanel(LibraryID=LibraryID,
-                                Name=Name,
-                                CSV=contents,
-                                ColumnHeaders="1",
-                                **kwargs
-                                )
+        :param LibraryID:
+        :param Name:
+        :param panel: list (or any iterable) of panel members. Large panels are imported in chunks, see import_panel
+        :param kwargs: Additional parameters (PanelID, chunk_size, max_workers etc of import_panel)
+        :param headers:
+        :return: PanelID, None if error occurs
+        """
+        result = self.import_panel(LibraryID, Name, panel, headers=headers, **kwargs)
+        return result.panel_id if result.ok else None
 
     def getSingleResponseHTML(self, SurveyID, ResponseID, **kwargs):
         """ Return response in html format (generated by Qualtrics)
@@ -1069,13 +3094,14 @@ class Qualtrics(object):
         :param kwargs:     Addition parameters
         :return:  html response as a string
         """
-        if not self.request("getSingleResponseHTML",
-                            SurveyID=SurveyID,
-                            ResponseID=ResponseID,
-                            **kwargs):
+        result = self.request("getSingleResponseHTML",
+                              SurveyID=SurveyID,
+                              ResponseID=ResponseID,
+                              **kwargs)
+        if not result:
             return None
 
-        return self.json_response["Result"]
+        return result["Result"]
 
     def getAllSubscriptions(self):
         """ Allows a 3rd party to check the status of all their subscriptions.
@@ -1149,19 +3175,131 @@ class Qualtrics(object):
         if recipient_id is None:
             # last_error_message is set by addRecipient function
             return None
+        link, error = self._survey_link(SurveyID, DistributionID, recipient_id)
+        if link is None:
+            self.last_error_message = error
+        return link
+
+    @staticmethod
+    def _survey_link(SurveyID, DistributionID, RecipientID):
+        """ Unique survey link for a recipient
+        :return: tuple (link, error message)
+        """
         if "_" not in SurveyID:
-            self.last_error_message = "Invalid SurveyID format (must be SV_xxxxxxxxxx)"
-            return None
+            return None, "Invalid SurveyID format (must be SV_xxxxxxxxxx)"
 
         if "_" not in DistributionID:
-            self.last_error_message = "Invalid DistributionID format (must be EMD_xxxxxxxxxx)"
-            return None
+            return None, "Invalid DistributionID format (must be EMD_xxxxxxxxxx)"
 
-        link = DistributionID.split("_")[1] + "_" + SurveyID.split("_")[1] + "_" + recipient_id
+        link = DistributionID.split("_")[1] + "_" + SurveyID.split("_")[1] + "_" + RecipientID
 
         link = "http://new.qualtrics.com/SE?Q_DL=%s" % link
 
-        return link
+        return link, None
+
+    # Fields of getPanel results corresponding to columns of importPanel file, other columns are embedded data
+    PANEL_MEMBER_FIELDS = {"Email": "Email", "FirstName": "FirstName", "LastName": "LastName",
+                           "ExternalRef": "ExternalDataReference"}
+
+    @classmethod
+    def _panel_member_key(cls, member, headers, recipient=False):
+        """ Values of columns (headers) of a panel member as they are written to CSV file, to match members
+        retrieved by getPanel (recipient=True) to imported ones. Values are stripped and lowercased, since
+        Qualtrics may normalize them (e.g. emails)
+        """
+        if recipient:
+            embedded_data = member.get("EmbeddedData") or {}
+            values = [member.get(cls.PANEL_MEMBER_FIELDS[name]) if name in cls.PANEL_MEMBER_FIELDS
+                      else embedded_data.get(name) for name in headers]
+        else:
+            values = [member.get(name) for name in headers]
+        return tuple("" if value is None else ("%s" % value).strip().lower() for value in values)
+
+    @staticmethod
+    def _iter_recipient_pages(get_page, LibraryID, PanelID, page_size, **kwargs):
+        """ Iterate over pages of panel (or list) members retrieved by get_page - getPanel or getListContacts
+        (LastRecipientID and NumberOfRecords). If an API call fails, None is generated and iteration stops
+        """
+        last_recipient_id = None
+        while True:
+            page = get_page(LibraryID, PanelID, LastRecipientID=last_recipient_id, NumberOfRecords=page_size,
+                            **kwargs)
+            yield page
+            if page is None or len(page) < page_size:
+                return
+            last_recipient_id = page[-1]["RecipientID"]
+
+    def generate_unique_survey_links(self, SurveyID, LibraryID, PanelID, DistributionID, people, headers=None,
+                                     Name="Unique survey links", page_size=10000, **kwargs):
+        """ Generate unique survey links for many people. Unlike generate_unique_survey_link (one addRecipient call
+        per person), people are added to the panel in large chunks by import_panel. Panel members are then
+        retrieved page by page by getPanel, matched to the imported people by values of all imported columns
+        (ignoring case and surrounding whitespace; identical people get different links) and links are computed
+        locally.
+
+        for person, link in qualtrics.generate_unique_survey_links(SurveyID, LibraryID, PanelID, DistributionID,
+                                                                   people, headers=["Email", "FirstName", "Group"]):
+            ...
+
+        :param SurveyID:
+        :param LibraryID:
+        :param PanelID: Panel the people are added to. If None, a new panel is created
+        :param DistributionID:
+        :param people: iterable of dictionaries with Email, FirstName, LastName, ExternalRef and embedded data
+        (like in importJsonPanel). All of them are kept in memory until their links have been generated
+        :param headers: Columns of imported CSV file, embedded data fields have to be listed
+        (default: Email, FirstName, LastName, ExternalRef)
+        :param Name: Name of the new panel (if PanelID is None)
+        :param page_size: Number of panel members retrieved by one getPanel call
+        :param kwargs: Additional parameters for import_panel (chunk_size, max_workers etc)
+        :return: generator of (person, link) tuples, in order of panel members. People that have not been added
+        to the panel are generated at the end with None link and last_error_message is set
+        """
+        assert isinstance(SurveyID, STR)
+        assert isinstance(DistributionID, STR)
+        _, error = self._survey_link(SurveyID, DistributionID, "")
+        if error is not None:
+            self.last_error_message = error
+            return
+        if headers is None:
+            headers = ["Email", "FirstName", "LastName", "ExternalRef"]
+        existing = set()
+        if PanelID is not None:
+            # Members added before are not matched
+            for page in self._iter_recipient_pages(self.getPanel, LibraryID, PanelID, page_size):
+                if page is None:
+                    return
+                existing.update(member["RecipientID"] for member in page)
+        pending = collections.defaultdict(collections.deque)
+
+        def remember(people):
+            for person in people:
+                pending[self._panel_member_key(person, headers)].append(person)
+                yield person
+
+        result = self.import_panel(LibraryID, Name, remember(people), headers=headers, PanelID=PanelID, **kwargs)
+        error = result.error_message
+        if result.panel_id is not None:
+            embedded_data = ",".join(name for name in headers if name not in self.PANEL_MEMBER_FIELDS) or None
+            for page in self._iter_recipient_pages(self.getPanel, LibraryID, result.panel_id, page_size,
+                                                   EmbeddedData=embedded_data):
+                if page is None:
+                    error = error or self.last_error_message
+                    break
+                for member in page:
+                    if member["RecipientID"] in existing:
+                        continue
+                    people = pending.get(self._panel_member_key(member, headers, recipient=True))
+                    if people:
+                        yield people.popleft(), self._survey_link(SurveyID, DistributionID, member["RecipientID"])[0]
+        missing = 0
+        for people in pending.values():
+            while people:
+                missing += 1
+                yield people.popleft(), None
+        if missing and error is None:
+            error = "%d people have not been found in the panel" % missing
+        self.last_error_message = error
 
     def getListContacts(self, LibraryID, ListID, EmbeddedData=None, ContactHistory=None, LastRecipientID=None, NumberOfRecords=None,
                  ExportLanguage=None, Unsubscribed=None, Subscribed=None, **kwargs):
@@ -1179,21 +3317,20 @@ class Qualtrics(object):
         :param Subscribed:  If 1 then only subscribed list members will be returned
         :return: list of list members as dictionaries
         """
-        if not self.request("getListContacts",
-                            Product='TA',
-                            LibraryID=LibraryID,
-                            ListID=ListID,
-                            EmbeddedData=EmbeddedData,
-                            ContactHistory=ContactHistory,
-                            LastRecipientID=LastRecipientID,
-                            NumberOfRecords=NumberOfRecords,
-                            ExportLanguage=ExportLanguage,
-                            Unsubscribed=Unsubscribed,
-                            Subscribed=Subscribed,
-                            **kwargs):
-            print(self.last_error_message)
-            return None
-        return self.json_response
+        result = self.request("getListContacts",
+                              Product='TA',
+                              LibraryID=LibraryID,
+                              ListID=ListID,
+                              EmbeddedData=EmbeddedData,
+                              ContactHistory=ContactHistory,
+                              LastRecipientID=LastRecipientID,
+                              NumberOfRecords=NumberOfRecords,
+                              ExportLanguage=ExportLanguage,
+                              Unsubscribed=Unsubscribed,
+                              Subscribed=Subscribed,
+                              **kwargs)
+        # last_error_message is set by request function
+        return result
 
     def removeContact(self, LibraryID, ListID, RecipientID, **kwargs):
         """ Remove contact from the specified list
@@ -1203,35 +3340,121 @@ class Qualtrics(object):
         :param LibraryID: The library id for this panel
         :param ListID:     The list id you want to export
         :param RecipientID: The id of the contact who is to be removed
-        :return: success or failure
+        :return: server response if contact has been removed, None if error occurs (last_error_message is set)
         """
-        if not self.request("removeContact",
+        return self.request("removeContact",
                             Product='TA',
                             LibraryID=LibraryID,
                             ListID=ListID,
                             RecipientID=RecipientID,
-                            **kwargs):
-            print(self.last_error_message)
-            return None
-        return self.json_response
+                            **kwargs)
+
+    @staticmethod
+    def _transient_failure(result):
+        """ Whether failed API call can be retried: network error, rate limiting or server error """
+        return result.status_code is None or result.status_code == 429 or result.status_code >= 500
+
+    def _list_recipient_ids(self, LibraryID, ListID, page_size):
+        """ IDs of all contacts of the list, retrieved page by page. None if error occurs """
+        recipient_ids = []
+        for page in self._iter_recipient_pages(self.getListContacts, LibraryID, ListID, page_size):
+            if page is None:
+                return None
+            recipient_ids.extend(contact["RecipientID"] for contact in page)
+        return recipient_ids
+
+    def _remove_contact(self, LibraryID, ListID, contact, limiter, max_retries, retry_delay):
+        """ removeContact call (retried after transient failures), its outcome is recorded in contact """
+        start = default_timer()
+        while True:
+            time.sleep(limiter.delay(default_timer()))
+            result = self.call("removeContact", Product="TA", LibraryID=LibraryID, ListID=ListID,
+                               RecipientID=contact.recipient_id, low_memory=True)
+            contact.attempts += 1
+            contact.status_code = result.status_code
+            if result.ok:
+                contact.status, contact.error_message = "removed", None
+                break
+            contact.status, contact.error_message = "failed", result.error_message
+            if contact.attempts > max_retries or not self._transient_failure(result):
+                break
+            time.sleep(retry_delay * 2 ** (contact.attempts - 1))
+        contact.elapsed = default_timer() - start
+        return contact
+
+    def remove_contacts(self, LibraryID, ListID, RecipientIDs=None, max_workers=8, rate_limit=None, max_retries=3,
+                        retry_delay=1.0, progress=None, page_size=10000, recreate_threshold=None):
+        """ Remove many contacts from the list by concurrent removeContact calls. Calls failed because of network
+        errors, rate limiting (HTTP 429) or server errors (HTTP 5xx) are retried with exponential backoff.
+
+        result = qualtrics.remove_contacts(LibraryID, ListID, max_workers=16, rate_limit=50)
+        if not result.ok:
+            result = qualtrics.remove_contacts(LibraryID, ListID, [c.recipient_id for c in result.failed])
 
-    def truncate_contact_list(self, LibraryID, ListID):
-        """ Removes all contacts from list but keeps existing list
+        :param LibraryID:
+        :param ListID:
+        :param RecipientIDs: IDs of contacts to be removed (any iterable). If None, all contacts of the list are
+        removed (their IDs are retrieved by getListContacts before the first one is removed)
+        :param max_workers: Maximum number of simultaneous removeContact calls
+        :param rate_limit: Maximum number of removeContact calls started per second (all workers together)
+        :param max_retries: Maximum number of retries of a call after transient failures
+        :param retry_delay: Seconds before the first retry, doubled after each one
+        :param progress: Function called with ContactRemoval object when a contact has been removed (or failed)
+        :param page_size: Number of contacts retrieved by one getListContacts call
+        :param recreate_threshold: If all contacts are removed and there are more than that, nothing is removed and
+        result.recreate is True: deleting the list and creating a new one takes a few API calls instead of one per
+        contact (but the list gets a new ListID)
+        :return: ContactsRemoval object (ContactRemoval object of each contact). None if contacts of the list can't
+        be retrieved. If any contact has not been removed, last_error_message is set
+        """
+        result = ContactsRemoval(LibraryID, ListID)
+        if RecipientIDs is None:
+            RecipientIDs = self._list_recipient_ids(LibraryID, ListID, page_size)
+            if RecipientIDs is None:
+                return None
+            if recreate_threshold is not None and len(RecipientIDs) > recreate_threshold:
+                result.contacts = [ContactRemoval(recipient_id) for recipient_id in RecipientIDs]
+                result.recreate = True
+                self.last_error_message = result.error_message
+                return result
+        limiter = _RateLimiter(rate_limit)
+
+        def report(contact):
+            if progress is not None:
+                progress(contact)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            removals = set()
+            for recipient_id in RecipientIDs:
+                contact = ContactRemoval(recipient_id)
+                result.contacts.append(contact)
+                while len(removals) >= max_workers:
+                    done, removals = wait(removals, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        report(future.result())
+                removals.add(executor.submit(self._remove_contact, LibraryID, ListID, contact, limiter,
+                                             max_retries, retry_delay))
+            for future in removals:
+                report(future.result())
+        self.last_error_message = result.error_message
+        return result
+
+    @staticmethod
+    def _check_truncate_parameters(kwargs):
+        if "recreate_threshold" in kwargs:
+            raise TypeError("truncate_contact_list does not support recreate_threshold, use remove_contacts and "
+                            "check result.recreate")
+
+    def truncate_contact_list(self, LibraryID, ListID, **kwargs):
+        """ Removes all contacts from list but keeps existing list. See remove_contacts
         :param LibraryID: The library id for this panel
         :param ListID:     The list id you want to export
-        :return success or failure
+        :param kwargs: Additional parameters for remove_contacts (max_workers, rate_limit, progress etc).
+        recreate_threshold is not supported: its outcome can't be told from failed removals, use remove_contacts
+        :return tuple (success, IDs of contacts that have not been removed). If it fails, last_error_message is set
         """
-        list_of_contacts = self.getListContacts(LibraryID=LibraryID, ListID=ListID)
-        failures = []
-        if list_of_contacts:
-            for contact in list_of_contacts:
-                RecipientID = contact['RecipientID']
-                try:
-                    self.removeContact(LibraryID=LibraryID, ListID=ListID, RecipientID=RecipientID)
-                except Exception as e:
-                    # print e
-                    failures.append(RecipientID)
-        if failures:
-            return True, []
-        else:
-            return False, failures
+        self._check_truncate_parameters(kwargs)
+        result = self.remove_contacts(LibraryID, ListID, **kwargs)
+        if result is None:
+            return False, []
+        return result.ok, [contact.recipient_id for contact in result.failed]
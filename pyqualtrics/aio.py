@@ -0,0 +1,1453 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" asyncio version of Qualtrics API (Python 3.7+, requires aiohttp library)
+
+async with AsyncQualtrics(user, token) as qualtrics:
+    panels = await asyncio.gather(*[qualtrics.getPanel(LibraryID, PanelID) for PanelID in panel_ids])
+"""
+
+import asyncio
+import codecs
+import collections
+import contextlib
+import contextvars
+import csv
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from timeit import default_timer
+from zipfile import BadZipfile
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from pyqualtrics import (ContactRemoval, ContactsImport, ContactsRemoval, ImportChunk, PanelImport, Qualtrics,
+                         QualtricsResult, ResponseExport, ResponseImport, STR, _PollSchedule, _RateLimiter,
+                         _csv_export_responses)
+from pyqualtrics.jsonstream import JsonObjectStream
+from pyqualtrics.records import ResponseRecord, compact_responses
+from pyqualtrics.zipstream import ZipStreamDecoder
+
+
+class AsyncResponse(object):
+    """ Completely read HTTP response returned by AsyncQualtrics.request3
+    (has the same attributes as requests.Response object that are used by this library)
+    """
+    def __init__(self, status_code, url, content, encoding="utf-8"):
+        self.status_code = status_code
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class _QueueWriter(object):
+    """ File-like object passing downloaded chunks to asyncio.Queue (waits if the queue is full) """
+    def __init__(self, queue):
+        self.queue = queue
+
+    def write(self, data):
+        return self.queue.put(data)
+
+
+class AsyncResponseExportStream(object):
+    """ Text of the file in response export archive, decompressed while the archive is being downloaded
+    (returned by AsyncQualtrics.GetResponseExportStream). read() returns the next piece of text, "" at the end
+    of file; the stream can be iterated with async for. Download errors are raised by read() as IOError, truncated
+    or corrupted archive as BadZipfile. Close the stream to stop the download.
+    """
+    def __init__(self, qualtrics, queue, task, decoder, text_decoder, text):
+        self.name = decoder.name        # Name of the file in archive
+        self._qualtrics = qualtrics
+        self._queue = queue
+        self._task = task
+        self._decoder = decoder
+        self._text_decoder = text_decoder
+        self._pending = text
+        self._finished = False
+
+    async def read(self):
+        if self._pending:
+            text, self._pending = self._pending, ""
+            return text
+        while not self._finished:
+            chunk = await self._queue.get()
+            if chunk is None:
+                self._finished = True
+                result = await self._task
+                # Task has its own context, make result visible to the caller
+                self._qualtrics._store_result(result)
+                if result.value is None:
+                    raise IOError(result.error_message)
+                return self._text_decoder.decode(self._decoder.finish(), final=True)
+            data = self._decoder.feed(chunk)
+            text = self._text_decoder.decode(data) if data else ""
+            if text:
+                return text
+        return ""
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        text = await self.read()
+        if not text:
+            raise StopAsyncIteration
+        return text
+
+    def close(self):
+        self._finished = True
+        if not self._task.done():
+            self._task.cancel()
+            # Make room for the end marker put by cancelled download
+            while not self._queue.empty():
+                self._queue.get_nowait()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _CsvRowSplitter(object):
+    """ Parses CSV text that arrives in arbitrary pieces. Quoted values can contain line breaks,
+    so a line completes a row only when the number of quote characters seen so far is even.
+    """
+    def __init__(self, delimiter):
+        self.delimiter = delimiter
+        self._pending = ""
+        self._lines = []
+        self._complete = 0
+        self._quotes = 0
+
+    def feed(self, text):
+        """ :return: list of rows completed by text """
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._lines.append(line + "\n")
+            self._quotes += line.count('"')
+            if self._quotes % 2 == 0:
+                self._complete = len(self._lines)
+        rows = list(csv.reader(self._lines[:self._complete], delimiter=self.delimiter))
+        self._lines = self._lines[self._complete:]
+        self._complete = 0
+        return rows
+
+    def finish(self):
+        """ :return: list of remaining rows """
+        lines = self._lines + ([self._pending] if self._pending else [])
+        self._lines, self._pending = [], ""
+        return list(csv.reader(lines, delimiter=self.delimiter))
+
+
+class AsyncQualtrics(Qualtrics):
+    """ Awaitable version of Qualtrics class. All API calls are coroutines, parameters, return values and
+    error handling (last_error_message etc) are the same as in Qualtrics class.
+
+    last_result and last_* attributes are kept per asyncio task (in contextvars), so concurrent API calls
+    made by different tasks do not overwrite each other's errors.
+    """
+    # Additional options passed to aiohttp.ClientSession.request, for example {"ssl": False}
+    aiohttp_kwargs = dict()
+
+    def __init__(self, user=None, token=None, api_version="2.5", pool_maxsize=100, keep_alive=True,
+                 pool_idle_timeout=None, **kwargs):
+        """
+        :param pool_maxsize: Maximum number of simultaneous connections
+        :param keep_alive: Reuse connections between API calls
+        :param pool_idle_timeout: Seconds to keep idle connection open (aiohttp default is used if None)
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncQualtrics requires aiohttp library (pip install aiohttp)")
+        super(AsyncQualtrics, self).__init__(user, token, api_version, pool_maxsize=pool_maxsize,
+                                             keep_alive=keep_alive, pool_idle_timeout=pool_idle_timeout, **kwargs)
+        self._client = None
+        self._context_result = contextvars.ContextVar("pyqualtrics_last_result_%s" % id(self), default=None)
+
+    @property
+    def last_result(self):
+        """ QualtricsResult of the last API call made by the current asyncio task """
+        return self._context_result.get()
+
+    def _store_result(self, result):
+        self._context_result.set(result)
+        return result
+
+    @property
+    def client(self):
+        """ aiohttp.ClientSession used for all API calls. Created on first use (inside running event loop) """
+        if self._client is None or self._client.closed:
+            connector_kwargs = {"limit": self.pool_maxsize}
+            if not self.keep_alive:
+                connector_kwargs["force_close"] = True
+            elif self.pool_idle_timeout is not None:
+                connector_kwargs["keepalive_timeout"] = self.pool_idle_timeout
+            self._client = aiohttp.ClientSession(connector=aiohttp.TCPConnector(**connector_kwargs))
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @staticmethod
+    def _query_params(params):
+        # requests library skips parameters set to None, aiohttp does not accept them
+        return dict((key, value if isinstance(value, STR) else str(value))
+                    for key, value in params.items() if value is not None)
+
+    async def _send3(self, url, method, data, headers=None, fileobj=None, filename=None, chunk_size=65536):
+        """ Send v3 API request. Body of successful response is saved to fileobj or filename (appended to it
+        for 206 Partial Content response) if one of them is given
+
+        :return: AsyncResponse (content is empty if body has been saved to a file)
+        """
+        if method == "post":
+            request_kwargs = {"data": self.json_codec.dumps(data)}
+        elif method == "get":
+            request_kwargs = {}
+        else:
+            raise NotImplementedError("method %s is not supported" % method)
+        request_kwargs.update(self.aiohttp_kwargs)
+        request_headers = self._request3_headers()
+        if headers:
+            request_headers.update(headers)
+        async with self.client.request(method.upper(), url, headers=request_headers, **request_kwargs) as r:
+            if (fileobj is not None or filename is not None) and r.status in (200, 206):
+                fp = fileobj if fileobj is not None else open(filename, "ab" if r.status == 206 else "wb")
+                try:
+                    async for chunk in r.content.iter_chunked(chunk_size):
+                        written = fp.write(chunk)
+                        if asyncio.iscoroutine(written):
+                            # fileobj with asynchronous write function (e.g. _QueueWriter)
+                            await written
+                finally:
+                    if fileobj is None:
+                        fp.close()
+                content = b""
+            else:
+                content = await r.read()
+            return AsyncResponse(r.status, str(r.url), content, r.charset)
+
+    async def call3(self, url, method="post", stream=False, data=None, low_memory=None, headers=None, fileobj=None,
+                    filename=None, chunk_size=65536):
+        if low_memory is None:
+            low_memory = self.low_memory
+        result = QualtricsResult(url)
+        self._store_result(result.without_body() if low_memory else result)
+        if data is None:
+            data = dict()
+        if method == "post":
+            result.data = data
+        start = default_timer()
+        try:
+            r = await self._send3(url, method, data, headers=headers, fileobj=fileobj, filename=filename,
+                                  chunk_size=chunk_size)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            result.error_message = str(e) or e.__class__.__name__
+            return self._finish_result(result, low_memory)
+        finally:
+            result.elapsed = default_timer() - start
+        result.status_code = r.status_code
+        try:
+            json_response = self.json_codec.loads(r.content)
+        except Exception:
+            json_response = None
+        result.error_message = self._request3_error(r.status_code, json_response)
+        if result.error_message is None:
+            result.value = r
+        result.json_response = json_response
+        if not low_memory:
+            result.r = r
+            result.text = r.text   # Keep this for backward compatibility with previous versions
+        return self._finish_result(result, low_memory)
+
+    async def request3(self, url, method="post", stream=False, data=None, low_memory=None, headers=None,
+                       fileobj=None, filename=None, chunk_size=65536):
+        return (await self.call3(url, method=method, stream=stream, data=data, low_memory=low_memory,
+                                 headers=headers, fileobj=fileobj, filename=filename,
+                                 chunk_size=chunk_size)).value
+
+    async def CreateResponseExport(self, format, surveyId, lastResponseId=None, startDate=None, endDate=None,
+                                   limit=None, includedQuestionIds=None, useLabels=None, decimalSeparator=None,
+                                   seenUnansweredRecode=None, useLocalTime=None):
+        url = "%s/responseexports" % self.api3_url
+        data = self._response_export_data(format, surveyId, lastResponseId=lastResponseId, startDate=startDate,
+                                          endDate=endDate, limit=limit, includedQuestionIds=includedQuestionIds,
+                                          useLabels=useLabels)
+        result = await self.call3(url, method="post", data=data)
+        if result.value is None:
+            return None
+        try:
+            responseExportId = result.json_response["result"]["id"]
+        except Exception as e:
+            self.last_error_message = "Mailformed response from server: %s" % e
+            return None
+        self.last_error_message = None
+        return responseExportId
+
+    async def GetResponseExportProgress(self, responseExportId):
+        url = "%s/responseexports/%s" % (self.api3_url, responseExportId)
+        result = await self.call3(url, method="get")
+        if result.value is None:
+            # Server or network error
+            return "servfail", self.last_error_message
+        try:
+            status, data = self._parse_export_progress(result.json_response)
+            self.last_error_message = None
+        except (ValueError, KeyError, TypeError) as e:
+            self.last_error_message = "Mailformed server response: %s" % e
+            return "servfail", self.last_error_message
+
+        return status, data
+
+    async def GetResponseExportFile(self, responseExportId, chunk_size=65536, spool_size=10 * 1024 * 1024):
+        url = self._response_export_file_url(responseExportId)
+        spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+        response = await self.request3(url, method="get", fileobj=spool, chunk_size=chunk_size)
+        if response is None:
+            spool.close()
+            return None
+
+        spool.seek(0)
+        try:
+            fp = self._open_export_archive(spool)
+        except BadZipfile as e:
+            spool.close()
+            self.last_error_message = str(e)
+            return None
+        self.last_error_message = None
+        return fp
+
+    async def GetResponseExportStream(self, responseExportId, chunk_size=65536, queue_size=16):
+        """ Asynchronous version of Qualtrics.GetResponseExportStream: the archive is decompressed while it is
+        downloaded. Unlike Qualtrics.GetResponseExportStream, returned AsyncResponseExportStream is not a file
+        object (it can't be passed to csv module), see iter_response_export_rows for parsed rows.
+
+        async with await qualtrics.GetResponseExportStream(url) as stream:
+            async for text in stream:
+                ...
+
+        :param queue_size: Maximum number of downloaded chunks waiting to be read
+        :return: AsyncResponseExportStream, None if error occurs
+        """
+        stream = await self._open_export_stream(responseExportId, chunk_size, queue_size)
+        if stream is not None:
+            self.last_error_message = None
+        return stream
+
+    async def _open_export_stream(self, responseExportId, chunk_size, queue_size):
+        """ Start download of the archive and decode its header. Sets last_error_message only if error occurs """
+        url = self._response_export_file_url(responseExportId)
+        queue = asyncio.Queue(maxsize=queue_size)
+
+        async def download():
+            try:
+                return await self.call3(url, method="get", fileobj=_QueueWriter(queue), chunk_size=chunk_size)
+            finally:
+                await queue.put(None)
+
+        task = asyncio.ensure_future(download())
+        decoder = ZipStreamDecoder()
+        # utf-8-sig skips byte order mark Qualtrics puts at the beginning of CSV files
+        text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        data = b""
+        try:
+            while not decoder.header_decoded:
+                chunk = await queue.get()
+                if chunk is None:
+                    result = await task
+                    self._store_result(result)
+                    if result.value is None:
+                        return None
+                    raise BadZipfile("File is not a zip file")
+                data = decoder.feed(chunk)
+        except BadZipfile as e:
+            self.last_error_message = str(e)
+            AsyncResponseExportStream(self, queue, task, decoder, text_decoder, "").close()
+            return None
+        return AsyncResponseExportStream(self, queue, task, decoder, text_decoder,
+                                         text_decoder.decode(data) if data else "")
+
+    async def iter_response_export_rows(self, responseExportId, chunk_size=65536, queue_size=16):
+        """ Asynchronous generator of rows of CSV or TSV response export file, decompressed and parsed while
+        the archive is being downloaded. See Qualtrics.iter_response_export_rows
+
+        :param queue_size: Maximum number of downloaded chunks waiting to be processed
+        """
+        stream = await self._open_export_stream(responseExportId, chunk_size, queue_size)
+        if stream is None:
+            return
+        with contextlib.closing(stream):
+            extension = os.path.splitext(stream.name)[1].lower()
+            if extension not in self.EXPORT_ROW_DELIMITERS:
+                self.last_error_message = "Export file %s is not CSV or TSV file" % stream.name
+                return
+            splitter = _CsvRowSplitter(self.EXPORT_ROW_DELIMITERS[extension])
+            try:
+                async for text in stream:
+                    for row in splitter.feed(text):
+                        yield row
+            except (IOError, BadZipfile) as e:
+                self.last_error_message = str(e)
+                return
+            for row in splitter.finish():
+                yield row
+            self.last_error_message = None
+
+    async def response_export_columns(self, responseExportId, types=None, header_rows=None, chunk_size=65536):
+        """ See Qualtrics.response_export_columns. The archive is downloaded completely before it is decoded """
+        fp = await self.GetResponseExportFile(responseExportId, chunk_size=chunk_size)
+        if fp is None:
+            return None
+        return self._read_export_columns(fp, types, header_rows)
+
+    async def DownloadResponseExportFile(self, responseExportId, filename, chunk_size=65536, resume=False):
+        url = self._response_export_file_url(responseExportId)
+        part_filename = filename + ".part"
+        offset = 0
+        if resume and os.path.exists(part_filename):
+            offset = os.path.getsize(part_filename)
+        headers = {"Range": "bytes=%s-" % offset} if offset else None
+        result = await self.call3(url, method="get", headers=headers, filename=part_filename, chunk_size=chunk_size)
+        if result.value is None:
+            if offset and result.status_code == 416:
+                # Range Not Satisfiable - the file has been downloaded completely already
+                self._replace_file(part_filename, filename)
+                self.last_error_message = None
+                return True
+            return None
+        self._replace_file(part_filename, filename)
+        self.last_error_message = None
+        return True
+
+    async def export_responses(self, surveyId, format=Qualtrics.CSV_FORMAT, filename=None, timeout=None, cancel=None,
+                               min_poll_interval=0.5, max_poll_interval=30, chunk_size=65536, **kwargs):
+        """ See Qualtrics.export_responses. cancel is asyncio.Event.
+        If filename is None, export file is opened by GetResponseExportFile (file is downloaded completely)
+        """
+        export = ResponseExport(surveyId, format, filename)
+        schedule = _PollSchedule(min_poll_interval, max_poll_interval)
+        deadline = default_timer() + timeout if timeout is not None else None
+        export.id = await self.CreateResponseExport(format, surveyId, **kwargs)
+        if export.id is None:
+            return self._export_failed(export, "failed", self.last_error_message)
+        export.status = "queued"
+        while True:
+            status, data = await self.GetResponseExportProgress(export.id)
+            interval = self._export_progress(export, schedule, status, data, deadline, timeout)
+            if interval is None:
+                break
+            if cancel is None:
+                await asyncio.sleep(interval)
+                continue
+            try:
+                await asyncio.wait_for(cancel.wait(), interval)
+            except asyncio.TimeoutError:
+                continue
+            return self._export_failed(export, "cancelled", "Response export %s has been cancelled" % export.id)
+        if export.status != "complete":
+            return export
+
+        start = default_timer()
+        if filename is not None:
+            downloaded = await self.DownloadResponseExportFile(export.file_url, filename, chunk_size=chunk_size)
+        else:
+            export.stream = await self.GetResponseExportFile(export.file_url, chunk_size=chunk_size)
+            downloaded = export.stream is not None
+        return self._export_downloaded(export, downloaded, default_timer() - start)
+
+    async def export_many_responses(self, surveyIds, format=Qualtrics.CSV_FORMAT, directory=None, max_workers=4,
+                                    timeout=None, cancel=None, progress=None, min_poll_interval=0.5,
+                                    max_poll_interval=30, chunk_size=65536, **kwargs):
+        """ See Qualtrics.export_many_responses. cancel is asyncio.Event, max_workers limits the number of
+        simultaneous downloads. Progress of due exports is checked concurrently.
+        """
+        exports = OrderedDict()
+        for surveyId in surveyIds:
+            filename = os.path.join(directory, "%s.zip" % surveyId) if directory is not None else None
+            exports[surveyId] = ResponseExport(surveyId, format, filename)
+        await self._run_exports(list(exports.values()), format, max_workers, timeout, cancel, progress,
+                                min_poll_interval, max_poll_interval, chunk_size, kwargs)
+        failed = [export for export in exports.values() if not export.ok]
+        self.last_error_message = "%s of %s response exports failed" % (len(failed), len(exports)) if failed else None
+        return exports
+
+    async def _run_exports(self, exports, format, max_workers, timeout, cancel, progress, min_poll_interval,
+                           max_poll_interval, chunk_size, kwargs):
+        deadline = default_timer() + timeout if timeout is not None else None
+        semaphore = asyncio.Semaphore(max_workers)
+
+        def report(export):
+            if progress is not None:
+                progress(export)
+
+        async def create(export):
+            async with semaphore:
+                export.started = default_timer()
+                export.id = await self.CreateResponseExport(format, export.survey_id,
+                                                            **dict(kwargs, **export.parameters))
+            if export.id is None:
+                return report(self._export_failed(export, "failed", self.last_error_message))
+            export.status = "queued"
+            report(export)
+            await poll(export, _PollSchedule(min_poll_interval, max_poll_interval))
+
+        async def poll(export, schedule):
+            while True:
+                status, data = await self.GetResponseExportProgress(export.id)
+                interval = self._export_progress(export, schedule, status, data, deadline, timeout)
+                report(export)
+                if interval is None:
+                    break
+                if cancel is None:
+                    await asyncio.sleep(interval)
+                    continue
+                try:
+                    await asyncio.wait_for(cancel.wait(), interval)
+                except asyncio.TimeoutError:
+                    continue
+                return report(self._export_failed(export, "cancelled",
+                                                  "Response export %s has been cancelled" % export.id))
+            if export.status == "complete":
+                async with semaphore:
+                    start = default_timer()
+                    if export.filename is not None:
+                        downloaded = await self.DownloadResponseExportFile(export.file_url, export.filename,
+                                                                           chunk_size=chunk_size)
+                    else:
+                        export.stream = await self.GetResponseExportFile(export.file_url, chunk_size=chunk_size)
+                        downloaded = export.stream is not None
+                    report(self._export_downloaded(export, downloaded, default_timer() - start))
+
+        await asyncio.gather(*[create(export) for export in exports])
+
+    async def export_responses_by_date(self, surveyId, startDate, endDate=None, shards=4,
+                                       format=Qualtrics.CSV_FORMAT, filename=None, max_workers=4, timeout=None,
+                                       cancel=None, progress=None, min_poll_interval=0.5, max_poll_interval=30,
+                                       chunk_size=65536, **kwargs):
+        """ See Qualtrics.export_responses_by_date. cancel is asyncio.Event, window exports are merged
+        in the default executor, so the event loop is not blocked by file operations
+        """
+        export = self._date_sharded_export(surveyId, startDate, endDate, shards, format, filename)
+        await self._run_exports(export.shards, format, max_workers, timeout, cancel, progress, min_poll_interval,
+                                max_poll_interval, chunk_size, kwargs)
+        await asyncio.get_event_loop().run_in_executor(None, self._merge_export, export)
+        # last_error_message set by the executor thread is not visible here
+        self.last_error_message = export.error_message
+        return export
+
+    async def export_responses_by_questions(self, surveyId, questionIds, shards=4, format=Qualtrics.CSV_FORMAT,
+                                            filename=None, max_workers=4, timeout=None, cancel=None, progress=None,
+                                            min_poll_interval=0.5, max_poll_interval=30, chunk_size=65536, **kwargs):
+        """ See Qualtrics.export_responses_by_questions. cancel is asyncio.Event, group exports are joined
+        in the default executor
+        """
+        export = self._question_sharded_export(surveyId, questionIds, shards, format, filename)
+        if kwargs.get("endDate") is None:
+            kwargs["endDate"] = self._utcnow()
+        await self._run_exports(export.shards, format, max_workers, timeout, cancel, progress, min_poll_interval,
+                                max_poll_interval, chunk_size, kwargs)
+        await asyncio.get_event_loop().run_in_executor(None, self._merge_export, export, self._join_export_rows)
+        self.last_error_message = export.error_message
+        return export
+
+    async def call(self, Request, Product='RS', post_data=None, post_files=None, **kwargs):
+        low_memory = kwargs.pop("low_memory", self.low_memory)
+        url, params = self._request_url_and_params(Request, Product, kwargs)
+
+        result = QualtricsResult()
+        self._store_result(result.without_body() if low_memory else result)
+        request_kwargs = dict(self.aiohttp_kwargs)
+        if post_data:
+            method = "POST"
+            request_kwargs["data"] = post_data
+        elif post_files:
+            method = "POST"
+            form = aiohttp.FormData()
+            for name, value in post_files.items():
+                form.add_field(name, value, filename=name)
+            request_kwargs["data"] = form
+        else:
+            method = "GET"
+        start = default_timer()
+        try:
+            async with self.client.request(method, url, params=self._query_params(params),
+                                           **request_kwargs) as r:
+                text = await r.text()
+                result.status_code = r.status
+                result.url = str(r.url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            result.url = ""
+            result.error_message = str(e) or e.__class__.__name__
+            return self._finish_result(result, low_memory)
+        finally:
+            result.elapsed = default_timer() - start
+
+        if not low_memory:
+            result.text = text
+        result.value, result.json_response, result.error_message = self._parse_response(
+            Request, result.status_code, text, kwargs)
+        return self._finish_result(result, low_memory)
+
+    async def request(self, Request, Product='RS', post_data=None, post_files=None, **kwargs):
+        return (await self.call(Request, Product=Product, post_data=post_data, post_files=post_files,
+                                **kwargs)).value
+
+    async def _result(self, Request, *keys, **kwargs):
+        """ Make API call and return json_response["Result"][key1][key2]... or None if error occurs """
+        result = await self.request(Request, **kwargs)
+        if not result:
+            return None
+        for key in ("Result", ) + keys:
+            result = result[key]
+        return result
+
+    async def createPanel(self, LibraryID, Name, **kwargs):
+        return await self._result("createPanel", "PanelID", LibraryID=LibraryID, Name=Name, **kwargs)
+
+    async def deletePanel(self, LibraryID, PanelID, **kwargs):
+        return await self.request("deletePanel", LibraryID=LibraryID, PanelID=PanelID, **kwargs) is not None
+
+    async def getPanelMemberCount(self, LibraryID, PanelID, **kwargs):
+        count = await self._result("getPanelMemberCount", "Count", LibraryID=LibraryID, PanelID=PanelID, **kwargs)
+        if count is None:
+            return None
+        return int(count)
+
+    async def addRecipient(self, LibraryID, PanelID, FirstName, LastName, Email, ExternalDataRef, Language, ED):
+        return await self._result("addRecipient", "RecipientID",
+                                  LibraryID=LibraryID,
+                                  PanelID=PanelID,
+                                  FirstName=FirstName,
+                                  LastName=LastName,
+                                  Email=Email,
+                                  ExternalDataRef=ExternalDataRef,
+                                  Language=Language,
+                                  ED=ED)
+
+    async def getRecipient(self, LibraryID, RecipientID):
+        return await self._result("getRecipient", "Recipient", LibraryID=LibraryID, RecipientID=RecipientID)
+
+    async def removeRecipient(self, LibraryID, PanelID, RecipientID, **kwargs):
+        return bool(await self.request("removeRecipient", LibraryID=LibraryID, PanelID=PanelID,
+                                       RecipientID=RecipientID, **kwargs))
+
+    async def sendSurveyToIndividual(self, **kwargs):
+        return await self._result("sendSurveyToIndividual", "EmailDistributionID", **kwargs)
+
+    async def sendSurveyToPanel(self, SurveyID, SendDate, SentFromAddress, FromEmail, FromName, Subject, MessageID,
+                                MessageLibraryID, PanelID, PanelLibraryID, LinkType, **kwargs):
+        return await self._result("sendSurveyToPanel", "EmailDistributionID",
+                                  SurveyID=SurveyID,
+                                  SendDate=SendDate,
+                                  SentFromAddress=SentFromAddress,
+                                  FromEmail=FromEmail,
+                                  FromName=FromName,
+                                  Subject=Subject,
+                                  MessageID=MessageID,
+                                  MessageLibraryID=MessageLibraryID,
+                                  PanelID=PanelID,
+                                  PanelLibraryID=PanelLibraryID,
+                                  LinkType=LinkType,
+                                  **kwargs)
+
+    async def sendReminder(self, ParentEmailDistributionID, SendDate, SentFromAddress, FromEmail, FromName, Subject,
+                           MessageID, LibraryID, **kwargs):
+        return await self._result("sendReminder", "EmailDistributionID",
+                                  ParentEmailDistributionID=ParentEmailDistributionID,
+                                  SendDate=SendDate,
+                                  SentFromAddress=SentFromAddress,
+                                  FromEmail=FromEmail,
+                                  FromName=FromName,
+                                  Subject=Subject,
+                                  MessageID=MessageID,
+                                  LibraryID=LibraryID,
+                                  **kwargs)
+
+    async def createDistribution(self, SurveyID, PanelID, Description, PanelLibraryID, **kwargs):
+        return await self._result("createDistribution", "EmailDistributionID",
+                                  SurveyID=SurveyID,
+                                  PanelID=PanelID,
+                                  Description=Description,
+                                  PanelLibraryID=PanelLibraryID,
+                                  **kwargs)
+
+    async def getDistributions(self, **kwargs):
+        result = await self.request("getDistributions", **kwargs)
+        if not result:
+            return None
+        return result
+
+    async def getSurveys(self, **kwargs):
+        response = await self.request("getSurveys", **kwargs)
+        surveys = None
+        if response:
+            surveys = OrderedDict()
+            for survey in response["Result"]["Surveys"]:
+                surveys[survey['SurveyID']] = survey
+        return surveys
+
+    async def getSurvey(self, SurveyID):
+        return await self.request("getSurvey", SurveyID=SurveyID, Format=None)
+
+    async def get_survey_labels(self, SurveyID, refresh=False):
+        labels = self._survey_labels.get(SurveyID)
+        if labels is not None and not refresh:
+            self.last_error_message = None
+            return labels
+        return self._parse_survey_labels(SurveyID, await self.getSurvey(SurveyID))
+
+    async def label_responses(self, SurveyID, responses):
+        labels = await self.get_survey_labels(SurveyID)
+        if labels is None:
+            return None
+        return labels.label_responses(responses)
+
+    async def get_response_count(self, SurveyID):
+        result = await self.call3("%s/surveys/%s" % (self.api3_url, SurveyID), method="get")
+        if result.value is None:
+            return None
+        try:
+            count = self._parse_response_count(result.json_response)
+        except (ValueError, KeyError, TypeError) as e:
+            self.last_error_message = "Mailformed server response: %s" % e
+            return None
+        self.last_error_message = None
+        return count
+
+    async def importSurvey(self, ImportFormat, Name, Activate=None, URL=None, FileContents=None, OwnerID=None,
+                           **kwargs):
+        result = await self.request(
+            "importSurvey",
+            ImportFormat=ImportFormat,
+            Name=Name,
+            Activate=Activate,
+            URL=URL,
+            OwnerID=OwnerID,
+            post_files={"FileContents": FileContents} if FileContents else None,
+            **kwargs
+        )
+        if result is not None:
+            return result["Result"]["SurveyID"]
+
+    async def deleteSurvey(self, SurveyID, **kwargs):
+        return await self.request("deleteSurvey", SurveyID=SurveyID) is not None
+
+    async def activateSurvey(self, SurveyID, **kwargs):
+        return bool(await self.request("activateSurvey", SurveyID=SurveyID, **kwargs))
+
+    async def deactivateSurvey(self, SurveyID, **kwargs):
+        return bool(await self.request("deactivateSurvey", SurveyID=SurveyID, **kwargs))
+
+    async def getLegacyResponseData(self, SurveyID, LastResponseID=None, Limit=None, ResponseID=None,
+                                    ResponseSetID=None, SubgroupID=None, StartDate=None, EndDate=None, Questions=None,
+                                    Labels=None, ExportTags=None, ExportQuestionIDs=None, LocalTime=None,
+                                    UnansweredRecode=None, PanelID=None, ResponsesInProgress=None, LocationData=None,
+                                    compact=False, export_threshold=None, **kwargs):
+        """ See Qualtrics.getLegacyResponseData. Export file is parsed in the default executor """
+        export_parameters = self._legacy_export_parameters(
+            export_threshold, dict(kwargs, LastResponseID=LastResponseID, Limit=Limit, ResponseID=ResponseID,
+                                   ResponseSetID=ResponseSetID, SubgroupID=SubgroupID, StartDate=StartDate,
+                                   EndDate=EndDate, Questions=Questions, Labels=Labels, ExportTags=ExportTags,
+                                   ExportQuestionIDs=ExportQuestionIDs, LocalTime=LocalTime,
+                                   UnansweredRecode=UnansweredRecode, PanelID=PanelID,
+                                   ResponsesInProgress=ResponsesInProgress, LocationData=LocationData))
+        if export_parameters is not None and self._use_legacy_export(
+                export_threshold, await self.get_response_count(SurveyID), Limit):
+            responses = await self._legacy_export(SurveyID, export_parameters)
+            return compact_responses(responses) if compact and responses is not None else responses
+        responses = await self.request(
+            "getLegacyResponseData",
+            SurveyID=SurveyID,
+            LastResponseID=LastResponseID,
+            Limit=Limit,
+            ResponseID=ResponseID,
+            ResponseSetID=ResponseSetID,
+            SubgroupID=SubgroupID,
+            StartDate=StartDate,
+            EndDate=EndDate,
+            Questions=Questions,
+            Labels=Labels,
+            ExportTags=ExportTags,
+            ExportQuestionIDs=ExportQuestionIDs,
+            LocalTime=LocalTime,
+            UnansweredRecode=UnansweredRecode,
+            PanelID=PanelID,
+            ResponsesInProgress=ResponsesInProgress,
+            LocationData=LocationData,
+            **kwargs)
+        return compact_responses(responses) if compact else responses
+
+    async def _legacy_export(self, SurveyID, export_parameters):
+        export = await self.export_responses(SurveyID, self.CSV2013_FORMAT, **export_parameters)
+        if not export.ok:
+            return None
+        try:
+            responses = await asyncio.get_event_loop().run_in_executor(None, self._read_export_responses,
+                                                                       export.stream)
+        except (ValueError, csv.Error) as e:
+            self.last_error_message = str(e)
+            return None
+        self.last_error_message = None
+        return responses
+
+    async def iter_legacy_responses(self, SurveyID, page_size=1000, prefetch=False, **kwargs):
+        """ Asynchronous generator of (ResponseID, response) tuples, see Qualtrics.iter_legacy_responses """
+        assert page_size > 0
+        compact = kwargs.pop("compact", False)
+        kwargs.setdefault("low_memory", True)
+        last_response_id = kwargs.pop("LastResponseID", None)
+
+        def fetch(last_response_id):
+            return self.call("getLegacyResponseData", SurveyID=SurveyID, Limit=page_size,
+                             LastResponseID=last_response_id, **kwargs)
+
+        task = asyncio.ensure_future(fetch(last_response_id)) if prefetch else None
+        try:
+            while True:
+                result = await (task if prefetch else fetch(last_response_id))
+                # Task has its own context, make result visible to the caller
+                self._store_result(result.without_body() if kwargs["low_memory"] else result)
+                page = result.value
+                if page is None:
+                    return
+                last_page = len(page) < page_size
+                if page:
+                    last_response_id = next(reversed(page))
+                if prefetch and not last_page:
+                    task = asyncio.ensure_future(fetch(last_response_id))
+                while page:
+                    response_id, response = page.popitem(last=False)
+                    yield response_id, ResponseRecord.from_mapping(response) if compact else response
+                if last_page:
+                    return
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+
+    async def iter_legacy_response_data(self, SurveyID, chunk_size=65536, compact=False, **kwargs):
+        """ Asynchronous generator of (ResponseID, response) tuples parsed while server response is being
+        downloaded, see Qualtrics.iter_legacy_response_data
+        """
+        kwargs.pop("low_memory", None)
+        url, params = self._request_url_and_params("getLegacyResponseData", "RS", dict(kwargs, SurveyID=SurveyID))
+        result = self._store_result(QualtricsResult())
+        start = default_timer()
+        try:
+            async with self.client.get(url, params=self._query_params(params), **self.aiohttp_kwargs) as r:
+                result.url = str(r.url)
+                result.status_code = r.status
+                if r.status != 200:
+                    result.value, result.json_response, result.error_message = self._parse_response(
+                        "getLegacyResponseData", r.status, await r.text(), kwargs)
+                    return
+                decoder = codecs.getincrementaldecoder(r.charset or "utf-8")()
+                stream = JsonObjectStream()
+                final = False
+                chunks = r.content.iter_chunked(chunk_size)
+                while not final:
+                    try:
+                        chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        final = True
+                        items = stream.feed(decoder.decode(b"", final=True)) + stream.finish()
+                    else:
+                        items = stream.feed(decoder.decode(chunk))
+                    for key, value in items:
+                        if key == "Meta":
+                            result.error_message = self._legacy_stream_error(value)
+                            return
+                        yield key, ResponseRecord.from_mapping(value) if compact else value
+            result.error_message = None
+        except ValueError as e:
+            result.error_message = "Unexpected response from Qualtrics: %s" % e
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            result.url = result.url or ""
+            result.error_message = str(e) or e.__class__.__name__
+        finally:
+            result.elapsed = default_timer() - start
+
+    async def getResponse(self, SurveyID, ResponseID, **kwargs):
+        response = await self.getLegacyResponseData(SurveyID=SurveyID, ResponseID=ResponseID, **kwargs)
+        # Don't do "if not response:" - because getLegacyResponseData can return empty dict in some cases
+        if response is None:
+            return None
+        if ResponseID not in response:
+            # Should never happen
+            self.last_error_message = "Qualtrics error: ResponseID %s not in response (probably deleted)" % ResponseID
+            return None
+        return response[ResponseID]
+
+    async def getResponses(self, SurveyID, ResponseIDs, compact=False, export_threshold=None, chunk_size=65536,
+                           **kwargs):
+        """ See Qualtrics.getResponses. Export file is read in the default executor """
+        responses = OrderedDict((response_id, None) for response_id in ResponseIDs)
+        if len(responses) <= 1:
+            for response_id in responses:
+                found = await self.getLegacyResponseData(SurveyID, ResponseID=response_id, compact=compact, **kwargs)
+                if found is None:
+                    return None
+                responses[response_id] = found.get(response_id)
+            self.last_error_message = None
+            return responses
+        export_parameters = self._legacy_export_parameters(export_threshold, kwargs)
+        if export_parameters is not None and self._use_legacy_export(
+                export_threshold, await self.get_response_count(SurveyID), kwargs.get("Limit")):
+            export = await self.export_responses(SurveyID, self.CSV2013_FORMAT, chunk_size=chunk_size,
+                                                 **export_parameters)
+            if not export.ok:
+                return None
+            try:
+                await asyncio.get_event_loop().run_in_executor(None, self._select_export_responses, export.stream,
+                                                               responses, compact)
+            except (ValueError, csv.Error) as e:
+                self.last_error_message = str(e)
+                return None
+            self.last_error_message = None
+            return responses
+        remaining = set(responses)
+        items = self.iter_legacy_response_data(SurveyID, chunk_size=chunk_size, **kwargs)
+        async for response_id, response in items:
+            if response_id not in remaining:
+                continue
+            responses[response_id] = ResponseRecord.from_mapping(response) if compact else response
+            remaining.discard(response_id)
+            if not remaining:
+                await items.aclose()
+                # Retrieval has been stopped early
+                self.last_error_message = None
+                break
+        if self.last_error_message is not None:
+            return None
+        return responses
+
+    @classmethod
+    def _select_export_responses(cls, fp, responses, compact):
+        with fp:
+            cls._select_responses(_csv_export_responses(fp), responses, compact)
+
+    async def importResponses(self, SurveyID, ResponseSetID=None, FileURL=None, Delimiter=None, Enclosure=None,
+                              IgnoreValidation=None, DecimalFormat=None, FileContents=None, **kwargs):
+        return bool(await self.request(
+            "importResponses",
+            SurveyID=SurveyID,
+            ResponseSetID=ResponseSetID,
+            FileURL=FileURL,
+            Delimiter=Delimiter,
+            Enclosure=Enclosure,
+            IgnoreValidation=IgnoreValidation,
+            DecimalFormat=DecimalFormat,
+            post_files={"FileContents": FileContents} if FileContents else None,
+            **kwargs))
+
+    async def import_responses(self, SurveyID, responses, chunk_size=Qualtrics.IMPORT_CHUNK_SIZE,
+                               max_chunk_bytes=Qualtrics.IMPORT_CHUNK_BYTES, max_workers=4, completed=None,
+                               progress=None, headers=None, **kwargs):
+        """ See Qualtrics.import_responses. responses is a regular (not asynchronous) iterable """
+        result = ResponseImport(SurveyID)
+        await self._upload_chunks(
+            self._with_import_headers(self._import_chunks(result, responses, chunk_size, max_chunk_bytes), headers),
+            lambda data: self._responses_to_csv(*data),
+            lambda chunk, contents: self.importResponses(SurveyID, FileContents=contents, **kwargs),
+            max_workers, completed, progress)
+        self.last_error_message = result.error_message
+        return result
+
+    async def _upload_chunk(self, upload, chunk, contents):
+        start = default_timer()
+        if await upload(chunk, contents):
+            chunk.status = "imported"
+        else:
+            chunk.status, chunk.error_message = "failed", self.last_error_message
+        chunk.elapsed = default_timer() - start
+        return chunk
+
+    async def _upload_chunks(self, chunks, to_contents, upload, max_workers, completed, progress, first=None):
+        """ See Qualtrics._upload_chunks. upload and first are coroutine functions """
+        completed = set(completed or ())
+
+        def report(chunk):
+            if progress is not None:
+                progress(chunk)
+
+        uploads = set()
+        try:
+            for chunk, data in chunks:
+                if chunk.index in completed:
+                    chunk.status = "skipped"
+                    report(chunk)
+                    continue
+                try:
+                    contents = to_contents(data)
+                except ValueError as e:
+                    chunk.status, chunk.error_message = "failed", str(e)
+                    report(chunk)
+                    if first is not None:
+                        break
+                    continue
+                chunk.size = len(contents)
+                del data
+                if first is not None:
+                    report(await self._upload_chunk(first, chunk, contents))
+                    if not chunk.ok:
+                        break
+                    first = None
+                    continue
+                while len(uploads) >= max_workers:
+                    done, uploads = await asyncio.wait(uploads, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        report(task.result())
+                uploads.add(asyncio.ensure_future(self._upload_chunk(upload, chunk, contents)))
+            while uploads:
+                done, uploads = await asyncio.wait(uploads, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    report(task.result())
+        finally:
+            for task in uploads:
+                task.cancel()
+
+    async def importResponsesAsDict(self, SurveyID, responses, ResponseSetID=None, Delimiter=None, Enclosure=None,
+                                    IgnoreValidation=None, DecimalFormat=None, **kwargs):
+        result = await self.import_responses(
+            SurveyID,
+            responses,
+            ResponseSetID=ResponseSetID,
+            Delimiter=Delimiter,
+            Enclosure=Enclosure,
+            IgnoreValidation=IgnoreValidation,
+            DecimalFormat=DecimalFormat,
+            **kwargs)
+        return result.ok
+
+    async def updateResponseEmbeddedData(self, SurveyID, ResponseID, ED, **kwargs):
+        return bool(await self.request("updateResponseEmbeddedData", SurveyID=SurveyID, ResponseID=ResponseID, ED=ED,
+                                       **kwargs))
+
+    async def getPanels(self, LibraryID):
+        return await self._result("getPanels", "Panels", LibraryID=LibraryID)
+
+    async def getPanel(self, LibraryID, PanelID, EmbeddedData=None, LastRecipientID=None, NumberOfRecords=None,
+                       ExportLanguage=None, Unsubscribed=None, Subscribed=None, **kwargs):
+        return await self.request(
+            "getPanel",
+            LibraryID=LibraryID,
+            PanelID=PanelID,
+            EmbeddedData=EmbeddedData,
+            LastRecipientID=LastRecipientID,
+            NumberOfRecords=NumberOfRecords,
+            ExportLanguage=ExportLanguage,
+            Unsubscribed=Unsubscribed,
+            Subscribed=Subscribed,
+            **kwargs
+        )
+
+    async def importPanel(self, LibraryID, Name, CSV, **kwargs):
+        if not isinstance(CSV, STR) or len(CSV) > self.PANEL_CHUNK_BYTES:
+            result = await self.import_panel_csv(LibraryID, Name, CSV, **kwargs)
+            return result.panel_id if result.ok else None
+        self._column_header_kwargs(CSV, kwargs)
+        return await self._import_panel(LibraryID, Name, CSV, kwargs)
+
+    async def _import_panel(self, LibraryID, Name, CSV, kwargs):
+        result = await self.request("importPanel", post_data=CSV, LibraryID=LibraryID, Name=Name, **kwargs)
+        if result is not None:
+            return result["Result"]["PanelID"]
+        return None
+
+    async def import_panel_csv(self, LibraryID, Name, CSV, chunk_size=Qualtrics.PANEL_CHUNK_SIZE,
+                               max_chunk_bytes=Qualtrics.PANEL_CHUNK_BYTES, max_workers=4, PanelID=None,
+                               completed=None, progress=None, **kwargs):
+        """ See Qualtrics.import_panel_csv. CSV is a string or a regular (not asynchronous) iterable of lines """
+        header = kwargs.get("ColumnHeaders", None) in ("1", 1)
+        first_chunk = [True]
+
+        def to_contents(text):
+            if first_chunk[0]:
+                self._column_header_kwargs(text, kwargs)
+                first_chunk[0] = False
+            return text
+        result = PanelImport(LibraryID, PanelID)
+        return await self._import_panel_chunks(result, Name, self._csv_chunks(result, CSV, header, chunk_size,
+                                                                              max_chunk_bytes),
+                                               to_contents, max_workers, completed, progress, kwargs)
+
+    async def import_panel(self, LibraryID, Name, panel, headers=None, chunk_size=Qualtrics.PANEL_CHUNK_SIZE,
+                           max_chunk_bytes=Qualtrics.PANEL_CHUNK_BYTES, max_workers=4, PanelID=None, completed=None,
+                           progress=None, **kwargs):
+        """ See Qualtrics.import_panel. panel is a regular (not asynchronous) iterable """
+        kwargs["ColumnHeaders"] = "1"
+        self._column_header_kwargs(self._panel_to_csv([], headers), kwargs)
+        result = PanelImport(LibraryID, PanelID)
+        return await self._import_panel_chunks(result, Name,
+                                               self._import_chunks(result, panel, chunk_size, max_chunk_bytes),
+                                               lambda batch: self._panel_to_csv(batch, headers), max_workers,
+                                               completed, progress, kwargs, empty=[])
+
+    async def _import_panel_chunks(self, result, Name, chunks, to_contents, max_workers, completed, progress, kwargs,
+                                   empty=None):
+        assert result.panel_id is not None or not completed, "PanelID is required to resume panel import"
+
+        async def create(chunk, contents):
+            result.panel_id = await self._import_panel(result.library_id, Name, contents, kwargs)
+            return result.panel_id is not None
+
+        def append(chunk, contents):
+            return self._import_panel(result.library_id, Name, contents, dict(kwargs, PanelID=result.panel_id))
+
+        await self._upload_chunks(chunks, to_contents, append, max_workers, completed, progress,
+                                  first=create if result.panel_id is None else None)
+        if empty is not None and not result.chunks and result.panel_id is None:
+            chunk = ImportChunk(0, 0, 0)
+            result.chunks.append(chunk)
+            await self._upload_chunks([(chunk, empty)], to_contents, append, 1, None, progress, first=create)
+        self.last_error_message = result.error_message
+        return result
+
+    async def importContacts(self, LibraryID, Name, CSV, **kwargs):
+        if not isinstance(CSV, STR) or len(CSV) > self.CONTACTS_CHUNK_BYTES:
+            result = await self.import_contacts(LibraryID, Name, CSV, **kwargs)
+            return result.list_id if result.ok else None
+        self._column_header_kwargs(CSV, kwargs)
+        result = await self.request("importContacts", Product="TA", post_data=CSV, LibraryID=LibraryID, Name=Name,
+                                    **kwargs)
+        if result is not None:
+            return result["Result"]["ListID"]
+        return None
+
+    async def checkImportContactsStatus(self, LibraryID, JobID, **kwargs):
+        return await self._result("checkImportContactsStatus", Product="TA", LibraryID=LibraryID, JobID=JobID,
+                                  **kwargs)
+
+    async def _import_contacts_chunk(self, LibraryID, Name, contents, kwargs):
+        result = await self.request("importContacts", Product="TA", post_data=contents, LibraryID=LibraryID,
+                                    Name=Name, **kwargs)
+        if result is None:
+            return None, None
+        return result["Result"]["ListID"], result["Result"].get("JobID")
+
+    async def _contacts_import_progress(self, chunk, LibraryID, schedule, deadline):
+        status = await self.checkImportContactsStatus(LibraryID, chunk.job_id)
+        return self._contacts_import_status(chunk, schedule, deadline, status, self.last_error_message)
+
+    async def import_contacts(self, LibraryID, Name, CSV=None, filename=None, ListID=None,
+                              chunk_size=Qualtrics.CONTACTS_CHUNK_SIZE, max_chunk_bytes=Qualtrics.CONTACTS_CHUNK_BYTES,
+                              max_workers=4, timeout=None, min_poll_interval=0.5, max_poll_interval=30,
+                              completed=None, progress=None, **kwargs):
+        """ See Qualtrics.import_contacts. CSV is a string or a regular (not asynchronous) iterable of lines """
+        assert (CSV is None) != (filename is None), "Either CSV or filename should be given"
+        assert ListID is not None or not completed, "ListID is required to resume contacts import"
+        if filename is not None:
+            with open(filename, encoding="utf-8", newline="") as fp:
+                return await self.import_contacts(LibraryID, Name, fp, ListID=ListID, chunk_size=chunk_size,
+                                                  max_chunk_bytes=max_chunk_bytes, max_workers=max_workers,
+                                                  timeout=timeout, min_poll_interval=min_poll_interval,
+                                                  max_poll_interval=max_poll_interval, completed=completed,
+                                                  progress=progress, **kwargs)
+        deadline = default_timer() + timeout if timeout is not None else None
+        result = ContactsImport(LibraryID, ListID)
+        completed = set(completed or ())
+        # chunk: [_PollSchedule, time of the next checkImportContactsStatus call]
+        pending = OrderedDict()
+
+        def report(chunk):
+            if progress is not None:
+                progress(chunk)
+
+        async def upload(chunk, contents):
+            start = default_timer()
+            parameters = kwargs if result.list_id is None else dict(kwargs, ListID=result.list_id)
+            list_id, chunk.job_id = await self._import_contacts_chunk(LibraryID, Name, contents, parameters)
+            chunk.elapsed = default_timer() - start
+            if list_id is None:
+                chunk.status, chunk.error_message = "failed", self.last_error_message
+            else:
+                result.list_id = list_id
+            return chunk
+
+        def started(chunk):
+            if self._contacts_import_started(chunk, pending, min_poll_interval, max_poll_interval):
+                report(chunk)
+
+        async def poll(uploads):
+            """ Check jobs that are due, then wait for an upload to complete or for the next check """
+            now = default_timer()
+            for chunk in [chunk for chunk, (schedule, due) in pending.items() if due <= now]:
+                interval = await self._contacts_import_progress(chunk, LibraryID, pending[chunk][0], deadline)
+                if interval is None:
+                    del pending[chunk]
+                    report(chunk)
+                else:
+                    pending[chunk][1] = default_timer() + interval
+            wait_time = self._next_poll(pending)
+            if uploads:
+                done, uploads = await asyncio.wait(uploads, timeout=wait_time, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    started(task.result())
+            elif wait_time is not None:
+                await asyncio.sleep(wait_time)
+            return uploads
+
+        column_headers = False
+        uploads = set()
+        try:
+            for chunk, contents in self._csv_chunks(result, CSV, True, chunk_size, max_chunk_bytes):
+                if chunk.index in completed:
+                    chunk.status = "skipped"
+                    report(chunk)
+                    continue
+                if not column_headers:
+                    self._column_header_kwargs(contents, kwargs)
+                    column_headers = True
+                chunk.size = len(contents)
+                if result.list_id is None:
+                    started(await upload(chunk, contents))
+                    if result.list_id is None:
+                        break
+                    continue
+                while len(uploads) >= max_workers:
+                    uploads = await poll(uploads)
+                uploads.add(asyncio.ensure_future(upload(chunk, contents)))
+                del contents
+            while uploads or pending:
+                uploads = await poll(uploads)
+        finally:
+            for task in uploads:
+                task.cancel()
+        self.last_error_message = result.error_message
+        return result
+
+    async def importJsonPanel(self, LibraryID, Name, panel, headers=None, **kwargs):
+        result = await self.import_panel(LibraryID, Name, panel, headers=headers, **kwargs)
+        return result.panel_id if result.ok else None
+
+    async def getSingleResponseHTML(self, SurveyID, ResponseID, **kwargs):
+        return await self._result("getSingleResponseHTML", SurveyID=SurveyID, ResponseID=ResponseID, **kwargs)
+
+    async def getAllSubscriptions(self):
+        return await self.request("getAllSubscriptions")
+
+    async def subscribe(self, Name, PublicationURL, Topics, Encrypt=None, SharedKey=None, BrandID=None, **kwargs):
+        return await self.request(
+            "subscribe",
+            Name=Name,
+            PublicationURL=PublicationURL,
+            Topics=Topics,
+            Encrypt=Encrypt,
+            SharedKey=SharedKey,
+            BrandID=BrandID,
+        )
+
+    async def generate_unique_survey_link(self, SurveyID, LibraryID, PanelID, DistributionID, FirstName, LastName,
+                                          Email, ExternalDataRef="", Language="English", EmbeddedData=None):
+        assert isinstance(EmbeddedData, (dict, type(None)))
+        assert isinstance(SurveyID, STR)
+        assert isinstance(DistributionID, STR)
+
+        if EmbeddedData is None:
+            EmbeddedData = {}
+        recipient_id = await self.addRecipient(LibraryID, PanelID, FirstName=FirstName, LastName=LastName,
+                                               Email=Email, ExternalDataRef=ExternalDataRef, Language=Language,
+                                               ED=EmbeddedData)
+        if recipient_id is None:
+            # last_error_message is set by addRecipient function
+            return None
+        link, error = self._survey_link(SurveyID, DistributionID, recipient_id)
+        if link is None:
+            self.last_error_message = error
+        return link
+
+    @staticmethod
+    async def _iter_recipient_pages(get_page, LibraryID, PanelID, page_size, **kwargs):
+        last_recipient_id = None
+        while True:
+            page = await get_page(LibraryID, PanelID, LastRecipientID=last_recipient_id, NumberOfRecords=page_size,
+                                  **kwargs)
+            yield page
+            if page is None or len(page) < page_size:
+                return
+            last_recipient_id = page[-1]["RecipientID"]
+
+    async def generate_unique_survey_links(self, SurveyID, LibraryID, PanelID, DistributionID, people, headers=None,
+                                           Name="Unique survey links", page_size=10000, **kwargs):
+        """ Asynchronous generator of (person, link) tuples, see Qualtrics.generate_unique_survey_links.
+        people is a regular (not asynchronous) iterable
+        """
+        assert isinstance(SurveyID, STR)
+        assert isinstance(DistributionID, STR)
+        _, error = self._survey_link(SurveyID, DistributionID, "")
+        if error is not None:
+            self.last_error_message = error
+            return
+        if headers is None:
+            headers = ["Email", "FirstName", "LastName", "ExternalRef"]
+        existing = set()
+        if PanelID is not None:
+            async for page in self._iter_recipient_pages(self.getPanel, LibraryID, PanelID, page_size):
+                if page is None:
+                    return
+                existing.update(member["RecipientID"] for member in page)
+        pending = collections.defaultdict(collections.deque)
+
+        def remember(people):
+            for person in people:
+                pending[self._panel_member_key(person, headers)].append(person)
+                yield person
+
+        result = await self.import_panel(LibraryID, Name, remember(people), headers=headers, PanelID=PanelID,
+                                         **kwargs)
+        error = result.error_message
+        if result.panel_id is not None:
+            embedded_data = ",".join(name for name in headers if name not in self.PANEL_MEMBER_FIELDS) or None
+            async for page in self._iter_recipient_pages(self.getPanel, LibraryID, result.panel_id, page_size,
+                                                         EmbeddedData=embedded_data):
+                if page is None:
+                    error = error or self.last_error_message
+                    break
+                for member in page:
+                    if member["RecipientID"] in existing:
+                        continue
+                    people = pending.get(self._panel_member_key(member, headers, recipient=True))
+                    if people:
+                        yield people.popleft(), self._survey_link(SurveyID, DistributionID, member["RecipientID"])[0]
+        missing = 0
+        for people in pending.values():
+            while people:
+                missing += 1
+                yield people.popleft(), None
+        if missing and error is None:
+            error = "%d people have not been found in the panel" % missing
+        self.last_error_message = error
+
+    async def getListContacts(self, LibraryID, ListID, EmbeddedData=None, ContactHistory=None, LastRecipientID=None,
+                              NumberOfRecords=None, ExportLanguage=None, Unsubscribed=None, Subscribed=None,
+                              **kwargs):
+        result = await self.request("getListContacts",
+                                    Product='TA',
+                                    LibraryID=LibraryID,
+                                    ListID=ListID,
+                                    EmbeddedData=EmbeddedData,
+                                    ContactHistory=ContactHistory,
+                                    LastRecipientID=LastRecipientID,
+                                    NumberOfRecords=NumberOfRecords,
+                                    ExportLanguage=ExportLanguage,
+                                    Unsubscribed=Unsubscribed,
+                                    Subscribed=Subscribed,
+                                    **kwargs)
+        return result
+
+    async def removeContact(self, LibraryID, ListID, RecipientID, **kwargs):
+        return await self.request("removeContact",
+                                  Product='TA',
+                                  LibraryID=LibraryID,
+                                  ListID=ListID,
+                                  RecipientID=RecipientID,
+                                  **kwargs)
+
+    async def _list_recipient_ids(self, LibraryID, ListID, page_size):
+        recipient_ids = []
+        async for page in self._iter_recipient_pages(self.getListContacts, LibraryID, ListID, page_size):
+            if page is None:
+                return None
+            recipient_ids.extend(contact["RecipientID"] for contact in page)
+        return recipient_ids
+
+    async def _remove_contact(self, LibraryID, ListID, contact, limiter, max_retries, retry_delay):
+        start = default_timer()
+        while True:
+            await asyncio.sleep(limiter.delay(default_timer()))
+            result = await self.call("removeContact", Product="TA", LibraryID=LibraryID, ListID=ListID,
+                                     RecipientID=contact.recipient_id, low_memory=True)
+            contact.attempts += 1
+            contact.status_code = result.status_code
+            if result.ok:
+                contact.status, contact.error_message = "removed", None
+                break
+            contact.status, contact.error_message = "failed", result.error_message
+            if contact.attempts > max_retries or not self._transient_failure(result):
+                break
+            await asyncio.sleep(retry_delay * 2 ** (contact.attempts - 1))
+        contact.elapsed = default_timer() - start
+        return contact
+
+    async def remove_contacts(self, LibraryID, ListID, RecipientIDs=None, max_workers=8, rate_limit=None,
+                              max_retries=3, retry_delay=1.0, progress=None, page_size=10000,
+                              recreate_threshold=None):
+        """ See Qualtrics.remove_contacts. RecipientIDs is a regular (not asynchronous) iterable """
+        result = ContactsRemoval(LibraryID, ListID)
+        if RecipientIDs is None:
+            RecipientIDs = await self._list_recipient_ids(LibraryID, ListID, page_size)
+            if RecipientIDs is None:
+                return None
+            if recreate_threshold is not None and len(RecipientIDs) > recreate_threshold:
+                result.contacts = [ContactRemoval(recipient_id) for recipient_id in RecipientIDs]
+                result.recreate = True
+                self.last_error_message = result.error_message
+                return result
+        limiter = _RateLimiter(rate_limit)
+
+        def report(contact):
+            if progress is not None:
+                progress(contact)
+
+        removals = set()
+        try:
+            for recipient_id in RecipientIDs:
+                contact = ContactRemoval(recipient_id)
+                result.contacts.append(contact)
+                while len(removals) >= max_workers:
+                    done, removals = await asyncio.wait(removals, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        report(task.result())
+                removals.add(asyncio.ensure_future(self._remove_contact(LibraryID, ListID, contact, limiter,
+                                                                        max_retries, retry_delay)))
+            while removals:
+                done, removals = await asyncio.wait(removals, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    report(task.result())
+        finally:
+            for task in removals:
+                task.cancel()
+        self.last_error_message = result.error_message
+        return result
+
+    async def truncate_contact_list(self, LibraryID, ListID, **kwargs):
+        self._check_truncate_parameters(kwargs)
+        result = await self.remove_contacts(LibraryID, ListID, **kwargs)
+        if result is None:
+            return False, []
+        return result.ok, [contact.recipient_id for contact in result.failed]
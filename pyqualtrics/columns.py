@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Decoding of CSV response exports (API v3) into typed NumPy arrays, one per column (requires numpy library).
+
+columns = read_response_columns(qualtrics.GetResponseExportStream(responseExportId))
+columns["Q1"]           # numpy.ma.MaskedArray of int64, missing answers are masked
+columns["StartDate"]    # numpy array of datetime64[s], missing values are NaT
+columns.labels["Q1"]    # Question text from the second header row
+"""
+import csv
+import io
+import itertools
+import json
+import re
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INT_PATTERN = re.compile(r"^\s*[-+]?\d+\s*$")
+FLOAT_PATTERN = re.compile(r"^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$")
+DATETIME_PATTERN = re.compile(r"^\d{4}-\d\d-\d\d([ T]\d\d:\d\d(:\d\d)?)?$")
+
+
+class ResponseColumns(OrderedDict):
+    """ OrderedDict {column name: numpy array} with information from header rows of the export file
+
+    labels - {column name: question text (second header row)}
+    import_ids - {column name: ImportId (third header row of csv format)}
+    """
+    def __init__(self, *args, **kwargs):
+        super(ResponseColumns, self).__init__(*args, **kwargs)
+        self.labels = OrderedDict()
+        self.import_ids = OrderedDict()
+
+    @property
+    def size(self):
+        """ Number of responses """
+        for column in self.values():
+            return len(column)
+        return 0
+
+
+def _count_header_rows(rows):
+    """ csv format has 3 header rows (the third one contains ImportIds), csv2013 format has 2 header rows """
+    if len(rows) > 2 and rows[2] and all(value.startswith('{"ImportId"') for value in rows[2] if value):
+        return 3
+    return 2
+
+
+def _export_field_names(header):
+    """ Field names (like in getLegacyResponseData) from header rows of CSV response export file. csv format has
+    them in the first row. csv2013 format has V1..V10 labels of ResponseID, ResponseSet etc in the first row and
+    their names in the second one (which has question texts in other columns)
+    """
+    names = header[0]
+    if len(header) > 1 and "ResponseID" not in names and "ResponseID" in header[1]:
+        names = [header[1][i] if i < len(header[1]) and re.match(r"V\d+$", name) else name
+                 for i, name in enumerate(names)]
+    return names
+
+
+def _parse_numbers(values, dtype):
+    """ Parse array of strings (without missing values) as numbers using numpy's C parser,
+    which is much faster than int()/float() called for every value.
+    Raises ValueError if any of values is not a number
+    """
+    numbers = np.loadtxt(io.StringIO(u"\n".join(values)), dtype=dtype, delimiter="\x00", comments=None, ndmin=1)
+    if len(numbers) != len(values):
+        # Value with a line break or an empty line
+        raise ValueError("Column contains values that are not numbers")
+    return numbers
+
+
+def _convert(values, dtype):
+    """ Convert object array of strings to dtype. Raises ValueError if it is not possible
+
+    :return: numpy.ma.MaskedArray for numbers, array with NaT for missing dates, values as is for strings
+    """
+    missing = values == ""
+    has_missing = missing.any()
+    kind = dtype.kind
+    if kind in "iufb":
+        filled = np.where(missing, "0", values) if has_missing else values
+        numbers = _parse_numbers(filled, np.int64 if kind == "b" else dtype)
+        return np.ma.MaskedArray(numbers.astype(dtype, copy=False), mask=missing)
+    if kind == "M":
+        filled = np.where(missing, "NaT", values) if has_missing else values
+        return filled.astype(dtype)
+    return values
+
+
+def _infer_column(values):
+    """ Convert object array of strings to the narrowest of int64, float64 and datetime64[s] types that fits
+    all values, or return it as is. The first value is checked before trying to convert the whole column
+    """
+    first = next((value for value in values if value != ""), None)
+    if first is None:
+        return values
+    for pattern, dtype in ((INT_PATTERN, "int64"), (FLOAT_PATTERN, "float64"), (DATETIME_PATTERN, "datetime64[s]")):
+        if pattern.match(first):
+            try:
+                return _convert(values, np.dtype(dtype))
+            except ValueError:
+                pass
+    return values
+
+
+def read_response_columns(fp, header_rows=None, types=None, delimiter=",", block_size=65536):
+    """ Read CSV response export (csv or csv2013 format) into typed columns.
+
+    Each column is converted to int64, float64 or datetime64[s] if all its values fit, otherwise it is an object
+    array of strings. Missing numbers are masked (numpy.ma), missing dates are NaT, missing strings are "".
+
+    :param fp: text stream (GetResponseExportStream, GetResponseExportFile) or file opened with newline=""
+    :param header_rows: Number of header rows (detected automatically if None: 3 for csv, 2 for csv2013 format)
+    :param types: {column name: numpy dtype or its name ("int64", "float", "datetime64[s]", "str")},
+    types of other columns are inferred ("str" or "object" keeps column as is).
+    Raises ValueError if a value can't be converted to the given type.
+    :param delimiter: "," for CSV, "\t" for TSV files
+    :param block_size: Rows are converted to arrays in blocks of this size, to limit memory usage
+    :return: ResponseColumns
+    """
+    if np is None:
+        raise ImportError("read_response_columns requires numpy library (pip install numpy)")
+    reader = csv.reader(fp, delimiter=delimiter)
+    headers = []
+    for row in reader:
+        headers.append(row)
+        if len(headers) == 3 or header_rows is not None and len(headers) == header_rows:
+            break
+    if not headers:
+        return ResponseColumns()
+    if header_rows is None:
+        header_rows = _count_header_rows(headers)
+    data_rows = headers[header_rows:]
+
+    names = _export_field_names(headers)
+    width = len(names)
+    blocks = [[] for name in names]
+
+    rows = itertools.chain(data_rows, reader)
+    while True:
+        block = list(itertools.islice(rows, block_size))
+        if not block:
+            break
+        # Object array references strings created by csv module, so it takes little additional memory
+        array = np.empty((len(block), width), dtype=object)
+        try:
+            array[:] = block
+        except ValueError:
+            # Rows of different length
+            array[:] = [(row + [""] * width)[:width] for row in block]
+        del block
+        for i in range(width):
+            blocks[i].append(array[:, i].copy())
+
+    columns = ResponseColumns()
+    for i, name in enumerate(names):
+        column_blocks = blocks[i]
+        blocks[i] = None
+        values = np.concatenate(column_blocks) if column_blocks else np.array([], dtype=object)
+        if types and name in types:
+            columns[name] = _convert(values, np.dtype(types[name]))
+        else:
+            columns[name] = _infer_column(values)
+        if header_rows > 1:
+            columns.labels[name] = headers[1][i] if i < len(headers[1]) else ""
+        if header_rows > 2:
+            import_id = headers[2][i] if i < len(headers[2]) else ""
+            try:
+                columns.import_ids[name] = json.loads(import_id)["ImportId"]
+            except (ValueError, KeyError, TypeError):
+                columns.import_ids[name] = None
+    return columns
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" File helpers shared by Qualtrics objects and the sync module """
+import io
+import os
+
+
+def _replace_file(source, destination):
+    """ Atomically replace destination with source, so destination is either the old or the new file, never missing
+    or half-written (os.replace is not available in Python 2.7)
+    """
+    replace = getattr(os, "replace", None)
+    if replace is not None:
+        replace(source, destination)
+    elif os.name == "nt" and os.path.exists(destination):
+        # Python 2.7 on Windows: rename does not overwrite files, so the replacement can't be atomic
+        os.remove(destination)
+        os.rename(source, destination)
+    else:
+        # rename is atomic and overwrites destination on POSIX
+        os.rename(source, destination)
+
+
+def _write_file_atomic(filename, text):
+    """ Write text (UTF-8) to a temporary file in the same directory, flush it to disk and replace filename with it """
+    temp_filename = filename + ".tmp"
+    with io.open(temp_filename, "w", encoding="utf-8") as fp:
+        fp.write(text)
+        fp.flush()
+        os.fsync(fp.fileno())
+    _replace_file(temp_filename, filename)
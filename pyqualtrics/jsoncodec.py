@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" JSON encoding and decoding used by Qualtrics objects. The standard library json module is used by default,
+faster libraries can be plugged in:
+
+Qualtrics.json_codec = get_codec()          # the fastest installed library, for all Qualtrics objects
+qualtrics.json_codec = get_codec("orjson")  # specific library, for one object
+"""
+import json
+from collections import OrderedDict
+
+
+class StdlibJsonCodec(object):
+    """ json module from the standard library """
+    name = "json"
+
+    def loads(self, data, ordered=False):
+        """ Decode JSON document. Raises ValueError if data is not a valid JSON document
+
+        :param data: str or bytes (UTF-8)
+        :param ordered: Decode objects as OrderedDict
+        """
+        if isinstance(data, bytes):
+            # json.loads accepts bytes only since Python 3.6. UnicodeDecodeError is a subclass of ValueError
+            data = data.decode("utf-8")
+        if ordered:
+            return json.loads(data, object_pairs_hook=OrderedDict)
+        return json.loads(data)
+
+    def dumps(self, obj):
+        """ :return: str """
+        return json.dumps(obj)
+
+
+class SimplejsonCodec(StdlibJsonCodec):
+    """ simplejson library (C extension, supports object_pairs_hook) """
+    name = "simplejson"
+
+    def __init__(self):
+        import simplejson
+        self._json = simplejson
+
+    def loads(self, data, ordered=False):
+        if ordered:
+            return self._json.loads(data, object_pairs_hook=OrderedDict)
+        return self._json.loads(data)
+
+    def dumps(self, obj):
+        return self._json.dumps(obj)
+
+
+class OrjsonCodec(StdlibJsonCodec):
+    """ orjson library (Python 3 only). orjson can only decode objects as dict. Converting them to OrderedDict
+    afterwards is slower than json module with object_pairs_hook (see benchmarks/json_codec.py), so ordered
+    documents (getLegacyResponseData) are decoded by json module
+    """
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, data, ordered=False):
+        if ordered:
+            return super(OrjsonCodec, self).loads(data, ordered=True)
+        # orjson.JSONDecodeError is a subclass of ValueError
+        return self._orjson.loads(data)
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj).decode("utf-8")
+
+
+# Preferred first
+CODECS = OrderedDict([
+    (OrjsonCodec.name, OrjsonCodec),
+    (SimplejsonCodec.name, SimplejsonCodec),
+    (StdlibJsonCodec.name, StdlibJsonCodec),
+])
+
+
+def get_codec(name=None):
+    """ JSON codec using the given library ("orjson", "simplejson" or "json"), or the fastest installed one if
+    name is None. Raises ImportError if the library is not installed, KeyError if it is not supported
+    """
+    if name is not None:
+        return CODECS[name]()
+    for codec_class in CODECS.values():
+        try:
+            return codec_class()
+        except ImportError:
+            pass
+    return StdlibJsonCodec()
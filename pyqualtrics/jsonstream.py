@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Incremental parsing of large JSON objects, such as getLegacyResponseData response
+{"R_1": {...}, "R_2": {...}, ...}: members of the top level object are returned as soon as they are received,
+the whole document is never kept in memory.
+"""
+import json
+import re
+from collections import OrderedDict
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class JsonObjectStream(object):
+    """ Push parser of a JSON object. Feed it pieces of text, it returns (key, value) tuples of top level members
+    (in document order) as soon as they are complete. Values are parsed by json module.
+
+    stream = JsonObjectStream()
+    for text in pieces:
+        for key, value in stream.feed(text):
+            ...
+    stream.finish()
+
+    Raises ValueError if document is not a valid JSON object.
+    """
+    def __init__(self, object_pairs_hook=OrderedDict):
+        self._decoder = json.JSONDecoder(object_pairs_hook=object_pairs_hook)
+        self._buffer = ""
+        self._pos = 0
+        # start, first_key, key, colon, value, comma or end
+        self._state = "start"
+        self._key = None
+        # Don't try to parse incomplete value again until buffer has grown to this size
+        # (so a value spanning many pieces is parsed O(log n) times instead of once per piece)
+        self._need = 0
+
+    def feed(self, text):
+        """ :return: list of (key, value) tuples completed by text """
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        if len(self._buffer) < self._need:
+            return []
+        return list(self._parse(final=False))
+
+    def finish(self):
+        """ Check that the document is complete
+
+        :return: list of remaining (key, value) tuples
+        """
+        items = list(self._parse(final=True))
+        if self._state != "end":
+            raise ValueError("Incomplete JSON document")
+        return items
+
+    def _skip_whitespace(self):
+        self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+        return self._pos < len(self._buffer)
+
+    def _decode(self, final):
+        """ Decode JSON value at current position
+
+        :return: (True, value) or (False, None) if more text is needed
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except ValueError:
+            if final:
+                raise
+            self._need = 2 * (len(self._buffer) - self._pos)
+            return False, None
+        if end == len(self._buffer) and not final and self._buffer[self._pos] not in '{["':
+            # Number or literal might continue in the next piece
+            self._need = len(self._buffer) - self._pos + 1
+            return False, None
+        self._need = 0
+        self._pos = end
+        return True, value
+
+    def _parse(self, final):
+        while self._skip_whitespace():
+            char = self._buffer[self._pos]
+            if self._state == "start":
+                if char != "{":
+                    raise ValueError("JSON document is not an object")
+                self._pos += 1
+                self._state = "first_key"
+            elif self._state in ("first_key", "key"):
+                if char == "}" and self._state == "first_key":
+                    self._pos += 1
+                    self._state = "end"
+                    continue
+                if char != '"':
+                    raise ValueError("Expecting property name at position %s" % self._pos)
+                complete, self._key = self._decode(final)
+                if not complete:
+                    return
+                self._state = "colon"
+            elif self._state == "colon":
+                if char != ":":
+                    raise ValueError("Expecting ':' at position %s" % self._pos)
+                self._pos += 1
+                self._state = "value"
+            elif self._state == "value":
+                complete, value = self._decode(final)
+                if not complete:
+                    return
+                self._state = "comma"
+                yield self._key, value
+            elif self._state == "comma":
+                if char not in ",}":
+                    raise ValueError("Expecting ',' or '}' at position %s" % self._pos)
+                self._pos += 1
+                self._state = "key" if char == "," else "end"
+            else:
+                raise ValueError("Extra data at position %s" % self._pos)
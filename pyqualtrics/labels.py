@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Choice labels of survey questions, so that labeled responses (as returned by getLegacyResponseData with
+Labels="1") can be produced locally from coded ones, without retrieving the responses again.
+
+labels = qualtrics.get_survey_labels(SurveyID)     # getSurvey is called once, labels are cached
+responses = qualtrics.getLegacyResponseData(SurveyID)
+labeled = labels.label_responses(responses)        # {"Q1": "2"} -> {"Q1": "Female"}
+
+Column of a single answer question (Q1) has the code (recode value) of the selected choice. Columns of a multiple
+answer question (Q2_1, Q2_2, ...) have "1" if the choice is selected. Columns of a matrix question (Q3_1, Q3_2, ...
+a column per statement) have the code of the selected answer (Q3_1_2 etc with "1" for multiple answer matrices).
+Values that have no label (text entry, empty answers etc) are not changed.
+"""
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+from pyqualtrics.records import ResponseRecord
+
+# Selectors of multiple choice questions that allow more than one answer
+MULTIPLE_ANSWER_SELECTORS = ("MAVR", "MAHR", "MACOL", "MSB")
+
+
+class SurveyLabels(object):
+    """ Maps of codes to labels for each column of legacy response data
+
+    :param columns: {column name: {code: label}}
+    """
+    def __init__(self, columns=None):
+        self.columns = columns if columns is not None else OrderedDict()
+
+    def __repr__(self):
+        return "%s(%d columns)" % (self.__class__.__name__, len(self.columns))
+
+    def add_question(self, export_tag, question_type, selector, choices, answers=None, sub_selector=None):
+        """ Add columns of a question
+
+        :param export_tag: Question export tag (Q1 etc)
+        :param question_type: MC, Matrix etc (other types have no labels)
+        :param selector: SAVR, MAVR etc
+        :param choices: list of (choice ID, code, label) tuples
+        :param answers: list of (answer ID, code, label) tuples (Matrix questions)
+        :param sub_selector: SingleAnswer or MultipleAnswer (Matrix questions)
+        """
+        if question_type == "MC":
+            if selector in MULTIPLE_ANSWER_SELECTORS:
+                for choice_id, code, label in choices:
+                    self.columns["%s_%s" % (export_tag, choice_id)] = {"1": label}
+            else:
+                self.columns[export_tag] = OrderedDict((code, label) for choice_id, code, label in choices)
+        elif question_type == "Matrix" and answers:
+            for choice_id, code, label in choices:
+                column = "%s_%s" % (export_tag, choice_id)
+                if sub_selector == "MultipleAnswer":
+                    for answer_id, answer_code, answer_label in answers:
+                        self.columns["%s_%s" % (column, answer_id)] = {"1": answer_label}
+                else:
+                    self.columns[column] = OrderedDict((answer_code, answer_label)
+                                                       for answer_id, answer_code, answer_label in answers)
+
+    @classmethod
+    def from_xml(cls, text):
+        """ Labels from survey definition returned by getSurvey. Raises xml.etree.ElementTree.ParseError
+        if it is not a valid XML document
+        """
+        labels = cls()
+        root = ET.fromstring(text.encode("utf-8") if not isinstance(text, bytes) else text)
+        for question in root.iter("Question"):
+            export_tag = question.findtext("ExportTag") or question.get("QuestionID")
+            labels.add_question(export_tag, question.findtext("Type"), question.findtext("Selector"),
+                                cls._xml_items(question, "Choices/Choice"),
+                                cls._xml_items(question, "Answers/Answer"), question.findtext("SubSelector"))
+        return labels
+
+    @staticmethod
+    def _xml_items(question, path):
+        return [(item.get("ID"), item.get("Recode") or item.get("ID"), item.findtext("Description") or "")
+                for item in question.findall(path)]
+
+    @classmethod
+    def from_qsf(cls, document):
+        """ Labels from survey exported in Qualtrics Survey Format (QSF document decoded from JSON) """
+        labels = cls()
+        for element in document.get("SurveyElements", []):
+            if element.get("Element") != "SQ":
+                continue
+            payload = element["Payload"]
+            question_type = payload.get("QuestionType")
+            # Matrix questions are coded by answers (columns), other questions by choices
+            recodes = payload.get("RecodeValues") or {}
+            choices = cls._qsf_items(payload.get("Choices"), payload.get("ChoiceOrder"),
+                                     recodes if question_type != "Matrix" else {})
+            answers = cls._qsf_items(payload.get("Answers"), payload.get("AnswerOrder"),
+                                     recodes if question_type == "Matrix" else {})
+            labels.add_question(payload.get("DataExportTag") or payload.get("QuestionID"), question_type,
+                                payload.get("Selector"), choices, answers, payload.get("SubSelector"))
+        return labels
+
+    @staticmethod
+    def _qsf_items(items, order, recodes):
+        if not items:
+            return []
+        # Choices is a dictionary in most surveys, but can be a list
+        if isinstance(items, list):
+            items = OrderedDict((str(i + 1), item) for i, item in enumerate(items) if item)
+        ids = [str(item_id) for item_id in order] if order else list(items)
+        return [(item_id, str(recodes.get(item_id, item_id)), items[item_id].get("Display", ""))
+                for item_id in ids if item_id in items]
+
+    def label(self, column, value):
+        """ Label of value in column, value itself if it has no label """
+        labels = self.columns.get(column)
+        if labels is None or value is None:
+            return value
+        return labels.get(str(value), value)
+
+    def label_response(self, response):
+        """ Labeled copy of a response (OrderedDict, or ResponseRecord if response is a ResponseRecord) """
+        columns = self.columns
+        labeled = OrderedDict()
+        for column, value in response.items():
+            labels = columns.get(column)
+            labeled[column] = value if labels is None or value is None else labels.get(str(value), value)
+        if isinstance(response, ResponseRecord):
+            return ResponseRecord.from_mapping(labeled)
+        return labeled
+
+    def label_responses(self, responses):
+        """ Labeled copy of {ResponseID: response} dictionary returned by getLegacyResponseData """
+        if responses is None:
+            return None
+        return OrderedDict((response_id, self.label_response(response))
+                           for response_id, response in responses.items())
+
+    def iter_label_responses(self, items):
+        """ Label (ResponseID, response) tuples (for example, produced by iter_legacy_response_data) """
+        for response_id, response in items:
+            yield response_id, self.label_response(response)
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Local SQLite copy of survey responses, so they can be queried without API calls.
+
+Responses of each survey are kept in a separate table (responses_<SurveyID>) with a column per field. ResponseID is
+the primary key, StartDate, EndDate, Finished and ExternalDataReference are indexed. Loading the same response again
+(re-imported or completed in-progress response) updates it.
+
+mirror = ResponseMirror("responses.db")
+mirror.load_legacy(qualtrics, SurveyID)     # or mirror.load_export(qualtrics, SurveyID) for large surveys
+finished = mirror.get_responses(SurveyID, StartDate="2017-01-01", Finished="1")
+"""
+import csv
+import json
+import re
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from pyqualtrics import EXPORT_STREAM_ERRORS, _csv_export_responses
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    # Python 2.7
+    from collections import Mapping
+
+if sys.version_info[0] >= 3:
+    STR = (str, )
+else:
+    STR = (str, unicode)  # noqa
+
+
+def _quote(name):
+    """ SQLite identifier """
+    return '"%s"' % name.replace('"', '""')
+
+
+def _date_parameter(value):
+    """ Dates are stored as returned by Qualtrics (2017-12-01 10:00:00), so they can be compared as strings """
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+class ResponseMirror(object):
+    """ SQLite database with responses to surveys. Can be used as a sink of pyqualtrics.sync.ResponseSync
+    (together with SQLiteWatermarkStore(mirror.connection)).
+
+    :param database: file name (":memory:" for in-memory database) or sqlite3.Connection
+    :param batch_size: Number of rows inserted by one executemany call
+    """
+    # Fields indexed in each survey table (ResponseID is the primary key)
+    INDEXED_FIELDS = ("StartDate", "EndDate", "Finished", "ExternalDataReference")
+
+    def __init__(self, database, batch_size=1000):
+        if isinstance(database, sqlite3.Connection):
+            self.connection = database
+        else:
+            self.connection = sqlite3.connect(database, check_same_thread=False)
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self._columns = {}  # table name -> list of columns
+
+    @staticmethod
+    def table_name(survey_id):
+        return "responses_%s" % re.sub(r"\W", "_", survey_id)
+
+    def close(self):
+        self.connection.close()
+
+    def columns(self, survey_id):
+        """ Fields of responses to a survey (without ResponseID), in the order they have been loaded first """
+        with self._lock:
+            return list(self._table_columns(self.table_name(survey_id)) or [])
+
+    def _table_columns(self, table):
+        """ Columns of existing table (without ResponseID), None if there is no such table """
+        if table not in self._columns:
+            rows = self.connection.execute("PRAGMA table_info(%s)" % _quote(table)).fetchall()
+            if not rows:
+                return None
+            # (cid, name, type, notnull, default, pk)
+            self._columns[table] = [row[1] for row in rows if row[1] != "ResponseID"]
+        return self._columns[table]
+
+    def _ensure_columns(self, table, fields):
+        """ Create table or add columns for fields that have not been seen before """
+        columns = self._table_columns(table)
+        if columns is None:
+            self.connection.execute("CREATE TABLE %s (ResponseID TEXT PRIMARY KEY)" % _quote(table))
+            columns = self._columns[table] = []
+        for field in fields:
+            if field not in columns and field != "ResponseID":
+                self.connection.execute("ALTER TABLE %s ADD COLUMN %s" % (_quote(table), _quote(field)))
+                columns.append(field)
+                if field in self.INDEXED_FIELDS:
+                    self.connection.execute("CREATE INDEX %s ON %s (%s)" % (
+                        _quote("%s_%s" % (table, field)), _quote(table), _quote(field)))
+
+    @staticmethod
+    def _upsert_statement(table, fields):
+        """ Statement inserting a row (ResponseID and fields) or updating fields of existing one. Update keeps
+        other columns and rowid, so responses stay in the order they have been loaded first
+        """
+        names = ", ".join(_quote(field) for field in ("ResponseID", ) + fields)
+        placeholders = ", ".join("?" * (len(fields) + 1))
+        if not fields:
+            return "INSERT OR IGNORE INTO %s (%s) VALUES (%s)" % (_quote(table), names, placeholders)
+        updates = ", ".join("%s = excluded.%s" % (_quote(field), _quote(field)) for field in fields)
+        return "INSERT INTO %s (%s) VALUES (%s) ON CONFLICT (ResponseID) DO UPDATE SET %s" % (
+            _quote(table), names, placeholders, updates)
+
+    @staticmethod
+    def _update_statement(table, fields):
+        """ Statement updating fields of existing row, parameters are field values followed by ResponseID """
+        updates = ", ".join("%s = ?" % _quote(field) for field in fields)
+        return "UPDATE %s SET %s WHERE ResponseID = ?" % (_quote(table), updates)
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        return value
+
+    def load(self, survey_id, responses):
+        """ Insert or update responses in one transaction. Consecutive responses with the same fields are inserted
+        by executemany in batches of batch_size
+
+        :param responses: {ResponseID: response} dictionary or iterable of (ResponseID, response) tuples
+        :return: number of responses loaded
+        """
+        if isinstance(responses, Mapping):
+            responses = responses.items()
+        table = self.table_name(survey_id)
+        count = 0
+        with self._lock:
+            try:
+                with self.connection:
+                    fields, batch = None, []
+                    for response_id, response in responses:
+                        response_fields = tuple(response.keys())
+                        if response_fields != fields or len(batch) >= self.batch_size:
+                            self._insert(table, fields, batch)
+                            fields, batch = response_fields, []
+                        batch.append([response_id] + [self._value(value) for value in response.values()])
+                        count += 1
+                    self._insert(table, fields, batch)
+            except Exception:
+                # Transaction has been rolled back (by SQLite error or error raised by responses iterator),
+                # columns added by it may not exist
+                self._columns.pop(table, None)
+                raise
+        return count
+
+    def _insert(self, table, fields, batch):
+        if batch:
+            self._ensure_columns(table, fields)
+            if sqlite3.sqlite_version_info >= (3, 24, 0) or not fields:
+                self.connection.executemany(self._upsert_statement(table, fields), batch)
+            else:
+                # SQLite before 3.24 has no upsert (INSERT OR REPLACE would delete the row with its other columns):
+                # insert rows that don't exist yet, then update all of them, in the same transaction
+                self.connection.executemany(self._upsert_statement(table, ()), [row[:1] for row in batch])
+                self.connection.executemany(self._update_statement(table, fields), [row[1:] + row[:1] for row in batch])
+
+    def load_legacy(self, qualtrics, SurveyID, **kwargs):
+        """ Load responses retrieved by qualtrics.iter_legacy_response_data. Responses retrieved before an error
+        are loaded as well
+
+        :param kwargs: Additional parameters for getLegacyResponseData (LastResponseID, Limit, Labels etc)
+        :return: number of responses loaded, None if error occurs (qualtrics.last_error_message is set)
+        """
+        count = self.load(SurveyID, qualtrics.iter_legacy_response_data(SurveyID, **kwargs))
+        if qualtrics.last_error_message is not None:
+            return None
+        return count
+
+    def load_export(self, qualtrics, SurveyID, **kwargs):
+        """ Load responses exported by qualtrics.export_responses (csv format, API v3). Responses are loaded in one
+        transaction while the export is downloaded, so if download fails, the transaction is rolled back and none
+        of them are loaded (unlike load_legacy)
+
+        :param kwargs: Additional parameters for export_responses and CreateResponseExport (timeout,
+        lastResponseId etc)
+        :return: number of responses loaded, None if error occurs (qualtrics.last_error_message is set)
+        """
+        kwargs["format"] = qualtrics.CSV_FORMAT
+        export = qualtrics.export_responses(SurveyID, **kwargs)
+        if not export.ok:
+            return None
+        try:
+            with export.stream:
+                return self.load(SurveyID, _csv_export_responses(export.stream))
+        except EXPORT_STREAM_ERRORS + (ValueError, csv.Error) as e:
+            qualtrics.last_error_message = str(e)
+            return None
+
+    def write(self, survey_id, responses):
+        """ ResponseSync sink interface: responses are upserted, so responses retrieved again are just updated """
+        self.load(survey_id, responses)
+
+    def recover(self, survey_id, state):
+        """ ResponseSync sink interface """
+
+    def get_responses(self, SurveyID, ResponseID=None, StartDate=None, EndDate=None, Finished=None,
+                      ExternalDataReference=None, where=None, parameters=(), order_by=None, limit=None):
+        """ Responses from the mirror, in the order they have been loaded first (unless order_by is given)
+
+        :param ResponseID: ID of a response or list of IDs
+        :param StartDate: Only responses started at or after this date (string or datetime)
+        :param EndDate: Only responses finished at or before this date (string or datetime)
+        :param Finished: "1" for finished responses, "0" for responses in progress
+        :param ExternalDataReference: Only responses with this external data reference
+        :param where: Additional SQL condition, e.g. '"Q1" = ?' (columns are named after response fields)
+        :param parameters: Values of parameters in where
+        :param order_by: SQL ORDER BY clause, e.g. '"EndDate" DESC'
+        :param limit: Maximum number of responses
+        :return: OrderedDict {ResponseID: OrderedDict response}, like getLegacyResponseData
+        """
+        return OrderedDict(self.iter_responses(
+            SurveyID, ResponseID=ResponseID, StartDate=StartDate, EndDate=EndDate, Finished=Finished,
+            ExternalDataReference=ExternalDataReference, where=where, parameters=parameters, order_by=order_by,
+            limit=limit))
+
+    def get_response(self, SurveyID, ResponseID):
+        """ :return: response or None if it is not in the mirror """
+        return self.get_responses(SurveyID, ResponseID=ResponseID).get(ResponseID)
+
+    def count(self, SurveyID, **kwargs):
+        """ Number of responses matching conditions (see get_responses) """
+        table = self.table_name(SurveyID)
+        with self._lock:
+            if self._table_columns(table) is None:
+                return 0
+            sql, parameters = self._where(**kwargs)
+            cursor = self.connection.execute("SELECT COUNT(*) FROM %s%s" % (_quote(table), sql), parameters)
+            return cursor.fetchone()[0]
+
+    def iter_responses(self, SurveyID, order_by=None, limit=None, **kwargs):
+        """ Generator of (ResponseID, response) tuples, see get_responses """
+        table = self.table_name(SurveyID)
+        with self._lock:
+            columns = self._table_columns(table)
+            if columns is None:
+                return
+            columns = list(columns)
+            sql, parameters = self._where(**kwargs)
+            sql = "SELECT ResponseID, %s FROM %s%s ORDER BY %s" % (
+                ", ".join(_quote(column) for column in columns) or "NULL", _quote(table), sql, order_by or "rowid")
+            if limit is not None:
+                sql += " LIMIT %d" % limit
+            rows = self.connection.execute(sql, parameters).fetchall()
+        for row in rows:
+            yield row[0], OrderedDict(zip(columns, row[1:]))
+
+    @staticmethod
+    def _where(ResponseID=None, StartDate=None, EndDate=None, Finished=None, ExternalDataReference=None, where=None,
+               parameters=()):
+        conditions, values = [], []
+        if ResponseID is not None:
+            ids = [ResponseID] if isinstance(ResponseID, STR) else list(ResponseID)
+            conditions.append("ResponseID IN (%s)" % ", ".join("?" * len(ids)))
+            values.extend(ids)
+        if StartDate is not None:
+            conditions.append('"StartDate" >= ?')
+            values.append(_date_parameter(StartDate))
+        if EndDate is not None:
+            conditions.append('"EndDate" <= ?')
+            values.append(_date_parameter(EndDate))
+        if Finished is not None:
+            conditions.append('"Finished" = ?')
+            values.append(Finished)
+        if ExternalDataReference is not None:
+            conditions.append('"ExternalDataReference" = ?')
+            values.append(ExternalDataReference)
+        if where:
+            conditions.append("(%s)" % where)
+            values.extend(parameters)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), values
+
+    def delete(self, SurveyID, ResponseIDs=None):
+        """ Delete responses (all of them if ResponseIDs is None) from the mirror
+
+        :return: number of deleted responses
+        """
+        table = self.table_name(SurveyID)
+        with self._lock:
+            if self._table_columns(table) is None:
+                return 0
+            with self.connection:
+                if ResponseIDs is None:
+                    return self.connection.execute("DELETE FROM %s" % _quote(table)).rowcount
+                return self.connection.executemany("DELETE FROM %s WHERE ResponseID = ?" % _quote(table),
+                                                   [(response_id, ) for response_id in ResponseIDs]).rowcount
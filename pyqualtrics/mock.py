@@ -17,14 +17,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import csv
+import io
+import json
+import re
+import threading
+import time
+import zipfile
+import xml.etree.ElementTree as ET
 from collections import OrderedDict
 
+try:
+    # Python 3.5
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qsl
+    from io import StringIO
+except ImportError:
+    # Python 2.7
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qsl
+    from StringIO import StringIO
+
 
 class MockQualtrics(object):
     """ Mock object for unit testing code that uses pyqualtrics library
 
     """
-    def __init__(self, user=None, token=None, api_version="2.5"):
+    def __init__(self, user=None, token=None, api_version="2.5", **kwargs):
         self.user = user
         self.token = token
         self.api_version = api_version
@@ -34,6 +55,7 @@ class MockQualtrics(object):
         self.response = None  # For debugging purpose
         self.mock_responses = OrderedDict()
         self.mock_responses_labels = OrderedDict()
+        self.mock_survey_labels = OrderedDict()     # SurveyID -> pyqualtrics.labels.SurveyLabels
 
     def getResponse(self, SurveyID, ResponseID, Labels=None, **kwargs):
         if Labels == "1":
@@ -46,3 +68,584 @@ class MockQualtrics(object):
             return self.mock_responses_labels
         else:
             return self.mock_responses
+
+    def get_survey_labels(self, SurveyID, refresh=False):
+        labels = self.mock_survey_labels.get(SurveyID)
+        self.last_error_message = None if labels is not None else "This survey is Unknown to this user account."
+        return labels
+
+    def label_responses(self, SurveyID, responses):
+        labels = self.get_survey_labels(SurveyID)
+        if labels is None:
+            return None
+        return labels.label_responses(responses)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # Default (5) is too small for concurrent clients
+    request_queue_size = 1024
+
+
+class _MockQualtricsHandler(BaseHTTPRequestHandler):
+    # Keep connections open, like real Qualtrics server does
+    protocol_version = "HTTP/1.1"
+    # Headers and body are sent separately, avoid delayed ACK stalls on keep-alive connections
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Don't spam stderr during unit tests
+        pass
+
+    def do_GET(self):
+        self.handle_request("get")
+
+    def do_POST(self):
+        self.handle_request("post")
+
+    def handle_request(self, method):
+        mock = self.server.mock
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        parsed = urlparse(self.path)
+        params = dict(parse_qsl(parsed.query, keep_blank_values=True))
+        if mock.latency:
+            time.sleep(mock.latency)
+        headers = {}
+        if parsed.path.startswith("/API/v3/"):
+            status, content_type, content = mock.handle_v3(method, parsed.path[len("/API/v3/"):], self.headers,
+                                                           body, headers)
+        else:
+            status, content_type, content = mock.handle_v2(params, body)
+        truncate = len(content)
+        with mock.lock:
+            mock.calls.append(params.get("Request", parsed.path))
+            if content_type == "application/zip" and mock.truncate_downloads is not None:
+                # Emulate dropped connection
+                truncate, mock.truncate_downloads = mock.truncate_downloads, None
+                self.close_connection = True
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content[:truncate])
+
+
+class MockQualtricsServer(object):
+    """ Local HTTP server imitating a small subset of Qualtrics API (v2.5, v3 response exports and response counts).
+    Intended for unit tests and benchmarks that should not depend on real Qualtrics account
+
+    with MockQualtricsServer() as server:
+        qualtrics = Qualtrics("user", "token")
+        server.configure(qualtrics)
+        server.add_response("SV_1", "R_1", Q1=1)
+        responses = qualtrics.getLegacyResponseData("SV_1")
+
+    :param latency: delay (in seconds) before each response, to emulate network round trip
+    :param token: if set, requests with different token are rejected
+    :param export_steps: number of GetResponseExportProgress calls before response export is complete
+    :param import_steps: number of checkImportContactsStatus calls before contacts import job is complete
+    """
+    def __init__(self, latency=0, token=None, export_steps=1, import_steps=1, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.token = token
+        self.export_steps = export_steps
+        self.import_steps = import_steps
+        # If set, connection is dropped after sending that many bytes of the next export file
+        self.truncate_downloads = None
+        # Whether responses recorded (EndDate) exactly at startDate/endDate of response export are included:
+        # "[]" - both, "[)" - startDate only, "()" - neither
+        self.export_date_bounds = "[)"
+        self.surveys = OrderedDict()    # SurveyID -> OrderedDict(ResponseID -> response)
+        self.survey_names = dict()
+        self.questions = dict()         # SurveyID -> list of question definitions, see add_question
+        self.fail_imports = 0           # Number of the next importResponses/importPanel/importContacts calls that fail
+        self.normalize_emails = False   # Strip and lowercase emails of panel members imported by importPanel
+        self.panels = OrderedDict()     # PanelID (or ListID) -> list of recipients
+        self.contact_jobs = dict()      # JobID of importContacts -> counts and number of status checks
+        self.fail_removals = 0          # Number of the next removeContact calls that fail with HTTP 503
+        self.exports = dict()
+        self.calls = []                 # Names of API calls made (or URL path for v3 API)
+        self.lock = threading.Lock()
+        self._counter = 0
+        self._httpd = _ThreadingHTTPServer((host, port), _MockQualtricsHandler)
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return "http://%s:%s" % (host, port)
+
+    @property
+    def url(self):
+        return self.base_url + "/WRAPI/ControlPanel/api.php"
+
+    @property
+    def api3_url(self):
+        return self.base_url + "/API/v3"
+
+    def configure(self, qualtrics):
+        """ Point Qualtrics object to this server """
+        qualtrics.url = self.url
+        qualtrics.api3_url = self.api3_url
+        return qualtrics
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _next_id(self, prefix):
+        with self.lock:
+            self._counter += 1
+            return "%s_%08d" % (prefix, self._counter)
+
+    def add_survey(self, SurveyID, SurveyName=None):
+        self.surveys.setdefault(SurveyID, OrderedDict())
+        if SurveyName or SurveyID not in self.survey_names:
+            self.survey_names[SurveyID] = SurveyName or SurveyID
+        return self.surveys[SurveyID]
+
+    def add_question(self, SurveyID, QuestionID, ExportTag, Type="MC", Selector="SAVR", choices=(), recodes=None,
+                     answers=(), SubSelector=None):
+        """ Add question to survey definition returned by getSurvey. Choices (and answers of Matrix questions) are
+        lists of labels, their IDs are 1, 2, ... Recodes are codes of choices (answers of Matrix questions)
+        """
+        self.add_survey(SurveyID)
+        self.questions.setdefault(SurveyID, []).append(dict(
+            QuestionID=QuestionID, ExportTag=ExportTag, Type=Type, Selector=Selector, SubSelector=SubSelector,
+            choices=list(choices), answers=list(answers), recodes=list(recodes) if recodes else None))
+
+    def add_response(self, SurveyID, ResponseID, **fields):
+        response = OrderedDict([
+            ("ResponseSet", "Default Response Set"),
+            ("Name", "Anonymous"),
+            ("ExternalDataReference", ""),
+            ("EmailAddress", ""),
+            ("IPAddress", "127.0.0.1"),
+            ("Status", "0"),
+            ("StartDate", "2016-01-01 00:00:00"),
+            ("EndDate", "2016-01-01 00:01:00"),
+            ("Finished", "1"),
+        ])
+        response.update(fields)
+        self.add_survey(SurveyID)[ResponseID] = response
+        return response
+
+    @staticmethod
+    def _json(data, status=200):
+        return status, "application/json", json.dumps(data).encode("utf-8")
+
+    def _success(self, result):
+        return self._json(OrderedDict([("Meta", {"Status": "Success", "Debug": ""}), ("Result", result)]))
+
+    def _error(self, message):
+        return self._json({"Meta": {"Status": "Error", "ErrorMessage": message, "Debug": ""}})
+
+    def handle_v2(self, params, body):
+        if self.token is not None and params.get("Token") != self.token:
+            return self._error("Incorrect Username or Password")
+        handler = getattr(self, "v2_%s" % params.get("Request"), None)
+        if handler is None:
+            return self._error("Invalid request. Missing or invalid parameter Request.")
+        return handler(params, body)
+
+    def v2_getLegacyResponseData(self, params, body):
+        if params.get("SurveyID") not in self.surveys:
+            return self._error("Invalid request. Missing or invalid parameter SurveyID.")
+        responses = list(self.surveys[params["SurveyID"]].items())
+        if params.get("ResponseID"):
+            responses = [(key, value) for key, value in responses if key == params["ResponseID"]]
+        if params.get("LastResponseID"):
+            keys = [key for key, value in responses]
+            if params["LastResponseID"] not in keys:
+                return self._error("Invalid request. LastResponseID not found.")
+            responses = responses[keys.index(params["LastResponseID"]) + 1:]
+        if params.get("Limit"):
+            responses = responses[:int(params["Limit"])]
+        return self._json(OrderedDict(responses))
+
+    def v2_getSurvey(self, params, body):
+        survey_id = params.get("SurveyID")
+        if survey_id not in self.surveys:
+            root = ET.Element("XML")
+            meta = ET.SubElement(root, "Meta")
+            ET.SubElement(meta, "Status").text = "Error"
+            ET.SubElement(meta, "ErrorMessage").text = "This survey is Unknown to this user account."
+            return 500, "text/xml", ET.tostring(root)
+        root = ET.Element("SurveyDefinition")
+        ET.SubElement(root, "SurveyName").text = self.survey_names[survey_id]
+        questions = ET.SubElement(root, "Questions")
+        for definition in self.questions.get(survey_id, []):
+            question = ET.SubElement(questions, "Question", QuestionID=definition["QuestionID"])
+            for name in ("Type", "Selector", "SubSelector", "ExportTag"):
+                if definition[name] is not None:
+                    ET.SubElement(question, name).text = definition[name]
+            matrix = definition["Type"] == "Matrix"
+            for items, tag, coded in (("choices", "Choice", not matrix), ("answers", "Answer", matrix)):
+                if not definition[items]:
+                    continue
+                element = ET.SubElement(question, tag + "s")
+                for i, label in enumerate(definition[items]):
+                    recode = definition["recodes"][i] if coded and definition["recodes"] else i + 1
+                    item = ET.SubElement(element, tag, ID=str(i + 1), Recode=str(recode))
+                    ET.SubElement(item, "Description").text = label
+        return 200, "text/xml", ET.tostring(root, encoding="utf-8")
+
+    @staticmethod
+    def _multipart_fields(body):
+        """ Fields of multipart/form-data request body (boundary is taken from the first line) """
+        fields = dict()
+        boundary = body.split(b"\r\n", 1)[0]
+        for part in body.split(boundary)[1:]:
+            if b"\r\n\r\n" not in part:
+                continue
+            headers, content = part.split(b"\r\n\r\n", 1)
+            match = re.search(br'name="([^"]*)"', headers)
+            if match is not None:
+                fields[match.group(1).decode("utf-8")] = content[:-2] if content.endswith(b"\r\n") else content
+        return fields
+
+    def v2_importResponses(self, params, body):
+        """ Responses get new IDs, fields are named by the second header row (like QID1 in import files) """
+        if params.get("SurveyID") not in self.surveys:
+            return self._error("Invalid request. Missing or invalid parameter SurveyID.")
+        with self.lock:
+            if self.fail_imports:
+                self.fail_imports -= 1
+                return self._error("Internal server error")
+        contents = self._multipart_fields(body).get("FileContents")
+        if contents is None:
+            return self._error("Invalid request. Missing or invalid parameter FileContents.")
+        rows = list(csv.reader(StringIO(contents.decode("utf-8"))))
+        for row in rows[2:]:
+            self.add_response(params["SurveyID"], self._next_id("R"), **dict(zip(rows[1], row)))
+        return self._success({"ImportedResponses": len(rows[2:])})
+
+    def v2_getSurveys(self, params, body):
+        surveys = [{"SurveyID": key, "SurveyName": self.survey_names[key]} for key in self.surveys]
+        return self._success({"Surveys": surveys})
+
+    def v2_createPanel(self, params, body):
+        panel_id = self._next_id("ML")
+        self.panels[panel_id] = []
+        return self._success({"PanelID": panel_id})
+
+    def v2_deletePanel(self, params, body):
+        if self.panels.pop(params.get("PanelID"), None) is None:
+            return self._error("Invalid request. Missing or invalid parameter PanelID.")
+        return self._success({"Success": True})
+
+    def v2_importPanel(self, params, body):
+        """ Columns other than Email, FirstName, LastName and ExternalRef are embedded data """
+        panel_id = params.get("PanelID")
+        if panel_id is not None and panel_id not in self.panels:
+            return self._error("Invalid request. Missing or invalid parameter PanelID.")
+        with self.lock:
+            if self.fail_imports:
+                self.fail_imports -= 1
+                return self._error("Internal server error")
+        rows = list(csv.reader(StringIO(body.decode("utf-8"))))
+        header = rows.pop(0) if params.get("ColumnHeaders") == "1" and rows else []
+        columns = dict((name, int(params[name]) - 1) for name in ("Email", "FirstName", "LastName", "ExternalRef")
+                       if params.get(name))
+        recipients = []
+        for row in rows:
+            recipient = OrderedDict([("RecipientID", self._next_id("MLRP"))])
+            for name in ("FirstName", "LastName", "Email"):
+                recipient[name] = row[columns[name]] if name in columns else None
+            if self.normalize_emails and recipient["Email"] is not None:
+                recipient["Email"] = recipient["Email"].strip().lower()
+            recipient["ExternalDataReference"] = row[columns["ExternalRef"]] if "ExternalRef" in columns else None
+            recipient["EmbeddedData"] = dict((name, value) for i, (name, value) in enumerate(zip(header, row))
+                                             if i not in columns.values())
+            recipients.append(recipient)
+        if panel_id is None:
+            panel_id = self._next_id("ML")
+            self.panels[panel_id] = []
+        with self.lock:
+            self.panels[panel_id].extend(recipients)
+        return self._success({"PanelID": panel_id, "Count": len(recipients)})
+
+    def v2_importContacts(self, params, body):
+        """ Columns are identified by names in the header row, the ones other than Email, FirstName, LastName and
+        ExternalRef are embedded data. Contacts with Email of an existing contact of the list update it,
+        rows without Email are rejected
+        """
+        list_id = params.get("ListID")
+        if list_id is not None and list_id not in self.panels:
+            return self._error("Invalid request. Missing or invalid parameter ListID.")
+        with self.lock:
+            if self.fail_imports:
+                self.fail_imports -= 1
+                return self._error("Internal server error")
+        rows = list(csv.reader(StringIO(body.decode("utf-8"))))
+        header = rows.pop(0) if rows else []
+        if list_id is None:
+            list_id = self._next_id("ML")
+            with self.lock:
+                self.panels[list_id] = []
+        contacts = []
+        for row in rows:
+            fields = dict(zip(header, row))
+            contact = OrderedDict([("RecipientID", self._next_id("MLRP"))])
+            for name in ("FirstName", "LastName", "Email"):
+                contact[name] = fields.pop(name, None) or None
+            contact["ExternalDataReference"] = fields.pop("ExternalRef", None) or None
+            contact["EmbeddedData"] = fields
+            contacts.append(contact)
+        counts = {"created": 0, "updated": 0, "failed": 0}
+        with self.lock:
+            recipients = self.panels[list_id]
+            for contact in contacts:
+                existing = [recipient for recipient in recipients
+                            if contact["Email"] is not None and recipient["Email"] == contact["Email"]]
+                if contact["Email"] is None:
+                    counts["failed"] += 1
+                elif existing:
+                    existing[0].update((key, value) for key, value in contact.items() if key != "RecipientID")
+                    counts["updated"] += 1
+                else:
+                    recipients.append(contact)
+                    counts["created"] += 1
+        job_id = self._next_id("CJ")
+        self.contact_jobs[job_id] = {"counts": counts, "polls": 0}
+        return self._success({"ListID": list_id, "JobID": job_id})
+
+    def v2_checkImportContactsStatus(self, params, body):
+        job = self.contact_jobs.get(params.get("JobID"))
+        if job is None:
+            return self._error("Invalid request. Missing or invalid parameter JobID.")
+        with self.lock:
+            job["polls"] += 1
+            percent = min(100.0, 100.0 * job["polls"] / self.import_steps)
+        if percent < 100:
+            return self._success({"Status": "In Progress", "PercentComplete": percent})
+        return self._success({"Status": "Complete", "PercentComplete": 100.0,
+                              "CreatedContacts": job["counts"]["created"],
+                              "UpdatedContacts": job["counts"]["updated"],
+                              "FailedContacts": job["counts"]["failed"]})
+
+    def v2_getPanelMemberCount(self, params, body):
+        if params.get("PanelID") not in self.panels:
+            return self._error("Invalid request. Missing or invalid parameter PanelID.")
+        return self._success({"Count": str(len(self.panels[params["PanelID"]]))})
+
+    def _recipients_page(self, panel_id, params):
+        """ Members of panel (or list) after LastRecipientID, at most NumberOfRecords of them """
+        with self.lock:
+            members = list(self.panels[panel_id])
+        if params.get("LastRecipientID"):
+            ids = [member["RecipientID"] for member in members]
+            if params["LastRecipientID"] not in ids:
+                return self._error("Invalid request. Missing or invalid parameter LastRecipientID.")
+            members = members[ids.index(params["LastRecipientID"]) + 1:]
+        if params.get("NumberOfRecords"):
+            members = members[:int(params["NumberOfRecords"])]
+        return self._json(members)
+
+    def v2_getPanel(self, params, body):
+        if params.get("PanelID") not in self.panels:
+            return self._error("Invalid request. Missing or invalid parameter PanelID.")
+        return self._recipients_page(params["PanelID"], params)
+
+    def v2_getListContacts(self, params, body):
+        if params.get("ListID") not in self.panels:
+            return self._error("Invalid request. Missing or invalid parameter ListID.")
+        return self._recipients_page(params["ListID"], params)
+
+    def v2_removeContact(self, params, body):
+        with self.lock:
+            if self.fail_removals:
+                self.fail_removals -= 1
+                return self._json({"Meta": {"Status": "Error", "ErrorMessage": "Service Unavailable", "Debug": ""}},
+                                  status=503)
+            contacts = self.panels.get(params.get("ListID"), [])
+            for contact in list(contacts):
+                if contact["RecipientID"] == params.get("RecipientID"):
+                    contacts.remove(contact)
+                    return self._success({"Success": True})
+        return self._error("Invalid request. Missing or invalid parameter RecipientID.")
+
+    def v2_addRecipient(self, params, body):
+        if params.get("PanelID") not in self.panels:
+            return self._error("Invalid request. Missing or invalid parameter PanelID.")
+        recipient = OrderedDict([
+            ("RecipientID", self._next_id("MLRP")),
+            ("FirstName", params.get("FirstName")),
+            ("LastName", params.get("LastName")),
+            ("Email", params.get("Email")),
+            ("ExternalDataReference", params.get("ExternalDataRef") or None),
+            ("Language", params.get("Language")),
+            ("EmbeddedData", dict((key[3:-1], value) for key, value in params.items() if key.startswith("ED["))),
+        ])
+        with self.lock:
+            self.panels[params["PanelID"]].append(recipient)
+        return self._success({"RecipientID": recipient["RecipientID"]})
+
+    def v2_getRecipient(self, params, body):
+        for panel in self.panels.values():
+            for recipient in panel:
+                if recipient["RecipientID"] == params.get("RecipientID"):
+                    return self._success({"Recipient": recipient})
+        return self._error("Invalid request. Missing or invalid parameter RecipientID.")
+
+    def v2_removeRecipient(self, params, body):
+        panel = self.panels.get(params.get("PanelID"), [])
+        for recipient in list(panel):
+            if recipient["RecipientID"] == params.get("RecipientID"):
+                panel.remove(recipient)
+                return self._success({"Success": True})
+        return self._error("Invalid request. Missing or invalid parameter RecipientID.")
+
+    def v2_sendSurveyToIndividual(self, params, body):
+        distribution_id = self._next_id("EMD")
+        return self._success({"EmailDistributionID": distribution_id, "DistributionQueueID": distribution_id,
+                              "Success": True})
+
+    def _v3_error(self, message, status):
+        return self._json({"meta": {"httpStatus": str(status), "error": {"errorMessage": message}}}, status=status)
+
+    def handle_v3(self, method, path, request_headers, body, response_headers):
+        if self.token is not None and request_headers.get("X-API-TOKEN") != self.token:
+            return self._v3_error("Unrecognized X-API-TOKEN.", 401)
+        parts = path.strip("/").split("/")
+        if parts[0] == "surveys" and len(parts) == 2 and method == "get":
+            return self.v3_get_survey(parts[1])
+        if parts[0] != "responseexports":
+            return self._v3_error("Not found", 404)
+        if method == "post" and len(parts) == 1:
+            return self.v3_create_export(json.loads(body.decode("utf-8")))
+        export = self.exports.get(parts[1]) if len(parts) > 1 else None
+        if export is None:
+            return self._v3_error("Export id not found", 404)
+        if len(parts) == 2:
+            return self.v3_export_progress(parts[1], export)
+        return self.v3_export_file(export, request_headers.get("Range"), response_headers)
+
+    def v3_get_survey(self, survey_id):
+        if survey_id not in self.surveys:
+            return self._v3_error("Invalid surveyId parameter.", 404)
+        result = OrderedDict([
+            ("id", survey_id),
+            ("name", self.survey_names[survey_id]),
+            ("responseCounts", {"auditable": len(self.surveys[survey_id]), "generated": 0, "deleted": 0}),
+        ])
+        return self._json({"result": result, "meta": {"httpStatus": "200 - OK"}})
+
+    def v3_create_export(self, data):
+        if data.get("surveyId") not in self.surveys:
+            return self._v3_error("Invalid surveyId parameter.", 400)
+        export_id = self._next_id("ES")
+        self.exports[export_id] = {"data": data, "polls": 0}
+        return self._json({"result": {"id": export_id}, "meta": {"httpStatus": "200 - OK"}})
+
+    def v3_export_progress(self, export_id, export):
+        with self.lock:
+            export["polls"] += 1
+            percent = min(100.0, 100.0 * export["polls"] / self.export_steps)
+        result = {"status": "in progress", "percentComplete": percent}
+        if percent >= 100:
+            result = {"status": "complete", "percentComplete": 100.0,
+                      "file": "%s/responseexports/%s/file" % (self.api3_url, export_id)}
+        return self._json({"result": result, "meta": {"httpStatus": "200 - OK"}})
+
+    def export_rows(self, data):
+        """ Responses selected by CreateResponseExport parameters, as (ResponseID, response) pairs """
+        rows = list(self.surveys[data["surveyId"]].items())
+        if data.get("startDate") or data.get("endDate"):
+            rows = [(key, value) for key, value in rows if self._recorded_in_range(value["EndDate"], data)]
+        if data.get("lastResponseId"):
+            keys = [key for key, value in rows]
+            rows = rows[keys.index(data["lastResponseId"]) + 1:]
+        if data.get("limit"):
+            rows = rows[:int(data["limit"])]
+        return rows
+
+    def _recorded_in_range(self, recorded, data):
+        """ Compare recorded date with startDate and endDate (ISO 8601 strings) of response export """
+        start, end = [data[key].replace("T", " ").rstrip("Z") if data.get(key) else None
+                      for key in ("startDate", "endDate")]
+        if start is not None and (recorded < start or recorded == start and self.export_date_bounds[0] == "("):
+            return False
+        if end is not None and (recorded > end or recorded == end and self.export_date_bounds[1] == ")"):
+            return False
+        return True
+
+    @staticmethod
+    def _column_included(name, question_ids):
+        """ Columns of questions (Q1, Q1_2 etc - question QID1) not in includedQuestionIds are not exported """
+        match = re.match(r"Q(\d+)(_|$)", name)
+        return not question_ids or match is None or "QID%s" % match.group(1) in question_ids
+
+    # Fields labeled V1..V10 in the first header row of csv2013 export file
+    CSV2013_FIELDS = ["ResponseID", "ResponseSet", "Name", "ExternalDataReference", "EmailAddress", "IPAddress",
+                      "Status", "StartDate", "EndDate", "Finished"]
+
+    def export_content(self, data):
+        """ Content of the file inside export archive """
+        rows = self.export_rows(data)
+        if data["format"] == "json":
+            responses = []
+            for response_id, response in rows:
+                record = OrderedDict([("ResponseID", response_id)])
+                record.update(response)
+                responses.append(record)
+            return json.dumps({"responses": responses}), "json"
+        # Columns are the same for any subset of responses, like in Qualtrics exports
+        fieldnames = ["ResponseID"]
+        for response in self.surveys[data["surveyId"]].values():
+            for key in response:
+                if key not in fieldnames and self._column_included(key, data.get("includedQuestionIds")):
+                    fieldnames.append(key)
+        fp = StringIO()
+        writer = csv.writer(fp, lineterminator="\n")
+        if data["format"] == "csv":
+            writer.writerow(fieldnames)
+            writer.writerow(fieldnames)
+            writer.writerow([json.dumps({"ImportId": name}) for name in fieldnames])
+        else:
+            # csv2013: V1..V10 labels of standard fields, their names in the second row (question texts in other
+            # columns)
+            writer.writerow(["V%s" % (self.CSV2013_FIELDS.index(name) + 1) if name in self.CSV2013_FIELDS else name
+                             for name in fieldnames])
+            writer.writerow([name if name in self.CSV2013_FIELDS else "%s - question text" % name
+                             for name in fieldnames])
+        for response_id, response in rows:
+            writer.writerow([response_id] + [response.get(key, "") for key in fieldnames[1:]])
+        return fp.getvalue(), "csv"
+
+    def v3_export_file(self, export, byte_range, response_headers):
+        if "archive" not in export:
+            # Same archive should be returned every time, so interrupted download can be resumed
+            content, extension = self.export_content(export["data"])
+            fp = io.BytesIO()
+            with zipfile.ZipFile(fp, "w", zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr("%s.%s" % (self.survey_names[export["data"]["surveyId"]], extension),
+                                 content.encode("utf-8"))
+            export["archive"] = fp.getvalue()
+        archive = export["archive"]
+        response_headers["Accept-Ranges"] = "bytes"
+        if byte_range and byte_range.startswith("bytes=") and byte_range.endswith("-"):
+            offset = int(byte_range[len("bytes="):-1])
+            if offset >= len(archive):
+                response_headers["Content-Range"] = "bytes */%s" % len(archive)
+                return 416, "text/plain", b""
+            response_headers["Content-Range"] = "bytes %s-%s/%s" % (offset, len(archive) - 1, len(archive))
+            return 206, "application/zip", archive[offset:]
+        return 200, "application/zip", archive
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Compact representation of survey responses returned by getLegacyResponseData.
+
+Every response is normally an OrderedDict repeating the same keys (ResponseSet, Name, EmailAddress, ..., Q1, Q2, ...).
+ResponseRecord keeps only a tuple of values, keys and their order are kept by ResponseSchema object shared by all
+responses with the same keys. Short values (question codes, "0"/"1" flags etc) are shared between responses too.
+"""
+import sys
+import weakref
+from collections import OrderedDict
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    # Python 2.7
+    from collections import Mapping
+
+if sys.version_info[0] >= 3:
+    STR = (str, )
+else:
+    STR = (str, unicode)  # noqa
+
+
+class ResponseSchema(object):
+    """ Ordered field names shared by responses. Use ResponseSchema.get to reuse existing schema
+    for the same fields.
+
+    :param fields: field names, in order
+    """
+    # Values not longer than this are shared between records
+    SHARED_VALUE_LENGTH = 32
+    # Maximum number of distinct shared values kept by a schema
+    SHARED_VALUES_LIMIT = 65536
+
+    _schemas = weakref.WeakValueDictionary()
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.index = dict((field, i) for i, field in enumerate(self.fields))
+        if len(self.index) != len(self.fields):
+            raise ValueError("Duplicate field names")
+        self._shared_values = {}
+
+    @classmethod
+    def get(cls, fields):
+        """ Schema for given field names, the same object is returned while records using it exist """
+        fields = tuple(fields)
+        schema = cls._schemas.get(fields)
+        if schema is None:
+            schema = cls(fields)
+            cls._schemas[fields] = schema
+        return schema
+
+    def _share(self, value):
+        if not isinstance(value, STR) or len(value) > self.SHARED_VALUE_LENGTH:
+            return value
+        shared = self._shared_values.get(value)
+        if shared is None:
+            if len(self._shared_values) >= self.SHARED_VALUES_LIMIT:
+                return value
+            shared = self._shared_values[value] = value
+        return shared
+
+    def record(self, values):
+        """ ResponseRecord with given values, in the order of fields
+
+        :param values: iterable of values
+        """
+        values = tuple([self._share(value) for value in values])
+        if len(values) != len(self.fields):
+            raise ValueError("Expected %d values, got %d" % (len(self.fields), len(values)))
+        return ResponseRecord(self, values)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, list(self.fields))
+
+
+class ResponseRecord(Mapping):
+    """ Read-only mapping of field names to values of a single response, in the order of schema fields.
+    Compares equal to dictionaries with the same items. Use to_dict() to get a modifiable (or JSON serializable)
+    copy.
+    """
+    __slots__ = ("schema", "_values")
+
+    def __init__(self, schema, values):
+        self.schema = schema
+        self._values = values
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """ Convert a dictionary (OrderedDict returned by getLegacyResponseData) to ResponseRecord """
+        if isinstance(mapping, cls):
+            return mapping
+        return ResponseSchema.get(mapping.keys()).record(mapping.values())
+
+    def __getitem__(self, key):
+        return self._values[self.schema.index[key]]
+
+    def get(self, key, default=None):
+        i = self.schema.index.get(key)
+        return default if i is None else self._values[i]
+
+    def __contains__(self, key):
+        return key in self.schema.index
+
+    def __iter__(self):
+        return iter(self.schema.fields)
+
+    def __len__(self):
+        return len(self._values)
+
+    def keys(self):
+        return list(self.schema.fields)
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return list(zip(self.schema.fields, self._values))
+
+    def to_dict(self):
+        """ :return: OrderedDict with the same items """
+        return OrderedDict(zip(self.schema.fields, self._values))
+
+    def __reduce__(self):
+        return _unpickle_record, (self.schema.fields, self._values)
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.items())
+
+
+def _unpickle_record(fields, values):
+    return ResponseSchema.get(fields).record(values)
+
+
+def compact_responses(responses):
+    """ Replace responses in {ResponseID: response} dictionary (returned by getLegacyResponseData) with
+    ResponseRecord objects, in place. Each response is released as soon as it has been converted.
+
+    :return: responses
+    """
+    if responses is None:
+        return None
+    for response_id, response in responses.items():
+        # Replacing values of existing keys does not change the dictionary size, so iteration is safe
+        responses[response_id] = ResponseRecord.from_mapping(response)
+    return responses
+
+
+def iter_compact_responses(items):
+    """ Convert (ResponseID, response) tuples (for example, produced by iter_legacy_response_data) to
+    (ResponseID, ResponseRecord) tuples
+    """
+    for response_id, response in items:
+        yield response_id, ResponseRecord.from_mapping(response)
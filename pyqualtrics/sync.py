@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Incremental synchronization of survey responses.
+
+ResponseSync retrieves responses page by page (getLegacyResponseData with LastResponseID and Limit), starting after
+the last response retrieved by the previous run (watermark). Each page is written by a sink, then the watermark is
+advanced, so it never points past responses that have not been written. If a run crashes, the next run asks the sink
+to discard anything written after the watermark and retrieves those responses again.
+
+store = FileWatermarkStore("watermarks.json")
+sync = ResponseSync(qualtrics, store, JsonLinesSink("responses"))
+result = sync.sync(SurveyID)
+print(result.responses, result.error_message)
+"""
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from pyqualtrics.fileutil import _write_file_atomic
+
+
+class FileWatermarkStore(object):
+    """ Watermarks of all surveys kept in a JSON file, {SurveyID: state}. The file is replaced atomically
+    (written to a temporary file, which is renamed), so it is never left half-written.
+
+    :param filename: JSON file name (created when the first watermark is set)
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if not os.path.exists(self.filename):
+            return {}
+        with io.open(self.filename, encoding="utf-8") as fp:
+            return json.load(fp)
+
+    def get(self, survey_id):
+        """ :return: state saved by set (dict with LastResponseID key) or None if survey has not been synchronized """
+        with self._lock:
+            return self._load().get(survey_id)
+
+    def set(self, survey_id, state):
+        with self._lock:
+            watermarks = self._load()
+            watermarks[survey_id] = state
+            _write_file_atomic(self.filename, u"%s" % json.dumps(watermarks, sort_keys=True, indent=1))
+
+
+class SQLiteWatermarkStore(object):
+    """ Watermarks kept in a table of SQLite database. The database can be shared with a sink (e.g. ResponseMirror
+    connection); ResponseSync commits the watermark after the sink has written the page, in a separate transaction,
+    so responses retrieved again after a crash must be overwritten by the sink (ResponseMirror upserts them).
+
+    :param database: file name or sqlite3.Connection
+    :param table: name of the table (created if it does not exist)
+    """
+    def __init__(self, database, table="pyqualtrics_watermarks"):
+        if not re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", table):
+            raise ValueError("Invalid table name: %r" % table)
+        if isinstance(database, sqlite3.Connection):
+            self.connection = database
+        else:
+            self.connection = sqlite3.connect(database, check_same_thread=False)
+        self.table = table
+        self._lock = threading.Lock()
+        with self._lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS %s (survey_id TEXT PRIMARY KEY, state TEXT NOT NULL)"
+                                    % table)
+
+    def get(self, survey_id):
+        with self._lock:
+            row = self.connection.execute("SELECT state FROM %s WHERE survey_id = ?" % self.table,
+                                          (survey_id, )).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, survey_id, state, commit=True):
+        """ :param commit: Commit the transaction (False if the caller commits it together with written responses) """
+        with self._lock:
+            self.connection.execute("INSERT OR REPLACE INTO %s (survey_id, state) VALUES (?, ?)" % self.table,
+                                    (survey_id, json.dumps(state, sort_keys=True)))
+            if commit:
+                self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class JsonLinesSink(object):
+    """ Appends responses to directory/<SurveyID>.jsonl file, one JSON object per line (ResponseID key first, then
+    response fields). Size of the file is saved with the watermark, data written after it (by a run that crashed)
+    is truncated before the next run continues.
+
+    :param directory: directory for the files (created if it does not exist)
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def filename(self, survey_id):
+        return os.path.join(self.directory, "%s.jsonl" % survey_id)
+
+    def recover(self, survey_id, state):
+        """ Discard responses written after the watermark
+
+        :param state: watermark saved after the last successful write (None if there is no watermark)
+        """
+        offset = state.get("offset", 0) if state else 0
+        filename = self.filename(survey_id)
+        if os.path.exists(filename) and os.path.getsize(filename) > offset:
+            with open(filename, "r+b") as fp:
+                fp.truncate(offset)
+
+    def write(self, survey_id, responses):
+        """ Write responses and make sure they are on disk
+
+        :param responses: OrderedDict {ResponseID: response}
+        :return: dict saved with the watermark
+        """
+        with open(self.filename(survey_id), "ab") as fp:
+            for response_id, response in responses.items():
+                record = OrderedDict([("ResponseID", response_id)])
+                record.update(response)
+                fp.write(json.dumps(record).encode("utf-8") + b"\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+            return {"offset": fp.tell()}
+
+
+class SyncResult(object):
+    """ Outcome of ResponseSync.sync call """
+    def __init__(self, survey_id, last_response_id):
+        self.survey_id = survey_id
+        self.last_response_id = last_response_id   # Watermark after the call
+        self.responses = 0                          # Number of responses retrieved and written
+        self.pages = 0                              # Number of getLegacyResponseData calls
+        self.error_message = None                   # None if all new responses have been retrieved
+
+    @property
+    def ok(self):
+        return self.error_message is None
+
+    def __repr__(self):
+        return "%s(survey_id=%r, last_response_id=%r, responses=%r, error_message=%r)" % (
+            self.__class__.__name__, self.survey_id, self.last_response_id, self.responses, self.error_message)
+
+
+class ResponseSync(object):
+    """ Retrieve responses that are newer than the watermark and write them to a sink.
+
+    Sink is an object with write(survey_id, responses) function, which returns a dict saved with the watermark
+    (or None), and recover(survey_id, state) function, called with the saved watermark before the sync starts.
+    Responses written after the watermark (if the previous run crashed) are retrieved again, so sink should
+    either discard them in recover (like JsonLinesSink) or overwrite existing responses.
+
+    Note that if the response the watermark points to is deleted, getLegacyResponseData fails with
+    "LastResponseID not found" error; reset the watermark to synchronize the survey from the beginning.
+
+    :param qualtrics: Qualtrics object
+    :param store: FileWatermarkStore, SQLiteWatermarkStore or object with the same get and set functions
+    :param sink: where responses are written
+    :param page_size: Number of responses retrieved (and written) at once
+    """
+    def __init__(self, qualtrics, store, sink, page_size=1000):
+        assert page_size > 0
+        self.qualtrics = qualtrics
+        self.store = store
+        self.sink = sink
+        self.page_size = page_size
+
+    def sync(self, SurveyID, **kwargs):
+        """ Retrieve and write new responses to a survey. Exceptions raised by the sink are not handled (the watermark
+        is not advanced past responses that have not been written)
+
+        :param SurveyID: The survey you will be getting the responses for.
+        :param kwargs: Additional parameters for getLegacyResponseData (Labels, Questions etc)
+        :return: SyncResult. If retrieval failed, its error_message (and qualtrics.last_error_message) is set
+        """
+        state = self.store.get(SurveyID)
+        self.sink.recover(SurveyID, state)
+        result = SyncResult(SurveyID, state["LastResponseID"] if state else None)
+        while True:
+            page = self.qualtrics.getLegacyResponseData(SurveyID, LastResponseID=result.last_response_id,
+                                                        Limit=self.page_size, low_memory=True, **kwargs)
+            if page is None:
+                result.error_message = self.qualtrics.last_error_message
+                return result
+            result.pages += 1
+            if page:
+                state = dict(self.sink.write(SurveyID, page) or {})
+                state["LastResponseID"] = next(reversed(page))
+                self.store.set(SurveyID, state)
+                result.last_response_id = state["LastResponseID"]
+                result.responses += len(page)
+            if len(page) < self.page_size:
+                return result
+
+    def reset(self, SurveyID):
+        """ Forget the watermark, so the next sync retrieves all responses (sink discards written responses) """
+        self.store.set(SurveyID, None)
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the pyqualtrics package.
+# For copyright and licensing information about this package, see the
+# NOTICE.txt and LICENSE.txt files in its top-level directory; they are
+# available at https://github.com/Baguage/pyqualtrics
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Decompression of zip archives returned by Qualtrics v3 API as they are downloaded.
+
+zipfile module needs the central directory at the end of the archive, so it can't open an archive until it is
+downloaded completely. Response export archives contain a single file, which can be decompressed using
+its local file header only. https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT
+"""
+import io
+import struct
+import zlib
+from zipfile import BadZipfile
+
+LOCAL_FILE_HEADER = struct.Struct("<4sHHHHHLLLHH")
+LOCAL_FILE_HEADER_SIGNATURE = b"PK\x03\x04"
+DATA_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+# General purpose bit flags
+FLAG_ENCRYPTED = 0x1
+FLAG_DATA_DESCRIPTOR = 0x8
+# Compression methods
+STORED = 0
+DEFLATED = 8
+
+
+class ZipStreamDecoder(object):
+    """ Incremental decoder of the first file in zip archive.
+    Feed it chunks of the archive, it returns decompressed data as soon as it is available.
+
+    decoder = ZipStreamDecoder()
+    for chunk in chunks:
+        process(decoder.feed(chunk))
+    decoder.finish()
+    """
+    def __init__(self):
+        # Name of the file in archive, available after header has been decoded
+        self.name = None
+        # True when the whole file has been decompressed
+        self.eof = False
+        self._header = b""
+        self._flags = None
+        self._crc = None
+        self._remaining = None
+        self._decompressor = None
+        self._actual_crc = 0
+        # Data following compressed file (data descriptor with CRC-32 if FLAG_DATA_DESCRIPTOR is set)
+        self._tail = b""
+
+    @property
+    def header_decoded(self):
+        return self.name is not None
+
+    def feed(self, data):
+        """ Decode next chunk of archive
+
+        :param data: bytes
+        :return: decompressed bytes (can be empty)
+        """
+        if self.eof:
+            self._tail = (self._tail + data)[:16]
+            return b""
+        if not self.header_decoded:
+            data = self._decode_header(data)
+            if not data:
+                return b""
+        if self._decompressor is not None:
+            try:
+                output = self._decompressor.decompress(data)
+            except zlib.error as e:
+                raise BadZipfile("Error decompressing %r: %s" % (self.name, e))
+            if getattr(self._decompressor, "eof", False):
+                self.eof = True
+                self._tail = self._decompressor.unused_data[:16]
+        else:
+            output = data[:self._remaining]
+            self._remaining -= len(output)
+            if self._remaining == 0:
+                self.eof = True
+                self._tail = data[len(output):][:16]
+        self._actual_crc = zlib.crc32(output, self._actual_crc)
+        return output
+
+    def finish(self):
+        """ Check that the file has been decompressed completely and its CRC-32 is correct.
+        Raises BadZipfile otherwise.
+
+        :return: remaining decompressed bytes
+        """
+        output = b""
+        if self._decompressor is not None and not self.eof:
+            output = self._decompressor.flush()
+            self._actual_crc = zlib.crc32(output, self._actual_crc)
+            # Python 2.7 decompressor has no eof attribute
+            self.eof = not hasattr(self._decompressor, "eof")
+        if not self.eof:
+            raise BadZipfile("Zip archive is truncated")
+        expected_crc = self._crc
+        if self._flags & FLAG_DATA_DESCRIPTOR:
+            tail = self._tail
+            if tail.startswith(DATA_DESCRIPTOR_SIGNATURE):
+                tail = tail[len(DATA_DESCRIPTOR_SIGNATURE):]
+            expected_crc = struct.unpack("<L", tail[:4])[0] if len(tail) >= 4 else None
+        if expected_crc is not None and expected_crc != self._actual_crc & 0xffffffff:
+            raise BadZipfile("Bad CRC-32 for file %r" % self.name)
+        return output
+
+    def _decode_header(self, data):
+        """ Accumulate and decode local file header.
+
+        :return: data following the header
+        """
+        self._header += data
+        if len(self._header) < LOCAL_FILE_HEADER.size:
+            if not LOCAL_FILE_HEADER_SIGNATURE.startswith(self._header[:4]):
+                raise BadZipfile("File is not a zip file")
+            return b""
+        (signature, version, flags, method, mtime, mdate, crc, compressed_size, size, name_length,
+         extra_length) = LOCAL_FILE_HEADER.unpack(self._header[:LOCAL_FILE_HEADER.size])
+        if signature != LOCAL_FILE_HEADER_SIGNATURE:
+            raise BadZipfile("File is not a zip file")
+        header_size = LOCAL_FILE_HEADER.size + name_length + extra_length
+        if len(self._header) < header_size:
+            return b""
+        if flags & FLAG_ENCRYPTED:
+            raise BadZipfile("Encrypted zip archives are not supported")
+        if method == DEFLATED:
+            # Raw deflate stream, without zlib header
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        elif method == STORED and not flags & FLAG_DATA_DESCRIPTOR:
+            self._remaining = compressed_size
+            self.eof = compressed_size == 0
+        else:
+            raise BadZipfile("Compression method %s is not supported" % method)
+        self._flags = flags
+        self._crc = None if flags & FLAG_DATA_DESCRIPTOR else crc
+        name = self._header[LOCAL_FILE_HEADER.size:LOCAL_FILE_HEADER.size + name_length]
+        self.name = name.decode("utf-8" if flags & 0x800 else "cp437")
+        data, self._header = self._header[header_size:], b""
+        return data
+
+
+class ZipStreamReader(io.RawIOBase):
+    """ Binary file-like object with the content of the first file in zip archive, decompressed from
+    an iterable of archive chunks (for example, iter_content() of streamed requests response) as they are read.
+
+    Raises BadZipfile if archive is invalid or truncated, exceptions raised by chunks iterable are not handled.
+
+    :param chunks: iterable of bytes
+    :param on_close: function called when reader is closed (for example, to release HTTP connection)
+    """
+    def __init__(self, chunks, on_close=None):
+        super(ZipStreamReader, self).__init__()
+        self._chunks = iter(chunks)
+        self._on_close = on_close
+        self._decoder = ZipStreamDecoder()
+        self._buffer = b""
+        self._offset = 0
+        self._finished = False
+
+    @property
+    def name(self):
+        """ Name of the file in archive """
+        self.read_header()
+        return self._decoder.name
+
+    def readable(self):
+        return True
+
+    def read_header(self):
+        """ Read the archive until the local file header is decoded (so an invalid archive is detected early) """
+        while not self._decoder.header_decoded and self._fill():
+            pass
+        if not self._decoder.header_decoded:
+            raise BadZipfile("File is not a zip file")
+
+    def _fill(self):
+        """ Decode next chunk of archive into buffer
+
+        :return: False if the end of the file has been reached
+        """
+        if self._finished:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._finished = True
+            if not self._decoder.header_decoded:
+                raise BadZipfile("File is not a zip file")
+            self._buffer, self._offset = self._decoder.finish(), 0
+            return bool(self._buffer)
+        self._buffer, self._offset = self._decoder.feed(chunk), 0
+        return True
+
+    def readinto(self, b):
+        # _fill is only called when buffer is exhausted, so decompressed data is never copied around
+        while self._offset >= len(self._buffer) and self._fill():
+            pass
+        size = min(len(b), len(self._buffer) - self._offset)
+        b[:size] = self._buffer[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+    def close(self):
+        if not self.closed and self._on_close is not None:
+            self._on_close()
+        super(ZipStreamReader, self).close()
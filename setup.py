@@ -38,7 +38,12 @@ setup(
     # find_packages() takes a source directory and two lists of package name patterns to exclude and include.
     # If omitted, the source directory defaults to the same directory as the setup script.
     packages=find_packages(exclude=["examples"]),  # https://pythonhosted.org/setuptools/setuptools.html#using-find-packages
-    install_requires=["requests"],
+    install_requires=["requests", 'futures; python_version < "3"'],
+    extras_require={
+        # aio module uses async generators and contextvars (Python 3.7+), it can't be imported in older versions
+        "async": ['aiohttp; python_version >= "3.7"'],
+        "numpy": ["numpy"],
+    },
     scripts=['bin/qualtrics.cmd', 'bin/qualtrics'],
     package_data = {
         # If any package contains *.qsf or *.rst files, include them:
@@ -17,20 +17,47 @@
 
 """ Unittests for the pyqualtrics package
 """
+import csv
+import datetime
+import io
 import json
+import pickle
 import random
+import shutil
 import string
 
 import time
 import zipfile
+from collections import OrderedDict
 
 import sys
+import tempfile
+import threading
 from requests.exceptions import ConnectionError
 import unittest
 import os
 import six
 
-from pyqualtrics import Qualtrics
+from pyqualtrics import EXPORT_STREAM_ERRORS, Qualtrics, _PollSchedule, _RateLimiter, _csv_export_responses
+from pyqualtrics.columns import read_response_columns
+from pyqualtrics.fileutil import _write_file_atomic
+from pyqualtrics.jsoncodec import StdlibJsonCodec, get_codec
+from pyqualtrics.jsonstream import JsonObjectStream
+from pyqualtrics.labels import SurveyLabels
+from pyqualtrics.mirror import ResponseMirror
+from pyqualtrics.mock import MockQualtrics, MockQualtricsServer
+from pyqualtrics.records import ResponseRecord, ResponseSchema, compact_responses
+from pyqualtrics.sync import FileWatermarkStore, JsonLinesSink, ResponseSync, SQLiteWatermarkStore
+try:
+    import asyncio
+    from pyqualtrics.aio import AsyncQualtrics, aiohttp
+except (ImportError, SyntaxError):
+    # Python 2.7
+    aiohttp = None
+try:
+    import numpy
+except ImportError:
+    numpy = None
 if sys.version_info <= (3, 0):
     from mock.mock import patch
 else:
@@ -45,6 +72,16 @@ class MockResponse:
         self.text = data
         self.content = data
 
+    def iter_content(self, chunk_size=1):
+        data = self.content
+        if not isinstance(data, bytes):
+            data = data.encode("utf-8")
+        for i in range(0, len(data), chunk_size):
+            yield data[i:i + chunk_size]
+
+    def close(self):
+        pass
+
     def json(self):
         # http://docs.python-requests.org/en/master/user/quickstart/#json-response-content
         # In case the JSON decoding fails, r.json() raises an exception (ValueError)
@@ -936,7 +973,7 @@ Use link https://nd.qualtrics.com/jfe/form/SV_8pqqcl4sy2316ZL and answer "Male".
             "R_2sPsOsGV0GSrLJb,Default Response Set,129.74.117.12,2016-04-08 12:04:00,2016-04-08 12:04:00,,,,,1,4,Male,,,-1"
         )
 
-    @patch("pyqualtrics.requests.get")
+    @patch("pyqualtrics.requests.Session.get")
     def test_GetResponseExportProgress_percentComplete(self, get_func):
         # Using mock get, because it is difficult to get in progress status reliably
         data='{"meta": {"httpStatus": "200 - OK", "requestId": "f53927df-d5d8-45eb-b6e3-de5542c7cd94"}, '\
@@ -963,7 +1000,7 @@ Use link https://nd.qualtrics.com/jfe/form/SV_8pqqcl4sy2316ZL and answer "Male".
         self.assertIsNone(responseExportId)
         self.assertEqual(qualtrics.last_error_message, "Unrecognized X-API-TOKEN.")
 
-    @patch("pyqualtrics.requests.post")
+    @patch("pyqualtrics.requests.Session.post")
     def test_CreateResponseExport_mailformed_response(self, get_func):
         get_func.return_value = MockResponse(status_code=200, data="")
         qualtrics = Qualtrics("234", "123")
@@ -984,7 +1021,7 @@ Use link https://nd.qualtrics.com/jfe/form/SV_8pqqcl4sy2316ZL and answer "Male".
         self.assertEqual(msg, "Unrecognized X-API-TOKEN.")
         self.assertEqual(qualtrics.last_error_message, "Unrecognized X-API-TOKEN.")
 
-    @patch("pyqualtrics.requests.get")
+    @patch("pyqualtrics.requests.Session.get")
     def test_GetResponseExportProgress_fail_3(self, get_func):
         get_func.return_value = MockResponse(status_code=200, data="")
         status, msg = self.qualtrics.GetResponseExportProgress("sdfasdfdsf")
@@ -992,7 +1029,7 @@ Use link https://nd.qualtrics.com/jfe/form/SV_8pqqcl4sy2316ZL and answer "Male".
         self.assertIn("Mailformed server response:", msg)
         self.assertIn("Mailformed server response:", self.qualtrics.last_error_message)
 
-    @patch("pyqualtrics.requests.get")
+    @patch("pyqualtrics.requests.Session.get")
     def test_GetResponseExportProgress_fail_4(self, get_func):
         get_func.return_value = MockResponse(status_code=200, data='{"result": ""}')
         status, msg = self.qualtrics.GetResponseExportProgress("sdfasdfdsf")
@@ -1012,7 +1049,7 @@ Use link https://nd.qualtrics.com/jfe/form/SV_8pqqcl4sy2316ZL and answer "Male".
         self.assertEqual(result, None)
         self.assertEqual(qualtrics.last_error_message, "Unrecognized X-API-TOKEN.")
 
-    @patch("pyqualtrics.requests.get")
+    @patch("pyqualtrics.requests.Session.get")
     def test_GetResponseExportFile_fail_bad_zip_file(self, get_func):
         get_func.return_value = MockResponse(status_code=200, data="")
         qualtrics = Qualtrics("234", "123")
@@ -1049,14 +1086,14 @@ Use link https://nd.qualtrics.com/jfe/form/SV_8pqqcl4sy2316ZL and answer "Male".
     def test_request3_notimplemented(self):
         self.assertRaises(NotImplementedError, self.qualtrics.request3, "123", method="trace")
 
-    @patch("pyqualtrics.requests.get")
+    @patch("pyqualtrics.requests.Session.get")
     def test_request3_mock_connection_error(self, get_func):
         get_func.side_effect = ConnectionError("Connection Error")
         status, msg = self.qualtrics.GetResponseExportProgress("123")
         self.assertEqual(msg, "Connection Error")
         self.assertEqual(status, "servfail")
 
-    # @patch("pyqualtrics.requests.get")
+    # @patch("pyqualtrics.requests.Session.get")
     # def test_request3_mailformed_response_from_server_1(self, get_func):
     #     mock_response = MockResponse(status_code=400)
     #     get_func.return_value = mock_response
@@ -1064,7 +1101,7 @@ Use link https://nd.qualtrics.com/jfe/form/SV_8pqqcl4sy2316ZL and answer "Male".
     #     self.assertEqual(msg, "Mailformed server response: No JSON object could be decoded")
     #     self.assertEqual(status, "servfail")
     #
-    # @patch("pyqualtrics.requests.get")
+    # @patch("pyqualtrics.requests.Session.get")
     # def test_request3_mailformed_response_from_server_2(self, get_func):
     #     mock_response = MockResponse(status_code=400, data='{"result": ""}')
     #
@@ -1073,7 +1110,7 @@ Use link https://nd.qualtrics.com/jfe/form/SV_8pqqcl4sy2316ZL and answer "Male".
     #     self.assertEqual(msg, "Mailformed server response: string indices must be integers")
     #     self.assertEqual(status, "servfail")
 
-    @patch("pyqualtrics.requests.get")
+    @patch("pyqualtrics.requests.Session.get")
     def test_request3_mailformed_response_from_server_3(self, get_func):
         mock_response = MockResponse(status_code=400)
         get_func.return_value = mock_response
@@ -1096,5 +1133,2212 @@ Use link https://nd.qualtrics.com/jfe/form/SV_8pqqcl4sy2316ZL and answer "Male".
                 print("Deleting survey %s" % survey["SurveyName"])
                 cls.qualtrics.deleteSurvey(SurveyID=survey_id)
 
+
+class TestConnectionPool(unittest.TestCase):
+    """ These tests do not require Qualtrics account
+    """
+    def test_session_is_reused(self):
+        qualtrics = Qualtrics("user", "token")
+        session = qualtrics.session
+        self.assertIs(qualtrics.session, session)
+        adapter = session.get_adapter("https://survey.qualtrics.com")
+        self.assertEqual(adapter._pool_maxsize, 10)
+
+    def test_pool_size(self):
+        qualtrics = Qualtrics("user", "token", pool_connections=2, pool_maxsize=32)
+        adapter = qualtrics.session.get_adapter("https://survey.qualtrics.com")
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 32)
+
+    def test_keep_alive(self):
+        qualtrics = Qualtrics("user", "token")
+        self.assertEqual(qualtrics.session.headers["Connection"], "keep-alive")
+        qualtrics = Qualtrics("user", "token", keep_alive=False)
+        self.assertEqual(qualtrics.session.headers["Connection"], "close")
+
+    def test_idle_timeout(self):
+        qualtrics = Qualtrics("user", "token", pool_idle_timeout=60)
+        session = qualtrics.session
+        self.assertIs(qualtrics.session, session)
+        qualtrics._session_last_used -= 61
+        self.assertIsNot(qualtrics.session, session)
+
+    def test_idle_timeout_concurrent(self):
+        # Session is replaced while another thread is waiting for server response
+        with MockQualtricsServer(token="token", latency=0.3) as server:
+            server.add_response("SV_1", "R_1", Q1="1")
+            with server.configure(Qualtrics("user", "token", pool_idle_timeout=0.05)) as qualtrics:
+                qualtrics.getSurveys()
+                session = qualtrics.session
+                results = []
+                thread = threading.Thread(target=lambda: results.append(qualtrics.getLegacyResponseData("SV_1")))
+                with patch.object(session, "close") as close:
+                    thread.start()
+                    time.sleep(0.15)
+                    self.assertIsNotNone(qualtrics.getLegacyResponseData("SV_1"))
+                    thread.join()
+                    self.assertFalse(close.called)
+                self.assertIsNot(qualtrics.session, session)
+                self.assertEqual(list(results[0].keys()), ["R_1"])
+
+    def test_close(self):
+        with Qualtrics("user", "token") as qualtrics:
+            session = qualtrics.session
+        self.assertIsNone(qualtrics._session)
+        # Still usable after close()
+        self.assertIsNot(qualtrics.session, session)
+
+    @patch("pyqualtrics.requests.Session.get")
+    def test_request3_uses_session(self, get_func):
+        get_func.return_value = MockResponse(
+            status_code=200,
+            data='{"result": {"status": "in progress", "percentComplete": 10.0}}'
+        )
+        qualtrics = Qualtrics("user", "token")
+        qualtrics.GetResponseExportProgress("ES_123")
+        qualtrics.GetResponseExportProgress("ES_123")
+        self.assertEqual(get_func.call_count, 2)
+
+
+
+class TestQualtricsResult(unittest.TestCase):
+    """ Thread safety of Qualtrics object, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        for i in range(20):
+            self.server.add_response("SV_1", "R_%s" % i, Q1=str(i))
+        self.qualtrics = self.server.configure(Qualtrics("user", "token", pool_maxsize=20))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    def test_call(self):
+        result = self.qualtrics.call("getLegacyResponseData", SurveyID="SV_1", Limit=2)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(list(result.value.keys()), ["R_0", "R_1"])
+        self.assertIs(result.json_response, result.value)
+        self.assertGreater(result.elapsed, 0)
+        self.assertIs(self.qualtrics.last_result, result)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(self.qualtrics.last_status_code, 200)
+
+        result = self.qualtrics.call("getLegacyResponseData", SurveyID="SV_2")
+        self.assertFalse(result.ok)
+        self.assertIsNone(result.value)
+        self.assertEqual(result.error_message, "Invalid request. Missing or invalid parameter SurveyID.")
+        self.assertEqual(self.qualtrics.last_error_message, result.error_message)
+
+    def test_call3(self):
+        result = self.qualtrics.call3(self.server.api3_url + "/responseexports", data={"surveyId": "SV_2"})
+        self.assertFalse(result.ok)
+        self.assertEqual(result.status_code, 400)
+        self.assertEqual(result.data, {"surveyId": "SV_2"})
+        self.assertEqual(result.error_message, "Invalid surveyId parameter.")
+        self.assertEqual(self.qualtrics.last_data, {"surveyId": "SV_2"})
+
+    def test_threads(self):
+        errors = []
+
+        def worker(i):
+            # Every other call fails
+            response_id = "R_%s" % i if i % 2 else "R_X%s" % i
+            for attempt in range(5):
+                response = self.qualtrics.getResponse("SV_1", response_id)
+                if i % 2:
+                    if response is None or response["Q1"] != str(i) or \
+                            self.qualtrics.last_error_message is not None:
+                        errors.append((i, self.qualtrics.last_error_message))
+                elif response is not None or response_id not in self.qualtrics.last_error_message:
+                    errors.append((i, self.qualtrics.last_error_message))
+
+        threads = [threading.Thread(target=worker, args=(i, )) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_low_memory(self):
+        responses = self.qualtrics.getLegacyResponseData("SV_1", low_memory=True)
+        self.assertEqual(len(responses), 20)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(self.qualtrics.last_status_code, 200)
+        self.assertNotIn("low_memory", self.qualtrics.last_url)
+        self.assertIsNone(self.qualtrics.response)
+        self.assertIsNone(self.qualtrics.json_response)
+        self.assertIsNone(self.qualtrics.r)
+
+        qualtrics = self.server.configure(Qualtrics("user", "token", low_memory=True))
+        self.assertIsNone(qualtrics.getResponse("SV_1", "R_X"))
+        self.assertIn("R_X", qualtrics.last_error_message)
+        self.assertIsNone(qualtrics.response)
+        self.assertIsNotNone(qualtrics.getResponse("SV_1", "R_1", low_memory=False))
+        self.assertIsNotNone(qualtrics.response)
+
+        result = qualtrics.call3(self.server.api3_url + "/responseexports", data={"surveyId": "SV_1", "format": "csv"})
+        self.assertTrue(result.ok)
+        self.assertIsNone(qualtrics.r)
+        self.assertIsNotNone(result.value)
+
+    def test_iter_legacy_responses(self):
+        expected = list(self.qualtrics.getLegacyResponseData("SV_1").items())
+        del self.server.calls[:]
+        for prefetch in (False, True):
+            responses = list(self.qualtrics.iter_legacy_responses("SV_1", page_size=7, prefetch=prefetch))
+            self.assertEqual(responses, expected)
+            self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(self.server.calls, ["getLegacyResponseData"] * 6)
+
+        # Page size equal to number of responses, last page is empty
+        responses = list(self.qualtrics.iter_legacy_responses("SV_1", page_size=10, LastResponseID="R_9"))
+        self.assertEqual(responses, expected[10:])
+
+    def test_iter_legacy_responses_error(self):
+        responses = list(self.qualtrics.iter_legacy_responses("SV_2", page_size=7, prefetch=True))
+        self.assertEqual(responses, [])
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid request. Missing or invalid parameter SurveyID.")
+
+    def test_iter_legacy_response_data(self):
+        expected = list(self.qualtrics.getLegacyResponseData("SV_1").items())
+        responses = list(self.qualtrics.iter_legacy_response_data("SV_1", chunk_size=7))
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(responses, expected)
+        self.assertEqual(list(responses[0][1].keys()), list(expected[0][1].keys()))
+        responses = list(self.qualtrics.iter_legacy_response_data("SV_1", Limit=5, LastResponseID="R_9"))
+        self.assertEqual([response_id for response_id, response in responses], ["R_%s" % i for i in range(10, 15)])
+
+    def test_iter_legacy_response_data_error(self):
+        self.assertEqual(list(self.qualtrics.iter_legacy_response_data("SV_2")), [])
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid request. Missing or invalid parameter SurveyID.")
+        self.assertEqual(self.qualtrics.last_status_code, 200)
+
+    def test_json_object_stream(self):
+        document = OrderedDict(("R_%s" % i, OrderedDict([("Q1", i), ("Q2", '"{}' * i), ("Q3", [1.5, None, True])]))
+                               for i in range(50))
+        document["Number"] = 12345
+        text = json.dumps(document, indent=1)
+        for chunk_size in (1, 3, 100, len(text)):
+            stream = JsonObjectStream()
+            items = []
+            for i in range(0, len(text), chunk_size):
+                items.extend(stream.feed(text[i:i + chunk_size]))
+            items.extend(stream.finish())
+            self.assertEqual(items, list(document.items()))
+        for text in ('{"a": 1', '{"a" 1}', '[1]', '{"a": 1} x', '{"a": 1,}', '{"a": tru}'):
+            stream = JsonObjectStream()
+            self.assertRaises(ValueError, lambda: stream.feed(text) + stream.finish())
+
+    def test_other_thread_result(self):
+        self.qualtrics.getResponse("SV_1", "R_X")
+        thread = threading.Thread(target=self.qualtrics.getResponse, args=("SV_1", "R_1"))
+        thread.start()
+        thread.join()
+        self.assertIn("R_X", self.qualtrics.last_error_message)
+
+
+class CountingJsonCodec(StdlibJsonCodec):
+    """ Standard library codec counting documents it decodes """
+    def __init__(self):
+        self.loads_calls = 0
+
+    def loads(self, data, ordered=False):
+        self.loads_calls += 1
+        return super(CountingJsonCodec, self).loads(data, ordered=ordered)
+
+
+class TestJsonCodec(unittest.TestCase):
+    """ Pluggable JSON libraries, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        for i in range(5):
+            self.server.add_response("SV_1", "R_%s" % i, Q2=str(i), Q1="x")
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    def check_codec(self, codec):
+        text = '{"b": {"d": 1, "c": [{"f": 2, "e": null}]}, "a": "\\u00e9"}'
+        for data in (text, text.encode("utf-8")):
+            document = codec.loads(data, ordered=True)
+            self.assertIsInstance(document, OrderedDict)
+            self.assertEqual(list(document.keys()), ["b", "a"])
+            self.assertIsInstance(document["b"]["c"][0], OrderedDict)
+            self.assertEqual(list(document["b"]["c"][0].keys()), ["f", "e"])
+            self.assertEqual(document["a"], u"\u00e9")
+            self.assertEqual(codec.loads(data), {"a": u"\u00e9", "b": {"d": 1, "c": [{"f": 2, "e": None}]}})
+        self.assertEqual(json.loads(codec.dumps(document)), document)
+        self.assertIsInstance(codec.dumps({"a": 1}), str)
+        self.assertRaises(ValueError, codec.loads, '{"a": 1')
+        self.assertRaises(ValueError, codec.loads, b"")
+
+    def test_codecs(self):
+        self.check_codec(StdlibJsonCodec())
+        self.check_codec(get_codec())
+        for name in ("orjson", "simplejson"):
+            try:
+                codec = get_codec(name)
+            except ImportError:
+                continue
+            self.assertEqual(codec.name, name)
+            self.check_codec(codec)
+        self.assertRaises(KeyError, get_codec, "json5")
+
+    def test_stdlib_codec_bytes(self):
+        # json.loads of Python 3.5 rejects bytes (call3 passes response body as bytes)
+        loads = json.loads
+
+        def strict_loads(data, **kwargs):
+            if isinstance(data, bytes) and not isinstance(data, str):
+                raise TypeError("the JSON object must be str, not 'bytes'")
+            return loads(data, **kwargs)
+        with patch("pyqualtrics.jsoncodec.json.loads", strict_loads):
+            codec = StdlibJsonCodec()
+            self.assertEqual(codec.loads(b'{"a": "\xc3\xa9"}'), {"a": u"\u00e9"})
+            self.assertEqual(codec.loads(b'{"b": 1, "a": 2}', ordered=True), OrderedDict([("b", 1), ("a", 2)]))
+            self.assertRaises(ValueError, codec.loads, b'{"a": "\xff"}')
+            self.qualtrics.json_codec = codec
+            self.assertEqual(self.qualtrics.get_response_count("SV_1"), 5)
+            self.assertIsNone(self.qualtrics.last_error_message)
+
+    def test_qualtrics_codec(self):
+        codec = CountingJsonCodec()
+        self.qualtrics.json_codec = codec
+        responses = self.qualtrics.getLegacyResponseData("SV_1")
+        self.assertEqual(list(responses.keys()), ["R_%s" % i for i in range(5)])
+        self.assertEqual(list(responses["R_0"].keys()), list(self.server.surveys["SV_1"]["R_0"].keys()))
+        self.assertEqual(codec.loads_calls, 1)
+
+        # v3 responses are decoded once, in call3
+        codec.loads_calls = 0
+        export_id = self.qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+        self.assertIsNotNone(export_id)
+        self.assertEqual(codec.loads_calls, 1)
+        status, data = self.qualtrics.GetResponseExportProgress(export_id)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(codec.loads_calls, 2)
+
+        # Parsed document is available in low memory mode too
+        self.qualtrics.low_memory = True
+        result = self.qualtrics.call3(self.server.api3_url + "/responseexports/%s" % export_id, method="get")
+        self.assertIsNotNone(result.json_response)
+        self.assertIsNone(self.qualtrics.json_response)
+
+
+class TestResponseRecords(unittest.TestCase):
+    """ Compact representation of responses, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        for i in range(10):
+            self.server.add_response("SV_1", "R_%s" % i, Q2=str(i % 3), Q1="Answer %s" % i)
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    def test_record(self):
+        response = OrderedDict([("ResponseSet", "Default Response Set"), ("Finished", "1"), ("Q1", None)])
+        record = ResponseRecord.from_mapping(response)
+        self.assertEqual(record, response)
+        self.assertEqual(list(record.keys()), list(response.keys()))
+        self.assertEqual(list(record.items()), list(response.items()))
+        self.assertEqual(record.to_dict(), response)
+        self.assertEqual(record["Finished"], "1")
+        self.assertIsNone(record.get("Q1", 1))
+        self.assertEqual(record.get("Q2", 2), 2)
+        self.assertIn("Q1", record)
+        self.assertRaises(KeyError, lambda: record["Q2"])
+        def assign():
+            record["Q1"] = "1"
+        self.assertRaises(TypeError, assign)
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+        self.assertIs(ResponseRecord.from_mapping(record), record)
+
+        other = ResponseRecord.from_mapping(OrderedDict([("ResponseSet", "Default Response Set"), ("Finished", "1"),
+                                                         ("Q1", "2")]))
+        self.assertIs(other.schema, record.schema)
+        self.assertIs(other["ResponseSet"], record["ResponseSet"])
+        self.assertNotEqual(other, record)
+        # Different order of fields - different schema
+        reordered = ResponseRecord.from_mapping(OrderedDict(reversed(list(response.items()))))
+        self.assertIsNot(reordered.schema, record.schema)
+        self.assertEqual(reordered, record)
+
+        schema = ResponseSchema(["a", "b"])
+        self.assertRaises(ValueError, schema.record, ["1"])
+        self.assertRaises(ValueError, ResponseSchema, ["a", "a"])
+
+    def test_compact_responses(self):
+        expected = self.qualtrics.getLegacyResponseData("SV_1")
+        responses = self.qualtrics.getLegacyResponseData("SV_1", compact=True)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(list(responses.keys()), list(expected.keys()))
+        self.assertEqual(responses, expected)
+        self.assertEqual(len(set(id(response.schema) for response in responses.values())), 1)
+        self.assertEqual(list(responses["R_1"].keys()), list(expected["R_1"].keys()))
+        self.assertIsInstance(self.qualtrics.getResponse("SV_1", "R_1", compact=True), ResponseRecord)
+        self.assertIsNone(self.qualtrics.getLegacyResponseData("SV_2", compact=True))
+        self.assertIsNone(compact_responses(None))
+
+        for responses in (self.qualtrics.iter_legacy_response_data("SV_1", compact=True),
+                          self.qualtrics.iter_legacy_responses("SV_1", page_size=3, compact=True)):
+            responses = list(responses)
+            self.assertEqual(responses, list(expected.items()))
+            self.assertTrue(all(isinstance(response, ResponseRecord) for response_id, response in responses))
+
+
+class FailingSink(JsonLinesSink):
+    """ Sink that crashes after writing part of the given page """
+    def __init__(self, directory, fail_on_page):
+        super(FailingSink, self).__init__(directory)
+        self.fail_on_page = fail_on_page
+        self.pages = 0
+
+    def write(self, survey_id, responses):
+        self.pages += 1
+        if self.pages == self.fail_on_page:
+            with open(self.filename(survey_id), "ab") as fp:
+                fp.write(b'{"ResponseID": "R_')
+            raise IOError("No space left on device")
+        return super(FailingSink, self).write(survey_id, responses)
+
+
+class TestResponseSync(unittest.TestCase):
+    """ Incremental synchronization with watermarks, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        for i in range(10):
+            self.server.add_response("SV_1", "R_%s" % i, Q1=str(i))
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+        self.directory = tempfile.mkdtemp()
+        self.sink = JsonLinesSink(os.path.join(self.directory, "responses"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def written(self, survey_id="SV_1"):
+        with io.open(self.sink.filename(survey_id), encoding="utf-8") as fp:
+            return [json.loads(line, object_pairs_hook=OrderedDict) for line in fp]
+
+    def check_sync(self, store):
+        sync = ResponseSync(self.qualtrics, store, self.sink, page_size=3)
+        result = sync.sync("SV_1")
+        self.assertTrue(result.ok)
+        self.assertEqual((result.responses, result.pages, result.last_response_id), (10, 4, "R_9"))
+        self.assertEqual(store.get("SV_1")["LastResponseID"], "R_9")
+        responses = self.written()
+        self.assertEqual([response["ResponseID"] for response in responses], ["R_%s" % i for i in range(10)])
+        self.assertEqual(list(responses[0].keys())[:3], ["ResponseID", "ResponseSet", "Name"])
+
+        # Only new responses are retrieved
+        for i in range(10, 14):
+            self.server.add_response("SV_1", "R_%s" % i, Q1=str(i))
+        del self.server.calls[:]
+        result = sync.sync("SV_1")
+        self.assertEqual((result.responses, result.last_response_id), (4, "R_13"))
+        self.assertEqual(len(self.server.calls), 2)
+        self.assertEqual([response["ResponseID"] for response in self.written()], ["R_%s" % i for i in range(14)])
+        result = sync.sync("SV_1")
+        self.assertEqual((result.responses, result.pages, result.last_response_id), (0, 1, "R_13"))
+
+        # From the beginning
+        sync.reset("SV_1")
+        self.assertIsNone(store.get("SV_1"))
+        self.assertEqual(sync.sync("SV_1").responses, 14)
+        self.assertEqual(len(self.written()), 14)
+
+    def test_file_store(self):
+        filename = os.path.join(self.directory, "watermarks.json")
+        self.check_sync(FileWatermarkStore(filename))
+        self.assertFalse(os.path.exists(filename + ".tmp"))
+        self.assertEqual(FileWatermarkStore(filename).get("SV_1")["LastResponseID"], "R_13")
+
+    def test_sqlite_store(self):
+        filename = os.path.join(self.directory, "watermarks.db")
+        store = SQLiteWatermarkStore(filename)
+        self.check_sync(store)
+        store.close()
+        store = SQLiteWatermarkStore(filename)
+        self.assertEqual(store.get("SV_1")["LastResponseID"], "R_13")
+        self.assertIsNone(store.get("SV_2"))
+        store.close()
+        self.assertRaises(ValueError, SQLiteWatermarkStore, ":memory:", table="x; DROP TABLE y")
+
+    def test_crash_recovery(self):
+        store = FileWatermarkStore(os.path.join(self.directory, "watermarks.json"))
+        sink = FailingSink(self.sink.directory, fail_on_page=3)
+        self.assertRaises(IOError, ResponseSync(self.qualtrics, store, sink, page_size=3).sync, "SV_1")
+        self.assertEqual(store.get("SV_1")["LastResponseID"], "R_5")
+
+        result = ResponseSync(self.qualtrics, store, self.sink, page_size=3).sync("SV_1")
+        self.assertEqual((result.responses, result.last_response_id), (4, "R_9"))
+        self.assertEqual([response["ResponseID"] for response in self.written()], ["R_%s" % i for i in range(10)])
+
+    def test_error(self):
+        store = FileWatermarkStore(os.path.join(self.directory, "watermarks.json"))
+        sync = ResponseSync(self.qualtrics, store, self.sink, page_size=3)
+        result = sync.sync("SV_2")
+        self.assertFalse(result.ok)
+        self.assertEqual(result.error_message, "Invalid request. Missing or invalid parameter SurveyID.")
+        self.assertIsNone(store.get("SV_2"))
+
+        # Response the watermark points to has been deleted
+        sync.sync("SV_1")
+        del self.server.surveys["SV_1"]["R_9"]
+        result = sync.sync("SV_1")
+        self.assertEqual(result.error_message, "Invalid request. LastResponseID not found.")
+        self.assertEqual(result.last_response_id, "R_9")
+
+    def test_recover_partial_line(self):
+        responses = OrderedDict([("R_0", OrderedDict([("Q1", "0")])), ("R_1", OrderedDict([("Q1", "1")]))])
+        state = self.sink.write("SV_1", responses)
+        with open(self.sink.filename("SV_1"), "ab") as fp:
+            fp.write(b'{"ResponseID": "R_2", "Q1": "')
+        self.sink.recover("SV_1", state)
+        self.assertEqual(os.path.getsize(self.sink.filename("SV_1")), state["offset"])
+        self.assertEqual([response["ResponseID"] for response in self.written()], ["R_0", "R_1"])
+
+        # Crash before the first watermark was saved
+        self.sink.recover("SV_1", None)
+        self.assertEqual(self.written(), [])
+
+    def test_replace_file(self):
+        filename = os.path.join(self.directory, "watermarks.json")
+        _write_file_atomic(filename, u"old")
+        _write_file_atomic(filename, u"new")
+        with io.open(filename, encoding="utf-8") as fp:
+            self.assertEqual(fp.read(), u"new")
+        self.assertFalse(os.path.exists(filename + ".tmp"))
+
+
+def add_large_survey(server, survey_id, count=5000):
+    """ Add responses with random answers, so compressed export archive is larger than one download chunk (64 KiB)
+    and truncate_downloads can drop the connection after the archive header has been read
+    """
+    answers = random.Random(survey_id)
+    for i in range(count):
+        server.add_response(survey_id, "R_%05d" % i, Q1="%032x" % answers.getrandbits(128))
+
+
+class TestLegacyExport(unittest.TestCase):
+    """ getLegacyResponseData routed to v3 response export, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.server.add_survey("SV_1", "Test Survey")
+        for i in range(20):
+            self.server.add_response("SV_1", "R_%02d" % i, Q1=str(i), Q2="a,\"b\"\n%s" % i)
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    def test_export_threshold(self):
+        expected = self.qualtrics.getLegacyResponseData("SV_1")
+        self.assertEqual(self.server.calls, ["getLegacyResponseData"])
+        self.assertEqual(self.qualtrics.get_response_count("SV_1"), 20)
+
+        del self.server.calls[:]
+        responses = self.qualtrics.getLegacyResponseData("SV_1", export_threshold=20)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertNotIn("getLegacyResponseData", self.server.calls)
+        self.assertIn("/API/v3/responseexports", self.server.calls)
+        self.assertIsInstance(responses, OrderedDict)
+        self.assertEqual(list(responses.items()), list(expected.items()))
+
+        # Below the threshold
+        del self.server.calls[:]
+        responses = self.qualtrics.getLegacyResponseData("SV_1", export_threshold=21)
+        self.assertEqual(list(responses.items()), list(expected.items()))
+        self.assertEqual(self.server.calls, ["/API/v3/surveys/SV_1", "getLegacyResponseData"])
+
+    def test_csv2013_header(self):
+        # Real csv2013 files have V1..V10 labels in the first header row and field names in the second one
+        fp = io.StringIO(u"V1,V2,V8,V10,Q1\n"
+                         u"ResponseID,ResponseSet,StartDate,Finished,How old are you?\n"
+                         u"R_1,Default Response Set,2016-01-01 10:00:00,1,42\n")
+        self.assertEqual(list(_csv_export_responses(fp)), [("R_1", OrderedDict([
+            ("ResponseSet", "Default Response Set"), ("StartDate", "2016-01-01 10:00:00"), ("Finished", "1"),
+            ("Q1", "42")]))])
+
+        # So do files generated by the mock server
+        export_id = self.qualtrics.CreateResponseExport(Qualtrics.CSV2013_FORMAT, "SV_1")
+        with self.qualtrics.GetResponseExportStream(export_id) as fp:
+            header = [next(csv.reader(fp)) for i in range(2)]
+        self.assertEqual((header[0][:2], header[1][:2]), (["V1", "V2"], ["ResponseID", "ResponseSet"]))
+        self.assertNotIn("ResponseID", header[0])
+
+        expected = self.qualtrics.getLegacyResponseData("SV_1")
+        self.qualtrics.legacy_export_threshold = 10
+        responses = self.qualtrics.getLegacyResponseData("SV_1")
+        self.assertIn("/API/v3/responseexports", self.server.calls)
+        self.assertEqual(list(responses["R_03"].keys()), list(expected["R_03"].keys()))
+        self.assertIn("StartDate", responses["R_03"])
+
+    def test_legacy_export_threshold(self):
+        self.qualtrics.legacy_export_threshold = 10
+        responses = self.qualtrics.getLegacyResponseData("SV_1", LastResponseID="R_04", Limit=12, compact=True)
+        self.assertNotIn("getLegacyResponseData", self.server.calls)
+        self.assertIsInstance(responses["R_05"], ResponseRecord)
+        self.assertEqual(list(responses.keys()), ["R_%02d" % i for i in range(5, 17)])
+        self.assertEqual(responses["R_05"]["Q2"], "a,\"b\"\n5")
+
+        # Limit is below the threshold, parameters not supported by response export
+        del self.server.calls[:]
+        self.assertEqual(len(self.qualtrics.getLegacyResponseData("SV_1", Limit=9)), 9)
+        self.assertEqual(len(self.qualtrics.getLegacyResponseData("SV_1", Labels="1")), 20)
+        self.assertEqual(self.server.calls, ["/API/v3/surveys/SV_1", "getLegacyResponseData", "getLegacyResponseData"])
+
+        # Export with date window
+        self.server.add_response("SV_1", "R_20", EndDate="2016-02-01 00:00:00")
+        responses = self.qualtrics.getLegacyResponseData("SV_1", StartDate="2016-01-15 00:00:00")
+        self.assertEqual(list(responses.keys()), ["R_20"])
+        self.assertEqual(responses["R_20"]["Q1"], "")
+
+    def test_errors(self):
+        self.qualtrics.legacy_export_threshold = 0
+        # Response count is not known, getLegacyResponseData reports the error
+        self.assertIsNone(self.qualtrics.getLegacyResponseData("SV_2"))
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid request. Missing or invalid parameter SurveyID.")
+        self.assertIsNone(self.qualtrics.get_response_count("SV_2"))
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid surveyId parameter.")
+
+        self.assertIsNone(self.qualtrics.getLegacyResponseData("SV_1", LastResponseID="R_XX"))
+        self.assertIsNotNone(self.qualtrics.last_error_message)
+
+    def test_truncated_download(self):
+        add_large_survey(self.server, "SV_3")
+        # Connection drops while the export is being read
+        self.server.truncate_downloads = 80000
+        self.assertIsNone(self.qualtrics.getLegacyResponseData("SV_3", export_threshold=10))
+        self.assertIn("Connection broken", self.qualtrics.last_error_message)
+        self.assertIn("/API/v3/responseexports", self.server.calls)
+
+        self.assertEqual(len(self.qualtrics.getLegacyResponseData("SV_3", export_threshold=10)), 5000)
+        self.assertIsNone(self.qualtrics.last_error_message)
+
+
+class TestGetResponses(unittest.TestCase):
+    """ getResponses (many responses by ID), using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.server.add_survey("SV_1", "Test Survey")
+        for i in range(30):
+            self.server.add_response("SV_1", "R_%02d" % i, Q1=str(i))
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    def test_get_responses(self):
+        expected = self.qualtrics.getLegacyResponseData("SV_1")
+        del self.server.calls[:]
+        responses = self.qualtrics.getResponses("SV_1", ["R_25", "R_03", "R_XX", "R_03", "R_10"])
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(self.server.calls, ["getLegacyResponseData"])
+        self.assertEqual(list(responses.keys()), ["R_25", "R_03", "R_XX", "R_10"])
+        self.assertIsNone(responses["R_XX"])
+        for response_id in ("R_25", "R_03", "R_10"):
+            self.assertEqual(responses[response_id], expected[response_id])
+
+        # Retrieval stops when all responses are found
+        responses = self.qualtrics.getResponses("SV_1", ("R_01", "R_00"), compact=True)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertIsInstance(responses["R_00"], ResponseRecord)
+        self.assertEqual(responses["R_01"]["Q1"], "1")
+
+        self.assertEqual(self.qualtrics.getResponses("SV_1", []), OrderedDict())
+        self.assertEqual(self.qualtrics.getResponses("SV_1", ["R_07"])["R_07"], expected["R_07"])
+        self.assertEqual(self.qualtrics.getResponses("SV_1", ["R_XX"]), OrderedDict([("R_XX", None)]))
+        self.assertIsNone(self.qualtrics.last_error_message)
+
+    def test_export(self):
+        expected = self.qualtrics.getLegacyResponseData("SV_1")
+        del self.server.calls[:]
+        responses = self.qualtrics.getResponses("SV_1", ["R_29", "R_XX", "R_00"], export_threshold=30)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertNotIn("getLegacyResponseData", self.server.calls)
+        self.assertEqual(responses, OrderedDict([("R_29", expected["R_29"]), ("R_XX", None),
+                                                 ("R_00", expected["R_00"])]))
+
+        self.qualtrics.legacy_export_threshold = 10
+        responses = self.qualtrics.getResponses("SV_1", ["R_00", "R_01"], compact=True)
+        self.assertIsInstance(responses["R_01"], ResponseRecord)
+        self.assertEqual(responses["R_01"].to_dict(), expected["R_01"])
+
+    def test_csv2013_export(self):
+        # Export file with csv2013 header as generated by Qualtrics: V1..V10 labels, then names and question texts
+        fp = io.StringIO(u"V1,V2,V3,V5,V6,V7,V8,V9,V10,Q1\n"
+                         u"ResponseID,ResponseSet,Name,EmailAddress,IPAddress,Status,StartDate,EndDate,Finished,"
+                         u"Your age\n"
+                         u"R_1,Default,\"Doe, John\",,127.0.0.1,0,2016-01-01 10:00:00,2016-01-01 10:05:00,1,42\n"
+                         u"R_2,Default,,,127.0.0.1,0,2016-01-02 10:00:00,2016-01-02 10:05:00,1,7\n")
+        responses = OrderedDict([("R_2", None), ("R_X", None)])
+        self.assertFalse(Qualtrics._select_responses(_csv_export_responses(fp), responses, False))
+        self.assertEqual(list(responses.keys()), ["R_2", "R_X"])
+        self.assertEqual(responses["R_2"]["Q1"], "7")
+        self.assertEqual(responses["R_2"]["StartDate"], "2016-01-02 10:00:00")
+        self.assertNotIn("V8", responses["R_2"])
+
+        # Export files of the mock server have the same header
+        expected = self.qualtrics.getLegacyResponseData("SV_1")
+        responses = self.qualtrics.getResponses("SV_1", ["R_05", "R_06"], export_threshold=1)
+        self.assertIn("/API/v3/responseexports", self.server.calls)
+        self.assertEqual(list(responses["R_05"].items()), list(expected["R_05"].items()))
+
+    def test_errors(self):
+        self.assertIsNone(self.qualtrics.getResponses("SV_2", ["R_01", "R_02"]))
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid request. Missing or invalid parameter SurveyID.")
+        self.assertIsNone(self.qualtrics.getResponses("SV_2", ["R_01"]))
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid request. Missing or invalid parameter SurveyID.")
+
+    def test_truncated_download(self):
+        add_large_survey(self.server, "SV_3")
+        # The last response is after the point where connection drops
+        self.server.truncate_downloads = 80000
+        self.assertIsNone(self.qualtrics.getResponses("SV_3", ["R_00001", "R_04999"], export_threshold=10))
+        self.assertIn("Connection broken", self.qualtrics.last_error_message)
+
+        responses = self.qualtrics.getResponses("SV_3", ["R_00001", "R_04999"], export_threshold=10)
+        self.assertEqual(list(responses.keys()), ["R_00001", "R_04999"])
+        self.assertIsNotNone(responses["R_04999"])
+        self.assertIsNone(self.qualtrics.last_error_message)
+
+
+class TestSurveyLabels(unittest.TestCase):
+    """ Labeled responses produced locally, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.server.add_survey("SV_1", "Test Survey")
+        self.server.add_question("SV_1", "QID1", "Q1", choices=["Male", "Female"], recodes=[5, 7])
+        self.server.add_question("SV_1", "QID2", "Q2", Selector="MAVR", choices=["Red", "Green", "Blue"])
+        self.server.add_question("SV_1", "QID3", "Q3", Type="Matrix", Selector="Likert", SubSelector="SingleAnswer",
+                                 choices=["Food", "Service"], answers=["Bad", "Good"])
+        self.server.add_question("SV_1", "QID4", "Q4", Type="TE", Selector="SL")
+        self.server.add_response("SV_1", "R_1", Q1="7", Q2_1="1", Q2_2="", Q2_3="1", Q3_1="2", Q3_2="1", Q4="5")
+        self.server.add_response("SV_1", "R_2", Q1=5, Q2_1="", Q2_2="1", Q2_3="", Q3_1="", Q3_2="2", Q4="")
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    def test_label_responses(self):
+        responses = self.qualtrics.getLegacyResponseData("SV_1")
+        labeled = self.qualtrics.label_responses("SV_1", responses)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(list(labeled.keys()), ["R_1", "R_2"])
+        self.assertEqual(list(labeled["R_1"].keys()), list(responses["R_1"].keys()))
+        self.assertEqual([labeled["R_1"][key] for key in ("Q1", "Q2_1", "Q2_2", "Q2_3", "Q3_1", "Q3_2", "Q4")],
+                         ["Female", "Red", "", "Blue", "Good", "Bad", "5"])
+        self.assertEqual([labeled["R_2"][key] for key in ("Q1", "Q2_1", "Q2_2", "Q2_3", "Q3_1", "Q3_2", "Q4")],
+                         ["Male", "", "Green", "", "", "Good", ""])
+        self.assertEqual(labeled["R_1"]["StartDate"], responses["R_1"]["StartDate"])
+        # Responses are not modified
+        self.assertEqual(responses["R_1"]["Q1"], "7")
+
+        # Survey definition is retrieved once
+        compact = self.qualtrics.getLegacyResponseData("SV_1", compact=True)
+        labeled_compact = self.qualtrics.label_responses("SV_1", compact)
+        self.assertIsInstance(labeled_compact["R_1"], ResponseRecord)
+        self.assertEqual(labeled_compact["R_1"].to_dict(), labeled["R_1"])
+        self.assertEqual(self.server.calls.count("getSurvey"), 1)
+        labels = self.qualtrics.get_survey_labels("SV_1", refresh=True)
+        self.assertEqual(self.server.calls.count("getSurvey"), 2)
+        self.assertEqual(labels.label("Q1", "5"), "Male")
+        self.assertEqual(labels.label("Q4", "5"), "5")
+
+        self.assertIsNone(self.qualtrics.label_responses("SV_2", responses))
+        self.assertEqual(self.qualtrics.last_error_message, "This survey is Unknown to this user account.")
+
+    def test_qsf(self):
+        with open(os.path.join(os.path.dirname(__file__), "pyqualtrics.qsf")) as fp:
+            labels = SurveyLabels.from_qsf(json.load(fp))
+        self.assertEqual(dict(labels.columns["Q1"]), {"1": "Male", "2": "Female"})
+        self.assertEqual(list(labels.columns["Q2"].values()), ["0-18 years", "19-65 years", "65+ years"])
+        responses = OrderedDict([("R_1", OrderedDict([("Q1", 2), ("Q2", "3")]))])
+        self.assertEqual(labels.label_responses(responses)["R_1"], OrderedDict([("Q1", "Female"), ("Q2", "65+ years")]))
+
+    def test_mock_qualtrics(self):
+        qualtrics = MockQualtrics()
+        qualtrics.mock_responses["R_1"] = {"Q1": "7"}
+        self.assertIsNone(qualtrics.label_responses("SV_1", qualtrics.getLegacyResponseData("SV_1")))
+        qualtrics.mock_survey_labels["SV_1"] = self.qualtrics.get_survey_labels("SV_1")
+        self.assertEqual(qualtrics.label_responses("SV_1", qualtrics.getLegacyResponseData("SV_1"))["R_1"]["Q1"],
+                         "Female")
+
+
+class TestImportResponses(unittest.TestCase):
+    """ Chunked import of responses, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.server.add_survey("SV_1", "Test Survey")
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    @staticmethod
+    def responses(count):
+        for i in range(count):
+            response = OrderedDict([("QID1", str(i)), ("QID2", "a,\"b\" %s" % i)])
+            if i % 7 == 3:
+                response["QID3"] = "extra %s" % i
+            yield response
+
+    def imported(self):
+        return sorted((response["QID1"], response["QID2"], response.get("QID3", ""))
+                      for response in self.server.surveys["SV_1"].values())
+
+    def expected(self, count):
+        return sorted((response["QID1"], response["QID2"], response.get("QID3", ""))
+                      for response in self.responses(count))
+
+    def test_import_responses(self):
+        chunks = []
+        result = self.qualtrics.import_responses("SV_1", self.responses(25), chunk_size=10, progress=chunks.append)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.responses, 25)
+        self.assertEqual([(chunk.index, chunk.offset, chunk.count, chunk.status) for chunk in result.chunks],
+                         [(0, 0, 10, "imported"), (1, 10, 10, "imported"), (2, 20, 5, "imported")])
+        self.assertEqual(sorted(chunk.index for chunk in chunks), [0, 1, 2])
+        self.assertEqual(self.server.calls.count("importResponses"), 3)
+        # Columns are fields of responses of the first chunk
+        self.assertEqual(self.imported(), self.expected(25))
+
+    def test_headers(self):
+        # Later chunks have fields in different order and without QID2, they get columns of the first chunk
+        responses = [OrderedDict([("QID1", "1"), ("QID2", "a")]), OrderedDict([("QID2", "b"), ("QID1", "2")]),
+                     OrderedDict([("QID1", "3")]), OrderedDict([("QID1", "4"), ("QID9", "x")])]
+        result = self.qualtrics.import_responses("SV_1", responses, chunk_size=1, max_workers=1)
+        self.assertEqual([chunk.status for chunk in result.chunks], ["imported"] * 3 + ["failed"])
+        self.assertEqual(result.chunks[3].error_message, "Response fields are not in import headers: QID9")
+        self.assertEqual(self.qualtrics.last_error_message, "1 of 4 chunks have not been imported. "
+                                                            "Chunk 3: Response fields are not in import headers: QID9")
+        imported = self.server.surveys["SV_1"].values()
+        self.assertEqual(sorted((response["QID1"], response["QID2"]) for response in imported),
+                         [("1", "a"), ("2", "b"), ("3", "")])
+
+        result = self.qualtrics.import_responses("SV_1", responses[3:], headers=["QID1", "QID9"])
+        self.assertTrue(result.ok)
+
+    def test_csv_layout(self):
+        # Legacy CSV (csv2013) export layout: two header rows, responses start in the third row
+        contents = Qualtrics._responses_to_csv([OrderedDict([("QID1", "1"), ("QID2", "a,b")]),
+                                                OrderedDict([("QID2", "c")])])
+        self.assertEqual(list(csv.reader(contents.splitlines())),
+                         [["QID1", "QID2"], ["QID1", "QID2"], ["1", "a,b"], ["", "c"]])
+        self.assertRaises(ValueError, Qualtrics._responses_to_csv, [{"QID3": "x"}], ["QID1"])
+
+    def test_chunk_bytes(self):
+        result = self.qualtrics.import_responses("SV_1", self.responses(30), max_chunk_bytes=100, max_workers=2)
+        self.assertTrue(result.ok)
+        self.assertGreaterEqual(len(result.chunks), 4)
+        self.assertTrue(all(chunk.size < 200 for chunk in result.chunks))
+        self.assertEqual(sum(chunk.count for chunk in result.chunks), 30)
+        self.assertEqual(self.imported(), self.expected(30))
+
+        # Response larger than max_chunk_bytes is imported in a chunk of its own
+        result = self.qualtrics.import_responses("SV_1", [{"QID1": "x" * 200}, {"QID1": "y"}], max_chunk_bytes=100)
+        self.assertEqual([chunk.count for chunk in result.chunks], [1, 1])
+
+    def test_resume(self):
+        self.server.fail_imports = 1
+        result = self.qualtrics.import_responses("SV_1", self.responses(25), chunk_size=10, max_workers=1)
+        self.assertFalse(result.ok)
+        self.assertEqual(self.qualtrics.last_error_message,
+                         "1 of 3 chunks have not been imported. Chunk 0: Internal server error")
+        self.assertEqual(result.completed, [1, 2])
+        self.assertEqual(result.responses, 15)
+
+        result = self.qualtrics.import_responses("SV_1", self.responses(25), chunk_size=10,
+                                                 completed=result.completed)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual([chunk.status for chunk in result.chunks], ["imported", "skipped", "skipped"])
+        self.assertEqual(result.responses, 10)
+        self.assertEqual(self.imported(), self.expected(25))
+
+    def test_import_responses_as_dict(self):
+        self.assertTrue(self.qualtrics.importResponsesAsDict("SV_1", self.responses(12), chunk_size=5))
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(self.imported(), self.expected(12))
+        self.assertTrue(self.qualtrics.importResponsesAsDict("SV_1", []))
+        self.assertFalse(self.qualtrics.importResponsesAsDict("SV_2", self.responses(1)))
+        self.assertEqual(self.qualtrics.last_error_message, "1 of 1 chunks have not been imported. Chunk 0: "
+                                                            "Invalid request. Missing or invalid parameter SurveyID.")
+
+
+class TestImportPanel(unittest.TestCase):
+    """ Chunked panel import, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    @staticmethod
+    def members(count):
+        for i in range(count):
+            yield {"Email": "member%s@example.com" % i, "FirstName": "First, %s" % i, "LastName": "Last %s" % i,
+                   "ExternalRef": "ext%s" % i}
+
+    def emails(self, panel_id):
+        return sorted(member["Email"] for member in self.server.panels[panel_id])
+
+    def expected(self, count):
+        return sorted(member["Email"] for member in self.members(count))
+
+    def test_import_panel(self):
+        result = self.qualtrics.import_panel("UR_1", "Roster", self.members(25), chunk_size=10)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.members, 25)
+        self.assertEqual([(chunk.index, chunk.count, chunk.status) for chunk in result.chunks],
+                         [(0, 10, "imported"), (1, 10, "imported"), (2, 5, "imported")])
+        self.assertEqual(self.server.calls.count("importPanel"), 3)
+        self.assertEqual(list(self.server.panels), [result.panel_id])
+        self.assertEqual(self.emails(result.panel_id), self.expected(25))
+        member = [member for member in self.server.panels[result.panel_id] if member["ExternalDataReference"] == "ext3"]
+        self.assertEqual((member[0]["FirstName"], member[0]["LastName"]), ("First, 3", "Last 3"))
+
+    def test_import_json_panel(self):
+        panel_id = self.qualtrics.importJsonPanel("UR_1", "Roster", self.members(12), max_chunk_bytes=200)
+        self.assertIsNotNone(panel_id)
+        self.assertGreater(self.server.calls.count("importPanel"), 2)
+        self.assertEqual(self.emails(panel_id), self.expected(12))
+
+        # Empty panel is created too
+        panel_id = self.qualtrics.importJsonPanel("UR_1", "Empty", [])
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(self.server.panels[panel_id], [])
+
+    def test_import_panel_csv(self):
+        lines = ["Custom,Email,FirstName,LastName\n"]
+        lines.extend("c%s,member%s@example.com,First %s,Last %s\n" % (i, i, i, i) for i in range(30))
+        result = self.qualtrics.import_panel_csv("UR_1", "Roster", iter(lines), max_chunk_bytes=300, max_workers=2,
+                                                 ColumnHeaders="1")
+        self.assertTrue(result.ok)
+        self.assertGreater(len(result.chunks), 3)
+        self.assertTrue(all(chunk.size <= 300 for chunk in result.chunks))
+        self.assertEqual(self.emails(result.panel_id), self.expected(30))
+        self.assertEqual(self.server.panels[result.panel_id][0]["EmbeddedData"], {"Custom": "c0"})
+
+        # Large file passed to importPanel is imported in chunks
+        self.qualtrics.PANEL_CHUNK_BYTES = 500
+        panel_id = self.qualtrics.importPanel("UR_1", "Roster", "".join(lines), ColumnHeaders="1")
+        self.assertEqual(self.emails(panel_id), self.expected(30))
+        self.assertEqual(self.qualtrics.importPanel("UR_1", "Roster", "".join(lines[:3]), ColumnHeaders="1",
+                                                    PanelID=panel_id), panel_id)
+        self.assertEqual(len(self.server.panels[panel_id]), 32)
+
+    def test_resume(self):
+        def fail_next(chunk):
+            if chunk.index == 0:
+                self.server.fail_imports = 1
+        result = self.qualtrics.import_panel("UR_1", "Roster", self.members(25), chunk_size=10, max_workers=1,
+                                             progress=fail_next)
+        self.assertFalse(result.ok)
+        self.assertEqual(self.qualtrics.last_error_message,
+                         "1 of 3 chunks have not been imported. Chunk 1: Internal server error")
+        self.assertEqual(result.completed, [0, 2])
+        self.assertEqual(len(self.server.panels[result.panel_id]), 15)
+
+        result = self.qualtrics.import_panel("UR_1", "Roster", self.members(25), chunk_size=10,
+                                             PanelID=result.panel_id, completed=result.completed)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual([chunk.status for chunk in result.chunks], ["skipped", "imported", "skipped"])
+        self.assertEqual(self.emails(result.panel_id), self.expected(25))
+        self.assertRaises(AssertionError, self.qualtrics.import_panel, "UR_1", "Roster", [], completed=[0])
+
+        # Panel is not created
+        self.server.fail_imports = 1
+        result = self.qualtrics.import_panel("UR_1", "Roster", self.members(25), chunk_size=10)
+        self.assertIsNone(result.panel_id)
+        self.assertEqual([chunk.status for chunk in result.chunks], ["failed"])
+        # Nothing to append
+        self.assertEqual(self.qualtrics.importJsonPanel("UR_1", "Roster", [], PanelID="ML_X"), "ML_X")
+        self.assertIsNone(self.qualtrics.importJsonPanel("UR_1", "Roster", self.members(1), PanelID="ML_X"))
+        self.assertEqual(self.qualtrics.last_error_message, "1 of 1 chunks have not been imported. Chunk 0: "
+                                                            "Invalid request. Missing or invalid parameter PanelID.")
+
+
+class TestImportContacts(unittest.TestCase):
+    """ Chunked contacts import with job status polling, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token", import_steps=3).start()
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def lines(count, start=0):
+        yield "Email,FirstName,LastName,Custom\n"
+        for i in range(start, start + count):
+            yield "contact%s@example.com,First %s,\"Last, %s\",c%s\n" % (i, i, i, i)
+
+    def emails(self, list_id):
+        return sorted(contact["Email"] for contact in self.server.panels[list_id])
+
+    def test_import_contacts(self):
+        polled = []
+        result = self.qualtrics.import_contacts("UR_1", "Contacts", self.lines(25), chunk_size=10,
+                                                min_poll_interval=0.01, max_poll_interval=0.05,
+                                                progress=polled.append)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertTrue(result.ok)
+        self.assertEqual((result.created, result.updated, result.failed_contacts), (25, 0, 0))
+        self.assertEqual([(chunk.count, chunk.counts["created"]) for chunk in result.chunks],
+                         [(10, 10), (10, 10), (5, 5)])
+        self.assertEqual(len(set(chunk.job_id for chunk in result.chunks)), 3)
+        self.assertEqual(sorted(chunk.index for chunk in polled), [0, 1, 2])
+        self.assertEqual(self.server.calls.count("importContacts"), 3)
+        self.assertEqual(self.server.calls.count("checkImportContactsStatus"), 9)
+        self.assertEqual(list(self.server.panels), [result.list_id])
+        self.assertEqual(self.emails(result.list_id), sorted("contact%s@example.com" % i for i in range(25)))
+        contact = self.server.panels[result.list_id][0]
+        self.assertEqual((contact["LastName"], contact["EmbeddedData"]), ("Last, 0", {"Custom": "c0"}))
+
+        # Existing contacts are updated, rows without Email are rejected
+        path = os.path.join(self.directory, "contacts.csv")
+        with io.open(path, "w", encoding="utf-8", newline="") as fp:
+            fp.writelines(self.lines(10, start=20))
+            fp.write(u",No,Email,\n")
+        result = self.qualtrics.import_contacts("UR_1", "Contacts", filename=path, ListID=result.list_id,
+                                                max_chunk_bytes=200, min_poll_interval=0.01)
+        self.assertTrue(result.ok)
+        self.assertGreater(len(result.chunks), 1)
+        self.assertEqual((result.created, result.updated, result.failed_contacts), (5, 5, 1))
+        self.assertEqual(len(self.server.panels[result.list_id]), 30)
+
+    def test_import_contacts_string(self):
+        list_id = self.qualtrics.importContacts("UR_1", "Contacts", "".join(self.lines(3)))
+        self.assertEqual(self.emails(list_id), ["contact0@example.com", "contact1@example.com",
+                                                "contact2@example.com"])
+        self.assertEqual(self.server.calls.count("checkImportContactsStatus"), 0)
+
+        # Large file passed to importContacts is imported by import_contacts, the job is waited for
+        self.qualtrics.CONTACTS_CHUNK_BYTES = 200
+        list_id = self.qualtrics.importContacts("UR_1", "Contacts", "".join(self.lines(10)), min_poll_interval=0.01)
+        self.assertEqual(len(self.server.panels[list_id]), 10)
+        self.assertEqual(self.server.calls.count("checkImportContactsStatus"), 3)
+
+    def test_concurrent_jobs(self):
+        # Chunks are appended while the job of the first one is running, jobs are polled from one loop
+        result = self.qualtrics.import_contacts("UR_1", "Contacts", self.lines(25), chunk_size=10, max_workers=1,
+                                                min_poll_interval=0.2)
+        self.assertTrue(result.ok)
+        calls = [call for call in self.server.calls if call in ("importContacts", "checkImportContactsStatus")]
+        # The first job completes at its third status check (0.6 seconds), all chunks have been uploaded before
+        checks = [i for i, call in enumerate(calls) if call == "checkImportContactsStatus"]
+        self.assertEqual(calls[:checks[2]].count("importContacts"), 3)
+        self.assertEqual(len(checks), 9)
+        self.assertEqual(len(self.server.panels[result.list_id]), 25)
+
+    def test_failures(self):
+        def lines():
+            for i, line in enumerate(self.lines(25)):
+                if i == 15:
+                    # The first chunk has been uploaded, the second one fails
+                    self.server.fail_imports = 1
+                yield line
+        result = self.qualtrics.import_contacts("UR_1", "Contacts", lines(), chunk_size=10, max_workers=1,
+                                                min_poll_interval=0.01)
+        self.assertFalse(result.ok)
+        self.assertEqual(self.qualtrics.last_error_message,
+                         "1 of 3 chunks have not been imported. Chunk 1: Internal server error")
+        self.assertEqual(result.created, 15)
+
+        result = self.qualtrics.import_contacts("UR_1", "Contacts", self.lines(25), chunk_size=10,
+                                                ListID=result.list_id, completed=result.completed,
+                                                min_poll_interval=0.01)
+        self.assertTrue(result.ok)
+        self.assertEqual([chunk.status for chunk in result.chunks], ["skipped", "imported", "skipped"])
+        self.assertEqual(len(self.server.panels[result.list_id]), 25)
+
+        # Jobs not completed in time
+        result = self.qualtrics.import_contacts("UR_1", "Contacts", self.lines(5), timeout=0.1,
+                                                min_poll_interval=1)
+        self.assertFalse(result.ok)
+        self.assertEqual(self.qualtrics.last_error_message,
+                         "1 of 1 chunks have not been imported. Chunk 0: Contacts import job %s has not completed in "
+                         "time" % result.chunks[0].job_id)
+
+
+class TestUniqueSurveyLinks(unittest.TestCase):
+    """ Bulk generation of unique survey links, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    @staticmethod
+    def people(count):
+        return [{"Email": "person%s@example.com" % (i % 5), "FirstName": "First %s" % (i % 5), "Group": i % 3}
+                for i in range(count)]
+
+    def recipient_ids(self, links):
+        return [link.split("Q_DL=")[1].split("_", 2)[2] for link in links]
+
+    def test_generate_unique_survey_links(self):
+        people = self.people(40)
+        links = list(self.qualtrics.generate_unique_survey_links("SV_1", "UR_1", None, "EMD_1", iter(people),
+                                                                 headers=["Email", "FirstName", "Group"],
+                                                                 chunk_size=10, page_size=7))
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(len(links), 40)
+        self.assertEqual(sorted(id(person) for person, link in links), sorted(id(person) for person in people))
+        self.assertTrue(all(link.startswith("http://new.qualtrics.com/SE?Q_DL=1_1_MLRP") for person, link in links))
+        self.assertEqual(self.server.calls.count("importPanel"), 4)
+        self.assertEqual(self.server.calls.count("addRecipient"), 0)
+        self.assertEqual(self.server.calls.count("getPanel"), 6)
+        # Each link belongs to a recipient with the same data
+        panel_id, members = next(iter(self.server.panels.items()))
+        recipients = dict((member["RecipientID"], member) for member in members)
+        self.assertEqual(sorted(self.recipient_ids(link for person, link in links)), sorted(recipients))
+        for person, link in links:
+            recipient = recipients[self.recipient_ids([link])[0]]
+            self.assertEqual((recipient["Email"], recipient["EmbeddedData"]["Group"]),
+                             (person["Email"], str(person["Group"])))
+
+        # Existing members of the panel are not matched
+        links = list(self.qualtrics.generate_unique_survey_links("SV_1", "UR_1", panel_id, "EMD_1", people[:3],
+                                                                 headers=["Email", "FirstName", "Group"]))
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(len(self.server.panels[panel_id]), 43)
+        self.assertFalse(set(self.recipient_ids(link for person, link in links)) & set(recipients))
+        self.assertEqual([person for person, link in links], people[:3])
+
+    def test_normalized_values(self):
+        # Server stores emails stripped and lowercased
+        self.server.normalize_emails = True
+        people = [{"Email": " Person%s@Example.com" % i, "FirstName": "Name%s" % i} for i in range(5)]
+        links = list(self.qualtrics.generate_unique_survey_links("SV_1", "UR_1", None, "EMD_1", people,
+                                                                 headers=["Email", "FirstName"]))
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(sorted(person["FirstName"] for person, link in links), ["Name%s" % i for i in range(5)])
+        self.assertTrue(all(link is not None for person, link in links))
+        panel_id, members = next(iter(self.server.panels.items()))
+        self.assertEqual(members[0]["Email"], "person0@example.com")
+
+    def test_errors(self):
+        self.assertEqual(list(self.qualtrics.generate_unique_survey_links("SV_1", "UR_1", None, "1", [])), [])
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid DistributionID format (must be EMD_xxxxxxxxxx)")
+
+        people = self.people(3)
+        self.assertEqual(list(self.qualtrics.generate_unique_survey_links("SV_1", "UR_1", "ML_X", "EMD_1", people)),
+                         [])
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid request. Missing or invalid parameter PanelID.")
+
+        self.server.fail_imports = 1
+        links = list(self.qualtrics.generate_unique_survey_links("SV_1", "UR_1", None, "EMD_1", people,
+                                                                 headers=["Email", "FirstName", "Group"]))
+        self.assertEqual(links, [(person, None) for person in people])
+        self.assertEqual(self.qualtrics.last_error_message,
+                         "1 of 1 chunks have not been imported. Chunk 0: Internal server error")
+
+
+class TestRemoveContacts(unittest.TestCase):
+    """ Concurrent removal of contacts from a list, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+        self.list_id = self.qualtrics.importContacts("UR_1", "Contacts", "Email\n" + "".join(
+            "contact%s@example.com\n" % i for i in range(30)))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    def test_truncate_contact_list(self):
+        removed = []
+        self.assertEqual(self.qualtrics.truncate_contact_list("UR_1", self.list_id, max_workers=4, page_size=7,
+                                                              progress=removed.append), (True, []))
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(self.server.panels[self.list_id], [])
+        self.assertEqual(len(removed), 30)
+        self.assertTrue(all(contact.ok and contact.attempts == 1 for contact in removed))
+        self.assertEqual(self.server.calls.count("getListContacts"), 5)
+        self.assertEqual(self.server.calls.count("removeContact"), 30)
+        # Empty list
+        self.assertEqual(self.qualtrics.truncate_contact_list("UR_1", self.list_id), (True, []))
+        self.assertEqual(self.qualtrics.truncate_contact_list("UR_1", "ML_X"), (False, []))
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid request. Missing or invalid parameter ListID.")
+
+    def test_retry(self):
+        self.server.fail_removals = 2
+        result = self.qualtrics.remove_contacts("UR_1", self.list_id, max_workers=1, retry_delay=0.01)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.removed, 30)
+        self.assertEqual([contact.attempts for contact in result.contacts[:2]], [3, 1])
+        self.assertEqual(self.server.panels[self.list_id], [])
+
+        self.server.fail_removals = 3
+        result = self.qualtrics.remove_contacts("UR_1", self.list_id, ["MLRP_X", "MLRP_Y"], max_retries=1,
+                                                retry_delay=0.01, max_workers=1)
+        self.assertFalse(result.ok)
+        self.assertEqual([(contact.attempts, contact.status_code, contact.error_message)
+                          for contact in result.contacts],
+                         [(2, 503, "Service Unavailable"),
+                          (2, 200, "Invalid request. Missing or invalid parameter RecipientID.")])
+        self.assertEqual(self.qualtrics.last_error_message,
+                         "2 of 2 contacts have not been removed. MLRP_X: Service Unavailable")
+
+    def test_rate_limit(self):
+        limiter = _RateLimiter(10)
+        self.assertEqual([limiter.delay(0.0) for i in range(3)], [0.0, 0.1, 0.2])
+        self.assertEqual(limiter.delay(1.0), 0.0)
+        self.assertEqual(_RateLimiter().delay(5.0), 0.0)
+
+        start = time.time()
+        result = self.qualtrics.remove_contacts("UR_1", self.list_id, rate_limit=200, max_workers=8)
+        self.assertTrue(result.ok)
+        self.assertGreaterEqual(time.time() - start, 29 / 200.0)
+
+    def test_recreate_threshold(self):
+        result = self.qualtrics.remove_contacts("UR_1", self.list_id, recreate_threshold=10)
+        self.assertTrue(result.recreate)
+        self.assertEqual(result.removed, 0)
+        self.assertEqual(self.qualtrics.last_error_message, "List %s has 30 contacts, deleting and recreating it is "
+                                                            "cheaper than removing them" % self.list_id)
+        self.assertEqual(self.server.calls.count("removeContact"), 0)
+        # truncate_contact_list could only report recreate as failure to remove all contacts
+        self.assertRaises(TypeError, self.qualtrics.truncate_contact_list, "UR_1", self.list_id, recreate_threshold=30)
+        self.assertEqual(self.server.calls.count("removeContact"), 0)
+
+
+class TestResponseMirror(unittest.TestCase):
+    """ SQLite mirror of responses, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        for i in range(20):
+            self.server.add_response("SV_1", "R_%02d" % i, StartDate="2016-01-%02d 10:00:00" % (i + 1),
+                                     EndDate="2016-01-%02d 11:00:00" % (i + 1), Finished=str(i % 2),
+                                     ExternalDataReference="ext%s" % (i % 3), Q1=str(i))
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+        self.mirror = ResponseMirror(":memory:", batch_size=7)
+
+    def tearDown(self):
+        self.mirror.close()
+        self.qualtrics.close()
+        self.server.stop()
+
+    def test_load_legacy(self):
+        expected = self.qualtrics.getLegacyResponseData("SV_1")
+        self.assertEqual(self.mirror.load_legacy(self.qualtrics, "SV_1"), 20)
+        responses = self.mirror.get_responses("SV_1")
+        self.assertEqual(list(responses.items()), list(expected.items()))
+        self.assertEqual(list(responses["R_00"].keys()), list(expected["R_00"].keys()))
+        self.assertEqual(self.mirror.columns("SV_1"), list(expected["R_00"].keys()))
+
+        indexes = [row[1] for row in self.mirror.connection.execute("PRAGMA index_list(responses_SV_1)")]
+        for field in ResponseMirror.INDEXED_FIELDS:
+            self.assertIn("responses_SV_1_%s" % field, indexes)
+        plan = self.mirror.connection.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM responses_SV_1 WHERE "EndDate" <= ?', ("2016-01-05", )).fetchall()
+        self.assertIn("responses_SV_1_EndDate", str(plan))
+
+        self.assertIsNone(self.mirror.load_legacy(self.qualtrics, "SV_2"))
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid request. Missing or invalid parameter SurveyID.")
+
+    def test_load_export(self):
+        self.assertEqual(self.mirror.load_export(self.qualtrics, "SV_1", min_poll_interval=0.01), 20)
+        self.assertEqual(list(self.mirror.get_responses("SV_1").items()),
+                         list(self.qualtrics.getLegacyResponseData("SV_1").items()))
+        self.assertIsNone(self.mirror.load_export(self.qualtrics, "SV_2", min_poll_interval=0.01))
+        self.assertEqual(self.qualtrics.last_error_message, "Invalid surveyId parameter.")
+
+        # Download fails: responses loaded before the error are rolled back
+        add_large_survey(self.server, "SV_3")
+        self.server.truncate_downloads = 80000
+        self.assertIsNone(self.mirror.load_export(self.qualtrics, "SV_3", min_poll_interval=0.01))
+        self.assertIn("Connection broken", self.qualtrics.last_error_message)
+        self.assertEqual(self.mirror.count("SV_3"), 0)
+        self.assertEqual(self.mirror.load_export(self.qualtrics, "SV_3", min_poll_interval=0.01), 5000)
+        self.assertEqual(self.mirror.get_response("SV_3", "R_04999")["Finished"], "1")
+
+    def test_upsert(self):
+        self.check_upsert()
+
+    def test_upsert_old_sqlite(self):
+        # SQLite before 3.24 has no INSERT ... ON CONFLICT DO UPDATE
+        with patch("pyqualtrics.mirror.sqlite3.sqlite_version_info", (3, 23, 1)):
+            self.check_upsert()
+
+    def check_upsert(self):
+        self.mirror.load_legacy(self.qualtrics, "SV_1")
+        # In-progress response has been completed, new response with a new field
+        self.server.surveys["SV_1"]["R_01"]["Finished"] = "1"
+        self.server.add_response("SV_1", "R_20", Q2="new")
+        self.assertEqual(self.mirror.load_legacy(self.qualtrics, "SV_1", LastResponseID="R_00"), 20)
+        self.assertEqual(self.mirror.count("SV_1"), 21)
+        responses = self.mirror.get_responses("SV_1")
+        self.assertEqual(list(responses.keys()), ["R_%02d" % i for i in range(21)])
+        self.assertEqual(responses["R_01"]["Finished"], "1")
+        self.assertEqual(responses["R_20"]["Q2"], "new")
+        self.assertIsNone(responses["R_00"]["Q2"])
+
+        # Response loaded again with fewer fields keeps the other ones and its position
+        reloaded = [("R_05", OrderedDict([("Q1", "changed")])), ("R_22", OrderedDict()),
+                    ("R_05", OrderedDict([("Q2", "last")]))]
+        self.assertEqual(self.mirror.load("SV_1", reloaded), 3)
+        responses = self.mirror.get_responses("SV_1")
+        self.assertEqual(list(responses.keys()), ["R_%02d" % i for i in range(21)] + ["R_22"])
+        self.assertEqual((responses["R_05"]["Q1"], responses["R_05"]["Q2"]), ("changed", "last"))
+        self.assertEqual(responses["R_05"]["StartDate"], "2016-01-06 10:00:00")
+
+    def test_queries(self):
+        self.mirror.load_legacy(self.qualtrics, "SV_1")
+        self.assertEqual(list(self.mirror.get_responses("SV_1", StartDate="2016-01-18").keys()),
+                         ["R_17", "R_18", "R_19"])
+        self.assertEqual(list(self.mirror.get_responses("SV_1", EndDate=datetime.datetime(2016, 1, 2, 11)).keys()),
+                         ["R_00", "R_01"])
+        self.assertEqual(self.mirror.count("SV_1", Finished="1"), 10)
+        self.assertEqual(self.mirror.count("SV_1", Finished="1", ExternalDataReference="ext0"), 3)
+        self.assertEqual(list(self.mirror.get_responses("SV_1", where='CAST("Q1" AS INTEGER) > ?', parameters=(16, ),
+                                                        order_by='"EndDate" DESC', limit=2).keys()),
+                         ["R_19", "R_18"])
+        self.assertEqual(list(self.mirror.get_responses("SV_1", ResponseID=["R_05", "R_03", "R_X"]).keys()),
+                         ["R_03", "R_05"])
+        self.assertEqual(self.mirror.get_response("SV_1", "R_03")["Q1"], "3")
+        self.assertIsNone(self.mirror.get_response("SV_1", "R_X"))
+        self.assertEqual(self.mirror.delete("SV_1", ["R_03", "R_04"]), 2)
+        self.assertEqual(self.mirror.count("SV_1"), 18)
+        self.assertEqual(self.mirror.get_responses("SV_2"), OrderedDict())
+        self.assertEqual(self.mirror.count("SV_2"), 0)
+
+    def test_sync_sink(self):
+        store = SQLiteWatermarkStore(self.mirror.connection)
+        sync = ResponseSync(self.qualtrics, store, self.mirror, page_size=6)
+        self.assertEqual(sync.sync("SV_1").responses, 20)
+        self.server.add_response("SV_1", "R_20")
+        self.assertEqual(sync.sync("SV_1").responses, 1)
+        self.assertEqual(self.mirror.count("SV_1"), 21)
+        self.assertEqual(store.get("SV_1")["LastResponseID"], "R_20")
+
+
+class TestResponseExportFile(unittest.TestCase):
+    """ Streaming and resumable download of response export files, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.server.add_survey("SV_1", "Test Survey")
+        for i in range(200):
+            self.server.add_response("SV_1", "R_%s" % i, Q1=str(i))
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+        self.export_id = self.qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+        self.filename = tempfile.mktemp(suffix=".zip")
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+        for filename in (self.filename, self.filename + ".part"):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def archive_content(self):
+        with zipfile.ZipFile(self.filename) as archive:
+            return archive.read(archive.namelist()[0]).decode("utf-8")
+
+    def test_GetResponseExportFile(self):
+        fp = self.qualtrics.GetResponseExportFile(self.export_id, chunk_size=100, spool_size=100)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertIn("R_199,", fp.read())
+
+    def test_DownloadResponseExportFile(self):
+        result = self.qualtrics.DownloadResponseExportFile(self.export_id, self.filename, chunk_size=100)
+        self.assertTrue(result)
+        self.assertFalse(os.path.exists(self.filename + ".part"))
+        self.assertIn("R_199,", self.archive_content())
+
+    def test_DownloadResponseExportFile_resume(self):
+        self.server.truncate_downloads = 500
+        result = self.qualtrics.DownloadResponseExportFile(self.export_id, self.filename, chunk_size=100, resume=True)
+        self.assertIsNone(result)
+        self.assertIsNotNone(self.qualtrics.last_error_message)
+        self.assertEqual(os.path.getsize(self.filename + ".part"), 500)
+        self.assertFalse(os.path.exists(self.filename))
+
+        result = self.qualtrics.DownloadResponseExportFile(self.export_id, self.filename, resume=True)
+        self.assertTrue(result)
+        self.assertEqual(self.qualtrics.last_status_code, 206)
+        self.assertIn("R_199,", self.archive_content())
+
+    def test_DownloadResponseExportFile_resume_complete(self):
+        self.qualtrics.DownloadResponseExportFile(self.export_id, self.filename + ".part")
+        result = self.qualtrics.DownloadResponseExportFile(self.export_id, self.filename, resume=True)
+        self.assertTrue(result)
+        self.assertEqual(self.qualtrics.last_status_code, 416)
+        self.assertIn("R_199,", self.archive_content())
+
+    def test_DownloadResponseExportFile_no_resume(self):
+        with open(self.filename + ".part", "wb") as fp:
+            fp.write(b"garbage")
+        result = self.qualtrics.DownloadResponseExportFile(self.export_id, self.filename)
+        self.assertTrue(result)
+        self.assertIn("R_199,", self.archive_content())
+
+
+class TestResponseExportStream(unittest.TestCase):
+    """ Decompression of response export files while they are downloaded, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.server.add_survey("SV_1", "Test Survey")
+        self.server.add_response("SV_1", "R_X", Q1='Line 1\n"Line 2"')
+        for i in range(200):
+            self.server.add_response("SV_1", "R_%s" % i, Q1=str(i))
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    def test_GetResponseExportStream(self):
+        export_id = self.qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+        expected = self.qualtrics.GetResponseExportFile(export_id).read()
+        with self.qualtrics.GetResponseExportStream(export_id, chunk_size=10) as fp:
+            self.assertIsNone(self.qualtrics.last_error_message)
+            self.assertEqual(fp.name, "Test Survey.csv")
+            self.assertEqual(fp.read(), expected)
+
+    def test_GetResponseExportStream_json(self):
+        export_id = self.qualtrics.CreateResponseExport(Qualtrics.JSON_FORMAT, "SV_1")
+        with self.qualtrics.GetResponseExportStream(export_id) as fp:
+            responses = json.load(fp)["responses"]
+        self.assertEqual(len(responses), 201)
+        self.assertEqual(responses[0]["Q1"], 'Line 1\n"Line 2"')
+
+    def test_GetResponseExportStream_fail(self):
+        self.assertIsNone(self.qualtrics.GetResponseExportStream("ES_1"))
+        self.assertEqual(self.qualtrics.last_error_message, "Export id not found")
+
+    def test_iter_response_export_rows(self):
+        export_id = self.qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+        rows = list(self.qualtrics.iter_response_export_rows(export_id, chunk_size=10))
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual(len(rows), 3 + 201)
+        self.assertEqual(rows[0][0], "ResponseID")
+        self.assertEqual(rows[3][:1] + rows[3][-1:], ["R_X", 'Line 1\n"Line 2"'])
+        self.assertEqual(rows[-1][0], "R_199")
+
+    def test_iter_response_export_rows_json(self):
+        export_id = self.qualtrics.CreateResponseExport(Qualtrics.JSON_FORMAT, "SV_1")
+        self.assertEqual(list(self.qualtrics.iter_response_export_rows(export_id)), [])
+        self.assertEqual(self.qualtrics.last_error_message, "Export file Test Survey.json is not CSV or TSV file")
+
+    def test_iter_response_export_rows_truncated(self):
+        export_id = self.qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+        self.server.truncate_downloads = 500
+        rows = list(self.qualtrics.iter_response_export_rows(export_id, chunk_size=100))
+        self.assertGreater(len(rows), 0)
+        self.assertLess(len(rows), 3 + 201)
+        self.assertIsNotNone(self.qualtrics.last_error_message)
+
+
+class TestExportResponses(unittest.TestCase):
+    """ export_responses function, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token", export_steps=4).start()
+        self.server.add_survey("SV_1", "Test Survey")
+        for i in range(10):
+            self.server.add_response("SV_1", "R_%s" % i, Q1=str(i))
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    def test_stream(self):
+        export = self.qualtrics.export_responses("SV_1", Qualtrics.CSV_FORMAT, min_poll_interval=0.01)
+        self.assertTrue(export.ok)
+        self.assertEqual(export.status, "downloaded")
+        self.assertEqual(export.polls, 4)
+        self.assertEqual(export.percent_complete, 100.0)
+        self.assertIs(export.value, export.stream)
+        rows = list(csv.reader(export.stream))
+        export.stream.close()
+        self.assertEqual(rows[-1][0], "R_9")
+        for phase_time in (export.queue_time, export.generate_time, export.download_time):
+            self.assertGreaterEqual(phase_time, 0)
+        self.assertAlmostEqual(export.total_time, export.queue_time + export.generate_time + export.download_time)
+
+    def test_stream_download_error(self):
+        # Stream is opened before the archive is downloaded, download errors are raised by read functions
+        add_large_survey(self.server, "SV_3")
+        self.server.truncate_downloads = 80000
+        export = self.qualtrics.export_responses("SV_3", min_poll_interval=0.01)
+        self.assertTrue(export.ok)
+        with export.stream:
+            self.assertRaises(EXPORT_STREAM_ERRORS, export.stream.read)
+
+    def test_filename(self):
+        filename = tempfile.mktemp(suffix=".zip")
+        try:
+            export = self.qualtrics.export_responses("SV_1", Qualtrics.JSON_FORMAT, filename=filename,
+                                                     min_poll_interval=0.01, limit=3)
+            self.assertEqual(export.value, filename)
+            with zipfile.ZipFile(filename) as archive:
+                responses = json.loads(archive.read(archive.namelist()[0]).decode("utf-8"))["responses"]
+            self.assertEqual(len(responses), 3)
+        finally:
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def test_fail(self):
+        export = self.qualtrics.export_responses("SV_2")
+        self.assertFalse(export.ok)
+        self.assertIsNone(export.value)
+        self.assertEqual(export.status, "failed")
+        self.assertEqual(export.error_message, "Invalid surveyId parameter.")
+        self.assertEqual(self.qualtrics.last_error_message, export.error_message)
+
+    def test_timeout(self):
+        self.server.export_steps = 1000
+        export = self.qualtrics.export_responses("SV_1", timeout=0.2, min_poll_interval=0.05)
+        self.assertEqual(export.status, "timeout")
+        self.assertIn("did not complete in 0.2 seconds", self.qualtrics.last_error_message)
+        self.assertGreater(export.polls, 1)
+        self.assertGreater(export.queue_time, 0)
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        timer = threading.Timer(0.1, cancel.set)
+        timer.start()
+        export = self.qualtrics.export_responses("SV_1", cancel=cancel, min_poll_interval=10)
+        timer.join()
+        self.assertEqual(export.status, "cancelled")
+        self.assertEqual(export.polls, 1)
+        self.assertEqual(export.error_message, "Response export %s has been cancelled" % export.id)
+
+    def test_poll_schedule(self):
+        schedule = _PollSchedule(min_interval=1, max_interval=60)
+        self.assertEqual(schedule.next_interval(0, 0), 1)
+        # No progress
+        self.assertEqual(schedule.next_interval(1, 0), 2)
+        self.assertEqual(schedule.next_interval(3, 0), 4)
+        # 10% in 10 seconds, 90% remaining - next poll in 45 seconds
+        self.assertEqual(schedule.next_interval(10, 10), 45)
+        # 80% in 40 seconds - 10% remaining
+        self.assertEqual(schedule.next_interval(50, 90), 2.5)
+        # Slowed down - 9.9% in 950 seconds
+        self.assertAlmostEqual(schedule.next_interval(1000, 99.9), 4.8, places=1)
+        self.assertEqual(schedule.next_interval(1001, 99.99), 1)
+        schedule = _PollSchedule(min_interval=1, max_interval=60)
+        schedule.next_interval(0, 0)
+        self.assertEqual(schedule.next_interval(100, 1), 60)
+
+
+class TestExportManyResponses(unittest.TestCase):
+    """ export_many_responses function, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token", export_steps=3).start()
+        self.survey_ids = ["SV_%s" % i for i in range(6)]
+        for survey_id in self.survey_ids:
+            for i in range(5):
+                self.server.add_response(survey_id, "R_%s_%s" % (survey_id, i), Q1=str(i))
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def test_export_many_responses(self):
+        statuses = []
+        exports = self.qualtrics.export_many_responses(
+            self.survey_ids + ["SV_X"], directory=self.directory, max_workers=3, min_poll_interval=0.01,
+            progress=lambda export: statuses.append((export.survey_id, export.status)))
+        self.assertEqual(list(exports.keys()), self.survey_ids + ["SV_X"])
+        self.assertEqual(self.qualtrics.last_error_message, "1 of 7 response exports failed")
+        self.assertEqual((exports["SV_X"].status, exports["SV_X"].error_message),
+                         ("failed", "Invalid surveyId parameter."))
+        for survey_id in self.survey_ids:
+            export = exports[survey_id]
+            self.assertTrue(export.ok)
+            self.assertEqual((export.status, export.polls), ("downloaded", 3))
+            self.assertEqual(export.value, os.path.join(self.directory, "%s.zip" % survey_id))
+            with zipfile.ZipFile(export.filename) as archive:
+                self.assertIn("R_%s_4" % survey_id, archive.read(archive.namelist()[0]).decode("utf-8"))
+            self.assertEqual([status for sid, status in statuses if sid == survey_id],
+                             ["queued", "in progress", "in progress", "complete", "downloaded"])
+        # Progress of all exports is checked in the same rounds
+        polls = [call for call in self.server.calls if call.startswith("/API/v3/responseexports/ES_")
+                 and not call.endswith("/file")]
+        self.assertEqual(len(polls), 3 * 6)
+
+    def test_streams(self):
+        exports = self.qualtrics.export_many_responses(self.survey_ids[:2], min_poll_interval=0.01)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        for survey_id, export in exports.items():
+            self.assertIn("R_%s_4," % survey_id, export.stream.read())
+            export.stream.close()
+
+    def test_overlap(self):
+        # Wall-clock time is close to that of a single export
+        self.server.latency = 0.05
+        start = time.time()
+        exports = self.qualtrics.export_many_responses(self.survey_ids, max_workers=6, min_poll_interval=0.05)
+        elapsed = time.time() - start
+        self.assertTrue(all(export.ok for export in exports.values()))
+        self.assertLess(elapsed, 3 * sum(export.total_time for export in exports.values()) / len(exports))
+
+    def test_timeout_and_cancel(self):
+        self.server.export_steps = 1000
+        exports = self.qualtrics.export_many_responses(self.survey_ids[:2], timeout=0.1, min_poll_interval=0.02)
+        self.assertEqual([export.status for export in exports.values()], ["timeout", "timeout"])
+        cancel = threading.Event()
+        timer = threading.Timer(0.1, cancel.set)
+        timer.start()
+        exports = self.qualtrics.export_many_responses(self.survey_ids[:2], cancel=cancel, min_poll_interval=10)
+        timer.join()
+        self.assertEqual([export.status for export in exports.values()], ["cancelled", "cancelled"])
+        self.assertEqual(self.qualtrics.last_error_message, "2 of 2 response exports failed")
+
+
+class TestDateShardedExport(unittest.TestCase):
+    """ export_responses_by_date function, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.start = datetime.datetime(2016, 1, 1)
+        # Window boundaries are at 300, 600 and 900 seconds, with 1 second overlap
+        seconds = sorted(set(list(range(10, 1200, 30)) + [299, 300, 301, 600, 601, 899, 900]))
+        self.response_ids = []
+        for second in seconds:
+            response_id = "R_%04d" % second
+            recorded = (self.start + datetime.timedelta(seconds=second)).strftime("%Y-%m-%d %H:%M:%S")
+            self.server.add_response("SV_1", response_id, EndDate=recorded, Q1=str(second))
+            self.response_ids.append(response_id)
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def export(self, **kwargs):
+        return self.qualtrics.export_responses_by_date("SV_1", "2016-01-01T00:00:00Z", "2016-01-01 00:20:00",
+                                                       min_poll_interval=0.01, **kwargs)
+
+    def test_date_windows(self):
+        export = self.export()
+        self.assertTrue(export.ok, export.error_message)
+        windows = [(shard.parameters["startDate"], shard.parameters["endDate"]) for shard in export.shards]
+        seconds = [[(date - self.start).total_seconds() for date in window] for window in windows]
+        self.assertEqual(seconds, [[0, 301], [299, 601], [599, 901], [899, 1200]])
+        dates = sorted((export_data["data"]["startDate"], export_data["data"]["endDate"])
+                       for export_data in self.server.exports.values())
+        self.assertEqual(dates[0], ("2016-01-01T00:00:00Z", "2016-01-01T00:05:01Z"))
+        self.assertEqual(dates[-1], ("2016-01-01T00:14:59Z", "2016-01-01T00:20:00Z"))
+
+        # Short range is split into fewer windows
+        export = self.qualtrics.export_responses_by_date("SV_1", self.start, self.start + datetime.timedelta(seconds=5),
+                                                         shards=4, min_poll_interval=0.01)
+        self.assertEqual(len(export.shards), 1)
+
+    def test_no_duplicates_or_gaps(self):
+        for bounds in ("[]", "[)", "()"):
+            self.server.export_date_bounds = bounds
+            export = self.export()
+            self.assertTrue(export.ok, export.error_message)
+            self.assertEqual(export.status, "downloaded")
+            self.assertIsNone(self.qualtrics.last_error_message)
+            rows = list(csv.reader(export.stream))
+            export.stream.close()
+            self.assertEqual(rows[0][:2], ["ResponseID", "ResponseSet"])
+            self.assertTrue(rows[2][0].startswith('{"ImportId"'))
+            self.assertEqual([row[0] for row in rows[3:]], self.response_ids, bounds)
+            self.assertGreaterEqual(export.total_time, max(shard.total_time for shard in export.shards) - 0.001)
+
+    def test_filename(self):
+        filename = os.path.join(self.directory, "responses.csv")
+        export = self.export(filename=filename, format=Qualtrics.CSV2013_FORMAT, shards=3)
+        self.assertEqual(export.value, filename)
+        with io.open(filename, encoding="utf-8", newline="") as fp:
+            rows = list(csv.reader(fp))
+        self.assertEqual(len(rows), 2 + len(self.response_ids))
+        self.assertEqual([row[0] for row in rows[2:]], self.response_ids)
+        self.assertFalse(os.path.exists(filename + ".part"))
+
+    def test_errors(self):
+        self.assertRaises(ValueError, self.export, format=Qualtrics.JSON_FORMAT)
+        self.assertRaises(ValueError, self.qualtrics.export_responses_by_date, "SV_1", "2016-01-02", "2016-01-01")
+        self.assertRaises(ValueError, self.qualtrics.export_responses_by_date, "SV_1", "January 1st")
+        export = self.qualtrics.export_responses_by_date("SV_X", "2016-01-01", "2016-01-02", min_poll_interval=0.01)
+        self.assertFalse(export.ok)
+        self.assertEqual(export.status, "failed")
+        self.assertEqual(self.qualtrics.last_error_message,
+                         "4 of 4 response exports failed: Invalid surveyId parameter.")
+
+    def test_create_response_export_dates(self):
+        eastern = datetime.timezone(datetime.timedelta(hours=-5)) if six.PY3 else None
+        if eastern is None:
+            return
+        export_id = self.qualtrics.CreateResponseExport(
+            Qualtrics.CSV_FORMAT, "SV_1", startDate=datetime.datetime(2016, 1, 1, 0, 5, tzinfo=eastern),
+            endDate="2016-01-01T05:10:00Z")
+        data = self.server.exports[export_id]["data"]
+        self.assertEqual((data["startDate"], data["endDate"]), ("2016-01-01T05:05:00Z", "2016-01-01T05:10:00Z"))
+
+
+class TestQuestionShardedExport(unittest.TestCase):
+    """ export_responses_by_questions function, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        for i in range(20):
+            fields = OrderedDict()
+            for q in range(1, 11):
+                fields["Q%s" % q] = str(i * q)
+                if q == 3:
+                    fields["Q3_2"] = "x%s" % i
+            self.server.add_response("SV_1", "R_%s" % i, **fields)
+        self.question_ids = ["QID%s" % q for q in range(1, 11)]
+        self.qualtrics = self.server.configure(Qualtrics("user", "token"))
+
+    def tearDown(self):
+        self.qualtrics.close()
+        self.server.stop()
+
+    def test_export_responses_by_questions(self):
+        expected = list(self.qualtrics.iter_response_export_rows(
+            self.qualtrics.export_responses("SV_1", min_poll_interval=0.01).file_url))
+        self.assertIn("Q3_2", expected[0])
+        self.server.exports.clear()
+        export = self.qualtrics.export_responses_by_questions("SV_1", self.question_ids, shards=3,
+                                                             min_poll_interval=0.01)
+        self.assertTrue(export.ok, export.error_message)
+        self.assertIsNone(self.qualtrics.last_error_message)
+        self.assertEqual([shard.parameters["includedQuestionIds"] for shard in export.shards],
+                         [self.question_ids[:3], self.question_ids[3:6], self.question_ids[6:]])
+        rows = list(csv.reader(export.stream))
+        export.stream.close()
+        self.assertEqual(rows, expected)
+        # All exports contain responses recorded before the same date
+        self.assertEqual(len(set(data["data"]["endDate"] for data in self.server.exports.values())), 1)
+
+    def test_join_missing_rows(self):
+        def export_file(rows):
+            fp = io.StringIO()
+            writer = csv.writer(fp)
+            writer.writerows(rows)
+            fp.seek(0)
+            return fp
+        first = export_file([["ResponseID", "Name", "Q1"], ["ResponseID", "Name", "Question 1"],
+                             ["R_1", "A", "1"], ["R_2", "B", "2"], ["R_3", "C", "3"]])
+        second = export_file([["ResponseID", "Name", "Q2"], ["ResponseID", "Name", "Question 2"],
+                              ["R_1", "A", "10"], ["R_3", "C", "30"], ["R_4", "D", "40"]])
+        fp = io.StringIO()
+        self.assertEqual(Qualtrics._join_export_rows([first, second], fp), 4)
+        self.assertEqual(list(csv.reader(io.StringIO(fp.getvalue()))), [
+            ["ResponseID", "Name", "Q1", "Q2"], ["ResponseID", "Name", "Question 1", "Question 2"],
+            ["R_1", "A", "1", "10"], ["R_3", "C", "3", "30"], ["R_2", "B", "2", ""], ["R_4", "D", "", "40"]])
+
+    def test_errors(self):
+        self.assertRaises(ValueError, self.qualtrics.export_responses_by_questions, "SV_1", [])
+        self.assertRaises(ValueError, self.qualtrics.export_responses_by_questions, "SV_1", "QID1")
+        self.assertRaises(ValueError, self.qualtrics.export_responses_by_questions, "SV_1", self.question_ids,
+                          format=Qualtrics.SPSS_FORMAT)
+        export = self.qualtrics.export_responses_by_questions("SV_X", self.question_ids, min_poll_interval=0.01)
+        self.assertEqual(export.status, "failed")
+        self.assertEqual(self.qualtrics.last_error_message,
+                         "4 of 4 response exports failed: Invalid surveyId parameter.")
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestResponseColumns(unittest.TestCase):
+    """ Decoding of CSV response exports into NumPy arrays
+    """
+    CSV = (
+        'ResponseID,Q1,Q2,StartDate,Q3,Q4\n'
+        'ResponseID,Age,Score,Start Date,Comment,Not answered\n'
+        '"{""ImportId"":""_recordId""}","{""ImportId"":""QID1""}","{""ImportId"":""QID2""}",'
+        '"{""ImportId"":""startDate""}","{""ImportId"":""QID3""}","{""ImportId"":""QID4""}"\n'
+        'R_1,25,1.5,2016-01-01 00:00:00,hello,\n'
+        'R_2,,2,2016-01-02 10:00:00,"multi\r\nline",\n'
+        'R_3,30,,,2017-01-01\n'
+    )
+
+    def test_read_response_columns(self):
+        columns = read_response_columns(io.StringIO(self.CSV, newline=""), block_size=2)
+        self.assertEqual(list(columns.keys()), ["ResponseID", "Q1", "Q2", "StartDate", "Q3", "Q4"])
+        self.assertEqual(columns.size, 3)
+        self.assertEqual(columns["ResponseID"].tolist(), ["R_1", "R_2", "R_3"])
+        self.assertEqual(columns["Q1"].dtype, numpy.int64)
+        self.assertEqual(columns["Q1"].tolist(), [25, None, 30])
+        self.assertEqual(columns["Q2"].dtype, numpy.float64)
+        self.assertEqual(columns["Q2"].tolist(), [1.5, 2.0, None])
+        self.assertEqual(columns["StartDate"].dtype, numpy.dtype("datetime64[s]"))
+        self.assertTrue(numpy.isnat(columns["StartDate"][2]))
+        self.assertEqual(str(columns["StartDate"][1]), "2016-01-02T10:00:00")
+        self.assertEqual(columns["Q3"].tolist(), ["hello", "multi\r\nline", "2017-01-01"])
+        # Short row is padded with missing values
+        self.assertEqual(columns["Q4"].tolist(), ["", "", ""])
+        self.assertEqual(columns.labels["Q1"], "Age")
+        self.assertEqual(columns.import_ids["Q1"], "QID1")
+
+    def test_types(self):
+        columns = read_response_columns(io.StringIO(self.CSV, newline=""), types={"Q1": "float32", "Q2": "str"})
+        self.assertEqual(columns["Q1"].dtype, numpy.float32)
+        self.assertEqual(columns["Q2"].tolist(), ["1.5", "2", ""])
+        self.assertRaises(ValueError, read_response_columns, io.StringIO(self.CSV, newline=""), types={"Q3": "int"})
+
+    def test_long_values(self):
+        text = "ResponseID,Q1\nResponseID,Q1\nR_1,%s\nR_2,short\n" % ("x" * 1000)
+        columns = read_response_columns(io.StringIO(text, newline=""), block_size=1)
+        self.assertEqual(columns["Q1"].dtype, object)
+        self.assertEqual(columns["Q1"].tolist(), ["x" * 1000, "short"])
+        self.assertEqual(columns.import_ids, {})
+
+    def test_response_export_columns(self):
+        with MockQualtricsServer(token="token") as server:
+            for i in range(10):
+                server.add_response("SV_1", "R_%s" % i, Q1=str(i), Q2="" if i % 2 else "%s.5" % i)
+            with server.configure(Qualtrics("user", "token")) as qualtrics:
+                for export_format in (Qualtrics.CSV_FORMAT, Qualtrics.CSV2013_FORMAT):
+                    export_id = qualtrics.CreateResponseExport(export_format, "SV_1")
+                    columns = qualtrics.response_export_columns(export_id)
+                    self.assertIsNone(qualtrics.last_error_message)
+                    self.assertEqual(columns["Q1"].tolist(), list(range(10)))
+                    self.assertEqual(columns["Q2"].count(), 5)
+                    self.assertEqual(columns["EndDate"].dtype, numpy.dtype("datetime64[s]"))
+                self.assertIsNone(qualtrics.response_export_columns(export_id, types={"ResponseID": "int"}))
+                self.assertIn("Can't convert column", qualtrics.last_error_message)
+                export_id = qualtrics.CreateResponseExport(Qualtrics.JSON_FORMAT, "SV_1")
+                self.assertIsNone(qualtrics.response_export_columns(export_id))
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncQualtrics(unittest.TestCase):
+    """ AsyncQualtrics tests, using local HTTP server instead of Qualtrics
+    """
+    def setUp(self):
+        self.server = MockQualtricsServer(token="token").start()
+        self.server.add_survey("SV_1", "Test Survey")
+        for i in range(10):
+            self.server.add_response("SV_1", "R_%s" % i, Q1=str(i))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def run_async(self, coroutine_function):
+        async def run():
+            async with self.server.configure(AsyncQualtrics("user", "token")) as qualtrics:
+                return await coroutine_function(qualtrics)
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+    def test_get_legacy_response_data(self):
+        async def run(qualtrics):
+            return await qualtrics.getLegacyResponseData("SV_1", Limit=3), qualtrics.last_error_message
+        responses, error = self.run_async(run)
+        self.assertIsNone(error)
+        self.assertEqual(list(responses.keys()), ["R_0", "R_1", "R_2"])
+        self.assertEqual(responses["R_1"]["Q1"], "1")
+
+    def test_get_legacy_response_data_export(self):
+        async def run(qualtrics):
+            responses = await qualtrics.getLegacyResponseData("SV_1", Limit=5, export_threshold=5, compact=True)
+            return responses, qualtrics.last_error_message
+        responses, error = self.run_async(run)
+        self.assertIsNone(error)
+        self.assertIn("/API/v3/responseexports", self.server.calls)
+        self.assertNotIn("getLegacyResponseData", self.server.calls)
+        self.assertEqual(list(responses.keys()), ["R_0", "R_1", "R_2", "R_3", "R_4"])
+        self.assertEqual(responses["R_1"]["Q1"], "1")
+
+    def test_get_responses(self):
+        async def run(qualtrics):
+            responses = await qualtrics.getResponses("SV_1", ["R_5", "R_X", "R_2"])
+            error = qualtrics.last_error_message
+            exported = await qualtrics.getResponses("SV_1", ["R_9", "R_X", "R_0"], export_threshold=5, compact=True)
+            return responses, error, exported, qualtrics.last_error_message
+        responses, error, exported, export_error = self.run_async(run)
+        self.assertIsNone(error)
+        self.assertIsNone(export_error)
+        self.assertEqual(self.server.calls.count("getLegacyResponseData"), 1)
+        self.assertEqual(list(responses.keys()), ["R_5", "R_X", "R_2"])
+        self.assertIsNone(responses["R_X"])
+        self.assertEqual(responses["R_5"]["Q1"], "5")
+        self.assertEqual(list(exported.keys()), ["R_9", "R_X", "R_0"])
+        self.assertIsNone(exported["R_X"])
+        self.assertEqual(exported["R_9"]["Q1"], "9")
+
+    def test_label_responses(self):
+        self.server.add_question("SV_1", "QID1", "Q1", choices=["A", "B", "C"])
+
+        async def run(qualtrics):
+            responses = await qualtrics.getLegacyResponseData("SV_1", Limit=3)
+            labeled = await qualtrics.label_responses("SV_1", responses)
+            await qualtrics.get_survey_labels("SV_1")
+            return labeled, qualtrics.last_error_message
+        labeled, error = self.run_async(run)
+        self.assertIsNone(error)
+        self.assertEqual([response["Q1"] for response in labeled.values()], ["0", "A", "B"])
+        self.assertEqual(self.server.calls.count("getSurvey"), 1)
+
+    def test_import_responses(self):
+        responses = [{"QID1": str(i)} for i in range(9)]
+
+        async def run(qualtrics):
+            self.server.fail_imports = 1
+            result = await qualtrics.import_responses("SV_1", responses, chunk_size=2, max_workers=1)
+            error = qualtrics.last_error_message
+            ok = await qualtrics.importResponsesAsDict("SV_1", responses, chunk_size=2, completed=result.completed)
+            return result, error, ok, qualtrics.last_error_message
+        result, error, ok, last_error = self.run_async(run)
+        self.assertEqual([chunk.status for chunk in result.chunks], ["failed"] + ["imported"] * 4)
+        self.assertEqual(error, "1 of 5 chunks have not been imported. Chunk 0: Internal server error")
+        self.assertTrue(ok)
+        self.assertIsNone(last_error)
+        self.assertEqual(sorted(int(response["QID1"]) for response in self.server.surveys["SV_1"].values()
+                                if "QID1" in response), list(range(9)))
+
+    def test_import_panel(self):
+        members = [{"Email": "member%s@example.com" % i} for i in range(7)]
+
+        async def run(qualtrics):
+            result = await qualtrics.import_panel("UR_1", "Roster", members, headers=["Email"], chunk_size=2)
+            panel_id = await qualtrics.importPanel("UR_1", "Roster", iter(["Email\n", "a@example.com\n"]),
+                                                   ColumnHeaders="1")
+            return result, panel_id, qualtrics.last_error_message
+        result, panel_id, error = self.run_async(run)
+        self.assertIsNone(error)
+        self.assertEqual([chunk.count for chunk in result.chunks], [2, 2, 2, 1])
+        self.assertEqual(sorted(member["Email"] for member in self.server.panels[result.panel_id]),
+                         sorted(member["Email"] for member in members))
+        self.assertEqual([member["Email"] for member in self.server.panels[panel_id]], ["a@example.com"])
+
+    def test_import_contacts(self):
+        self.server.import_steps = 2
+
+        async def run(qualtrics):
+            result = await qualtrics.import_contacts("UR_1", "Contacts", ["Email\n"] + [
+                "contact%s@example.com\n" % i for i in range(7)], chunk_size=3, min_poll_interval=0.01)
+            return result, qualtrics.last_error_message
+        result, error = self.run_async(run)
+        self.assertIsNone(error)
+        self.assertEqual([chunk.count for chunk in result.chunks], [3, 3, 1])
+        self.assertEqual((result.created, result.updated, result.failed_contacts), (7, 0, 0))
+        self.assertEqual(len(self.server.panels[result.list_id]), 7)
+        self.assertEqual(self.server.calls.count("checkImportContactsStatus"), 6)
+
+    def test_generate_unique_survey_links(self):
+        people = [{"Email": "person%s@example.com" % i} for i in range(5)]
+
+        async def run(qualtrics):
+            links = [item async for item in qualtrics.generate_unique_survey_links(
+                "SV_1", "UR_1", None, "EMD_1", people, headers=["Email"], chunk_size=2, page_size=2)]
+            return links, qualtrics.last_error_message
+        links, error = self.run_async(run)
+        self.assertIsNone(error)
+        self.assertEqual(sorted(person["Email"] for person, link in links), [person["Email"] for person in people])
+        self.assertEqual(len(set(link for person, link in links)), 5)
+
+    def test_truncate_contact_list(self):
+        list_id = self.server.configure(Qualtrics("user", "token")).importContacts(
+            "UR_1", "Contacts", "Email\n" + "".join("contact%s@example.com\n" % i for i in range(10)))
+        self.server.fail_removals = 1
+
+        async def run(qualtrics):
+            truncated = await qualtrics.truncate_contact_list("UR_1", list_id, max_workers=3, page_size=4,
+                                                              retry_delay=0.01)
+            result = await qualtrics.remove_contacts("UR_1", list_id, ["MLRP_X"])
+            return truncated, result, qualtrics.last_error_message
+        truncated, result, error = self.run_async(run)
+        self.assertEqual(truncated, (True, []))
+        self.assertEqual(self.server.panels[list_id], [])
+        self.assertEqual(self.server.calls.count("removeContact"), 12)
+        self.assertEqual(error, "1 of 1 contacts have not been removed. MLRP_X: "
+                                "Invalid request. Missing or invalid parameter RecipientID.")
+
+    def test_concurrent_get_response(self):
+        async def run(qualtrics):
+            return await asyncio.gather(*[qualtrics.getResponse("SV_1", "R_%s" % i) for i in range(10)])
+        responses = self.run_async(run)
+        self.assertEqual([response["Q1"] for response in responses], [str(i) for i in range(10)])
+
+    def test_same_results_as_sync(self):
+        qualtrics = self.server.configure(Qualtrics("user", "token"))
+        expected = qualtrics.getLegacyResponseData("SV_1")
+
+        async def run(qualtrics):
+            return await qualtrics.getLegacyResponseData("SV_1")
+        self.assertEqual(self.run_async(run), expected)
+
+    def test_errors(self):
+        async def run(qualtrics):
+            response = await qualtrics.getResponse("SV_1", "R_999")
+            return response, qualtrics.last_error_message
+        response, error = self.run_async(run)
+        self.assertIsNone(response)
+        self.assertEqual(error, "Qualtrics error: ResponseID R_999 not in response (probably deleted)")
+
+        async def run(qualtrics):
+            panel_id = await qualtrics.createPanel(LibraryID="", Name="Hello")
+            return panel_id, qualtrics.last_error_message
+        self.server.token = "other token"
+        panel_id, error = self.run_async(run)
+        self.assertIsNone(panel_id)
+        self.assertEqual(error, "Incorrect Username or Password")
+
+    def test_connection_error(self):
+        async def run(qualtrics):
+            qualtrics.url = "http://127.0.0.1:1/"
+            return await qualtrics.getLegacyResponseData("SV_1"), qualtrics.last_error_message
+        responses, error = self.run_async(run)
+        self.assertIsNone(responses)
+        self.assertIn("127.0.0.1:1", error)
+
+    def test_panel(self):
+        async def run(qualtrics):
+            panel_id = await qualtrics.createPanel("UR_1", "Panel")
+            await asyncio.gather(*[
+                qualtrics.addRecipient("UR_1", panel_id, "First", "Last", "%s@example.com" % i, None, "EN",
+                                       {"SubjectID": str(i)})
+                for i in range(5)
+            ])
+            return await qualtrics.getPanelMemberCount("UR_1", panel_id)
+        self.assertEqual(self.run_async(run), 5)
+
+    def test_response_export(self):
+        async def run(qualtrics):
+            export_id = await qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+            status, url = await qualtrics.GetResponseExportProgress(export_id)
+            fp = await qualtrics.GetResponseExportFile(url)
+            return status, fp.read()
+        status, content = self.run_async(run)
+        self.assertEqual(status, "complete")
+        self.assertIn("R_9,", content)
+
+    def test_compact_responses(self):
+        async def run(qualtrics):
+            responses = await qualtrics.getLegacyResponseData("SV_1", compact=True)
+            streamed = [item async for item in qualtrics.iter_legacy_response_data("SV_1", compact=True)]
+            paged = [item async for item in qualtrics.iter_legacy_responses("SV_1", page_size=4, compact=True)]
+            return responses, streamed, paged
+        responses, streamed, paged = self.run_async(run)
+        self.assertEqual(list(responses.keys()), ["R_%s" % i for i in range(10)])
+        self.assertIsInstance(responses["R_1"], ResponseRecord)
+        self.assertEqual(responses["R_1"]["Q1"], "1")
+        self.assertEqual(streamed, list(responses.items()))
+        self.assertEqual(paged, list(responses.items()))
+        self.assertTrue(all(isinstance(response, ResponseRecord) for response_id, response in paged))
+
+    def test_export_responses_by_date(self):
+        async def run(qualtrics):
+            # All responses are recorded at 00:01:00, boundary of the second and the third window
+            export = await qualtrics.export_responses_by_date("SV_1", "2016-01-01", "2016-01-01 00:02:00",
+                                                              min_poll_interval=0.01)
+            return export, qualtrics.last_error_message
+        export, error = self.run_async(run)
+        self.assertIsNone(error)
+        self.assertEqual(export.status, "downloaded")
+        self.assertEqual(len(export.shards), 4)
+        rows = list(csv.reader(export.stream))
+        export.stream.close()
+        self.assertEqual([row[0] for row in rows[3:]], ["R_%s" % i for i in range(10)])
+
+    def test_export_responses_by_questions(self):
+        self.server.add_response("SV_1", "R_10", Q1="10", Q2="20")
+
+        async def run(qualtrics):
+            export = await qualtrics.export_responses_by_questions("SV_1", ["QID1", "QID2"], shards=2,
+                                                                   min_poll_interval=0.01)
+            return export, qualtrics.last_error_message
+        export, error = self.run_async(run)
+        self.assertIsNone(error)
+        rows = list(csv.reader(export.stream))
+        export.stream.close()
+        self.assertEqual(rows[0][-2:], ["Q1", "Q2"])
+        self.assertEqual(rows[-1][0], "R_10")
+        self.assertEqual(rows[-1][-2:], ["10", "20"])
+
+    def test_json_codec(self):
+        codec = CountingJsonCodec()
+
+        async def run(qualtrics):
+            qualtrics.json_codec = codec
+            export_id = await qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+            status, url = await qualtrics.GetResponseExportProgress(export_id)
+            responses = await qualtrics.getLegacyResponseData("SV_1", Limit=3)
+            return status, list(responses.keys()), qualtrics.last_error_message
+        self.assertEqual(self.run_async(run), ("complete", ["R_0", "R_1", "R_2"], None))
+        self.assertEqual(codec.loads_calls, 3)
+
+    def test_download_response_export_resume(self):
+        filename = tempfile.mktemp(suffix=".zip")
+        self.server.truncate_downloads = 200
+
+        async def run(qualtrics):
+            export_id = await qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+            first = await qualtrics.DownloadResponseExportFile(export_id, filename, chunk_size=100, resume=True)
+            part_size = os.path.getsize(filename + ".part")
+            second = await qualtrics.DownloadResponseExportFile(export_id, filename, resume=True)
+            return first, part_size, second, qualtrics.last_status_code
+        try:
+            self.assertEqual(self.run_async(run), (None, 200, True, 206))
+            with zipfile.ZipFile(filename) as archive:
+                self.assertIn("R_9,", archive.read(archive.namelist()[0]).decode("utf-8"))
+        finally:
+            for name in (filename, filename + ".part"):
+                if os.path.exists(name):
+                    os.remove(name)
+
+    def test_iter_response_export_rows(self):
+        self.server.add_response("SV_1", "R_X", Q1='Line 1\r\n"Line 2",')
+
+        async def run(qualtrics):
+            export_id = await qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+            rows = [row async for row in qualtrics.iter_response_export_rows(export_id, chunk_size=7, queue_size=2)]
+            return rows, qualtrics.last_error_message, export_id
+        rows, error, export_id = self.run_async(run)
+        self.assertIsNone(error)
+        with self.server.configure(Qualtrics("user", "token")) as qualtrics:
+            self.assertEqual(rows, list(qualtrics.iter_response_export_rows(export_id)))
+        self.assertEqual(rows[-1][-1], 'Line 1\r\n"Line 2",')
+
+    def test_GetResponseExportStream(self):
+        async def run(qualtrics):
+            export_id = await qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+            async with await qualtrics.GetResponseExportStream(export_id, chunk_size=10, queue_size=2) as stream:
+                pieces = [text async for text in stream]
+                name = stream.name
+                self.assertEqual(await stream.read(), "")
+            error = qualtrics.last_error_message
+            missing = await qualtrics.GetResponseExportStream("ES_1")
+            missing_error = qualtrics.last_error_message
+
+            self.server.truncate_downloads = 200
+            stream = await qualtrics.GetResponseExportStream(export_id, chunk_size=50)
+            with self.assertRaises((IOError, zipfile.BadZipfile)):
+                while await stream.read():
+                    pass
+            stream.close()
+            return export_id, pieces, name, error, missing, missing_error
+        export_id, pieces, name, error, missing, missing_error = self.run_async(run)
+        self.assertIsNone(error)
+        self.assertGreater(len(pieces), 1)
+        self.assertTrue(name.endswith(".csv"))
+        with self.server.configure(Qualtrics("user", "token")) as qualtrics:
+            with qualtrics.GetResponseExportStream(export_id) as fp:
+                self.assertEqual("".join(pieces), fp.read())
+        self.assertIsNone(missing)
+        self.assertEqual(missing_error, "Export id not found")
+
+    def test_iter_response_export_rows_errors(self):
+        async def run(qualtrics):
+            export_id = await qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_1")
+            self.server.truncate_downloads = 200
+            truncated = [row async for row in qualtrics.iter_response_export_rows(export_id, chunk_size=50)]
+            truncated_error = qualtrics.last_error_message
+            missing = [row async for row in qualtrics.iter_response_export_rows("ES_1")]
+            # Generator closed before the end of download
+            async for row in qualtrics.iter_response_export_rows(export_id, chunk_size=10, queue_size=1):
+                break
+            return len(truncated), truncated_error, missing, qualtrics.last_error_message
+        count, truncated_error, missing, error = self.run_async(run)
+        self.assertLess(count, 13)
+        self.assertIsNotNone(truncated_error)
+        self.assertEqual(missing, [])
+        self.assertEqual(error, "Export id not found")
+
+    def test_export_responses(self):
+        self.server.export_steps = 3
+
+        async def run(qualtrics):
+            export = await qualtrics.export_responses("SV_1", min_poll_interval=0.01)
+            cancel = asyncio.Event()
+            asyncio.get_event_loop().call_later(0.05, cancel.set)
+            cancelled = await qualtrics.export_responses("SV_1", cancel=cancel, min_poll_interval=10)
+            return export, export.stream.read(), cancelled
+        export, content, cancelled = self.run_async(run)
+        self.assertEqual((export.status, export.polls), ("downloaded", 3))
+        self.assertIn("R_9,", content)
+        self.assertEqual((cancelled.status, cancelled.polls), ("cancelled", 1))
+
+    def test_export_many_responses(self):
+        self.server.export_steps = 2
+        self.server.add_response("SV_2", "R_2_1", Q1="1")
+
+        async def run(qualtrics):
+            statuses = []
+            exports = await qualtrics.export_many_responses(
+                ["SV_1", "SV_2", "SV_X"], max_workers=2, min_poll_interval=0.01,
+                progress=lambda export: statuses.append(export.status))
+            return exports, statuses, qualtrics.last_error_message
+        exports, statuses, error = self.run_async(run)
+        self.assertEqual(error, "1 of 3 response exports failed")
+        self.assertEqual([export.status for export in exports.values()], ["downloaded", "downloaded", "failed"])
+        self.assertIn("R_2_1,", exports["SV_2"].stream.read())
+        self.assertEqual(statuses.count("downloaded"), 2)
+
+    def test_iter_legacy_response_data(self):
+        async def run(qualtrics):
+            responses = [item async for item in qualtrics.iter_legacy_response_data("SV_1", chunk_size=5)]
+            error = qualtrics.last_error_message
+            failed = [item async for item in qualtrics.iter_legacy_response_data("SV_2")]
+            return responses, error, failed, qualtrics.last_error_message
+        responses, error, failed, failed_error = self.run_async(run)
+        self.assertIsNone(error)
+        self.assertEqual([response_id for response_id, response in responses], ["R_%s" % i for i in range(10)])
+        self.assertEqual(responses[3][1]["Q1"], "3")
+        self.assertEqual(failed, [])
+        self.assertEqual(failed_error, "Invalid request. Missing or invalid parameter SurveyID.")
+
+    def test_iter_legacy_responses(self):
+        async def run(qualtrics):
+            return [item async for item in qualtrics.iter_legacy_responses("SV_1", page_size=3, prefetch=True)]
+        responses = self.run_async(run)
+        self.assertEqual([response_id for response_id, response in responses], ["R_%s" % i for i in range(10)])
+
+    def test_response_export_errors(self):
+        async def run(qualtrics):
+            export_id = await qualtrics.CreateResponseExport(Qualtrics.CSV_FORMAT, "SV_2")
+            progress = await qualtrics.GetResponseExportProgress("ES_1")
+            return export_id, progress
+        export_id, progress = self.run_async(run)
+        self.assertIsNone(export_id)
+        self.assertEqual(progress, ("servfail", "Export id not found"))
+
+
 if __name__ == "__main__":
     unittest.main()